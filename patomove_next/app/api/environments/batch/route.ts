@@ -0,0 +1,37 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { createManyWithIds, readBatch, RecordFields, validateRecords } from '@/app/lib/batchCreate'
+
+const ENVIRONMENT_FIELDS: RecordFields = {
+  siteName: { type: 'string', required: true },
+  facilityType: { type: 'string' },
+  externalCode: { type: 'string' },
+  orgId: { type: 'string', required: true }
+}
+
+// POST an array of environments (same fields as POST /api/environments); returns { ids } in request order
+export async function POST(request: NextRequest) {
+  const records = await readBatch(request)
+  if (records instanceof NextResponse) return records
+  const invalid = validateRecords(records, ENVIRONMENT_FIELDS)
+  if (invalid) return invalid
+
+  try {
+    const rows = records.map(record => ({
+      siteName: record.siteName,
+      facilityType: record.facilityType,
+      externalCode: record.externalCode,
+      orgId: record.orgId
+    }))
+
+    const ids = await createManyWithIds(rows, data => prisma.environment.createMany({ data }))
+
+    return NextResponse.json({ ids, count: ids.length }, { status: 201 })
+  } catch (error) {
+    console.error('Error batch creating environments:', error)
+    return NextResponse.json(
+      { error: 'Failed to create environments', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    )
+  }
+}
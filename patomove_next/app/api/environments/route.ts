@@ -25,12 +25,13 @@ export async function GET() {
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json()
-    const { siteName, facilityType, orgId } = body
+    const { siteName, facilityType, externalCode, orgId } = body
 
     const environment = await prisma.environment.create({
       data: {
         siteName,
         facilityType,
+        externalCode,
         orgId
       }
     })
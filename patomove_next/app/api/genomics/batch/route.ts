@@ -0,0 +1,60 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { createManyWithIds, readBatch, RecordFields, validateRecords } from '@/app/lib/batchCreate'
+
+const GENOME_FIELDS: RecordFields = {
+  filename: { type: 'string', required: true },
+  originalFilename: { type: 'string', required: true },
+  storagePath: { type: 'string', required: true },
+  fileSize: { type: 'int', required: true },
+  fileHash: { type: 'string', required: true },
+  uploadedBy: { type: 'string', required: true },
+  validationStatus: { type: 'string' },
+  processingStatus: { type: 'string' },
+  validationErrors: { type: 'string' },
+  contigCount: { type: 'int' },
+  totalLength: { type: 'int' },
+  n50: { type: 'int' },
+  gcContent: { type: 'float' },
+  qualityMetrics: { type: 'string' }
+}
+
+// POST an array of genome file records (same fields as POST /api/genomics, plus optional upload QC
+// metrics); returns { ids } in request order
+export async function POST(request: NextRequest) {
+  const records = await readBatch(request)
+  if (records instanceof NextResponse) return records
+  const invalid = validateRecords(records, GENOME_FIELDS)
+  if (invalid) return invalid
+
+  try {
+    const rows = records.map(record => ({
+      filename: record.filename,
+      originalFilename: record.originalFilename,
+      storagePath: record.storagePath,
+      fileSize: record.fileSize,
+      fileHash: record.fileHash,
+      uploadedBy: record.uploadedBy,
+      validationStatus: record.validationStatus ?? 'pending',
+      processingStatus: record.processingStatus ?? 'uploaded',
+      validationErrors: record.validationErrors,
+      contigCount: record.contigCount,
+      totalLength: record.totalLength,
+      n50: record.n50,
+      gcContent: record.gcContent,
+      qualityMetrics: record.qualityMetrics,
+      createdBy: record.uploadedBy,
+      updatedBy: record.uploadedBy
+    }))
+
+    const ids = await createManyWithIds(rows, data => prisma.genomicData.createMany({ data }))
+
+    return NextResponse.json({ ids, count: ids.length }, { status: 201 })
+  } catch (error) {
+    console.error('Failed to batch create genomic data:', error)
+    return NextResponse.json(
+      { error: 'Failed to create genomic data', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    )
+  }
+}
@@ -0,0 +1,47 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { CREATE_MANY_CHUNK_SIZE, MAX_BATCH_SIZE } from '@/app/lib/batchCreate'
+
+// POST { hashes: [...] } -> { known: { [fileHash]: genomeId } } for the hashes already stored,
+// so bulk importers can skip known files before uploading them
+export async function POST(request: NextRequest) {
+  let hashes: unknown
+  try {
+    hashes = (await request.json())?.hashes
+  } catch {
+    return NextResponse.json({ error: 'Request body must be JSON' }, { status: 400 })
+  }
+
+  if (!Array.isArray(hashes) || hashes.some(hash => typeof hash !== 'string')) {
+    return NextResponse.json({ error: 'Request body must be { hashes: [...] } with string hashes' }, { status: 400 })
+  }
+  if (hashes.length > MAX_BATCH_SIZE) {
+    return NextResponse.json(
+      { error: `Too many hashes: ${hashes.length} (max ${MAX_BATCH_SIZE})` },
+      { status: 413 }
+    )
+  }
+
+  try {
+    const unique = [...new Set(hashes as string[])]
+    const known: Record<string, string> = {}
+    // One indexed IN query per chunk (fileHash is unique), within SQLite's bound-parameter limit
+    for (let start = 0; start < unique.length; start += CREATE_MANY_CHUNK_SIZE) {
+      const genomes = await prisma.genomicData.findMany({
+        where: { fileHash: { in: unique.slice(start, start + CREATE_MANY_CHUNK_SIZE) } },
+        select: { id: true, fileHash: true }
+      })
+      for (const genome of genomes) {
+        known[genome.fileHash] = genome.id
+      }
+    }
+
+    return NextResponse.json({ known, checked: unique.length })
+  } catch (error) {
+    console.error('Failed to look up genome hashes:', error)
+    return NextResponse.json(
+      { error: 'Failed to look up genome hashes' },
+      { status: 500 }
+    )
+  }
+}
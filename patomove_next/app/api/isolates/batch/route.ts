@@ -0,0 +1,59 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { createManyWithIds, readBatch, RecordFields, validateRecords } from '@/app/lib/batchCreate'
+
+const ISOLATE_FIELDS: RecordFields = {
+  label: { type: 'string', required: true },
+  sampleType: { type: 'string', required: true },
+  collectionSource: { type: 'string', required: true },
+  collectionSite: { type: 'string', required: true },
+  collectionDate: { type: 'date', required: true },
+  orgId: { type: 'string', required: true },
+  patientId: { type: 'string' },
+  environmentId: { type: 'string' },
+  phenotypeId: { type: 'string' },
+  priority: { type: 'string' },
+  processingStatus: { type: 'string' },
+  notes: { type: 'string' },
+  genomeId: { type: 'string' },
+  createdBy: { type: 'string' },
+  updatedBy: { type: 'string' }
+}
+
+// POST an array of isolates (same fields as POST /api/isolates); returns { ids } in request order
+export async function POST(request: NextRequest) {
+  const records = await readBatch(request)
+  if (records instanceof NextResponse) return records
+  const invalid = validateRecords(records, ISOLATE_FIELDS)
+  if (invalid) return invalid
+
+  try {
+    const rows = records.map(record => ({
+      label: record.label,
+      sampleType: record.sampleType,
+      collectionSource: record.collectionSource,
+      collectionSite: record.collectionSite,
+      collectionDate: new Date(record.collectionDate),
+      orgId: record.orgId,
+      patientId: record.patientId,
+      environmentId: record.environmentId,
+      phenotypeId: record.phenotypeId,
+      priority: record.priority,
+      processingStatus: record.processingStatus,
+      notes: record.notes,
+      genomeId: record.genomeId,
+      createdBy: record.createdBy,
+      updatedBy: record.updatedBy
+    }))
+
+    const ids = await createManyWithIds(rows, data => prisma.isolate.createMany({ data }))
+
+    return NextResponse.json({ ids, count: ids.length }, { status: 201 })
+  } catch (error) {
+    console.error('Error batch creating isolates:', error)
+    return NextResponse.json(
+      { error: 'Failed to create isolates', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    )
+  }
+}
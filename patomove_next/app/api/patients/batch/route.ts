@@ -0,0 +1,39 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { createManyWithIds, readBatch, RecordFields, validateRecords } from '@/app/lib/batchCreate'
+
+const PATIENT_FIELDS: RecordFields = {
+  dateOfBirth: { type: 'date' },
+  sex: { type: 'string' },
+  clinicalNotes: { type: 'string' },
+  externalCode: { type: 'string' },
+  orgId: { type: 'string', required: true }
+}
+
+// POST an array of patients (same fields as POST /api/patients); returns { ids } in request order
+export async function POST(request: NextRequest) {
+  const records = await readBatch(request)
+  if (records instanceof NextResponse) return records
+  const invalid = validateRecords(records, PATIENT_FIELDS)
+  if (invalid) return invalid
+
+  try {
+    const rows = records.map(record => ({
+      dateOfBirth: record.dateOfBirth ? new Date(record.dateOfBirth) : null,
+      sex: record.sex,
+      clinicalNotes: record.clinicalNotes,
+      externalCode: record.externalCode,
+      orgId: record.orgId
+    }))
+
+    const ids = await createManyWithIds(rows, data => prisma.patient.createMany({ data }))
+
+    return NextResponse.json({ ids, count: ids.length }, { status: 201 })
+  } catch (error) {
+    console.error('Error batch creating patients:', error)
+    return NextResponse.json(
+      { error: 'Failed to create patients', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    )
+  }
+}
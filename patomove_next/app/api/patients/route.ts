@@ -36,13 +36,14 @@ export async function GET(request: NextRequest) {
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json()
-    const { dateOfBirth, sex, clinicalNotes, orgId } = body
+    const { dateOfBirth, sex, clinicalNotes, externalCode, orgId } = body
 
     const patient = await prisma.patient.create({
       data: {
         dateOfBirth: dateOfBirth ? new Date(dateOfBirth) : null,
         sex,
         clinicalNotes,
+        externalCode,
         orgId
       },
       include: {
@@ -0,0 +1,39 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { prisma } from '@/app/lib/prisma'
+import { createManyWithIds, readBatch, RecordFields, validateRecords } from '@/app/lib/batchCreate'
+
+const PHENOTYPE_FIELDS: RecordFields = {
+  species: { type: 'string' },
+  method: { type: 'string' },
+  testDate: { type: 'date' },
+  confidence: { type: 'float' },
+  micData: { type: 'string' }
+}
+
+// POST an array of phenotype profiles (same fields as POST /api/phenotypes); returns { ids } in request order
+export async function POST(request: NextRequest) {
+  const records = await readBatch(request)
+  if (records instanceof NextResponse) return records
+  const invalid = validateRecords(records, PHENOTYPE_FIELDS)
+  if (invalid) return invalid
+
+  try {
+    const rows = records.map(record => ({
+      species: record.species,
+      method: record.method,
+      testDate: record.testDate ? new Date(record.testDate) : null,
+      confidence: record.confidence,
+      micData: record.micData
+    }))
+
+    const ids = await createManyWithIds(rows, data => prisma.phenotypeProfile.createMany({ data }))
+
+    return NextResponse.json({ ids, count: ids.length }, { status: 201 })
+  } catch (error) {
+    console.error('Error batch creating phenotype profiles:', error)
+    return NextResponse.json(
+      { error: 'Failed to create phenotype profiles', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    )
+  }
+}
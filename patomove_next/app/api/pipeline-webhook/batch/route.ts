@@ -0,0 +1,23 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { readBatch } from '@/app/lib/batchCreate';
+import { applyWebhookPayload, WebhookPayload } from '@/app/lib/pipelineWebhook';
+
+// POST an array of webhook payloads (same shape as POST /api/pipeline-webhook).
+// Payloads are applied in order and independently: the response carries one
+// { status, body } per payload so the sender can retry only the ones that failed.
+export async function POST(request: NextRequest) {
+  const payloads = await readBatch(request);
+  if (payloads instanceof NextResponse) return payloads;
+
+  const results = [];
+  for (const payload of payloads as WebhookPayload[]) {
+    try {
+      results.push(await applyWebhookPayload(payload));
+    } catch (error) {
+      console.error('Pipeline webhook error:', payload?.job_id, error);
+      results.push({ status: 500, body: { error: 'Failed to process webhook', job_id: payload?.job_id } });
+    }
+  }
+
+  return NextResponse.json({ results, count: results.length });
+}
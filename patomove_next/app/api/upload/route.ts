@@ -1,6 +1,9 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { writeFile, mkdir } from 'fs/promises';
-import { existsSync } from 'fs';
+import { mkdir } from 'fs/promises';
+import { createWriteStream, existsSync } from 'fs';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+import type { ReadableStream as NodeReadableStream } from 'stream/web';
 import path from 'path';
 
 export async function POST(request: NextRequest) {
@@ -27,11 +30,9 @@ export async function POST(request: NextRequest) {
     const fileName = `${genomeId}_${file.name}`;
     const filePath = path.join(storageDir, fileName);
     
-    // Convert file to buffer and save
-    const bytes = await file.arrayBuffer();
-    const buffer = Buffer.from(bytes);
-    
-    await writeFile(filePath, buffer);
+    // Stream the file to disk rather than copying it into one more Buffer first
+    // (bulk importers should use /api/upload/stream, which never holds the whole file)
+    await pipeline(Readable.fromWeb(file.stream() as NodeReadableStream), createWriteStream(filePath));
     
     // Return the storage path relative to the project root
     const relativePath = path.join('storage', 'genomes', fileName);
@@ -45,7 +46,7 @@ export async function POST(request: NextRequest) {
       fileName,
       storagePath: relativePath,
       absolutePath,
-      fileSize: buffer.length
+      fileSize: file.size
     });
 
   } catch (error) {
@@ -0,0 +1,73 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { createHash, randomUUID } from 'crypto'
+import { createWriteStream } from 'fs'
+import { mkdir, rename, unlink } from 'fs/promises'
+import { Readable, Transform } from 'stream'
+import { pipeline } from 'stream/promises'
+import type { ReadableStream as NodeReadableStream } from 'stream/web'
+import path from 'path'
+
+// PUT the raw file bytes (not multipart) to /api/upload/stream?filename=...&sha256=...
+// The body is hashed and written to storage/genomes as it arrives, so server memory does not
+// grow with file size, and a body whose SHA-256 differs from the claimed one is rejected
+export async function PUT(request: NextRequest) {
+  const filename = request.nextUrl.searchParams.get('filename')
+  const expectedHash = request.nextUrl.searchParams.get('sha256')?.toLowerCase()
+
+  if (!filename || path.basename(filename) !== filename || filename.startsWith('.')) {
+    return NextResponse.json({ error: 'A plain filename is required' }, { status: 400 })
+  }
+  if (!expectedHash || !/^[0-9a-f]{64}$/.test(expectedHash)) {
+    return NextResponse.json({ error: 'sha256 must be the hex SHA-256 of the file' }, { status: 400 })
+  }
+  if (!request.body) {
+    return NextResponse.json({ error: 'No file content' }, { status: 400 })
+  }
+
+  const storageDir = path.join(process.cwd(), 'storage', 'genomes')
+  // Named by content, so a retried upload of the same bytes replaces its own earlier copy
+  const fileName = `${expectedHash.slice(0, 16)}_${filename}`
+  const filePath = path.join(storageDir, fileName)
+  const tempPath = path.join(storageDir, `.${randomUUID()}.part`)
+
+  try {
+    await mkdir(storageDir, { recursive: true })
+
+    const digest = createHash('sha256')
+    let fileSize = 0
+    const hasher = new Transform({
+      transform(chunk, _encoding, callback) {
+        digest.update(chunk)
+        fileSize += chunk.length
+        callback(null, chunk)
+      }
+    })
+    await pipeline(Readable.fromWeb(request.body as NodeReadableStream), hasher, createWriteStream(tempPath))
+
+    const fileHash = digest.digest('hex')
+    if (fileHash !== expectedHash) {
+      await unlink(tempPath)
+      return NextResponse.json(
+        { error: 'Uploaded content does not match sha256', expected: expectedHash, received: fileHash },
+        { status: 422 }
+      )
+    }
+    await rename(tempPath, filePath)
+
+    return NextResponse.json({
+      success: true,
+      fileName,
+      storagePath: path.join('storage', 'genomes', fileName),
+      absolutePath: filePath,
+      fileSize,
+      fileHash
+    }, { status: 201 })
+  } catch (error) {
+    await unlink(tempPath).catch(() => {})
+    console.error('Streaming upload error:', error)
+    return NextResponse.json(
+      { error: 'Failed to upload file' },
+      { status: 500 }
+    )
+  }
+}
@@ -0,0 +1,121 @@
+import { randomUUID } from 'crypto'
+import { NextRequest, NextResponse } from 'next/server'
+import { Prisma } from '@prisma/client'
+import { prisma } from '@/app/lib/prisma'
+
+// Largest array accepted by a single batch request
+export const MAX_BATCH_SIZE = 10000
+
+// Rows per createMany statement; keeps bound parameters well under SQLite's limit
+// even for wide models like GenomicData
+export const CREATE_MANY_CHUNK_SIZE = 500
+
+type BatchRecord = { [key: string]: any }
+
+/**
+ * Read a batch request body: either a JSON array of records or { records: [...] }.
+ * Returns a 400 response when the body is not a non-empty array within MAX_BATCH_SIZE.
+ */
+export async function readBatch(request: NextRequest): Promise<BatchRecord[] | NextResponse> {
+  let body: any
+  try {
+    body = await request.json()
+  } catch {
+    return NextResponse.json({ error: 'Request body must be JSON' }, { status: 400 })
+  }
+
+  const records = Array.isArray(body) ? body : body?.records
+  if (!Array.isArray(records) || records.length === 0) {
+    return NextResponse.json(
+      { error: 'Request body must be a non-empty array of records (or { records: [...] })' },
+      { status: 400 }
+    )
+  }
+  if (records.length > MAX_BATCH_SIZE) {
+    return NextResponse.json(
+      { error: `Batch too large: ${records.length} records (max ${MAX_BATCH_SIZE})` },
+      { status: 413 }
+    )
+  }
+  return records
+}
+
+// Prisma Int columns are 32-bit
+const INT_MIN = -2147483648
+const INT_MAX = 2147483647
+
+export type FieldType = 'string' | 'int' | 'float' | 'date'
+export type RecordFields = { [field: string]: { type: FieldType; required?: boolean } }
+export type RecordError = { index: number; problem: string }
+
+function fieldError(value: any, type: FieldType): string | null {
+  if (type === 'string') return typeof value === 'string' ? null : 'must be a string'
+  if (type === 'date') {
+    return typeof value === 'string' && !Number.isNaN(Date.parse(value)) ? null : 'must be a date string'
+  }
+  if (typeof value !== 'number' || !Number.isFinite(value)) return 'must be a number'
+  if (type === 'int' && !(Number.isInteger(value) && value >= INT_MIN && value <= INT_MAX)) {
+    return 'must be a 32-bit integer'
+  }
+  return null
+}
+
+function recordError(record: any, fields: RecordFields): string | null {
+  if (typeof record !== 'object' || record === null || Array.isArray(record)) {
+    return 'record must be an object'
+  }
+  for (const [field, { type, required }] of Object.entries(fields)) {
+    const value = record[field]
+    // The routes store an empty date string as null, so it counts as missing
+    if (value === undefined || value === null || (type === 'date' && value === '')) {
+      if (required) return `${field} is required`
+    } else {
+      const error = fieldError(value, type)
+      if (error) return `${field} ${error}`
+    }
+  }
+  return null
+}
+
+/**
+ * Check every record against its fields before anything is written, so bad records are
+ * reported as one 400 listing each one's index ({ errors: [{ index, problem }] }) instead of
+ * failing the whole transaction with a 500. Optional fields may be missing or null.
+ * Returns null when every record is valid.
+ */
+export function validateRecords(records: BatchRecord[], fields: RecordFields): NextResponse | null {
+  const errors: RecordError[] = []
+  records.forEach((record, index) => {
+    const problem = recordError(record, fields)
+    if (problem) errors.push({ index, problem })
+  })
+  if (errors.length === 0) return null
+  return NextResponse.json(
+    {
+      error: `${errors.length} invalid record(s); first at index ${errors[0].index}: ${errors[0].problem}`,
+      errors
+    },
+    { status: 400 }
+  )
+}
+
+/**
+ * Insert rows with server-assigned IDs using chunked createMany calls inside one
+ * transaction, so a batch is created completely or not at all.
+ * Returns the new IDs in the same order as the input rows.
+ */
+export async function createManyWithIds<Row extends BatchRecord>(
+  rows: Row[],
+  createMany: (chunk: (Row & { id: string })[]) => Prisma.PrismaPromise<Prisma.BatchPayload>
+): Promise<string[]> {
+  // createMany does not return the created rows, so IDs are assigned up front
+  const rowsWithIds = rows.map(row => ({ ...row, id: randomUUID() }))
+
+  const operations: Prisma.PrismaPromise<Prisma.BatchPayload>[] = []
+  for (let start = 0; start < rowsWithIds.length; start += CREATE_MANY_CHUNK_SIZE) {
+    operations.push(createMany(rowsWithIds.slice(start, start + CREATE_MANY_CHUNK_SIZE)))
+  }
+  await prisma.$transaction(operations)
+
+  return rowsWithIds.map(row => row.id)
+}
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Columnar MIC store and cumulative antibiograms for Patomove (requires numpy).
+
+PhenotypeProfile.micData is a JSON list of {antibiotic, mic, interpretation}
+entries. Every profile is decoded once into profile x antibiotic arrays (MIC
+as float32, interpretation as int8 codes) plus species, test date and
+organization columns, so %S/%I/%R per species x antibiotic over a date window
+is a handful of vectorized reductions. The store is cached in an .npz file and
+refreshed incrementally from rows whose updatedAt moved past the cached
+watermark.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+import warnings
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Sequence, Tuple
+import argparse
+import numpy as np
+from sqlite_loader import to_prisma_datetime
+
+CACHE_VERSION = 2
+INTERPRETATIONS = ["", "S", "I", "R"]  # code 0: antibiotic not tested
+INTERPRETATION_CODES = {name: code for code, name in enumerate(INTERPRETATIONS) if name}
+MISSING_DATE = np.iinfo(np.int64).min
+NO_CODE = -1
+# Refresh re-checks rows updated this long before the watermark, covering writes that committed
+# after a later-stamped row; unchanged rows are skipped by comparing their stored updatedAt
+REFRESH_LAG_MS = 5000
+ID_CHUNK = 500
+# CLSI M39 recommends at least 30 isolates before reporting a percentage
+LOW_COUNT = 30
+
+# (id, species, testDate, micData, updatedAt, orgId)
+ProfileRow = Tuple[str, Optional[str], Any, Optional[str], Any, Optional[str]]
+
+
+class Vocabulary:
+    """String <-> small integer code mapping for a categorical column"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _epoch_ms(value: Any) -> int:
+    value = to_prisma_datetime(value)
+    return MISSING_DATE if value is None else int(value)
+
+
+class MicStore:
+    """Profiles as rows, antibiotics as columns; arrays grow by doubling so refreshes append cheaply"""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.antibiotics = Vocabulary()
+        self.species = Vocabulary()
+        self.orgs = Vocabulary()
+        self.species_code = np.empty(0, np.int32)
+        self.org_code = np.empty(0, np.int32)
+        self.test_date = np.empty(0, np.int64)
+        self.updated_at = np.empty(0, np.int64)
+        self.mic = np.empty((0, 0), np.float32)
+        self.interp = np.empty((0, 0), np.int8)
+        self.profile_watermark = 0
+        self.isolate_watermark = 0
+        # Source (row count, max id) at the last refresh, advanced as upsert adds rows
+        self.source_stats: Tuple[int, str] = (0, "")
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, rows: int, columns: int):
+        capacity, width = self.mic.shape
+        if rows <= capacity and columns <= width:
+            return
+        new_capacity = max(rows, capacity * 2 if rows > capacity else capacity, 1024)
+        new_width = max(columns, width)
+
+        def grow(array: np.ndarray, fill: Any) -> np.ndarray:
+            shape = (new_capacity,) + ((new_width,) if array.ndim == 2 else ())
+            grown = np.full(shape, fill, array.dtype)
+            grown[tuple(slice(0, n) for n in array.shape)] = array
+            return grown
+
+        self.species_code = grow(self.species_code, NO_CODE)
+        self.org_code = grow(self.org_code, NO_CODE)
+        self.test_date = grow(self.test_date, MISSING_DATE)
+        self.updated_at = grow(self.updated_at, MISSING_DATE)
+        self.mic = grow(self.mic, np.nan)
+        self.interp = grow(self.interp, 0)
+
+    def upsert(self, rows: Iterable[ProfileRow]) -> int:
+        """Decode micData for new or changed profiles; returns the number of profiles written"""
+        targets, species, dates, orgs, versions = [], [], [], [], []
+        cell_rows, cell_columns, cell_mics, cell_codes = [], [], [], []
+        for profile_id, profile_species, test_date, mic_data, updated_at, org_id in rows:
+            row = self.row_of.get(profile_id)
+            if row is None:
+                row = self.row_of[profile_id] = len(self.ids)
+                self.ids.append(profile_id)
+                self.source_stats = (self.source_stats[0] + 1, max(self.source_stats[1], profile_id))
+            targets.append(row)
+            species.append(self.species.code(profile_species))
+            dates.append(_epoch_ms(test_date))
+            orgs.append(self.orgs.code(org_id))
+            versions.append(_epoch_ms(updated_at))
+            self.profile_watermark = max(self.profile_watermark, versions[-1])
+
+            try:
+                entries = json.loads(mic_data) if mic_data else []
+            except json.JSONDecodeError:
+                entries = []
+            for entry in entries:
+                if not isinstance(entry, dict) or not entry.get("antibiotic"):
+                    continue
+                try:
+                    mic = float(entry.get("mic"))
+                except (TypeError, ValueError):
+                    mic = np.nan
+                cell_rows.append(row)
+                cell_columns.append(self.antibiotics.code(entry["antibiotic"]))
+                cell_mics.append(mic)
+                cell_codes.append(INTERPRETATION_CODES.get(entry.get("interpretation"), 0))
+
+        if not targets:
+            return 0
+        self._reserve(self.size, len(self.antibiotics))
+        targets = np.array(targets)
+        self.species_code[targets] = species
+        self.test_date[targets] = dates
+        self.org_code[targets] = orgs
+        self.updated_at[targets] = versions
+        # A changed profile replaces its whole panel
+        self.mic[targets] = np.nan
+        self.interp[targets] = 0
+        self.mic[cell_rows, cell_columns] = cell_mics
+        self.interp[cell_rows, cell_columns] = cell_codes
+        return len(targets)
+
+    def stale(self, versions: Iterable[Tuple[str, Any]]) -> List[str]:
+        """IDs from (id, updatedAt) pairs that are new or changed since they were decoded"""
+        stale = []
+        for profile_id, updated_at in versions:
+            row = self.row_of.get(profile_id)
+            if row is None or self.updated_at[row] != _epoch_ms(updated_at):
+                stale.append(profile_id)
+        return stale
+
+    def set_orgs(self, pairs: Iterable[Tuple[str, str, Any]]):
+        """Apply (phenotypeId, orgId, updatedAt) from isolates linked to a profile"""
+        for profile_id, org_id, updated_at in pairs:
+            row = self.row_of.get(profile_id)
+            if row is not None:
+                self.org_code[row] = self.orgs.code(org_id)
+            self.isolate_watermark = max(self.isolate_watermark, _epoch_ms(updated_at))
+
+    def retain(self, live_ids: Iterable[str]) -> int:
+        """Drop profiles that no longer exist; returns how many were removed"""
+        live = set(live_ids)
+        keep = np.array([profile_id in live for profile_id in self.ids], dtype=bool)
+        removed = int(self.size - keep.sum())
+        if removed:
+            n = self.size
+            self.species_code = self.species_code[:n][keep]
+            self.org_code = self.org_code[:n][keep]
+            self.test_date = self.test_date[:n][keep]
+            self.updated_at = self.updated_at[:n][keep]
+            self.mic = self.mic[:n][keep]
+            self.interp = self.interp[:n][keep]
+            self.ids = [profile_id for profile_id, kept in zip(self.ids, keep) if kept]
+            self.row_of = {profile_id: row for row, profile_id in enumerate(self.ids)}
+        return removed
+
+    def save(self, path: str, source: str):
+        n, width = self.size, len(self.antibiotics)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=CACHE_VERSION,
+            source=source,
+            watermarks=np.array([self.profile_watermark, self.isolate_watermark], np.int64),
+            source_stats=np.array([self.source_stats[0], self.source_stats[1]], dtype=str),
+            ids=np.array(self.ids, dtype=str),
+            antibiotics=np.array(self.antibiotics.values, dtype=str),
+            species=np.array(self.species.values, dtype=str),
+            orgs=np.array(self.orgs.values, dtype=str),
+            species_code=self.species_code[:n],
+            org_code=self.org_code[:n],
+            test_date=self.test_date[:n],
+            updated_at=self.updated_at[:n],
+            mic=self.mic[:n, :width],
+            interp=self.interp[:n, :width]
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source: str) -> Optional["MicStore"]:
+        """Cached store for `source`, or None when there is no usable cache"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as cache:
+            if int(cache["version"]) != CACHE_VERSION or str(cache["source"]) != source:
+                return None
+            store = cls()
+            store.ids = cache["ids"].tolist()
+            store.row_of = {profile_id: row for row, profile_id in enumerate(store.ids)}
+            store.antibiotics = Vocabulary(cache["antibiotics"].tolist())
+            store.species = Vocabulary(cache["species"].tolist())
+            store.orgs = Vocabulary(cache["orgs"].tolist())
+            store.species_code = cache["species_code"]
+            store.org_code = cache["org_code"]
+            store.test_date = cache["test_date"]
+            store.updated_at = cache["updated_at"]
+            store.mic = cache["mic"]
+            store.interp = cache["interp"]
+            store.profile_watermark, store.isolate_watermark = cache["watermarks"].tolist()
+            count, max_id = cache["source_stats"].tolist()
+            store.source_stats = (int(count), max_id)
+        return store
+
+    def antibiogram(self, group_by: Sequence[str] = ("species",), start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, species: Optional[str] = None,
+                    org: Optional[str] = None, min_tested: int = 1) -> List[Dict[str, Any]]:
+        """%S/%I/%R, MIC50 and MIC90 per group x antibiotic over profiles tested in [start, end)"""
+        n, width = self.size, len(self.antibiotics)
+        mask = np.ones(n, dtype=bool)
+        if start is not None:
+            mask &= self.test_date[:n] >= int(start.timestamp() * 1000)
+        if end is not None:
+            mask &= (self.test_date[:n] < int(end.timestamp() * 1000)) & (self.test_date[:n] != MISSING_DATE)
+        if species is not None:
+            mask &= self.species_code[:n] == self.species.codes.get(species, -2)
+        if org is not None:
+            mask &= self.org_code[:n] == self.orgs.codes.get(org, -2)
+        rows = np.flatnonzero(mask)
+        if rows.size == 0 or width == 0:
+            return []
+
+        # Codes are small, so group keys are mixed-radix integers found with a bincount instead of a sort
+        columns = {"species": (self.species_code, len(self.species)), "org": (self.org_code, len(self.orgs))}
+        key = np.zeros(rows.size, np.int64)
+        radices = []
+        for name in group_by:
+            codes, size = columns[name]
+            key = key * (size + 1) + (codes[rows] + 1)  # +1 makes room for NO_CODE
+            radices.append(size + 1)
+        present = np.flatnonzero(np.bincount(key))
+        lookup = np.zeros(present[-1] + 1, np.int64)
+        lookup[present] = np.arange(present.size)
+        group = lookup[key]
+        groups = present.size
+        group_keys = np.stack(np.unravel_index(present, radices), axis=1) - 1
+
+        # counts[c][g, a] = profiles in group g with interpretation code c for antibiotic a
+        interp = self.interp[rows, :width]
+        flat = (group[:, None] * width + np.arange(width)).ravel()
+        counts = np.bincount(flat * len(INTERPRETATIONS) + interp.ravel(),
+                             minlength=groups * width * len(INTERPRETATIONS))
+        counts = counts.reshape(groups, width, len(INTERPRETATIONS))
+        susceptible, intermediate, resistant = counts[:, :, 1], counts[:, :, 2], counts[:, :, 3]
+        tested = susceptible + intermediate + resistant
+
+        mic = self.mic[rows, :width]
+        order = np.argsort(group.astype(np.int16) if groups < 2**15 else group, kind="stable")  # radix sort
+        bounds = np.searchsorted(group[order], np.arange(groups + 1))
+        mic50 = np.full((groups, width), np.nan)
+        mic90 = np.full((groups, width), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # antibiotics no profile in a group tested
+            for g in range(groups):
+                block = mic[order[bounds[g]:bounds[g + 1]]]
+                mic50[g], mic90[g] = np.nanquantile(block, [0.5, 0.9], axis=0, method="inverted_cdf")
+
+        labels = {"species": self.species.values, "org": self.orgs.values}
+        results = []
+        for g, a in zip(*np.nonzero(tested >= max(min_tested, 1))):
+            total = int(tested[g, a])
+            row = {name: (labels[name][code] if code != NO_CODE else None)
+                   for name, code in zip(group_by, group_keys[g].tolist())}
+            row.update({
+                "antibiotic": self.antibiotics.values[a],
+                "tested": total,
+                "S": int(susceptible[g, a]),
+                "I": int(intermediate[g, a]),
+                "R": int(resistant[g, a]),
+                "pctS": round(100 * susceptible[g, a] / total, 1),
+                "pctI": round(100 * intermediate[g, a] / total, 1),
+                "pctR": round(100 * resistant[g, a] / total, 1),
+                "mic50": None if np.isnan(mic50[g, a]) else float(mic50[g, a]),
+                "mic90": None if np.isnan(mic90[g, a]) else float(mic90[g, a]),
+                "lowCount": total < LOW_COUNT
+            })
+            results.append(row)
+        results.sort(key=lambda r: tuple(str(r[name]) for name in group_by) + (r["antibiotic"],))
+        return results
+
+
+class SqliteProfileSource:
+    """PhenotypeProfile rows (with the org of a linked isolate) from the Patomove SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.name = f"sqlite:{os.path.abspath(db_path)}"
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def profile_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return self.conn.execute('SELECT "id", "updatedAt" FROM "PhenotypeProfile" WHERE "updatedAt" > ?',
+                                 (since_ms,))
+
+    def profiles(self, ids: List[str]) -> Iterator[ProfileRow]:
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            yield from self.conn.execute(
+                'SELECT p."id", p."species", p."testDate", p."micData", p."updatedAt", '
+                '(SELECT i."orgId" FROM "Isolate" i WHERE i."phenotypeId" = p."id" LIMIT 1) '
+                f'FROM "PhenotypeProfile" p WHERE p."id" IN ({", ".join("?" * len(chunk))})', chunk
+            )
+
+    def changed_isolate_orgs(self, since_ms: int) -> Iterable[Tuple[str, str, Any]]:
+        return self.conn.execute(
+            'SELECT "phenotypeId", "orgId", "updatedAt" FROM "Isolate" '
+            'WHERE "phenotypeId" IS NOT NULL AND "updatedAt" > ?', (since_ms,)
+        )
+
+    def profile_stats(self) -> Tuple[int, str]:
+        """Row count and max id, answered from an index without fetching any IDs"""
+        return tuple(self.conn.execute('SELECT COUNT(*), COALESCE(MAX("id"), \'\') FROM "PhenotypeProfile"').fetchone())
+
+    def profile_ids(self) -> Iterable[str]:
+        return (row[0] for row in self.conn.execute('SELECT "id" FROM "PhenotypeProfile"'))
+
+
+class DatasetProfileSource:
+    """Profiles from generate_db_demo.py JSON output; always loaded in full"""
+
+    def __init__(self, path: str):
+        self.name = f"data:{os.path.abspath(path)}"
+        with open(path) as f:
+            data = json.load(f)
+        self.profile_rows = data.get("phenotypeProfiles", [])
+        self.orgs = {}
+        for isolate in data.get("isolates", []):
+            if isolate.get("phenotypeId"):
+                self.orgs.setdefault(isolate["phenotypeId"], isolate["orgId"])
+
+    def profile_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return [(p["id"], p.get("updatedAt")) for p in self.profile_rows]
+
+    def profiles(self, ids: List[str]) -> Iterator[ProfileRow]:
+        wanted = set(ids)
+        for p in self.profile_rows:
+            if p["id"] in wanted:
+                yield (p["id"], p.get("species"), p.get("testDate"), p.get("micData"), p.get("updatedAt"),
+                       self.orgs.get(p["id"]))
+
+    def changed_isolate_orgs(self, since_ms: int) -> Iterable[Tuple[str, str, Any]]:
+        return []
+
+    def profile_stats(self) -> Tuple[int, str]:
+        return len(self.profile_rows), max(self.profile_ids(), default="")
+
+    def profile_ids(self) -> Iterable[str]:
+        return (p["id"] for p in self.profile_rows)
+
+
+def refresh(store: MicStore, source: Any) -> Dict[str, int]:
+    """Bring the store up to date with the source using the updatedAt watermarks"""
+    stale = store.stale(source.profile_versions(store.profile_watermark - REFRESH_LAG_MS))
+    updated = store.upsert(source.profiles(stale))
+    store.set_orgs(source.changed_isolate_orgs(store.isolate_watermark - REFRESH_LAG_MS))
+    # Deletions are not visible through updatedAt. Without one, the source still has the row count and
+    # max id recorded with the watermark plus the rows upsert added, so only a mismatch needs the full
+    # ID scan (a delete plus a missed insert that leaves both unchanged is not noticed)
+    stats = source.profile_stats()
+    scanned = stats != store.source_stats
+    removed = store.retain(source.profile_ids()) if scanned else 0
+    store.source_stats = stats
+    return {"updated": updated, "removed": removed, "scanned": int(scanned)}
+
+
+def load_store(source: Any, cache_path: Optional[str]) -> Tuple[MicStore, Dict[str, int]]:
+    store = MicStore.load(cache_path, source.name) if cache_path else None
+    cached = store is not None
+    store = store or MicStore()
+    changes = refresh(store, source)
+    if cache_path and (not cached or changes["updated"] or changes["scanned"]):
+        store.save(cache_path, source.name)
+    return store, {**changes, "cached": int(cached)}
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def print_table(results: List[Dict[str, Any]], group_by: Sequence[str]):
+    header = [name.capitalize() for name in group_by] + ["Antibiotic", "n", "%S", "%I", "%R", "MIC50", "MIC90"]
+    print("   " + " | ".join(header))
+    for r in results:
+        cells = [str(r[name]) for name in group_by] + [
+            r["antibiotic"], f"{r['tested']}{'*' if r['lowCount'] else ''}",
+            f"{r['pctS']:.1f}", f"{r['pctI']:.1f}", f"{r['pctR']:.1f}", str(r["mic50"]), str(r["mic90"])
+        ]
+        print("   " + " | ".join(cells))
+    if any(r["lowCount"] for r in results):
+        print(f"   * fewer than {LOW_COUNT} isolates tested")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cumulative antibiograms from PhenotypeProfile MIC data")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Use a generated demo JSON file instead of the database")
+    parser.add_argument("--cache", type=str, default="antibiogram_cache.npz",
+                       help="Columnar cache file (default: antibiogram_cache.npz)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Decode every profile without reading or writing the cache")
+    parser.add_argument("--group-by", type=lambda v: v.split(","), default=["species"],
+                       help="species, org or species,org (default: species)")
+    parser.add_argument("--species", type=str, default=None, help="Only this species")
+    parser.add_argument("--org", type=str, default=None, help="Only this organization ID")
+    parser.add_argument("--from", dest="start", type=parse_date, default=None,
+                       help="Test dates on or after this ISO date")
+    parser.add_argument("--to", dest="end", type=parse_date, default=None,
+                       help="Test dates before this ISO date")
+    parser.add_argument("--min-tested", type=int, default=1,
+                       help="Hide cells with fewer tested profiles (default: 1)")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table",
+                       help="Output format (default: table)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write results to a file instead of stdout (json/csv)")
+    args = parser.parse_args()
+
+    if any(name not in ("species", "org") for name in args.group_by):
+        parser.error("--group-by accepts species, org or species,org")
+    if args.data:
+        source = DatasetProfileSource(args.data)
+    elif os.path.exists(args.sqlite):
+        source = SqliteProfileSource(args.sqlite)
+    else:
+        parser.error(f"{args.sqlite} does not exist (use --data to read a generated dataset)")
+
+    start = time.perf_counter()
+    # Generated datasets carry no updatedAt to refresh from, so they are always decoded in full
+    store, changes = load_store(source, None if args.no_cache or args.data else args.cache)
+    loaded = time.perf_counter() - start
+    origin = "cache" if changes["cached"] else "source"
+    print(f"🧫 {store.size} profiles x {len(store.antibiotics)} antibiotics from {origin} in {loaded:.3f}s "
+          f"({changes['updated']} decoded, {changes['removed']} removed)", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = store.antibiogram(group_by=args.group_by, start=args.start, end=args.end,
+                                species=args.species, org=args.org, min_tested=args.min_tested)
+    print(f"📊 {len(results)} antibiogram cells in {1000 * (time.perf_counter() - start):.1f} ms", file=sys.stderr)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(results, out, indent=2)
+            out.write("\n")
+        elif args.format == "csv":
+            fields = list(args.group_by) + ["antibiotic", "tested", "S", "I", "R", "pctS", "pctI", "pctR",
+                                            "mic50", "mic90", "lowCount"]
+            writer = csv.DictWriter(out, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            print_table(results, args.group_by)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark suite for the Patomove demo data generator.
+
+Runs a ladder of isolate counts and measures:
+  - generation rows/sec per table for each engine (python, numpy)
+  - ingestion rows/sec per API endpoint plus p50/p95/p99 POST latency (with --url)
+
+Results are written as JSON and can be compared against a stored baseline;
+the command exits nonzero when any throughput drops past the threshold.
+"""
+
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import argparse
+
+from generate_db_demo import DemoDataGenerator
+from metrics import throughput, format_summary
+from streaming import IdPool, KeyColumn
+
+INGESTION_ENDPOINTS = ["environments", "patients", "phenotypes", "isolates", "genomics"]
+
+# Fixed seed so every generation run produces the same rows
+BENCHMARK_SEED = 0
+
+# Rates measured over fewer rows than this are too noisy to flag as regressions
+MIN_COMPARED_ROWS = 1000
+
+
+def consume(rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    for _ in rows:
+        count += 1
+    return count
+
+
+def timed(rows: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    start = time.perf_counter()
+    count = consume(rows)
+    return throughput(count, time.perf_counter() - start)
+
+
+def benchmark_engine(engine: str, num_isolates: int, workers: int = 1) -> Dict[str, Dict[str, float]]:
+    """Generate every sharded table once with one engine and time each table"""
+    generator = DemoDataGenerator(num_isolates=num_isolates, engine=engine, seed=BENCHMARK_SEED, workers=workers)
+    if engine == "numpy":
+        generator.vector_engine()  # keep the numpy import out of the timings
+    org_ids = [org["id"] for org in generator.generate_organizations()]
+
+    environment_ids, environment_orgs = IdPool(), KeyColumn("orgId", org_ids)
+    patient_ids, patient_orgs = IdPool(), KeyColumn("orgId", org_ids)
+    phenotype_ids = IdPool()
+    isolate_ids = IdPool()
+    return {
+        "environments": timed(environment_ids.collect(environment_orgs.collect(generator.iter_environments(org_ids)))),
+        "patients": timed(patient_ids.collect(patient_orgs.collect(generator.iter_patients(org_ids)))),
+        "patientAdts": timed(generator.iter_patient_adts(patient_ids, org_ids, patient_orgs)),
+        "phenotypeProfiles": timed(phenotype_ids.collect(generator.iter_phenotype_profiles())),
+        "isolates": timed(isolate_ids.collect(
+            generator.iter_isolates(org_ids, patient_ids, environment_ids, phenotype_ids,
+                                    patient_orgs, environment_orgs))),
+        "genomicData": timed(generator.iter_genomic_data(isolate_ids)),
+        "treatmentOutcomes": timed(generator.iter_treatment_outcomes(isolate_ids)),
+    }
+
+
+def run_generation_ladder(sizes: List[int], engines: List[str], workers: int = 1) -> List[Dict[str, Any]]:
+    results = []
+    for num_isolates in sizes:
+        for engine in engines:
+            tables = benchmark_engine(engine, num_isolates, workers)
+            results.append({"engine": engine, "isolates": num_isolates, "tables": tables})
+            summary = ", ".join(f"{table} {tables[table]['rows_per_sec']:,.0f}/s"
+                                for table in ("phenotypeProfiles", "isolates", "genomicData"))
+            print(f"  {num_isolates:>9,} isolates [{engine:>6}] {summary}")
+    return results
+
+
+def ingestion_reference_date() -> datetime:
+    """The next whole second, waited for so no earlier rung or run can have used it.
+
+    Organization codes end in the reference date's epoch seconds and are @unique, so every rung of
+    every run needs its own; the seed is derived from it too, keeping seeded fileHash values unique.
+    """
+    now = time.time()
+    next_second = int(now) + 1
+    time.sleep(next_second - now)
+    return datetime.fromtimestamp(next_second)
+
+
+def benchmark_ingestion(num_isolates: int, base_url: str, concurrency: int, batch_size: int = 1,
+                        reference_date: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Populate a running server through the API and report per-endpoint throughput and POST latency.
+    
+    With batch_size > 1 the latency percentiles are per batch request, not per row.
+    """
+    reference_date = reference_date or ingestion_reference_date()
+    generator = DemoDataGenerator(num_isolates=num_isolates, populate_db=True, base_url=base_url,
+                                  concurrency=concurrency, batch_size=batch_size,
+                                  seed=BENCHMARK_SEED + int(reference_date.timestamp()),
+                                  reference_date=reference_date)
+    generator.generate_demo_data()
+
+    endpoints = {}
+    for endpoint in INGESTION_ENDPOINTS:
+        path = f"{endpoint}/batch" if batch_size > 1 else endpoint
+        latency = generator.endpoint_latency.get(path)
+        if latency is None:
+            continue
+        stats = throughput(generator.endpoint_created.get(endpoint, 0), generator.endpoint_seconds.get(endpoint, 0.0))
+        stats.update(latency.summary())
+        endpoints[endpoint] = stats
+    return endpoints
+
+
+def run_ingestion_ladder(sizes: List[int], base_url: str, concurrency: int, batch_size: int = 1) -> List[Dict[str, Any]]:
+    results = []
+    for num_isolates in sizes:
+        reference_date = ingestion_reference_date()
+        print(f"📤 Ingesting {num_isolates:,} isolates into {base_url}...")
+        endpoints = benchmark_ingestion(num_isolates, base_url, concurrency, batch_size, reference_date)
+        results.append({"isolates": num_isolates, "concurrency": concurrency, "batch_size": batch_size,
+                        "reference_date": reference_date.isoformat(), "endpoints": endpoints})
+        for endpoint, stats in endpoints.items():
+            print(f"  {num_isolates:>9,} isolates [{endpoint:>12}] {format_summary(stats, stats['rows_per_sec'])}")
+    return results
+
+
+def throughput_index(results: Dict[str, Any]) -> Dict[Tuple, Dict[str, Any]]:
+    """Flatten a results document into {(kind, variant, isolates, table): stats}"""
+    index = {}
+    for run in results.get("generation", []):
+        for table, stats in run["tables"].items():
+            index[("generation", run["engine"], run["isolates"], table)] = stats
+    for run in results.get("ingestion", []):
+        for endpoint, stats in run["endpoints"].items():
+            variant = f"c{run['concurrency']}-b{run.get('batch_size', 1)}"
+            index[("ingestion", variant, run["isolates"], endpoint)] = stats
+    return index
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Describe every measurement that is slower than the baseline by more than `threshold`"""
+    current = throughput_index(results)
+    regressions = []
+    for key, baseline_stats in throughput_index(baseline).items():
+        if key not in current or baseline_stats["rows"] < MIN_COMPARED_ROWS:
+            continue
+        rate, baseline_rate = current[key]["rows_per_sec"], baseline_stats["rows_per_sec"]
+        change = rate / baseline_rate - 1
+        if change < -threshold:
+            kind, variant, isolates, table = key
+            regressions.append(f"{kind} {table} [{variant}] at {isolates:,} isolates: "
+                               f"{rate:,.0f}/s vs baseline {baseline_rate:,.0f}/s ({change:+.0%})")
+    return regressions
+
+
+# Generation ladders: the full 10k/100k/1M rungs, and a quick one for local iteration
+DEFAULT_SIZES = [10000, 100000, 1000000]
+QUICK_SIZES = [1000, 10000, 100000]
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(float(size)) for size in value.split(",")] if value else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark demo data generation and API ingestion throughput")
+    parser.add_argument("--sizes", type=parse_sizes, default=None,
+                       help="Comma-separated isolate counts for generation (default: 10000,100000,1000000)")
+    parser.add_argument("--quick", action="store_true",
+                       help="Generation ladder of 1000,10000,100000 when --sizes is not given")
+    parser.add_argument("--engines", type=lambda v: v.split(","), default=["python", "numpy"],
+                       help="Comma-separated engines to compare (default: python,numpy)")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                       help="Generation worker processes (default: 1)")
+    parser.add_argument("--url", type=str, default=None,
+                       help="Also benchmark ingestion against a running server, e.g. http://localhost:3000/api")
+    parser.add_argument("--ingest-sizes", type=parse_sizes, default=[1000, 10000],
+                       help="Comma-separated isolate counts for ingestion (default: 1000,10000)")
+    parser.add_argument("--concurrency", "-c", type=int, default=8,
+                       help="In-flight API requests when ingesting (default: 8)")
+    parser.add_argument("--batch-size", "-b", type=int, default=1,
+                       help="Rows per ingestion request via the /batch routes (default: 1)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write results as JSON (usable later as --baseline)")
+    parser.add_argument("--baseline", type=str, default=None,
+                       help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                       help="Fail when rows/sec drops more than this fraction below the baseline (default: 0.15)")
+    args = parser.parse_args()
+    if args.sizes is None:
+        args.sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+
+    results: Dict[str, Any] = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+    if args.sizes:
+        print("⏱️  Generation throughput (rows/sec)")
+        results["generation"] = run_generation_ladder(args.sizes, args.engines, args.workers)
+
+    if args.url:
+        probe = DemoDataGenerator(populate_db=True, base_url=args.url)
+        if not probe.check_server():
+            print(f"❌ Server not reachable at {args.url}! Please start with 'npm run dev' first.")
+            sys.exit(1)
+        results["ingestion"] = run_ingestion_ladder(args.ingest_sizes, args.url, args.concurrency, args.batch_size)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} throughput regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"✅ No throughput regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Bulk genome importer for sequencing-run directories.
+
+Hashes and QCs every assembly under a run directory in parallel (one streaming
+pass per file, via fasta_qc), checks all hashes against existing GenomicData in
+a single lookup request, and skips genomes the database already holds. New
+files are streamed to PUT /api/upload/stream with bounded concurrency, and their
+records are registered through POST /api/genomics/batch in batches. Files are
+never read whole on either side, so memory stays flat however large the run.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+import argparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fasta_qc import find_assemblies, qc_batch
+from generate_db_demo import GatewayRetry
+from metrics import LatencyHistogram
+
+# Largest hash list per lookup request (the route's MAX_BATCH_SIZE)
+LOOKUP_BATCH_SIZE = 10000
+
+
+def create_session(concurrency: int, max_retries: int = 3) -> requests.Session:
+    """Pooled session retrying gateway errors; file bodies are rewound by urllib3 on retry.
+
+    Uses the generator's GatewayRetry: a POST /genomics/batch answered 502/504 may already have been
+    applied, so POSTs are resent only on connection errors and 503. Uploads (PUT) also retry 502/504.
+    """
+    retry = GatewayRetry(
+        total=max_retries,
+        connect=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def rejected_records(e: requests.exceptions.RequestException, size: int) -> Dict[int, str]:
+    """Index -> problem for every record a batch route rejected with a 400 ({ errors: [{ index, problem }] })"""
+    response = getattr(e, "response", None)
+    if response is None or response.status_code != 400:
+        return {}
+    try:
+        body = response.json()
+    except ValueError:
+        return {}
+    errors = body.get("errors") if isinstance(body, dict) else None
+    rejected = {}
+    for error in errors if isinstance(errors, list) else []:
+        index = error.get("index") if isinstance(error, dict) else None
+        if isinstance(index, int) and 0 <= index < size:
+            rejected[index] = str(error.get("problem"))
+    return rejected
+
+
+def describe(e: requests.exceptions.RequestException) -> str:
+    response = getattr(e, "response", None)
+    if response is not None:
+        try:
+            return f"{e}: {response.json()}"
+        except ValueError:
+            return f"{e}: {response.text[:200]}"
+    return str(e)
+
+
+class BulkImporter:
+    def __init__(self, base_url: str, uploaded_by: str = "bulk-import", concurrency: int = 4,
+                 batch_size: int = 100, timeout: float = 600, skip_invalid: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.uploaded_by = uploaded_by
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.skip_invalid = skip_invalid
+        self.session = create_session(concurrency)
+
+        self.outcomes: List[Dict[str, Any]] = []
+        self.upload_latency = LatencyHistogram()
+        self.uploaded_bytes = 0
+        self.phases: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def outcome(self, record: Dict[str, Any], status: str, **details):
+        with self.lock:
+            self.outcomes.append({"file": record["path"], "fileHash": record.get("fileHash"),
+                                  "status": status, **details})
+
+    def lookup(self, hashes: List[str]) -> Dict[str, str]:
+        """fileHash -> existing genome id, for every hash already in GenomicData"""
+        known = {}
+        for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+            response = self.session.post(f"{self.base_url}/genomics/lookup",
+                                         json={"hashes": hashes[start:start + LOOKUP_BATCH_SIZE]}, timeout=60)
+            response.raise_for_status()
+            known.update(response.json().get("known") or {})
+        return known
+
+    def upload(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stream one file to storage; returns its GenomicData payload, or None after recording the failure"""
+        start = time.perf_counter()
+        try:
+            with open(record["path"], "rb") as f:
+                response = self.session.put(
+                    f"{self.base_url}/upload/stream",
+                    params={"filename": record["originalFilename"], "sha256": record["fileHash"]},
+                    data=f,  # streamed from disk with a Content-Length, never read whole
+                    headers={"Content-Type": "application/octet-stream"},
+                    timeout=self.timeout)
+            self.upload_latency.record(time.perf_counter() - start)
+            response.raise_for_status()
+            stored = response.json()
+            filename, storage_path = stored["fileName"], stored["storagePath"]
+        except (OSError, requests.exceptions.RequestException) as e:
+            self.upload_latency.record_error()
+            self.outcome(record, "upload failed", error=describe(e) if isinstance(e, requests.exceptions.RequestException) else str(e))
+            return None
+        except (KeyError, TypeError, ValueError) as e:
+            # A 2xx without the stored file's name/path fails this file, not the whole run
+            self.outcome(record, "upload failed", error=f"Unexpected upload response: {e!r}")
+            return None
+
+        with self.lock:
+            self.uploaded_bytes += record["fileSize"]
+        payload = {key: record.get(key) for key in ("originalFilename", "fileSize", "fileHash", "validationStatus",
+                                                      "processingStatus", "validationErrors", "contigCount",
+                                                      "totalLength", "n50", "gcContent", "qualityMetrics")}
+        payload.update(filename=filename, storagePath=storage_path, uploadedBy=self.uploaded_by)
+        return payload
+
+    def register(self, batch: List[Dict[str, Any]], records: Dict[str, Dict[str, Any]]):
+        """Create a batch of genome records in one transaction.
+
+        A 400 lists every record the route rejected; those fail and the rest are sent again.
+        Another failed batch is usually a fileHash that another import registered since the lookup
+        (fileHash is unique); those are re-checked and dropped, and the rest retried once.
+        """
+        retry = True
+        while batch:
+            try:
+                response = self.session.post(f"{self.base_url}/genomics/batch", json=batch,
+                                             timeout=30 + len(batch) / 100)
+                response.raise_for_status()
+                ids = response.json().get("ids") or []
+            except requests.exceptions.RequestException as e:
+                rejected = rejected_records(e, len(batch))
+                if rejected:
+                    for index, problem in rejected.items():
+                        self.outcome(records[batch[index]["fileHash"]], "register failed", error=problem)
+                    batch = [payload for index, payload in enumerate(batch) if index not in rejected]
+                    continue
+                if retry:
+                    try:
+                        known = self.lookup([payload["fileHash"] for payload in batch])
+                    except requests.exceptions.RequestException:
+                        known = {}
+                    for payload in batch:
+                        if payload["fileHash"] in known:
+                            self.outcome(records[payload["fileHash"]], "already imported", genomeId=known[payload["fileHash"]])
+                    batch = [payload for payload in batch if payload["fileHash"] not in known]
+                    retry = False
+                    continue
+                for payload in batch:
+                    self.outcome(records[payload["fileHash"]], "register failed", error=describe(e))
+                return
+
+            if len(ids) != len(batch):
+                # Without one ID per record there is no telling which record got which ID
+                for payload in batch:
+                    self.outcome(records[payload["fileHash"]], "register failed",
+                                 error=f"Route returned {len(ids)} ids for {len(batch)} records")
+                return
+            for payload, genome_id in zip(batch, ids):
+                self.outcome(records[payload["fileHash"]], "imported", genomeId=genome_id, storagePath=payload["storagePath"])
+            return
+
+    def run(self, paths: List[str], workers: int = 1, dry_run: bool = False) -> Dict[str, Any]:
+        start = time.perf_counter()
+        print(f"🔬 Hashing and checking {len(paths)} assemblies with {workers} worker(s)...")
+        records: Dict[str, Dict[str, Any]] = {}
+        for path, record in zip(paths, qc_batch(paths, workers=workers)):
+            record["path"] = path
+            if not record.get("fileHash"):
+                self.outcome(record, "unreadable", error=record.get("validationErrors"))
+            elif record["fileHash"] in records:
+                self.outcome(record, "duplicate in run", duplicateOf=records[record["fileHash"]]["path"])
+            elif self.skip_invalid and record["validationStatus"] != "valid":
+                self.outcome(record, "invalid", error=record.get("validationErrors"))
+            else:
+                records[record["fileHash"]] = record
+        self.phases["hash"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        known = self.lookup(list(records))
+        for file_hash, genome_id in known.items():
+            self.outcome(records.pop(file_hash), "already imported", genomeId=genome_id)
+        self.phases["lookup"] = time.perf_counter() - start
+        print(f"🔎 {len(known)} already in the database, {len(records)} new")
+
+        if not dry_run and records:
+            start = time.perf_counter()
+            total_bytes = sum(record["fileSize"] for record in records.values())
+            print(f"📤 Uploading {len(records)} files ({total_bytes / 1024**2:,.1f} MB), "
+                  f"{self.concurrency} at a time...")
+            batch: List[Dict[str, Any]] = []
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                # map yields in submission order; registration overlaps the remaining uploads
+                for payload in pool.map(self.upload, records.values()):
+                    if payload is None:
+                        continue
+                    batch.append(payload)
+                    if len(batch) >= self.batch_size:
+                        self.register(batch, records)
+                        batch = []
+            if batch:
+                self.register(batch, records)
+            self.phases["upload"] = time.perf_counter() - start
+
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for outcome in self.outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        upload_seconds = self.phases.get("upload", 0)
+        return {
+            "counts": counts,
+            "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+            "uploaded_bytes": self.uploaded_bytes,
+            "upload_mb_per_sec": round(self.uploaded_bytes / 1024**2 / upload_seconds, 2) if upload_seconds else None,
+            "upload_latency": self.upload_latency.summary(),
+            "files": sorted(self.outcomes, key=lambda outcome: outcome["file"]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a sequencing run's genome assemblies, skipping known files")
+    parser.add_argument("paths", nargs="+",
+                       help="Run directories (searched recursively) or FASTA files (.gz accepted)")
+    parser.add_argument("--url", type=str, default="http://localhost:3000/api",
+                       help="API base URL (default: http://localhost:3000/api)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1,
+                       help="Hashing/QC processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                       help="Uploads in flight at once (default: 4)")
+    parser.add_argument("--batch-size", type=int, default=100,
+                       help="Genome records registered per batch request (default: 100)")
+    parser.add_argument("--uploaded-by", type=str, default="bulk-import",
+                       help="uploadedBy recorded on the new genomes (default: bulk-import)")
+    parser.add_argument("--skip-invalid", action="store_true",
+                       help="Do not import files that fail FASTA QC (default: import them as invalid)")
+    parser.add_argument("--timeout", type=float, default=600,
+                       help="Seconds allowed per file upload (default: 600)")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Hash and look up only; report what would be uploaded")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the per-file report as JSON")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        paths.extend(find_assemblies(path) if os.path.isdir(path) else [path])
+    if not paths:
+        parser.error("no FASTA files found")
+
+    importer = BulkImporter(args.url, uploaded_by=args.uploaded_by, concurrency=max(1, args.concurrency),
+                            batch_size=max(1, args.batch_size), timeout=args.timeout, skip_invalid=args.skip_invalid)
+    start = time.perf_counter()
+    try:
+        report = importer.run(paths, workers=max(1, args.workers), dry_run=args.dry_run)
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Hash lookup failed: {describe(e)}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    counts = report["counts"]
+    print(f"✅ {counts.get('imported', 0)} imported, {counts.get('already imported', 0)} already imported, "
+          f"{counts.get('duplicate in run', 0)} duplicates in run in {elapsed:.1f}s")
+    phases = ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in report["phases"].items())
+    print(f"⏱️  {phases}" + (f" ({report['upload_mb_per_sec']:.1f} MB/s)" if report["upload_mb_per_sec"] else ""))
+    failed = [outcome for outcome in report["files"] if outcome["status"] in ("upload failed", "register failed", "unreadable")]
+    if failed:
+        print(f"⚠️  {len(failed)} failed:")
+        for outcome in failed[:10]:
+            print(f"   {outcome['file']}: {outcome['status']}: {outcome.get('error')}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report: {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
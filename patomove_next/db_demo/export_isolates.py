@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Streaming export of the denormalized isolate view to Parquet or CSV.
+
+GET /api/isolates loads every isolate with all its relations into one JSON
+response. This reads the SQLite database directly, one page at a time, using
+keyset pagination on (collectionDate, id) so every page is an index range scan
+on Isolate.collectionDate, however deep into the table it is. Each page is
+written out before the next is read, so memory stays flat for any table size.
+Parquet needs pyarrow; without it the export falls back to chunked CSV.
+"""
+
+import csv
+import importlib.util
+import os
+import resource
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import argparse
+from sqlite_loader import chunked, to_prisma_datetime
+from streaming import open_text
+
+PAGE_SIZE = 5000
+ID_CHUNK = 500
+# Epoch-ms DateTime column to the ISO string Prisma returns, inside SQLite JSON aggregates
+ISO_SQL = 'strftime(\'%Y-%m-%dT%H:%M:%fZ\', "{}" / 1000.0, \'unixepoch\')'
+
+# (output column, SQL expression, type); the one-to-many relations are filled in per page
+COLUMNS: List[Tuple[str, Optional[str], str]] = [
+    ("id", 'i."id"', "string"),
+    ("label", 'i."label"', "string"),
+    ("sampleType", 'i."sampleType"', "string"),
+    ("collectionSource", 'i."collectionSource"', "string"),
+    ("collectionSite", 'i."collectionSite"', "string"),
+    ("collectionDate", 'i."collectionDate"', "datetime"),
+    ("priority", 'i."priority"', "string"),
+    ("processingStatus", 'i."processingStatus"', "string"),
+    ("notes", 'i."notes"', "string"),
+    ("createdAt", 'i."createdAt"', "datetime"),
+    ("updatedAt", 'i."updatedAt"', "datetime"),
+    ("orgId", 'i."orgId"', "string"),
+    ("orgName", 'o."name"', "string"),
+    ("orgCode", 'o."code"', "string"),
+    ("orgType", 'o."type"', "string"),
+    ("patientId", 'i."patientId"', "string"),
+    ("patientSex", 'pt."sex"', "string"),
+    ("patientDateOfBirth", 'pt."dateOfBirth"', "datetime"),
+    ("environmentId", 'i."environmentId"', "string"),
+    ("environmentSiteName", 'e."siteName"', "string"),
+    ("environmentFacilityType", 'e."facilityType"', "string"),
+    ("phenotypeId", 'i."phenotypeId"', "string"),
+    ("phenotypeSpecies", 'ph."species"', "string"),
+    ("phenotypeMethod", 'ph."method"', "string"),
+    ("phenotypeTestDate", 'ph."testDate"', "datetime"),
+    ("micData", 'ph."micData"', "string"),
+    ("genomeId", 'i."genomeId"', "string"),
+    ("genomeFilename", 'g."originalFilename"', "string"),
+    ("genomeValidationStatus", 'g."validationStatus"', "string"),
+    ("genomeProcessingStatus", 'g."processingStatus"', "string"),
+    ("contigCount", 'g."contigCount"', "int"),
+    ("totalLength", 'g."totalLength"', "int"),
+    ("n50", 'g."n50"', "int"),
+    ("gcContent", 'g."gcContent"', "float"),
+    ("speciesIdentification", 'g."speciesIdentification"', "string"),
+    ("mlstScheme", 'g."mlstScheme"', "string"),
+    ("mlstType", 'g."mlstType"', "string"),
+    ("resistanceGenes", 'g."resistanceGenes"', "string"),
+    ("virulenceGenes", 'g."virulenceGenes"', "string"),
+    ("plasmids", 'g."plasmids"', "string"),
+    ("analysisGenomeIds", None, "string"),    # JSON array, from _IsolateAnalyses
+    ("treatmentCount", None, "int"),
+    ("treatments", None, "string"),           # JSON array of IsolateTreatmentOutcome
+]
+SQL_COLUMNS = [(name, expr, kind) for name, expr, kind in COLUMNS if expr]
+DATETIME_COLUMNS = [index for index, (_, _, kind) in enumerate(COLUMNS) if kind == "datetime"]
+KEY_COLUMN = [name for name, _, _ in SQL_COLUMNS].index("collectionDate")
+
+FROM_CLAUSE = (
+    'FROM "Isolate" i '
+    'JOIN "Organization" o ON o."id" = i."orgId" '
+    'LEFT JOIN "Patient" pt ON pt."id" = i."patientId" '
+    'LEFT JOIN "Environment" e ON e."id" = i."environmentId" '
+    'LEFT JOIN "PhenotypeProfile" ph ON ph."id" = i."phenotypeId" '
+    'LEFT JOIN "GenomicData" g ON g."id" = i."genomeId"'
+)
+
+
+def iso_timestamp(ms: Optional[int]) -> Optional[str]:
+    """Epoch ms as Prisma serializes DateTime in API responses"""
+    if ms is None:
+        return None
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class IsolateExporter:
+    """Pages of denormalized isolate rows (COLUMNS order, DateTime as epoch ms) in (collectionDate, id) order"""
+
+    def __init__(self, db_path: str, org_ids: Optional[List[str]] = None, sample_type: Optional[str] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None, page_size: int = PAGE_SIZE):
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        self.page_size = page_size
+        # Unary + keeps SQLite from choosing the orgId/sampleType indexes, which would re-sort every
+        # matching isolate for each page instead of walking the collectionDate index
+        filters, params = [], []
+        if org_ids:
+            filters.append(f'+i."orgId" IN ({", ".join("?" * len(org_ids))})')
+            params.extend(org_ids)
+        if sample_type:
+            filters.append('+i."sampleType" = ?')
+            params.append(sample_type)
+        if start:
+            filters.append('i."collectionDate" >= ?')
+            params.append(to_prisma_datetime(start.isoformat()))
+        if end:
+            filters.append('i."collectionDate" < ?')
+            params.append(to_prisma_datetime(end.isoformat()))
+        self.filters, self.params = filters, params
+
+    def page_sql(self, first: bool) -> str:
+        # The keyset is spelled out so the collectionDate index drives the scan: the ">=" is the range
+        # bound, the OR only breaks ties on id within the first date
+        filters = list(self.filters)
+        if not first:
+            filters.append('i."collectionDate" >= ? AND (i."collectionDate" > ? OR i."id" > ?)')
+        where = f'WHERE {" AND ".join(filters)} ' if filters else ""
+        select = ", ".join(expr for _, expr, _ in SQL_COLUMNS)
+        return f'SELECT {select} {FROM_CLAUSE} {where}ORDER BY i."collectionDate", i."id" LIMIT ?'
+
+    def count(self) -> int:
+        where = f'WHERE {" AND ".join(self.filters)}' if self.filters else ""
+        return self.conn.execute(f'SELECT COUNT(*) FROM "Isolate" i {where}', self.params).fetchone()[0]
+
+    def attach_relations(self, rows: List[List[Any]]):
+        """Append analysisGenomeIds, treatmentCount and treatments to a page of rows"""
+        ids = [row[0] for row in rows]
+        analyses: Dict[str, str] = {}
+        treatments: Dict[str, Tuple[int, str]] = {}
+        for chunk in chunked(ids, ID_CHUNK):
+            placeholders = ", ".join("?" * len(chunk))
+            analyses.update(self.conn.execute(
+                f'SELECT "B", json_group_array("A") FROM "_IsolateAnalyses" WHERE "B" IN ({placeholders}) GROUP BY "B"',
+                chunk
+            ))
+            for isolate_id, count, outcomes in self.conn.execute(
+                'SELECT "isolateId", COUNT(*), json_group_array(json_object('
+                f'\'antibiotic\', "antibiotic", \'startDate\', {ISO_SQL.format("startDate")}, '
+                f'\'endDate\', {ISO_SQL.format("endDate")}, '
+                '\'outcome\', "outcome", \'clinicalNotes\', "clinicalNotes")) '
+                f'FROM "IsolateTreatmentOutcome" WHERE "isolateId" IN ({placeholders}) GROUP BY "isolateId"', chunk
+            ):
+                treatments[isolate_id] = (count, outcomes)
+        for row in rows:
+            count, outcomes = treatments.get(row[0], (0, None))
+            row.extend([analyses.get(row[0]), count, outcomes])
+
+    def pages(self) -> Iterator[List[List[Any]]]:
+        first_sql, next_sql = self.page_sql(True), self.page_sql(False)
+        key = None
+        while True:
+            if key is None:
+                rows = self.conn.execute(first_sql, self.params + [self.page_size]).fetchall()
+            else:
+                rows = self.conn.execute(next_sql, self.params + [key[0], key[0], key[1], self.page_size]).fetchall()
+            if not rows:
+                return
+            key = (rows[-1][KEY_COLUMN], rows[-1][0])
+            page = [list(row) for row in rows]
+            self.attach_relations(page)
+            yield page
+            if len(rows) < self.page_size:
+                return
+
+
+class CsvExportWriter:
+    """CSV parts of at most chunk_rows rows each: <output>-0001.csv[.gz], <output>-0002.csv[.gz], ..."""
+
+    def __init__(self, output: str, chunk_rows: int = 500000, compress: bool = False):
+        self.output = output
+        self.chunk_rows = chunk_rows
+        self.compress = compress
+        self.paths: List[str] = []
+        self.f = None
+        self.writer = None
+        self.rows_in_part = 0
+
+    def _next_part(self):
+        if self.f:
+            self.f.close()
+        path = f"{self.output}-{len(self.paths) + 1:04d}.csv{'.gz' if self.compress else ''}"
+        self.paths.append(path)
+        self.f = open_text(path, self.compress)
+        self.writer = csv.writer(self.f)
+        self.writer.writerow([name for name, _, _ in COLUMNS])
+        self.rows_in_part = 0
+
+    def write_page(self, rows: List[List[Any]]):
+        for row in rows:
+            for index in DATETIME_COLUMNS:
+                row[index] = iso_timestamp(row[index])
+        while rows:
+            if self.f is None or (self.chunk_rows and self.rows_in_part >= self.chunk_rows):
+                self._next_part()
+            take = len(rows) if not self.chunk_rows else self.chunk_rows - self.rows_in_part
+            self.writer.writerows(rows[:take])
+            self.rows_in_part += len(rows[:take])
+            rows = rows[take:]
+
+    def close(self):
+        if self.f is None:
+            self._next_part()  # header-only file for an empty export
+        self.f.close()
+
+
+class ParquetExportWriter:
+    """One Parquet file, written a row group at a time (requires pyarrow)"""
+
+    def __init__(self, output: str, row_group_rows: int = 100000, compression: str = "zstd"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        types = {"string": pa.string(), "int": pa.int64(), "float": pa.float64(),
+                 "datetime": pa.timestamp("ms", tz="UTC")}
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in COLUMNS])
+        self.path = f"{output}.parquet"
+        self.paths = [self.path]
+        self.writer = pq.ParquetWriter(self.path, self.schema, compression=compression)
+        self.row_group_rows = row_group_rows
+        self.buffer: List[List[Any]] = []
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        # DateTime columns are epoch ms, which is exactly timestamp[ms]
+        arrays = [self.pa.array(values, type=field.type) for values, field in zip(zip(*self.buffer), self.schema)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        self.buffer = []
+
+    def write_page(self, rows: List[List[Any]]):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.row_group_rows:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def have_pyarrow() -> bool:
+    # find_spec imports the pyarrow package itself, so a missing one raises
+    try:
+        return importlib.util.find_spec("pyarrow.parquet") is not None
+    except ImportError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the denormalized isolate view to Parquet or CSV")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database (default: ../prisma/dev.db)")
+    parser.add_argument("--output", "-o", type=str, default="isolates_export",
+                       help="Output path without extension (default: isolates_export)")
+    parser.add_argument("--format", choices=["auto", "parquet", "csv"], default="auto",
+                       help="auto: Parquet when pyarrow is installed, otherwise CSV (default: auto)")
+    parser.add_argument("--org", action="append", default=None, help="Only this organization ID (repeatable)")
+    parser.add_argument("--sample-type", choices=["clinical", "environmental"], default=None,
+                       help="Only isolates of this sample type")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, default=None,
+                       help="Collected on or after this ISO date")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, default=None,
+                       help="Collected before this ISO date")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                       help=f"Isolates read per keyset page (default: {PAGE_SIZE})")
+    parser.add_argument("--chunk-rows", type=int, default=500000,
+                       help="CSV: rows per part file, 0 for a single file (default: 500000)")
+    parser.add_argument("--gzip", action="store_true", help="CSV: gzip the part files")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.sqlite):
+        parser.error(f"{args.sqlite} does not exist")
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "parquet" if have_pyarrow() else "csv"
+    elif fmt == "parquet" and not have_pyarrow():
+        parser.error("--format parquet requires pyarrow (pip install pyarrow), or use --format csv")
+
+    exporter = IsolateExporter(args.sqlite, args.org, args.sample_type, args.start, args.end, args.page_size)
+    total = exporter.count()
+    writer = ParquetExportWriter(args.output) if fmt == "parquet" else \
+        CsvExportWriter(args.output, args.chunk_rows, args.gzip)
+    print(f"📦 Exporting {total:,} isolates to {fmt}...")
+
+    start = time.perf_counter()
+    exported = 0
+    next_report = 100000
+    for page in exporter.pages():
+        writer.write_page(page)
+        exported += len(page)
+        if exported >= next_report:
+            elapsed = time.perf_counter() - start
+            print(f"   {exported:,}/{total:,} ({exported / elapsed:,.0f} rows/s, peak RSS {peak_rss_mb():.0f} MB)")
+            next_report += 100000
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Exported {exported:,} isolates in {elapsed:.1f}s ({exported / max(elapsed, 1e-9):,.0f} rows/s, "
+          f"peak RSS {peak_rss_mb():.0f} MB)")
+    for path in writer.paths:
+        print(f"   {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
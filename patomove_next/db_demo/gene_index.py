@@ -0,0 +1,663 @@
+#!/usr/bin/env python3
+"""
+Inverted index over GenomicData resistance genes, virulence genes and plasmids
+(requires numpy).
+
+Each genome's resistanceGenes / virulenceGenes / plasmids JSON is decoded once
+into postings: feature ("resistance:blaCTX-M") -> genome rows with the hit's
+identity, kept as sorted CSR arrays so a gene lookup is a slice. The index is
+cached in an .npz file and refreshed only for genomes whose updatedAt changed.
+Queries combine genes with AND/OR and join back to the linked isolate, its
+organization and collection date.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+import argparse
+import numpy as np
+from antibiogram import ID_CHUNK, MISSING_DATE, NO_CODE, REFRESH_LAG_MS, Vocabulary, parse_date
+from sqlite_loader import to_prisma_datetime
+
+CACHE_VERSION = 2
+# Query prefix -> GenomicData column holding that kind of feature
+KINDS = {"resistance": "resistanceGenes", "virulence": "virulenceGenes", "plasmid": "plasmids"}
+KIND_ALIASES = {"res": "resistance", "amr": "resistance", "vir": "virulence", "vf": "virulence"}
+
+# (genomeId, updatedAt, resistanceGenes, virulenceGenes, plasmids, isolateId, label, orgId, collectionDate)
+GenomeRow = Tuple[str, Any, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], Any]
+# (isolateId, genomeId, label, orgId, collectionDate, updatedAt)
+IsolateRow = Tuple[str, Optional[str], str, str, Any, Any]
+
+
+def epoch_ms(value: Any) -> int:
+    value = to_prisma_datetime(value)
+    return MISSING_DATE if value is None else int(value)
+
+
+def pack_strings(values: List[str]) -> np.ndarray:
+    """Newline-joined UTF-8, far smaller in the cache than a fixed-width unicode array"""
+    return np.frombuffer("\n".join(values).encode(), dtype=np.uint8)
+
+
+def unpack_strings(packed: np.ndarray) -> List[str]:
+    text = packed.tobytes().decode()
+    return text.split("\n") if text else []
+
+
+def decode_hits(kind: str, blob: Optional[str]) -> Iterator[Tuple[str, float]]:
+    """(feature, identity) pairs from one JSON column; plasmids are plain names without identity"""
+    if not blob:
+        return
+    try:
+        entries = json.loads(blob)
+    except json.JSONDecodeError:
+        return
+    for entry in entries if isinstance(entries, list) else ():
+        if isinstance(entry, str):
+            yield f"{kind}:{entry}", np.nan
+        elif isinstance(entry, dict) and entry.get("gene"):
+            try:
+                identity = float(entry.get("identity"))
+            except (TypeError, ValueError):
+                identity = np.nan
+            yield f"{kind}:{entry['gene']}", identity
+
+
+class GeneIndex:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.features = Vocabulary()
+        self.isolates = Vocabulary()
+        self.isolate_labels: List[str] = []
+        self.isolate_record: Dict[int, int] = {}  # isolate code -> genome row it is linked to
+        self.orgs = Vocabulary()
+
+        # Per genome row
+        self.alive = np.empty(0, bool)
+        self.updated_at = np.empty(0, np.int64)
+        self.isolate_code = np.empty(0, np.int32)
+        self.org_code = np.empty(0, np.int32)
+        self.collected = np.empty(0, np.int64)
+
+        # Postings, sorted by feature: hits of feature f are [offsets[f], offsets[f + 1])
+        self.hit_feature = np.empty(0, np.int32)
+        self.hit_record = np.empty(0, np.int32)
+        self.hit_identity = np.empty(0, np.float32)
+        self.offsets = np.zeros(1, np.int64)
+
+        self.genome_watermark = 0
+        self.isolate_watermark = 0
+        # Source (row count, max id) at the last refresh, advanced as upsert adds rows
+        self.source_stats: Tuple[int, str] = (0, "")
+
+    @property
+    def size(self) -> int:
+        return int(self.alive[:len(self.ids)].sum())
+
+    def _reserve(self, rows: int):
+        capacity = len(self.alive)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+
+        def grow(array: np.ndarray, fill: Any) -> np.ndarray:
+            grown = np.full(new_capacity, fill, array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self.alive = grow(self.alive, False)
+        self.updated_at = grow(self.updated_at, MISSING_DATE)
+        self.isolate_code = grow(self.isolate_code, NO_CODE)
+        self.org_code = grow(self.org_code, NO_CODE)
+        self.collected = grow(self.collected, MISSING_DATE)
+
+    def _replace_hits(self, rows: np.ndarray, features: List[int], records: List[int], identities: List[float]):
+        """Drop every posting of `rows` and merge in their new hits, keeping feature order"""
+        keep = ~np.isin(self.hit_record, rows) if rows.size else slice(None)
+        hit_feature = np.concatenate([self.hit_feature[keep], np.array(features, np.int32)])
+        hit_record = np.concatenate([self.hit_record[keep], np.array(records, np.int32)])
+        hit_identity = np.concatenate([self.hit_identity[keep], np.array(identities, np.float32)])
+        order = np.argsort(hit_feature, kind="stable")
+        self.hit_feature = hit_feature[order]
+        self.hit_record = hit_record[order]
+        self.hit_identity = hit_identity[order]
+        self.offsets = np.searchsorted(self.hit_feature, np.arange(len(self.features) + 1)).astype(np.int64)
+
+    def link(self, row: int, isolate_id: Optional[str], label: Optional[str], org_id: Optional[str], collected: Any):
+        if isolate_id is None:
+            self.isolate_code[row] = NO_CODE
+            self.org_code[row] = NO_CODE
+            self.collected[row] = MISSING_DATE
+            return
+        code = self.isolates.code(isolate_id)
+        if code == len(self.isolate_labels):
+            self.isolate_labels.append(label)
+        else:
+            self.isolate_labels[code] = label
+        previous = self.isolate_record.get(code)
+        if previous is not None and previous != row and self.isolate_code[previous] == code:
+            self.link(previous, None, None, None, None)
+        self.isolate_record[code] = row
+        self.isolate_code[row] = code
+        self.org_code[row] = self.orgs.code(org_id)
+        self.collected[row] = epoch_ms(collected)
+
+    def upsert(self, genomes: Iterable[GenomeRow]) -> int:
+        """Decode the gene columns of new or changed genomes and rewrite their postings"""
+        rows, features, records, identities = [], [], [], []
+        for genome_id, updated_at, resistance, virulence, plasmids, isolate_id, label, org_id, collected in genomes:
+            row = self.row_of.get(genome_id)
+            if row is None:
+                row = self.row_of[genome_id] = len(self.ids)
+                self.ids.append(genome_id)
+                self.source_stats = (self.source_stats[0] + 1, max(self.source_stats[1], genome_id))
+                self._reserve(len(self.ids))
+            rows.append(row)
+            self.alive[row] = True
+            self.updated_at[row] = epoch_ms(updated_at)
+            self.genome_watermark = max(self.genome_watermark, int(self.updated_at[row]))
+            self.link(row, isolate_id, label, org_id, collected)
+            for kind, blob in (("resistance", resistance), ("virulence", virulence), ("plasmid", plasmids)):
+                for feature, identity in decode_hits(kind, blob):
+                    features.append(self.features.code(feature))
+                    records.append(row)
+                    identities.append(identity)
+        if rows:
+            self._replace_hits(np.array(rows, np.int32), features, records, identities)
+        return len(rows)
+
+    def stale(self, versions: Iterable[Tuple[str, Any]]) -> List[str]:
+        stale = []
+        for genome_id, updated_at in versions:
+            row = self.row_of.get(genome_id)
+            if row is None or self.updated_at[row] != epoch_ms(updated_at):
+                stale.append(genome_id)
+        return stale
+
+    def relink(self, isolates: Iterable[IsolateRow]):
+        """Apply isolates whose genome link, org or collection date changed"""
+        for isolate_id, genome_id, label, org_id, collected, updated_at in isolates:
+            self.isolate_watermark = max(self.isolate_watermark, epoch_ms(updated_at))
+            if genome_id is None:
+                continue  # no link in either relation; genomes are never unlinked, so keep the current one
+            code = self.isolates.codes.get(isolate_id)
+            previous = self.isolate_record.get(code) if code is not None else None
+            row = self.row_of.get(genome_id)
+            if previous is not None and previous != row and self.isolate_code[previous] == code:
+                self.link(previous, None, None, None, None)
+                del self.isolate_record[code]
+            if row is not None:
+                self.link(row, isolate_id, label, org_id, collected)
+
+    def retain(self, live_ids: Iterable[str]) -> int:
+        """Tombstone genomes that no longer exist and drop their postings"""
+        live = set(live_ids)
+        gone = [row for genome_id, row in self.row_of.items() if genome_id not in live]
+        for row in gone:
+            del self.row_of[self.ids[row]]
+            self.alive[row] = False
+        if gone:
+            self._replace_hits(np.array(gone, np.int32), [], [], [])
+        return len(gone)
+
+    def save(self, path: str, source: str):
+        n = len(self.ids)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=CACHE_VERSION,
+            source=source,
+            watermarks=np.array([self.genome_watermark, self.isolate_watermark], np.int64),
+            source_stats=np.array([self.source_stats[0], self.source_stats[1]], dtype=str),
+            ids=pack_strings(self.ids),
+            features=pack_strings(self.features.values),
+            isolates=pack_strings(self.isolates.values),
+            isolate_labels=pack_strings([label or "" for label in self.isolate_labels]),
+            orgs=pack_strings(self.orgs.values),
+            alive=self.alive[:n],
+            updated_at=self.updated_at[:n],
+            isolate_code=self.isolate_code[:n],
+            org_code=self.org_code[:n],
+            collected=self.collected[:n],
+            hit_feature=self.hit_feature,
+            hit_record=self.hit_record,
+            hit_identity=self.hit_identity
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source: str) -> Optional["GeneIndex"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as cache:
+            if int(cache["version"]) != CACHE_VERSION or str(cache["source"]) != source:
+                return None
+            index = cls()
+            index.ids = unpack_strings(cache["ids"])
+            index.alive = cache["alive"]
+            index.row_of = {genome_id: row for row, genome_id in enumerate(index.ids) if index.alive[row]}
+            index.features = Vocabulary(unpack_strings(cache["features"]))
+            index.isolates = Vocabulary(unpack_strings(cache["isolates"]))
+            index.isolate_labels = unpack_strings(cache["isolate_labels"])
+            index.orgs = Vocabulary(unpack_strings(cache["orgs"]))
+            index.updated_at = cache["updated_at"]
+            index.isolate_code = cache["isolate_code"]
+            index.org_code = cache["org_code"]
+            index.collected = cache["collected"]
+            index.hit_feature = cache["hit_feature"]
+            index.hit_record = cache["hit_record"]
+            index.hit_identity = cache["hit_identity"]
+            index.genome_watermark, index.isolate_watermark = cache["watermarks"].tolist()
+            count, max_id = cache["source_stats"].tolist()
+            index.source_stats = (int(count), max_id)
+        index.offsets = np.searchsorted(index.hit_feature, np.arange(len(index.features) + 1)).astype(np.int64)
+        linked = np.flatnonzero(index.alive & (index.isolate_code != NO_CODE))
+        index.isolate_record = dict(zip(index.isolate_code[linked].tolist(), linked.tolist()))
+        return index
+
+    def resolve(self, term: "Term") -> List[int]:
+        """Feature codes a query term matches"""
+        kinds = [term.kind] if term.kind else list(KINDS)
+        codes = []
+        for kind in kinds:
+            target = f"{kind}:{term.name}"
+            if term.prefix:
+                codes.extend(code for feature, code in self.features.codes.items() if feature.startswith(target))
+            elif target in self.features.codes:
+                codes.append(self.features.codes[target])
+        return codes
+
+    def postings(self, term: "Term") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(records, features, identities) of every hit matching a term"""
+        slices = [slice(self.offsets[code], self.offsets[code + 1]) for code in self.resolve(term)]
+        if not slices:
+            empty = np.empty(0, np.int32)
+            return empty, empty, np.empty(0, np.float32)
+        records = np.concatenate([self.hit_record[s] for s in slices])
+        features = np.concatenate([self.hit_feature[s] for s in slices])
+        identities = np.concatenate([self.hit_identity[s] for s in slices])
+        if term.min_identity is not None:
+            keep = identities >= term.min_identity
+            records, features, identities = records[keep], features[keep], identities[keep]
+        return records, features, identities
+
+    def evaluate(self, node: Any) -> np.ndarray:
+        """Boolean mask over genome rows matching a parsed query"""
+        if isinstance(node, Term):
+            mask = np.zeros(len(self.ids), bool)
+            mask[self.postings(node)[0]] = True
+            return mask
+        op, left, right = node
+        if op == "AND":
+            return self.evaluate(left) & self.evaluate(right)
+        return self.evaluate(left) | self.evaluate(right)
+
+    def search(self, query: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               org: Optional[str] = None, limit: Optional[int] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """Matching genomes (newest collection first) with their isolate and matched hits; returns (total, rows)"""
+        tree = parse_query(query)
+        rows = np.flatnonzero(self.evaluate(tree) & self.alive[:len(self.ids)])
+        if start is not None:
+            rows = rows[self.collected[rows] >= int(start.timestamp() * 1000)]
+        if end is not None:
+            collected = self.collected[rows]
+            rows = rows[(collected < int(end.timestamp() * 1000)) & (collected != MISSING_DATE)]
+        if org is not None:
+            rows = rows[self.org_code[rows] == self.orgs.codes.get(org, -2)]
+        total = int(rows.size)
+        rows = rows[np.argsort(self.collected[rows], kind="stable")[::-1]][:limit]  # undated (MISSING_DATE) last
+
+        # Matched hits for the returned rows only
+        matched: Dict[int, List[Dict[str, Any]]] = {int(row): [] for row in rows}
+        for term in terms_of(tree):
+            records, features, identities = self.postings(term)
+            keep = np.isin(records, rows)
+            for record, feature, identity in zip(records[keep].tolist(), features[keep].tolist(), identities[keep].tolist()):
+                kind, name = self.features.values[feature].split(":", 1)
+                matched[record].append({"kind": kind, "name": name,
+                                        "identity": None if identity != identity else round(identity, 2)})
+
+        results = []
+        for row in rows.tolist():
+            isolate = int(self.isolate_code[row])
+            collected = int(self.collected[row])
+            results.append({
+                "genomeId": self.ids[row],
+                "isolateId": self.isolates.values[isolate] if isolate != NO_CODE else None,
+                "label": self.isolate_labels[isolate] if isolate != NO_CODE else None,
+                "orgId": self.orgs.values[self.org_code[row]] if self.org_code[row] != NO_CODE else None,
+                "collectionDate": datetime.fromtimestamp(collected / 1000).isoformat() if collected != MISSING_DATE else None,
+                "matched": matched[row]
+            })
+        return total, results
+
+
+class Term:
+    """One query term: [kind:]name[*][@min_identity], e.g. res:blaCTX-M*@98 or plasmid:plasmid_3"""
+
+    def __init__(self, text: str):
+        name, _, identity = text.partition("@")
+        kind, _, rest = name.partition(":")
+        kind = KIND_ALIASES.get(kind.lower(), kind.lower())
+        if rest and kind in KINDS:
+            self.kind, name = kind, rest
+        else:
+            self.kind = None
+        self.prefix = name.endswith("*")
+        self.name = name.rstrip("*")
+        self.min_identity = float(identity) if identity else None
+        if not self.name:
+            raise ValueError(f"Empty gene name in query term {text!r}")
+
+
+# Gene names may carry attached parentheses, e.g. tet(A) or aac(6')-Ib; a bare "(" opens a group
+TOKEN_PATTERN = re.compile(r"\s*([^\s()&|]+(?:\([^\s()]*\)[^\s()&|]*)*|\(|\)|&|\|)")
+
+
+def parse_query(query: str) -> Any:
+    """Parse terms joined by AND/& and OR/| (AND binds tighter) with parentheses into a tree"""
+    tokens = [token for token in TOKEN_PATTERN.findall(query)]
+    tokens = ["AND" if t in ("&", "and", "AND") else "OR" if t in ("|", "or", "OR") else t for t in tokens]
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def expression() -> Any:
+        node = conjunction()
+        while peek() == "OR":
+            take()
+            node = ("OR", node, conjunction())
+        return node
+
+    def conjunction() -> Any:
+        node = atom()
+        while peek() == "AND":
+            take()
+            node = ("AND", node, atom())
+        return node
+
+    def atom() -> Any:
+        token = peek()
+        if token is None or token in ("AND", "OR", ")"):
+            raise ValueError(f"Expected a gene term in query {query!r}")
+        take()
+        if token == "(":
+            node = expression()
+            if peek() != ")":
+                raise ValueError(f"Missing ')' in query {query!r}")
+            take()
+            return node
+        return Term(token)
+
+    tree = expression()
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()!r} in query {query!r}")
+    return tree
+
+
+def terms_of(node: Any) -> Iterator[Term]:
+    if isinstance(node, Term):
+        yield node
+    else:
+        yield from terms_of(node[1])
+        yield from terms_of(node[2])
+
+
+class SqliteGenomeSource:
+    """GenomicData gene columns plus the linked isolate, from the Patomove SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.name = f"sqlite:{os.path.abspath(db_path)}"
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def genome_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return self.conn.execute('SELECT "id", "updatedAt" FROM "GenomicData" WHERE "updatedAt" > ?', (since_ms,))
+
+    def genomes(self, ids: List[str]) -> Iterator[GenomeRow]:
+        # Primary link (Isolate.genomeId) first, then the analysis relation
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            yield from self.conn.execute(
+                'SELECT g."id", g."updatedAt", g."resistanceGenes", g."virulenceGenes", g."plasmids", '
+                'i."id", i."label", i."orgId", i."collectionDate" FROM "GenomicData" g '
+                'LEFT JOIN "Isolate" i ON i."id" = COALESCE('
+                '(SELECT p."id" FROM "Isolate" p WHERE p."genomeId" = g."id" LIMIT 1), '
+                '(SELECT a."B" FROM "_IsolateAnalyses" a WHERE a."A" = g."id" LIMIT 1)) '
+                f'WHERE g."id" IN ({", ".join("?" * len(chunk))})', chunk
+            )
+
+    def changed_isolates(self, since_ms: int) -> Iterable[IsolateRow]:
+        # Same link resolution as genomes(): the loader links analysed genomes only through _IsolateAnalyses
+        return self.conn.execute(
+            'SELECT i."id", COALESCE(i."genomeId", '
+            '(SELECT a."A" FROM "_IsolateAnalyses" a WHERE a."B" = i."id" LIMIT 1)), '
+            'i."label", i."orgId", i."collectionDate", i."updatedAt" FROM "Isolate" i '
+            'WHERE i."updatedAt" > ?', (since_ms,)
+        )
+
+    def genome_stats(self) -> Tuple[int, str]:
+        """Row count and max id, answered from an index without fetching any IDs"""
+        return tuple(self.conn.execute('SELECT COUNT(*), COALESCE(MAX("id"), \'\') FROM "GenomicData"').fetchone())
+
+    def genome_ids(self) -> Iterable[str]:
+        return (row[0] for row in self.conn.execute('SELECT "id" FROM "GenomicData"'))
+
+
+class DatasetGenomeSource:
+    """Genomes from generate_db_demo.py JSON output, linked to isolates by filename label like sqlite_loader"""
+
+    def __init__(self, path: str):
+        self.name = f"data:{os.path.abspath(path)}"
+        with open(path) as f:
+            data = json.load(f)
+        self.rows = data.get("genomicData", [])
+        self.isolates_by_label = {isolate["label"]: isolate for isolate in data.get("isolates", [])}
+
+    def genome_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return [(g["id"], g.get("updatedAt")) for g in self.rows]
+
+    def genomes(self, ids: List[str]) -> Iterator[GenomeRow]:
+        wanted = set(ids)
+        for g in self.rows:
+            if g["id"] not in wanted:
+                continue
+            isolate = self.isolates_by_label.get(g["originalFilename"].rsplit(".", 1)[0], {})
+            yield (g["id"], g.get("updatedAt"), g.get("resistanceGenes"), g.get("virulenceGenes"), g.get("plasmids"),
+                   isolate.get("id"), isolate.get("label"), isolate.get("orgId"), isolate.get("collectionDate"))
+
+    def changed_isolates(self, since_ms: int) -> Iterable[IsolateRow]:
+        return []
+
+    def genome_stats(self) -> Tuple[int, str]:
+        return len(self.rows), max(self.genome_ids(), default="")
+
+    def genome_ids(self) -> Iterable[str]:
+        return (g["id"] for g in self.rows)
+
+
+def refresh(index: GeneIndex, source: Any) -> Dict[str, int]:
+    stale = index.stale(source.genome_versions(index.genome_watermark - REFRESH_LAG_MS))
+    updated = index.upsert(source.genomes(stale))
+    index.relink(source.changed_isolates(index.isolate_watermark - REFRESH_LAG_MS))
+    # Deletions leave no updatedAt; only a source row count or max id other than the ones recorded with the
+    # watermark (plus the rows upsert added) needs the full ID scan. See antibiogram.refresh
+    stats = source.genome_stats()
+    scanned = stats != index.source_stats
+    removed = index.retain(source.genome_ids()) if scanned else 0
+    index.source_stats = stats
+    return {"updated": updated, "removed": removed, "scanned": int(scanned)}
+
+
+def load_index(source: Any, cache_path: Optional[str]) -> Tuple[GeneIndex, Dict[str, int]]:
+    index = GeneIndex.load(cache_path, source.name) if cache_path else None
+    cached = index is not None
+    index = index or GeneIndex()
+    changes = refresh(index, source)
+    if cache_path and (not cached or changes["updated"] or changes["scanned"]):
+        index.save(cache_path, source.name)
+    return index, {**changes, "cached": int(cached)}
+
+
+class SyntheticGenomeSource(DatasetGenomeSource):
+    """N genomes drawn from the generator's gene vocabularies and rates, for index benchmarks"""
+
+    def __init__(self, count: int, seed: int = 0):
+        from generate_db_demo import DemoDataGenerator
+        gen = DemoDataGenerator(num_isolates=1)
+        rng = np.random.default_rng(seed)
+        self.name = f"synthetic:{count}:{seed}"
+        orgs = [f"org_{i}" for i in range(5)]
+        now_ms = int(time.time() * 1000)
+        self.rows = []
+        self.links = {}
+        for i in range(count):
+            genome_id = f"genome_{i:07d}"
+            resistance = virulence = plasmids = None
+            if rng.random() > 0.5:
+                resistance = json.dumps([{"gene": gen.resistance_gene_names[g], "identity": round(float(x), 2)}
+                                         for g, x in zip(rng.integers(0, len(gen.resistance_gene_names), rng.integers(0, 6)),
+                                                         rng.uniform(95, 100, 6))])
+            if rng.random() > 0.7:
+                virulence = json.dumps([{"gene": f"vir_{g}", "identity": round(float(x), 2)}
+                                        for g, x in zip(rng.integers(1, 51, rng.integers(0, 4)), rng.uniform(90, 100, 4))])
+            if rng.random() > 0.8:
+                plasmids = json.dumps([f"plasmid_{p}" for p in rng.integers(1, 11, rng.integers(0, 4))])
+            self.rows.append({"id": genome_id, "updatedAt": now_ms, "resistanceGenes": resistance,
+                              "virulenceGenes": virulence, "plasmids": plasmids})
+            self.links[genome_id] = (f"isolate_{i:07d}", f"ISO-{i + 1:07d}", orgs[i % len(orgs)],
+                                     now_ms - int(rng.integers(0, 180)) * 86400000)
+
+    def genomes(self, ids: List[str]) -> Iterator[GenomeRow]:
+        wanted = set(ids)
+        for g in self.rows:
+            if g["id"] in wanted:
+                yield (g["id"], g["updatedAt"], g["resistanceGenes"], g["virulenceGenes"], g["plasmids"]) + self.links[g["id"]]
+
+
+BENCHMARK_QUERIES = [
+    "res:blaCTX-M@98",
+    "res:blaCTX-M & plasmid:plasmid_3",
+    "res:blaTEM | res:sul1",
+    "(res:blaCTX-M@99 | res:tet(A)@99) & vir:vir_7",
+    "res:bla*",
+]
+
+
+def run_benchmark(count: int, cache_path: str, repeats: int = 20) -> Dict[str, Any]:
+    print(f"🧬 Synthesizing {count:,} genomes from the generator's gene vocabularies...")
+    source = SyntheticGenomeSource(count)
+
+    start = time.perf_counter()
+    index = GeneIndex()
+    refresh(index, source)
+    build_seconds = time.perf_counter() - start
+    index.save(cache_path, source.name)
+    start = time.perf_counter()
+    index = GeneIndex.load(cache_path, source.name)
+    load_seconds = time.perf_counter() - start
+    print(f"✅ Indexed {index.size:,} genomes ({len(index.hit_record):,} postings, {len(index.features)} features) "
+          f"in {build_seconds:.2f}s; cache load {load_seconds:.2f}s")
+
+    queries = {}
+    month_ago = datetime.fromtimestamp(time.time() - 30 * 86400)
+    for query in BENCHMARK_QUERIES:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            total, _ = index.search(query, start=month_ago, limit=50)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        queries[query] = {"matches_last_30d": total, "p50_ms": round(1000 * timings[len(timings) // 2], 2),
+                          "max_ms": round(1000 * timings[-1], 2)}
+        print(f"   {query:<45} {total:>8,} matches  p50 {queries[query]['p50_ms']:.1f}ms")
+    return {"genomes": count, "build_seconds": round(build_seconds, 2), "load_seconds": round(load_seconds, 2),
+            "queries": queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query genomes by resistance genes, virulence genes and plasmids")
+    parser.add_argument("query", nargs="?", default=None,
+                       help="e.g. 'res:blaCTX-M@98 & plasmid:plasmid_3' (terms: [kind:]name[*][@min_identity])")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Use a generated demo JSON file instead of the database")
+    parser.add_argument("--cache", type=str, default="gene_index_cache.npz",
+                       help="Index cache file (default: gene_index_cache.npz)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Build the index without reading or writing the cache")
+    parser.add_argument("--from", dest="start", type=parse_date, default=None,
+                       help="Isolates collected on or after this ISO date")
+    parser.add_argument("--to", dest="end", type=parse_date, default=None,
+                       help="Isolates collected before this ISO date")
+    parser.add_argument("--org", type=str, default=None, help="Only isolates of this organization ID")
+    parser.add_argument("--limit", type=int, default=50, help="Rows to return (default: 50)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    parser.add_argument("--features", action="store_true", help="List indexed features with genome counts")
+    parser.add_argument("--benchmark", type=int, default=None, metavar="N",
+                       help="Build and query an index of N synthetic genomes (e.g. 1000000)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = run_benchmark(args.benchmark, args.cache)
+        if args.format == "json":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        return
+    if not args.query and not args.features:
+        parser.error("give a query, --features or --benchmark N")
+
+    if args.data:
+        source = DatasetGenomeSource(args.data)
+    elif os.path.exists(args.sqlite):
+        source = SqliteGenomeSource(args.sqlite)
+    else:
+        parser.error(f"{args.sqlite} does not exist (use --data to read a generated dataset)")
+
+    start = time.perf_counter()
+    # Generated datasets carry no updatedAt to refresh from, so they are always indexed in full
+    index, changes = load_index(source, None if args.no_cache or args.data else args.cache)
+    origin = "cache" if changes["cached"] else "source"
+    print(f"🧬 {index.size} genomes, {len(index.hit_record)} postings from {origin} in "
+          f"{time.perf_counter() - start:.3f}s ({changes['updated']} decoded, {changes['removed']} removed)",
+          file=sys.stderr)
+
+    if args.features:
+        counts = np.diff(index.offsets)
+        for code in np.argsort(-counts, kind="stable").tolist():
+            print(f"   {index.features.values[code]:<30} {counts[code]}")
+        return
+
+    start = time.perf_counter()
+    try:
+        total, results = index.search(args.query, start=args.start, end=args.end, org=args.org, limit=args.limit)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"🔎 {total} matching genomes in {1000 * (time.perf_counter() - start):.1f} ms"
+          f"{f' (showing {len(results)})' if len(results) < total else ''}", file=sys.stderr)
+
+    if args.format == "json":
+        json.dump({"total": total, "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    for r in results:
+        hits = ", ".join(f"{m['name']}" + (f" ({m['identity']}%)" if m["identity"] is not None else "")
+                         for m in r["matched"])
+        print(f"   {r['label'] or '-':<12} {(r['collectionDate'] or '-')[:10]}  {r['genomeId']}  {hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,23 +5,149 @@ Creates realistic demo data for 500 isolates with all related entities.
 """
 
 import json
+import math
+import os
 import uuid
 import random
 import requests
+import resource
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional, Iterable, Iterator, Sequence
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
+from journal import PopulateJournal
+from metrics import LatencyHistogram
+from streaming import IdPool, KeyColumn, NdjsonWriter, JsonStreamWriter
+from telemetry import Telemetry
+from workload import WorkloadProfile, DateSampler, ZipfPicker, geometric
+
+# Rows per shard. Shard boundaries (and therefore every shard's RNG stream) are fixed,
+# so seeded output is byte-identical whatever the number of workers.
+SHARD_SIZE = 10000
+
+# Reference "now" for seeded runs, so dates are reproducible too
+DEFAULT_SEEDED_REFERENCE_DATE = datetime(2025, 1, 1)
+
+# Table -> method producing one shard of rows: method(rows: range, rng, *foreign_key_pools)
+SHARD_METHODS = {
+    "environments": "environment_rows",
+    "patients": "patient_rows",
+    "patientAdts": "patient_adt_rows",
+    "phenotypeProfiles": "phenotype_profile_rows",
+    "isolates": "isolate_rows",
+    "genomicData": "genomic_data_rows",
+    "treatmentOutcomes": "treatment_outcome_rows",
+}
+VECTORIZED_TABLES = {"phenotypeProfiles", "isolates", "genomicData"}
+
+# Endpoints with a POST /api/<endpoint>/batch route (array body -> { ids })
+BATCH_ENDPOINTS = {"environments", "patients", "phenotypes", "isolates", "genomics"}
+
+# Row fields holding another row's ID, translated to server IDs when populating
+FOREIGN_KEY_FIELDS = ("orgId", "patientId", "environmentId", "phenotypeId", "isolateId")
+
+def sample_in_order(population: Sequence[Any], k: int, rng: random.Random) -> Iterator[Any]:
+    """Choose k items uniformly at random, yielding them in population order (selection sampling)"""
+    n = len(population)
+    needed = k
+    for i in range(n):
+        if needed == 0:
+            return
+        if rng.random() * (n - i) < needed:
+            yield population[i]
+            needed -= 1
+
+# Shard worker state, set once per process by the pool initializer
+_shard_worker: Dict[str, Any] = {}
+
+def _init_shard_worker(generator_kwargs: Dict[str, Any], table: str, args: tuple):
+    _shard_worker["generator"] = DemoDataGenerator(**generator_kwargs)
+    _shard_worker["table"] = table
+    _shard_worker["args"] = args
+
+def _generate_shard(shard: int) -> List[Dict[str, Any]]:
+    generator = _shard_worker["generator"]
+    return list(generator.generate_shard(_shard_worker["table"], shard, *_shard_worker["args"]))
+
+# Statuses a POST is resent on: the server refused the request without running it
+UNSERVED_STATUSES = frozenset({503})
+
+class GatewayRetry(Retry):
+    """Retry that also retries POSTs on a 503, and on status_forcelist codes for idempotent methods.
+
+    A 503 means the server turned the request away, so resending cannot duplicate a row. A 502 or 504
+    comes from the proxy and says nothing about whether the upstream committed the row, and most
+    columns (Isolate.label among them) are not unique, so a POST is not resent on those.
+    """
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code in UNSERVED_STATUSES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
 
 class DemoDataGenerator:
-    def __init__(self, num_isolates: int = 500, populate_db: bool = False, base_url: str = "http://localhost:3000/api"):
+    def __init__(self, num_isolates: int = 500, populate_db: bool = False, base_url: str = "http://localhost:3000/api",
+                 concurrency: int = 8, max_retries: int = 3, batch_size: int = 1, engine: str = "python",
+                 seed: Optional[int] = None, workers: int = 1, reference_date: Optional[datetime] = None,
+                 fasta_storage: Optional[str] = None, profile: bool = False,
+                 workload: Optional[WorkloadProfile] = None):
         self.num_isolates = num_isolates
         self.num_patients = min(50, num_isolates // 4)  # 1 patient per 4-10 isolates
         self.num_environments = 10
-        self.timestamp = datetime.now().isoformat()
+        
+        # Workload profile: multi-year seasonal dates, Zipf-skewed foreign keys and independently
+        # sized tables. None keeps the legacy 6-month uniform data (and its RNG call sequence).
+        self.workload = workload
+        self._date_sampler = None
+        self._zipf_pickers: Dict[tuple, ZipfPicker] = {}
+        if workload:
+            self.num_patients = max(1, round(num_isolates * workload.patients_per_isolate))
+            self.num_environments = workload.environments
+        
+        # Reproducibility: every shard derives its RNG and UUIDs from (seed, table, shard).
+        # Unseeded runs draw a seed so the metadata still records how to reproduce them.
+        self.seeded = seed is not None
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        if reference_date is None:
+            reference_date = DEFAULT_SEEDED_REFERENCE_DATE if self.seeded else datetime.now()
+        self.reference_date = reference_date
+        self.workers = max(1, workers)
+        
+        # Storage root to write a real synthetic FASTA file for every genome record into
+        self.fasta_storage = fasta_storage
+        
+        self.timestamp = self.reference_date.isoformat()
         self.populate_db = populate_db
         self.base_url = base_url
         
+        # Population engine: max in-flight requests per tier, 5xx retry budget and rows per request
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.batch_size = max(1, batch_size)
+        self.session = self.create_session() if populate_db else None
+        
+        # Per-endpoint POST latency and tier wall time, reported by benchmark.py
+        self.endpoint_latency: Dict[str, LatencyHistogram] = {}
+        self.endpoint_seconds: Dict[str, float] = {}
+        self.endpoint_created: Dict[str, int] = {}
+        
+        # Per-phase wall/CPU time and per-endpoint bytes/status counts; profile=True adds cProfile capture
+        self.telemetry = Telemetry(profile=profile)
+        
+        # "numpy" generates phenotype profiles, isolates and genomic data column-wise
+        self.engine = engine
+        self._vector_engine = None
+        
+        # Local row ID -> server-assigned ID, and rows that could not be created (local ID -> reason).
+        # Rows keep their generated IDs; foreign keys are translated when each row is posted.
+        self.id_map: Dict[str, str] = {}
+        self.failed_rows: Dict[str, Dict[str, str]] = {}
+        self.journal = None
+        
         # Track created IDs for database population
         self.created_org_ids = []
         self.created_patient_ids = []
@@ -51,37 +177,341 @@ class DemoDataGenerator:
             "laboratory", "pharmacy", "food_service", "waste_management"
         ]
         
-    def generate_uuid(self) -> str:
-        return str(uuid.uuid4())
+        # Value vocabularies for the high-volume tables (shared with the NumPy engine)
+        self.mic_values = [0.5, 1, 2, 4, 8, 16, 32, 64, 128]
+        self.ast_methods = ["VITEK2", "MicroScan", "broth_microdilution", "disk_diffusion"]
+        self.ast_panels = ['standard panel', 'extended panel', 'targeted testing']
+        self.isolate_contexts = ['routine culture', 'surveillance', 'outbreak investigation', 'clinical isolate']
+        self.validation_statuses = ["valid", "valid", "valid", "pending", "invalid"]  # Mostly valid
+        self.genome_processing_statuses = ["uploaded", "validated", "analyzing", "completed"]
+        self.sequencing_platforms = ["Illumina_MiSeq", "Illumina_NextSeq", "ONT_MinION", "PacBio_Sequel"]
+        self.assemblers = ["SPAdes", "SKESA", "Unicycler"]
+        self.mlst_schemes = ["ecoli", "saureus", "kpneumoniae"]
+        self.resistance_gene_names = ["blaTEM", "blaCTX-M", "aac(6')-Ib", "sul1", "tet(A)"]
+        self.uploaders = ["user_001", "user_002", "user_003"]
+        self.genome_contexts = ['clinical isolate', 'surveillance sample', 'outbreak investigation', 'quality control']
+        
+    def vector_engine(self):
+        """Lazily create the NumPy engine so numpy stays optional for the default engine"""
+        if self._vector_engine is None:
+            from vector_engine import VectorizedEngine
+            self._vector_engine = VectorizedEngine(self)
+        return self._vector_engine
     
-    def random_date_last_6_months(self, index: int = 0) -> str:
+    def generate_uuid(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    
+    def random_date_last_6_months(self, rng: random.Random, index: int = 0) -> str:
         """Generate dates spread over last 6 months"""
-        base_date = datetime.now() - timedelta(days=180)
-        days_offset = (index % 180) + random.randint(0, 10)
+        base_date = self.reference_date - timedelta(days=180)
+        days_offset = (index % 180) + rng.randint(0, 10)
         date = base_date + timedelta(days=days_offset)
         return date.isoformat()
     
-    def post_to_api(self, endpoint: str, data: Dict[str, Any]) -> Optional[str]:
-        """Post data to API endpoint and return created ID"""
+    def collection_date(self, rng: random.Random, index: int = 0) -> str:
+        """Date of a sample, test or upload: the workload's seasonal curve, else the last 6 months"""
+        if self.workload:
+            return self.date_sampler().sample(rng).isoformat()
+        return self.random_date_last_6_months(rng, index)
+    
+    def date_sampler(self) -> DateSampler:
+        if self._date_sampler is None:
+            self._date_sampler = DateSampler(self.workload, self.reference_date)
+        return self._date_sampler
+    
+    def zipf_picker(self, size: int, kind: str) -> ZipfPicker:
+        """Cached skewed picker over a pool of `size` rows; kind is patient or org"""
+        key = (size, kind)
+        if key not in self._zipf_pickers:
+            self._zipf_pickers[key] = ZipfPicker(size, getattr(self.workload, f"{kind}_skew"),
+                                                 getattr(self.workload, f"{kind}_skew_offset"))
+        return self._zipf_pickers[key]
+    
+    def pick(self, rng: random.Random, pool: Sequence[str], kind: str) -> str:
+        """rng.choice, or under a workload the Zipf-skewed choice for patient/org pools"""
+        return pool[self.pick_index(rng, pool, kind)]
+    
+    def pick_index(self, rng: random.Random, pool: Sequence[str], kind: str) -> int:
+        """Position of pick()'s choice; rng.randrange(n) makes the same draw as rng.choice"""
+        if self.workload:
+            return self.zipf_picker(len(pool), kind).pick(rng)
+        return rng.randrange(len(pool))
+    
+    def shard_rng(self, table: str, shard: int) -> random.Random:
+        # String seeds are hashed with SHA-512, so streams are stable across runs and platforms
+        return random.Random(f"{self.seed}:{table}:{shard}")
+    
+    def shard_worker_kwargs(self) -> Dict[str, Any]:
+        """Constructor arguments that reproduce this generator's rows in a worker process"""
+        return {
+            "num_isolates": self.num_isolates,
+            "engine": self.engine,
+            "seed": self.seed,
+            "reference_date": self.reference_date,
+            "workload": self.workload
+        }
+    
+    def generate_shard(self, table: str, shard: int, *args) -> Iterator[Dict[str, Any]]:
+        """Generate rows [shard * SHARD_SIZE, ...) of a table from that shard's own RNG"""
+        total = self.table_size(table, *args)
+        rows = range(shard * SHARD_SIZE, min((shard + 1) * SHARD_SIZE, total))
+        method = SHARD_METHODS[table]
+        if self.engine == "numpy" and table in VECTORIZED_TABLES:
+            engine = self.vector_engine()
+            return getattr(engine, method)(rows, engine.shard_rng(table, shard), *args)
+        return getattr(self, method)(rows, self.shard_rng(table, shard), *args)
+    
+    def table_size(self, table: str, *args) -> int:
+        if table == "environments":
+            return self.num_environments
+        if table == "patients":
+            return self.num_patients
+        if table == "patientAdts":
+            return len(args[0])  # one shard row per patient
+        if table == "phenotypeProfiles":
+            # Generate 1 profile per 2-3 isolates (not all isolates have AST)
+            if self.workload:
+                return round(self.num_isolates * self.workload.phenotypes_per_isolate)
+            return self.num_isolates // 3
+        if table == "isolates":
+            return self.num_isolates
+        if table == "genomicData":
+            # Generate some demo genome files (20% of isolates have genomes)
+            # This simulates uploaded FASTA files waiting to be linked
+            if self.workload:
+                return max(5, round(len(args[0]) * self.workload.genomes_per_isolate))
+            return max(5, int(len(args[0]) * 0.2))
+        if table == "treatmentOutcomes":
+            return len(args[0])  # one shard row per isolate
+        raise ValueError(f"Unknown table: {table}")
+    
+    def iter_sharded(self, table: str, *args) -> Iterator[Dict[str, Any]]:
+        """Yield a table's rows shard by shard, fanning shards out to a process pool when workers > 1.
+        
+        Results are consumed in shard order, so the output is identical to a single-process run.
+        """
+        num_shards = -(-self.table_size(table, *args) // SHARD_SIZE)
+        if self.workers == 1 or num_shards < 2:
+            for shard in range(num_shards):
+                yield from self.generate_shard(table, shard, *args)
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_shard_worker,
+                                 initargs=(self.shard_worker_kwargs(), table, args)) as pool:
+            pending = deque()
+            for shard in range(num_shards):
+                pending.append(pool.submit(_generate_shard, shard))
+                if len(pending) >= 2 * self.workers:  # bound finished-but-unconsumed shards
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    
+    def create_session(self) -> requests.Session:
+        """Create a pooled HTTP session that retries with exponential backoff where it cannot duplicate rows.
+
+        Connection failures and 503s are retried for every method, since the server never ran the
+        request. A POST that got a 500/502/504 or timed out mid-response may already have committed its
+        row, so it is not retried here (that would duplicate it or trip a @unique constraint); it is
+        recorded as failed and retried by a --resume run instead. Idempotent requests also retry 502/504.
+        """
+        retry = GatewayRetry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # excludes POST, except on a 503
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def attach_journal(self, journal):
+        """Record every created/failed row in a PopulateJournal and skip rows it already created"""
+        self.journal = journal
+        self.id_map = journal.id_map
+        journal.start({
+            "seed": self.seed,
+            "num_isolates": self.num_isolates,
+            "engine": self.engine,
+            "reference_date": self.reference_date.isoformat(),
+            "base_url": self.base_url,
+            "workload": self.workload.to_dict() if self.workload else None
+        })
+    
+    def record_created(self, endpoint: str, local_id: Optional[str], server_id: str):
+        if local_id is None:
+            return
+        self.id_map[local_id] = server_id
+        self.failed_rows.pop(local_id, None)
+        if self.journal:
+            self.journal.record_created(endpoint, local_id, server_id)
+    
+    def record_failure(self, endpoint: str, local_id: Optional[str], error: str):
+        if local_id is None:
+            return
+        self.failed_rows[local_id] = {"endpoint": endpoint, "error": error}
+        if self.journal:
+            self.journal.record_failure(endpoint, local_id, error)
+    
+    def send(self, path: str, body: Any, timeout: float = 10) -> Any:
+        """POST a JSON body, timing it under `path`; raises RequestException on failure"""
+        latency = self.endpoint_latency.setdefault(path, LatencyHistogram())
+        stats = self.telemetry.endpoint(path, latency)
+        # Encode here rather than via json= so serialization is timed apart from the request
+        start = time.perf_counter()
+        data = json.dumps(body).encode()
+        serialize_seconds = time.perf_counter() - start
+        response = None
+        try:
+            start = time.perf_counter()
+            response = self.session.post(f"{self.base_url}/{path}", data=data, timeout=timeout,
+                                         headers={"Content-Type": "application/json"})
+            latency.record(time.perf_counter() - start)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException:
+            latency.record_error()
+            raise
+        finally:
+            stats.record(response.status_code if response is not None else None, len(data),
+                         len(response.content) if response is not None else 0, serialize_seconds)
+    
+    def describe_error(self, path: str, e: requests.exceptions.RequestException) -> str:
+        print(f"❌ Failed to create {path}: {e}")
+        error = str(e)
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_detail = e.response.json()
+                print(f"   Error details: {error_detail}")
+                error = f"{error}: {error_detail}"
+            except:
+                print(f"   Response: {e.response.text}")
+        return error
+    
+    def post_to_api(self, endpoint: str, data: Dict[str, Any], local_id: Optional[str] = None) -> Optional[str]:
+        """Post data to API endpoint and return created ID, recording the outcome for `local_id`"""
         if not self.populate_db:
             return None
-            
+        
         try:
-            response = requests.post(f"{self.base_url}/{endpoint}", 
-                                   json=data, 
-                                   timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            return result.get('id')
+            result = self.send(endpoint, data)
         except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to create {endpoint}: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_detail = e.response.json()
-                    print(f"   Error details: {error_detail}")
-                except:
-                    print(f"   Response: {e.response.text}")
+            self.record_failure(endpoint, local_id, self.describe_error(endpoint, e))
             return None
+        # /api/isolates wraps the created record as { isolate }
+        created_id = result.get('id') or (result.get('isolate') or {}).get('id')
+        if not created_id:
+            self.record_failure(endpoint, local_id, "response has no id")
+            return None
+        self.record_created(endpoint, local_id, created_id)
+        return created_id
+    
+    def post_batch(self, endpoint: str, rows: List[Dict[str, Any]]) -> int:
+        """Create rows through POST /api/<endpoint>/batch; returns how many were created.
+        
+        The batch route creates all rows in one transaction and answers with the
+        new IDs in request order, so one failure fails (and journals) the whole batch.
+        """
+        local_ids, payloads = [], []
+        for row in rows:
+            payload = self.server_payload(endpoint, row)
+            if payload is not None:
+                local_ids.append(row['id'])
+                payloads.append(payload)
+        if not payloads:
+            return 0
+        
+        path = f"{endpoint}/batch"
+        try:
+            # Allow roughly a second per 1,000 rows on top of the usual timeout
+            server_ids = self.send(path, payloads, timeout=10 + len(payloads) / 1000).get('ids') or []
+        except requests.exceptions.RequestException as e:
+            error = self.describe_error(path, e)
+            for local_id in local_ids:
+                self.record_failure(endpoint, local_id, error)
+            return 0
+        if len(server_ids) != len(local_ids):
+            for local_id in local_ids:
+                self.record_failure(endpoint, local_id, f"batch response has {len(server_ids)} ids for {len(local_ids)} rows")
+            return 0
+        for local_id, server_id in zip(local_ids, server_ids):
+            self.record_created(endpoint, local_id, server_id)
+        return len(server_ids)
+    
+    def server_payload(self, endpoint: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Request body for a row with foreign keys translated to server IDs (None if a parent is missing)"""
+        payload = {}
+        for key, value in row.items():
+            if key == 'id':
+                continue
+            if key in FOREIGN_KEY_FIELDS and value is not None:
+                if value not in self.id_map:
+                    self.record_failure(endpoint, row['id'], f"{key} {value} was not created")
+                    return None
+                value = self.id_map[value]
+            payload[key] = value
+        return payload
+    
+    def create_row(self, endpoint: str, row: Dict[str, Any]) -> Optional[str]:
+        payload = self.server_payload(endpoint, row)
+        return self.post_to_api(endpoint, payload, row['id']) if payload is not None else None
+    
+    def populate_rows(self, endpoint: str, rows: List[Dict[str, Any]], label: str) -> List[str]:
+        """Create all rows of one dependency tier in parallel.
+        
+        Rows within a tier are independent, so up to `concurrency` requests are
+        kept in flight over the pooled session, each carrying one row or, with
+        batch_size > 1 on endpoints that have a /batch route, up to batch_size
+        rows. Rows already created (according to the journal on a resumed run)
+        are skipped. Returns the server IDs of the tier's created rows; failures
+        are collected in `failed_rows`.
+        """
+        pending = [row for row in rows if row['id'] not in self.id_map]
+        if len(pending) < len(rows):
+            print(f"  ↩️  {len(rows) - len(pending)} {label} already created, skipping")
+        
+        if self.batch_size > 1 and endpoint in BATCH_ENDPOINTS:
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            create = lambda batch: self.post_batch(endpoint, batch)
+        else:
+            batches = [[row] for row in pending]
+            create = lambda batch: 1 if self.create_row(endpoint, batch[0]) else 0
+        progress_every = max(1, len(batches) // 10)
+        
+        start = time.perf_counter()
+        created = 0
+        with self.telemetry.phase("populate", profile=False) as phase, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for i, count in enumerate(pool.map(create, batches)):
+                created += count
+                if (i + 1) % progress_every == 0 and (i + 1) < len(batches):
+                    print(f"  Created {created}/{len(pending)} {label}...")
+            phase["rows"] = created
+        self.endpoint_seconds[endpoint] = time.perf_counter() - start
+        self.endpoint_created[endpoint] = created
+        
+        return [self.id_map[row['id']] for row in rows if row['id'] in self.id_map]
+    
+    def apply_server_ids(self, dataset: Dict[str, Any]):
+        """Rewrite row IDs and foreign keys of a populated dataset to the server-assigned IDs"""
+        for rows in dataset.values():
+            if not isinstance(rows, list):
+                continue
+            for row in rows:
+                for key in ('id',) + FOREIGN_KEY_FIELDS:
+                    value = row.get(key)
+                    if value in self.id_map:
+                        row[key] = self.id_map[value]
+    
+    def failure_report(self) -> Dict[str, List[Dict[str, str]]]:
+        """Failed rows grouped by endpoint"""
+        report: Dict[str, List[Dict[str, str]]] = {}
+        for local_id, failure in self.failed_rows.items():
+            report.setdefault(failure["endpoint"], []).append({"id": local_id, "error": failure["error"]})
+        return report
     
     def check_server(self) -> bool:
         """Check if the server is running"""
@@ -89,18 +519,19 @@ class DemoDataGenerator:
             return True
             
         try:
-            response = requests.get(f"{self.base_url}/organizations", timeout=5)
+            response = self.session.get(f"{self.base_url}/organizations", timeout=5)
             return response.status_code == 200
         except:
             return False
     
     def generate_organizations(self) -> List[Dict[str, Any]]:
-        """Generate 2 organizations: 1 pathlab, 1 hospital"""
-        timestamp_suffix = str(int(datetime.now().timestamp()))
+        """Generate 2 organizations: 1 pathlab, 1 hospital (plus regional hospitals under a workload)"""
+        rng = self.shard_rng("organizations", 0)
+        timestamp_suffix = str(int((self.reference_date - datetime(1970, 1, 1)).total_seconds()))
         
         organizations = [
             {
-                "id": self.generate_uuid(),
+                "id": self.generate_uuid(rng),
                 "name": "Central Pathology Lab",
                 "type": "pathlab", 
                 "code": f"CPL{timestamp_suffix}",
@@ -112,7 +543,7 @@ class DemoDataGenerator:
                 "isActive": True
             },
             {
-                "id": self.generate_uuid(),
+                "id": self.generate_uuid(rng),
                 "name": "Metro Hospital",
                 "type": "hospital",
                 "code": f"MH{timestamp_suffix}",
@@ -125,125 +556,176 @@ class DemoDataGenerator:
             }
         ]
         
+        if self.workload:
+            for n in range(3, self.workload.organizations + 1):
+                organizations.append({
+                    "id": self.generate_uuid(rng),
+                    "name": f"Regional Hospital {n:02d}",
+                    "type": "hospital",
+                    "code": f"RH{n:02d}{timestamp_suffix}",
+                    "isInternal": False,
+                    "contactEmail": f"lab@regional{n:02d}.example.org",
+                    "contactPhone": f"+1-555-{n:04d}",
+                    "address": f"{n} Regional Way, District {n:02d}",
+                    "accessLevel": "viewer",
+                    "isActive": True
+                })
+        
         # Populate database if requested
         if self.populate_db:
             print("📤 Creating organizations...")
-            for org in organizations:
-                org_data = {k: v for k, v in org.items() if k != 'id'}  # Remove generated ID
-                created_id = self.post_to_api("organizations", org_data)
-                if created_id:
-                    org['id'] = created_id  # Use actual created ID
-                    self.created_org_ids.append(created_id)
-                else:
-                    print("❌ Failed to create organization, aborting...")
-                    sys.exit(1)
+            self.created_org_ids = self.populate_rows("organizations", organizations, "organizations")
+            if len(self.created_org_ids) < len(organizations):
+                print("❌ Failed to create organization, aborting...")
+                sys.exit(1)
             print(f"✅ Created {len(self.created_org_ids)} organizations")
         
         return organizations
     
-    def generate_environments(self, org_ids: List[str]) -> List[Dict[str, Any]]:
+    def iter_environments(self, org_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
         """Generate environmental sampling sites"""
-        environments = []
-        
-        for i in range(self.num_environments):
-            env_data = {
-                "id": self.generate_uuid(),
+        return self.iter_sharded("environments", org_ids)
+    
+    def environment_rows(self, rows: range, rng: random.Random, org_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        for i in rows:
+            yield {
+                "id": self.generate_uuid(rng),
                 "siteName": f"Environmental Site {i+1:02d}",
-                "facilityType": random.choice(self.facility_types),
-                "orgId": random.choice(org_ids)
+                "facilityType": rng.choice(self.facility_types),
+                "externalCode": f"E{i+1:03d}",
+                "orgId": self.pick(rng, org_ids, "org")
             }
-            environments.append(env_data)
+    
+    def generate_environments(self, org_ids: List[str]) -> List[Dict[str, Any]]:
+        """Generate environmental sampling sites"""
+        environments = list(self.iter_environments(org_ids))
         
         # Populate database if requested
         if self.populate_db:
             print("📤 Creating environments...")
-            for env in environments:
-                env_data = {k: v for k, v in env.items() if k != 'id'}
-                created_id = self.post_to_api("environments", env_data)
-                if created_id:
-                    env['id'] = created_id
-                    self.created_environment_ids.append(created_id)
+            self.created_environment_ids = self.populate_rows("environments", environments, "environments")
             print(f"✅ Created {len(self.created_environment_ids)} environments")
         
         return environments
     
-    def generate_patients(self, org_ids: List[str]) -> List[Dict[str, Any]]:
+    def iter_patients(self, org_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
         """Generate patients with realistic demographics"""
-        patients = []
-        
-        for i in range(self.num_patients):
+        return self.iter_sharded("patients", org_ids)
+    
+    def patient_rows(self, rows: range, rng: random.Random, org_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        for i in rows:
             # Random age between 0-90 years
-            age_days = random.randint(0, 90 * 365)
-            date_of_birth = datetime.now() - timedelta(days=age_days)
+            age_days = rng.randint(0, 90 * 365)
+            date_of_birth = self.reference_date - timedelta(days=age_days)
             
-            patient_data = {
-                "id": self.generate_uuid(),
-                "dateOfBirth": date_of_birth.isoformat() if random.random() > 0.1 else None,
-                "sex": random.choice(["M", "F"]),
-                "clinicalNotes": f"Demo patient {i+1:03d} - {random.choice(['routine screening', 'infection workup', 'post-surgical monitoring', 'chronic condition'])}",
-                "orgId": random.choice(org_ids)
+            yield {
+                "id": self.generate_uuid(rng),
+                "dateOfBirth": date_of_birth.isoformat() if rng.random() > 0.1 else None,
+                "sex": rng.choice(["M", "F"]),
+                "clinicalNotes": f"Demo patient {i+1:03d} - {rng.choice(['routine screening', 'infection workup', 'post-surgical monitoring', 'chronic condition'])}",
+                "externalCode": f"P{i+1:03d}",
+                "orgId": self.pick(rng, org_ids, "org")
             }
-            patients.append(patient_data)
+    
+    def generate_patients(self, org_ids: List[str]) -> List[Dict[str, Any]]:
+        """Generate patients with realistic demographics"""
+        patients = list(self.iter_patients(org_ids))
         
         # Populate database if requested
         if self.populate_db:
             print("📤 Creating patients...")
-            for patient in patients:
-                patient_api_data = {k: v for k, v in patient.items() if k != 'id'}
-                created_id = self.post_to_api("patients", patient_api_data)
-                if created_id:
-                    patient['id'] = created_id
-                    self.created_patient_ids.append(created_id)
-                if len(self.created_patient_ids) % 10 == 0:
-                    print(f"  Created {len(self.created_patient_ids)}/{self.num_patients} patients...")
+            self.created_patient_ids = self.populate_rows("patients", patients, "patients")
             print(f"✅ Created {len(self.created_patient_ids)} patients")
         
         return patients
     
-    def generate_patient_adts(self, patient_ids: List[str], org_ids: List[str]) -> List[Dict[str, Any]]:
-        """Generate admission/discharge/transfer records"""
-        adts = []
-        
+    def iter_patient_adts(self, patient_ids: Sequence[str], org_ids: Sequence[str],
+                          patient_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Generate admission/discharge/transfer records (patient_orgs[i] is patient i's orgId)"""
+        return self.iter_sharded("patientAdts", patient_ids, org_ids, patient_orgs)
+    
+    def patient_adt_rows(self, rows: range, rng: random.Random, patient_ids: Sequence[str],
+                         org_ids: Sequence[str], patient_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        if self.workload:
+            yield from self.workload_adt_rows(rows, rng, patient_ids, patient_orgs)
+            return
         # Generate 1-3 ADT records per patient
-        for patient_id in patient_ids:
-            num_admissions = random.randint(1, 3)
+        for index in rows:
+            patient_id = patient_ids[index]
+            num_admissions = rng.randint(1, 3)
             
             for admission in range(num_admissions):
-                admit_date = datetime.now() - timedelta(days=random.randint(1, 180))
+                admit_date = self.reference_date - timedelta(days=rng.randint(1, 180))
                 discharge_date = None
                 
-                if random.random() > 0.3:  # 70% discharged
-                    discharge_date = admit_date + timedelta(days=random.randint(1, 30))
+                if rng.random() > 0.3:  # 70% discharged
+                    discharge_date = admit_date + timedelta(days=rng.randint(1, 30))
                 
-                adts.append({
-                    "id": self.generate_uuid(),
+                yield {
+                    "id": self.generate_uuid(rng),
                     "patientId": patient_id,
-                    "orgId": random.choice(org_ids),
+                    "orgId": rng.choice(org_ids),
                     "admitDate": admit_date.isoformat(),
                     "dischargeDate": discharge_date.isoformat() if discharge_date else None,
-                    "transferType": random.choice(["admission", "transfer", "discharge"]) if discharge_date else "admission",
-                    "ward": f"Ward {random.choice(['A', 'B', 'C', 'ICU', 'ER'])}{random.randint(1, 9)}",
-                    "bed": f"Bed {random.randint(1, 30):02d}",
+                    "transferType": rng.choice(["admission", "transfer", "discharge"]) if discharge_date else "admission",
+                    "ward": f"Ward {rng.choice(['A', 'B', 'C', 'ICU', 'ER'])}{rng.randint(1, 9)}",
+                    "bed": f"Bed {rng.randint(1, 30):02d}",
                     "notes": f"ADT record {admission + 1} for admission #{admission + 1}"
-                })
-        
-        return adts
+                }
     
-    def generate_phenotype_profiles(self) -> List[Dict[str, Any]]:
+    def workload_adt_rows(self, rows: range, rng: random.Random, patient_ids: Sequence[str],
+                          patient_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Admissions with ward transfers: each stay segment has a lognormal length, and a
+        segment still running at the reference date is open (no discharge) and ends the admission"""
+        workload = self.workload
+        sampler = self.date_sampler()
+        median_stay_hours = workload.median_stay_days * 24
+        for index in rows:
+            patient_id = patient_ids[index]
+            org_id = patient_orgs[index]  # patients are admitted where they are registered
+            num_admissions = 1 + geometric(rng, workload.admissions_per_patient - 1)
+            
+            for admission in range(num_admissions):
+                segment_start = sampler.sample(rng)
+                num_segments = 1 + geometric(rng, workload.transfers_per_admission)
+                for segment in range(num_segments):
+                    stay_hours = rng.lognormvariate(math.log(median_stay_hours), workload.stay_sigma)
+                    segment_end = segment_start + timedelta(minutes=max(60, round(stay_hours * 60)))
+                    discharge_date = segment_end if segment_end <= self.reference_date else None
+                    
+                    yield {
+                        "id": self.generate_uuid(rng),
+                        "patientId": patient_id,
+                        "orgId": org_id,
+                        "admitDate": segment_start.isoformat(),
+                        "dischargeDate": discharge_date.isoformat() if discharge_date else None,
+                        "transferType": "admission" if segment == 0 else "transfer",
+                        "ward": f"Ward {rng.choice(['A', 'B', 'C', 'ICU', 'ER'])}{rng.randint(1, 9)}",
+                        "bed": f"Bed {rng.randint(1, 30):02d}",
+                        "notes": f"ADT record {segment + 1} for admission #{admission + 1}"
+                    }
+                    if discharge_date is None:
+                        break
+                    segment_start = segment_end
+    
+    def generate_patient_adts(self, patient_ids: List[str], org_ids: List[str],
+                              patient_orgs: List[str]) -> List[Dict[str, Any]]:
+        """Generate admission/discharge/transfer records"""
+        return list(self.iter_patient_adts(patient_ids, org_ids, patient_orgs))
+    
+    def iter_phenotype_profiles(self) -> Iterator[Dict[str, Any]]:
         """Generate antimicrobial susceptibility test profiles"""
-        profiles = []
-        
-        # Generate 1 profile per 2-3 isolates (not all isolates have AST)
-        num_profiles = self.num_isolates // 3
-        
-        for i in range(num_profiles):
+        return self.iter_sharded("phenotypeProfiles")
+    
+    def phenotype_profile_rows(self, rows: range, rng: random.Random) -> Iterator[Dict[str, Any]]:
+        for i in rows:
             # Generate MIC data as JSON string
             mic_data = []
-            num_antibiotics = random.randint(3, 8)
-            tested_antibiotics = random.sample(self.antibiotics, num_antibiotics)
+            num_antibiotics = rng.randint(3, 8)
+            tested_antibiotics = rng.sample(self.antibiotics, num_antibiotics)
             
             for antibiotic in tested_antibiotics:
-                mic_value = random.choice([0.5, 1, 2, 4, 8, 16, 32, 64, 128])
+                mic_value = rng.choice(self.mic_values)
                 interpretation = "R" if mic_value >= 16 else ("I" if mic_value >= 4 else "S")
                 
                 mic_data.append({
@@ -252,54 +734,64 @@ class DemoDataGenerator:
                     "interpretation": interpretation
                 })
             
-            profile_data = {
-                "id": self.generate_uuid(),
-                "species": random.choice(self.species_list),
-                "method": random.choice(["VITEK2", "MicroScan", "broth_microdilution", "disk_diffusion"]),
-                "testDate": self.random_date_last_6_months(i),
-                "confidence": round(random.uniform(0.85, 0.99), 3),
-                "notes": f"AST profile {i+1} - {random.choice(['standard panel', 'extended panel', 'targeted testing'])}",
+            yield {
+                "id": self.generate_uuid(rng),
+                "species": rng.choice(self.species_list),
+                "method": rng.choice(self.ast_methods),
+                "testDate": self.collection_date(rng, i),
+                "confidence": round(rng.uniform(0.85, 0.99), 3),
+                "notes": f"AST profile {i+1} - {rng.choice(self.ast_panels)}",
                 "micData": json.dumps(mic_data)
             }
-            profiles.append(profile_data)
+    
+    def generate_phenotype_profiles(self) -> List[Dict[str, Any]]:
+        """Generate antimicrobial susceptibility test profiles"""
+        profiles = list(self.iter_phenotype_profiles())
         
         # Populate database if requested  
         if self.populate_db:
             print("📤 Creating phenotype profiles...")
-            for profile in profiles:
-                profile_api_data = {k: v for k, v in profile.items() if k != 'id'}
-                created_id = self.post_to_api("phenotypes", profile_api_data)
-                if created_id:
-                    profile['id'] = created_id
-                    self.created_phenotype_ids.append(created_id)
+            self.created_phenotype_ids = self.populate_rows("phenotypes", profiles, "phenotype profiles")
             print(f"✅ Created {len(self.created_phenotype_ids)} phenotype profiles")
         
         return profiles
     
-    def generate_isolates(self, org_ids: List[str], patient_ids: List[str], 
-                         environment_ids: List[str], phenotype_ids: List[str]) -> List[Dict[str, Any]]:
+    def iter_isolates(self, org_ids: Sequence[str], patient_ids: Sequence[str],
+                      environment_ids: Sequence[str], phenotype_ids: Sequence[str],
+                      patient_orgs: Sequence[str], environment_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
         """Generate isolate records with realistic distribution"""
-        isolates = []
-        
-        for i in range(self.num_isolates):
-            isolate_id = self.generate_uuid()
+        return self.iter_sharded("isolates", org_ids, patient_ids, environment_ids, phenotype_ids,
+                                 patient_orgs, environment_orgs)
+    
+    def isolate_rows(self, rows: range, rng: random.Random, org_ids: Sequence[str], patient_ids: Sequence[str],
+                     environment_ids: Sequence[str], phenotype_ids: Sequence[str],
+                     patient_orgs: Sequence[str], environment_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        for i in rows:
+            isolate_id = self.generate_uuid(rng)
             
             # 75% human, 25% environmental
             if i % 4 == 0:  # Environmental
                 sample_type = "environmental"
                 collection_source = "environmental"
+                k = rng.randrange(len(environment_ids))
                 patient_id = None
-                environment_id = random.choice(environment_ids)
+                environment_id = environment_ids[k]
+                source_org_id = environment_orgs[k]
             else:  # Human
                 sample_type = "clinical"
                 collection_source = "clinical" 
-                patient_id = random.choice(patient_ids)
+                k = self.pick_index(rng, patient_ids, "patient")
+                patient_id = patient_ids[k]
                 environment_id = None
+                source_org_id = patient_orgs[k]
             
             # Some isolates have phenotype profiles
-            phenotype_id = random.choice(phenotype_ids) if phenotype_ids and random.random() > 0.6 else None
+            phenotype_id = rng.choice(phenotype_ids) if phenotype_ids and rng.random() > 0.6 else None
             
-            isolate_data = {
+            # A workload keeps each isolate in its patient's or site's org, as production data is
+            org_id = source_org_id if self.workload else rng.choice(org_ids)
+            
+            yield {
                 "id": isolate_id,
                 "label": f"ISO-{i+1:04d}",
                 "sampleType": sample_type,
@@ -307,67 +799,61 @@ class DemoDataGenerator:
                 "collectionSource": collection_source,
                 "patientId": patient_id,
                 "environmentId": environment_id,
-                "orgId": random.choice(org_ids),
-                "collectionSite": random.choice(self.collection_sites),
-                "collectionDate": self.random_date_last_6_months(i),
-                "priority": random.choice(self.priorities),
-                "processingStatus": random.choice(self.statuses),
-                "notes": f"Demo isolate {i+1} - {random.choice(['routine culture', 'surveillance', 'outbreak investigation', 'clinical isolate'])}"
+                "orgId": org_id,
+                "collectionSite": rng.choice(self.collection_sites),
+                "collectionDate": self.collection_date(rng, i),
+                "priority": rng.choice(self.priorities),
+                "processingStatus": rng.choice(self.statuses),
+                "notes": f"Demo isolate {i+1} - {rng.choice(self.isolate_contexts)}"
             }
-            isolates.append(isolate_data)
+    
+    def generate_isolates(self, org_ids: List[str], patient_ids: List[str], 
+                         environment_ids: List[str], phenotype_ids: List[str],
+                         patient_orgs: List[str], environment_orgs: List[str]) -> List[Dict[str, Any]]:
+        """Generate isolate records with realistic distribution"""
+        isolates = list(self.iter_isolates(org_ids, patient_ids, environment_ids, phenotype_ids,
+                                           patient_orgs, environment_orgs))
         
         # Populate database if requested
         if self.populate_db:
             print("📤 Creating isolates...")
-            for i, isolate in enumerate(isolates):
-                isolate_api_data = {k: v for k, v in isolate.items() if k != 'id'}
-                created_id = self.post_to_api("isolates", isolate_api_data)
-                if created_id:
-                    isolate['id'] = created_id
-                    self.created_isolate_ids.append(created_id)
-                
-                # Progress indicator
-                if (i + 1) % 5 == 0 or (i + 1) == len(isolates):
-                    print(f"  Created {len(self.created_isolate_ids)}/{len(isolates)} isolates...")
+            self.created_isolate_ids = self.populate_rows("isolates", isolates, "isolates")
             print(f"✅ Created {len(self.created_isolate_ids)} isolates")
         
         return isolates
     
-    def generate_genomic_data(self, isolate_ids: List[str]) -> List[Dict[str, Any]]:
+    def iter_genomic_data(self, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
         """Generate genome files for the new GenomicData schema"""
-        genomic_data = []
-        
-        # Generate some demo genome files (20% of isolates have genomes)
-        # This simulates uploaded FASTA files waiting to be linked
-        num_genomes = max(5, int(len(isolate_ids) * 0.2))
-        
-        for i in range(num_genomes):
+        return self.iter_sharded("genomicData", isolate_ids)
+    
+    def genomic_data_rows(self, rows: range, rng: random.Random, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        for i in rows:
             # Generate realistic filenames that might match isolate labels
-            if i < len(isolate_ids) and random.random() > 0.3:
+            if i < len(isolate_ids) and rng.random() > 0.3:
                 # 70% chance to create filename that matches an isolate 
                 isolate_index = i % len(isolate_ids)
                 base_filename = f"ISO-{isolate_index+1:04d}"
             else:
                 # 30% chance for unmatched filenames
-                base_filename = random.choice([
+                base_filename = rng.choice([
                     f"genome_{i+1:03d}",
-                    f"sample_{random.randint(100, 999)}",
-                    f"EC{random.randint(1, 100):03d}",
-                    f"SA{random.randint(1, 50):03d}",
-                    f"KP{random.randint(1, 75):03d}"
+                    f"sample_{rng.randint(100, 999)}",
+                    f"EC{rng.randint(1, 100):03d}",
+                    f"SA{rng.randint(1, 50):03d}",
+                    f"KP{rng.randint(1, 75):03d}"
                 ])
             
             filename = f"{base_filename}.fasta"
-            file_size = random.randint(1024*1024, 10*1024*1024)  # 1-10MB
-            upload_date = self.random_date_last_6_months(i)
+            file_size = rng.randint(1024*1024, 10*1024*1024)  # 1-10MB
+            upload_date = self.collection_date(rng, i)
             
-            genomic_data.append({
-                "id": self.generate_uuid(),
-                "filename": f"{self.generate_uuid()}_{filename}",  # Storage filename
+            yield {
+                "id": self.generate_uuid(rng),
+                "filename": f"{self.generate_uuid(rng)}_{filename}",  # Storage filename
                 "originalFilename": filename,                      # User's filename
-                "storagePath": f"/storage/genomes/{self.generate_uuid()}_{filename}",
+                "storagePath": f"/storage/genomes/{self.generate_uuid(rng)}_{filename}",
                 "fileSize": file_size,
-                "fileHash": f"sha256_{random.randint(100000, 999999):x}{random.randint(100000, 999999):x}",
+                "fileHash": f"sha256_{rng.getrandbits(128):032x}",  # Unique across million-row seeds
                 "uploadDate": upload_date,
                 
                 #linking tracking fields (initially unlinked)
@@ -376,106 +862,119 @@ class DemoDataGenerator:
                 "linkingMethod": None,
                 
                 #validation and processing
-                "validationStatus": random.choice(["valid", "valid", "valid", "pending", "invalid"]),  # Mostly valid
-                "processingStatus": random.choice(["uploaded", "validated", "analyzing", "completed"]),
+                "validationStatus": rng.choice(self.validation_statuses),
+                "processingStatus": rng.choice(self.genome_processing_statuses),
                 "validationErrors": None,
                 
                 #quality metrics (for valid genomes)
-                "contigCount": random.randint(1, 150) if random.random() > 0.2 else None,
-                "totalLength": random.randint(2000000, 8000000) if random.random() > 0.2 else None,
-                "n50": random.randint(10000, 500000) if random.random() > 0.2 else None,
-                "gcContent": round(random.uniform(35.0, 65.0), 2) if random.random() > 0.2 else None,
+                "contigCount": rng.randint(1, 150) if rng.random() > 0.2 else None,
+                "totalLength": rng.randint(2000000, 8000000) if rng.random() > 0.2 else None,
+                "n50": rng.randint(10000, 500000) if rng.random() > 0.2 else None,
+                "gcContent": round(rng.uniform(35.0, 65.0), 2) if rng.random() > 0.2 else None,
                 "qualityMetrics": json.dumps({
-                    "num_contigs": random.randint(1, 150),
-                    "largest_contig": random.randint(50000, 2000000),
-                    "total_length": random.randint(2000000, 8000000)
-                }) if random.random() > 0.3 else None,
+                    "num_contigs": rng.randint(1, 150),
+                    "largest_contig": rng.randint(50000, 2000000),
+                    "total_length": rng.randint(2000000, 8000000)
+                }) if rng.random() > 0.3 else None,
                 
                 #analysis results (for completed genomes)
-                "sequencingPlatform": random.choice(["Illumina_MiSeq", "Illumina_NextSeq", "ONT_MinION", "PacBio_Sequel"]) if random.random() > 0.4 else None,
+                "sequencingPlatform": rng.choice(self.sequencing_platforms) if rng.random() > 0.4 else None,
                 "assemblyStats": json.dumps({
-                    "assembler": random.choice(["SPAdes", "SKESA", "Unicycler"]),
-                    "version": f"v{random.randint(3, 4)}.{random.randint(0, 15)}.{random.randint(0, 3)}"
-                }) if random.random() > 0.5 else None,
-                "mlstScheme": random.choice(["ecoli", "saureus", "kpneumoniae"]) if random.random() > 0.6 else None,
-                "mlstType": f"ST{random.randint(1, 500)}" if random.random() > 0.6 else None,
+                    "assembler": rng.choice(self.assemblers),
+                    "version": f"v{rng.randint(3, 4)}.{rng.randint(0, 15)}.{rng.randint(0, 3)}"
+                }) if rng.random() > 0.5 else None,
+                "mlstScheme": rng.choice(self.mlst_schemes) if rng.random() > 0.6 else None,
+                "mlstType": f"ST{rng.randint(1, 500)}" if rng.random() > 0.6 else None,
                 "mlstAlleles": json.dumps({
-                    "adk": random.randint(1, 100),
-                    "fumC": random.randint(1, 100),
-                    "gyrB": random.randint(1, 100)
-                }) if random.random() > 0.7 else None,
+                    "adk": rng.randint(1, 100),
+                    "fumC": rng.randint(1, 100),
+                    "gyrB": rng.randint(1, 100)
+                }) if rng.random() > 0.7 else None,
                 "resistanceGenes": json.dumps([
-                    {"gene": random.choice(["blaTEM", "blaCTX-M", "aac(6')-Ib", "sul1", "tet(A)"]), 
-                     "identity": round(random.uniform(95, 100), 2)}
-                    for _ in range(random.randint(0, 5))
-                ]) if random.random() > 0.5 else None,
+                    {"gene": rng.choice(self.resistance_gene_names), 
+                     "identity": round(rng.uniform(95, 100), 2)}
+                    for _ in range(rng.randint(0, 5))
+                ]) if rng.random() > 0.5 else None,
                 "virulenceGenes": json.dumps([
-                    {"gene": f"vir_{random.randint(1, 50)}", 
-                     "identity": round(random.uniform(90, 100), 2)}
-                    for _ in range(random.randint(0, 3))
-                ]) if random.random() > 0.7 else None,
+                    {"gene": f"vir_{rng.randint(1, 50)}", 
+                     "identity": round(rng.uniform(90, 100), 2)}
+                    for _ in range(rng.randint(0, 3))
+                ]) if rng.random() > 0.7 else None,
                 "plasmids": json.dumps([
-                    f"plasmid_{random.randint(1, 10)}"
-                    for _ in range(random.randint(0, 3))
-                ]) if random.random() > 0.8 else None,
-                "speciesIdentification": random.choice(self.species_list) if random.random() > 0.3 else None,
-                "speciesConfidence": round(random.uniform(0.85, 0.99), 3) if random.random() > 0.3 else None,
+                    f"plasmid_{rng.randint(1, 10)}"
+                    for _ in range(rng.randint(0, 3))
+                ]) if rng.random() > 0.8 else None,
+                "speciesIdentification": rng.choice(self.species_list) if rng.random() > 0.3 else None,
+                "speciesConfidence": round(rng.uniform(0.85, 0.99), 3) if rng.random() > 0.3 else None,
                 
                 #pipeline tracking
-                "assemblyPath": f"/pipeline/assemblies/{base_filename}_processed.fasta" if random.random() > 0.4 else None,
-                "annotationPath": f"/pipeline/annotations/{base_filename}.gff" if random.random() > 0.6 else None,
-                "analysisCompleted": random.random() > 0.4,
-                "pipelineJobId": f"job_{random.randint(10000, 99999)}" if random.random() > 0.5 else None,
+                "assemblyPath": f"/pipeline/assemblies/{base_filename}_processed.fasta" if rng.random() > 0.4 else None,
+                "annotationPath": f"/pipeline/annotations/{base_filename}.gff" if rng.random() > 0.6 else None,
+                "analysisCompleted": rng.random() > 0.4,
+                "pipelineJobId": f"job_{rng.randint(10000, 99999)}" if rng.random() > 0.5 else None,
                 
                 #audit fields
-                "uploadedBy": random.choice(["user_001", "user_002", "user_003"]),
-                "createdBy": random.choice(["system", "user_001"]),
-                "updatedBy": random.choice(["system", "pipeline"]) if random.random() > 0.5 else None,
-                "notes": f"Demo genome {i+1} - {random.choice(['clinical isolate', 'surveillance sample', 'outbreak investigation', 'quality control'])}"
-            })
+                "uploadedBy": rng.choice(self.uploaders),
+                "createdBy": rng.choice(["system", "user_001"]),
+                "updatedBy": rng.choice(["system", "pipeline"]) if rng.random() > 0.5 else None,
+                "notes": f"Demo genome {i+1} - {rng.choice(self.genome_contexts)}"
+            }
+    
+    def iter_genome_files(self, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Genome records, backed by synthetic FASTA files on disk when fasta_storage is set"""
+        rows = self.iter_genomic_data(isolate_ids)
+        if self.fasta_storage:
+            from synthetic_fasta import FastaMaterializer
+            rows = FastaMaterializer(self.fasta_storage, self.seed, workers=self.workers).materialize(rows)
+        return rows
+    
+    def generate_genomic_data(self, isolate_ids: List[str]) -> List[Dict[str, Any]]:
+        """Generate genome files for the new GenomicData schema"""
+        genomic_data = list(self.iter_genome_files(isolate_ids))
         
         # Populate database if requested  
         if self.populate_db:
             print("📤 Creating genomic data...")
-            for genome in genomic_data:
-                genome_api_data = {k: v for k, v in genome.items() if k != 'id'}
-                created_id = self.post_to_api("genomics", genome_api_data)
-                if created_id:
-                    genome['id'] = created_id
-                    self.created_genomic_ids.append(created_id)
+            self.created_genomic_ids = self.populate_rows("genomics", genomic_data, "genomic data records")
             print(f"✅ Created {len(self.created_genomic_ids)} genomic data records")
         
         return genomic_data
     
-    def generate_treatment_outcomes(self, isolate_ids: List[str]) -> List[Dict[str, Any]]:
+    def iter_treatment_outcomes(self, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
         """Generate clinical treatment outcome data"""
-        outcomes = []
-        
+        return self.iter_sharded("treatmentOutcomes", isolate_ids)
+    
+    def treatment_outcome_rows(self, rows: range, rng: random.Random, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
         # 40% of isolates have treatment outcome data
-        treated_isolates = random.sample(isolate_ids, int(len(isolate_ids) * 0.4))
-        
-        for i, isolate_id in enumerate(treated_isolates):
+        for index in sample_in_order(rows, int(len(rows) * 0.4), rng):
+            isolate_id = isolate_ids[index]
             # 1-3 treatments per isolate
-            num_treatments = random.randint(1, 3)
+            num_treatments = rng.randint(1, 3)
             
             for treatment in range(num_treatments):
-                start_date = datetime.now() - timedelta(days=random.randint(1, 120))
-                end_date = start_date + timedelta(days=random.randint(3, 21))
+                if self.workload:
+                    start_date = self.date_sampler().sample(rng)
+                else:
+                    start_date = self.reference_date - timedelta(days=rng.randint(1, 120))
+                end_date = start_date + timedelta(days=rng.randint(3, 21))
                 
-                outcomes.append({
-                    "id": self.generate_uuid(),
+                yield {
+                    "id": self.generate_uuid(rng),
                     "isolateId": isolate_id,
-                    "antibiotic": random.choice(self.antibiotics),
+                    "antibiotic": rng.choice(self.antibiotics),
                     "startDate": start_date.isoformat(),
-                    "endDate": end_date.isoformat() if random.random() > 0.2 else None,
-                    "outcome": random.choice(["cured", "improved", "failed", "discontinued", "ongoing"]),
-                    "clinicalNotes": f"Treatment {treatment + 1} - {random.choice(['standard dosing', 'high dose', 'combination therapy', 'step-down therapy'])}"
-                })
-        
-        return outcomes
+                    "endDate": end_date.isoformat() if rng.random() > 0.2 else None,
+                    "outcome": rng.choice(["cured", "improved", "failed", "discontinued", "ongoing"]),
+                    "clinicalNotes": f"Treatment {treatment + 1} - {rng.choice(['standard dosing', 'high dose', 'combination therapy', 'step-down therapy'])}"
+                }
+    
+    def generate_treatment_outcomes(self, isolate_ids: List[str]) -> List[Dict[str, Any]]:
+        """Generate clinical treatment outcome data"""
+        return list(self.iter_treatment_outcomes(isolate_ids))
     
     def generate_protein_refs(self) -> List[Dict[str, Any]]:
         """Generate protein reference data"""
+        rng = self.shard_rng("proteinRefs", 0)
         proteins = []
         
         # Generate 100 common proteins
@@ -490,16 +989,17 @@ class DemoDataGenerator:
         for i in range(100):
             proteins.append({
                 "uniprotId": f"P{i+10000:05d}",
-                "name": f"{random.choice(protein_functions)}_{i+1}",
-                "function": random.choice(protein_functions),
-                "sequenceHash": f"hash_{random.randint(100000, 999999):x}",
-                "category": random.choice(categories)
+                "name": f"{rng.choice(protein_functions)}_{i+1}",
+                "function": rng.choice(protein_functions),
+                "sequenceHash": f"hash_{rng.randint(100000, 999999):x}",
+                "category": rng.choice(categories)
             })
         
         return proteins
     
     def generate_users(self, org_ids: List[str]) -> List[Dict[str, Any]]:
         """Generate user accounts"""
+        rng = self.shard_rng("users", 0)
         users = []
         
         user_names = [
@@ -511,13 +1011,13 @@ class DemoDataGenerator:
         
         for i, (first, last) in enumerate(user_names):
             users.append({
-                "id": self.generate_uuid(),
+                "id": self.generate_uuid(rng),
                 "email": f"{first.lower()}.{last.lower()}@demo.com",
                 "firstName": first,
                 "lastName": last,
-                "orgId": random.choice(org_ids),
-                "role": random.choice(roles),
-                "permissions": json.dumps(["read", "write"] if random.random() > 0.5 else ["read"]),
+                "orgId": rng.choice(org_ids),
+                "role": rng.choice(roles),
+                "permissions": json.dumps(["read", "write"] if rng.random() > 0.5 else ["read"]),
                 "isActive": True,
                 "authProvider": "local",
                 "authProviderId": f"auth_{i+1:03d}"
@@ -538,30 +1038,35 @@ class DemoDataGenerator:
         else:
             print(f"🧬 Generating demo data for {self.num_isolates} isolates...")
         
-        # Generate in dependency order (tables with no foreign keys first)
-        organizations = self.generate_organizations()
-        org_ids = self.created_org_ids if self.populate_db else [org["id"] for org in organizations]
+        # Generate in dependency order (tables with no foreign keys first).
+        # Rows always reference locally generated IDs, so a seeded run is reproducible
+        # whatever the server returns; populate_rows translates them when posting.
+        organizations = self.timed("organizations", self.generate_organizations)
+        org_ids = [org["id"] for org in organizations]
         
-        environments = self.generate_environments(org_ids)
-        environment_ids = self.created_environment_ids if self.populate_db else [env["id"] for env in environments]
+        environments = self.timed("environments", self.generate_environments, org_ids)
+        environment_ids = [env["id"] for env in environments]
+        environment_orgs = [env["orgId"] for env in environments]
         
-        patients = self.generate_patients(org_ids)
-        patient_ids = self.created_patient_ids if self.populate_db else [patient["id"] for patient in patients]
+        patients = self.timed("patients", self.generate_patients, org_ids)
+        patient_ids = [patient["id"] for patient in patients]
+        patient_orgs = [patient["orgId"] for patient in patients]
         
-        patient_adts = self.generate_patient_adts(patient_ids, org_ids)
+        patient_adts = self.timed("patientAdts", self.generate_patient_adts, patient_ids, org_ids, patient_orgs)
         
-        phenotype_profiles = self.generate_phenotype_profiles()
-        phenotype_ids = self.created_phenotype_ids if self.populate_db else [profile["id"] for profile in phenotype_profiles]
+        phenotype_profiles = self.timed("phenotypeProfiles", self.generate_phenotype_profiles)
+        phenotype_ids = [profile["id"] for profile in phenotype_profiles]
         
-        isolates = self.generate_isolates(org_ids, patient_ids, environment_ids, phenotype_ids)
+        isolates = self.timed("isolates", self.generate_isolates, org_ids, patient_ids, environment_ids, phenotype_ids,
+                              patient_orgs, environment_orgs)
         isolate_ids = [isolate["id"] for isolate in isolates]
         
-        genomic_data = self.generate_genomic_data(isolate_ids)
-        treatment_outcomes = self.generate_treatment_outcomes(isolate_ids)
-        protein_refs = self.generate_protein_refs()
-        users = self.generate_users(org_ids)
+        genomic_data = self.timed("genomicData", self.generate_genomic_data, isolate_ids)
+        treatment_outcomes = self.timed("treatmentOutcomes", self.generate_treatment_outcomes, isolate_ids)
+        protein_refs = self.timed("proteinRefs", self.generate_protein_refs)
+        users = self.timed("users", self.generate_users, org_ids)
         
-        return {
+        demo_data = {
             "organizations": organizations,
             "environments": environments,
             "patients": patients,
@@ -572,41 +1077,234 @@ class DemoDataGenerator:
             "treatmentOutcomes": treatment_outcomes,
             "proteinRefs": protein_refs,
             "users": users,
-            "metadata": {
-                "generated_at": self.timestamp,
-                "num_isolates": self.num_isolates,
-                "num_patients": self.num_patients,
-                "num_organizations": len(organizations),
-                "num_environments": len(environments)
-            }
+            "metadata": self.build_metadata(len(organizations), len(environments))
+        }
+        if self.populate_db:
+            self.apply_server_ids(demo_data)
+        return demo_data
+    
+    def timed(self, table: str, generate: Callable[..., List[Dict[str, Any]]], *args) -> List[Dict[str, Any]]:
+        """Run one generate_* step as a telemetry phase (populate tiers it triggers nest under it)"""
+        with self.telemetry.phase(table, profile=True) as phase:
+            rows = generate(*args)
+            phase["rows"] = len(rows)
+        return rows
+    
+    def timed_write(self, writer, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Stream a table into a writer as one telemetry phase (generation and serialization together)"""
+        with self.telemetry.phase(table, profile=True) as phase:
+            phase["rows"] = writer.write_table(table, rows)
+        return phase["rows"]
+    
+    def build_metadata(self, num_organizations: int, num_environments: int) -> Dict[str, Any]:
+        metadata = {
+            "generated_at": self.timestamp,
+            "seed": self.seed,
+            "engine": self.engine,
+            "num_isolates": self.num_isolates,
+            "num_patients": self.num_patients,
+            "num_organizations": num_organizations,
+            "num_environments": num_environments
         }
+        if self.workload:
+            metadata["workload"] = self.workload.to_dict()
+        return metadata
+    
+    def stream_demo_data(self, writer) -> Dict[str, int]:
+        """Generate the dataset table by table straight into a writer, returning row counts.
+        
+        Rows are written as they are produced. The only state kept between tables
+        are the foreign key ID pools (16 bytes per row, plus 4 per patient and
+        environment for their orgId), so peak memory no longer
+        grows with the size of the generated rows.
+        """
+        print(f"🧬 Streaming demo data for {self.num_isolates} isolates...")
+        counts = {}
+        
+        organizations = self.generate_organizations()
+        org_ids = [org["id"] for org in organizations]
+        counts["organizations"] = self.timed_write(writer, "organizations", organizations)
+        
+        environment_ids, environment_orgs = IdPool(), KeyColumn("orgId", org_ids)
+        counts["environments"] = self.timed_write(writer, "environments", environment_ids.collect(
+            environment_orgs.collect(self.iter_environments(org_ids))))
+        
+        patient_ids, patient_orgs = IdPool(), KeyColumn("orgId", org_ids)
+        counts["patients"] = self.timed_write(writer, "patients", patient_ids.collect(
+            patient_orgs.collect(self.iter_patients(org_ids))))
+        counts["patientAdts"] = self.timed_write(writer, "patientAdts", self.iter_patient_adts(patient_ids, org_ids, patient_orgs))
+        
+        phenotype_ids = IdPool()
+        counts["phenotypeProfiles"] = self.timed_write(writer, "phenotypeProfiles", phenotype_ids.collect(self.iter_phenotype_profiles()))
+        
+        isolate_ids = IdPool()
+        counts["isolates"] = self.timed_write(writer, "isolates", isolate_ids.collect(
+            self.iter_isolates(org_ids, patient_ids, environment_ids, phenotype_ids, patient_orgs, environment_orgs)))
+        
+        counts["genomicData"] = self.timed_write(writer, "genomicData", self.iter_genome_files(isolate_ids))
+        counts["treatmentOutcomes"] = self.timed_write(writer, "treatmentOutcomes", self.iter_treatment_outcomes(isolate_ids))
+        counts["proteinRefs"] = self.timed_write(writer, "proteinRefs", self.generate_protein_refs())
+        counts["users"] = self.timed_write(writer, "users", self.generate_users(org_ids))
+        
+        writer.write_metadata(self.build_metadata(counts["organizations"], counts["environments"]))
+        writer.close()
+        return counts
 
 def main():
     parser = argparse.ArgumentParser(description="Generate Patomove demo database JSON and optionally populate database")
     parser.add_argument("--isolates", "-i", type=int, default=500, 
                        help="Number of isolates to generate (default: 500)")
-    parser.add_argument("--output", "-o", type=str, default="demo_db.json",
-                       help="Output JSON file (default: demo_db.json)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Output JSON file, or directory for --format ndjson (default: demo_db.json / demo_db)")
+    parser.add_argument("--format", "-f", choices=["json", "json-stream", "ndjson"], default="json",
+                       help="json: in-memory, indented (default); json-stream: same document streamed row by row; "
+                            "ndjson: one <table>.ndjson file per table. Streaming formats run in constant memory")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                       help="numpy: generate phenotype profiles, isolates and genomic data column-wise (requires numpy)")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Seed for reproducible output: same seed and arguments give byte-identical files "
+                            "(dates are relative to --reference-date, default 2025-01-01)")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                       help="Generate shards of %d rows in N processes; output does not depend on N (default: 1)" % SHARD_SIZE)
+    parser.add_argument("--reference-date", type=datetime.fromisoformat, default=None,
+                       help="Date treated as 'now' when spreading dates (default: now, or 2025-01-01 with --seed)")
+    parser.add_argument("--workload", type=str, default=None,
+                       help="Production-like data shape: 'realistic' (multi-year seasonal dates, Zipf-skewed patients "
+                            "and organizations, ADT transfers) or a JSON file of parameter overrides")
+    parser.add_argument("--fasta-storage", type=str, default=None,
+                       help="Write a synthetic FASTA assembly for every genome record into <dir>/genomes and "
+                            "compute the record's size, hash and assembly metrics from it, e.g. ../storage")
+    parser.add_argument("--gzip", action="store_true",
+                       help="Gzip streamed output (json-stream/ndjson)")
     parser.add_argument("--populate", "-p", action="store_true",
                        help="Populate database directly via API (requires server running)")
     parser.add_argument("--url", type=str, default="http://localhost:3000/api",
                        help="API base URL (default: http://localhost:3000/api)")
+    parser.add_argument("--sqlite", type=str, default=None,
+                       help="Bulk load straight into a Prisma SQLite database, e.g. ../prisma/dev.db (no server needed)")
+    parser.add_argument("--concurrency", "-c", type=int, default=8,
+                       help="Max in-flight API requests per dependency tier when populating (default: 8)")
+    parser.add_argument("--retries", type=int, default=3,
+                       help="Retries with exponential backoff on connection errors and 503, and on 502/504 for "
+                            "idempotent requests; POSTs failing otherwise are retried with --resume (default: 3)")
+    parser.add_argument("--batch-size", "-b", type=int, default=1,
+                       help="Rows per request via the /api/<table>/batch routes when populating (default: 1, one row per POST)")
+    parser.add_argument("--journal", type=str, default="populate_journal.jsonl",
+                       help="Checkpoint journal mapping generated IDs to server IDs when populating "
+                            "(default: populate_journal.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted --populate run from its journal: skip created rows, retry failures")
+    parser.add_argument("--telemetry", type=str, default=None,
+                       help="Write a JSON report of per-phase wall/CPU time and per-endpoint requests, bytes and latency")
+    parser.add_argument("--prom-textfile", type=str, default=None,
+                       help="Write the same metrics in Prometheus text format, e.g. for node_exporter's textfile collector")
+    parser.add_argument("--profile", type=str, default=None,
+                       help="cProfile the generation phases (not HTTP populate) of the main process into this .prof file")
     
     args = parser.parse_args()
+    if args.populate and args.sqlite:
+        parser.error("--populate and --sqlite are mutually exclusive")
+    streaming = args.format != "json"
+    if streaming and (args.populate or args.sqlite):
+        parser.error(f"--format {args.format} writes files only; use the default json format with --populate/--sqlite")
+    if args.seed is not None and args.seed < 0:
+        parser.error("--seed must be a non-negative integer")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not 1 <= args.batch_size <= 10000:
+        parser.error("--batch-size must be between 1 and 10000 (the batch routes' limit)")
+    if args.gzip and not streaming:
+        parser.error("--gzip requires --format json-stream or ndjson")
+    args.workload_spec = args.workload
+    if args.workload is not None:
+        try:
+            args.workload = WorkloadProfile.from_spec(args.workload)
+        except (ValueError, json.JSONDecodeError) as e:
+            parser.error(f"--workload: {e}")
+    if args.resume:
+        if not args.populate:
+            parser.error("--resume requires --populate")
+        if not os.path.exists(args.journal):
+            parser.error(f"--resume: journal {args.journal} not found")
+        # Regenerate exactly the rows of the interrupted run
+        header = PopulateJournal.read_header(args.journal)
+        args.seed = header["seed"]
+        args.isolates = header["num_isolates"]
+        args.engine = header["engine"]
+        args.reference_date = datetime.fromisoformat(header["reference_date"])
+        args.workload = WorkloadProfile.from_dict(header["workload"]) if header.get("workload") else None
+        args.workload_spec = args.workload.name if args.workload else None
+        if header.get("base_url") != args.url:
+            print(f"⚠️  Journal was recorded against {header.get('base_url')}, resuming against {args.url}")
+    elif args.populate and os.path.exists(args.journal) and os.path.getsize(args.journal):
+        parser.error(f"journal {args.journal} already exists; pass --resume to continue that run or remove it")
+    if args.output is None:
+        args.output = "demo_db" if args.format == "ndjson" else "demo_db.json"
+        if args.format == "json-stream" and args.gzip:
+            args.output += ".gz"
     
     generator = DemoDataGenerator(
         num_isolates=args.isolates, 
         populate_db=args.populate,
-        base_url=args.url
+        base_url=args.url,
+        concurrency=args.concurrency,
+        max_retries=args.retries,
+        batch_size=args.batch_size,
+        engine=args.engine,
+        seed=args.seed,
+        workers=args.workers,
+        reference_date=args.reference_date,
+        fasta_storage=args.fasta_storage,
+        profile=args.profile is not None,
+        workload=args.workload
     )
-    demo_data = generator.generate_demo_data()
     
-    # Write to JSON file
-    with open(args.output, 'w') as f:
-        json.dump(demo_data, f, indent=2)
+    journal = None
+    if args.populate:
+        journal = PopulateJournal(args.journal)
+        generator.attach_journal(journal)
+        if args.resume:
+            print(f"↩️  Resuming from {args.journal}: {len(journal.id_map)} rows already created, "
+                  f"{journal.previous_failures} failures to retry")
+    
+    if streaming:
+        if args.format == "ndjson":
+            writer = NdjsonWriter(args.output, compress=args.gzip)
+        else:
+            writer = JsonStreamWriter(args.output, compress=args.gzip)
+        counts = generator.stream_demo_data(writer)
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    else:
+        demo_data = generator.generate_demo_data()
+        counts = {key: len(rows) for key, rows in demo_data.items() if key != "metadata"}
+        
+        # Write to JSON file
+        with generator.telemetry.phase("write_json"), open(args.output, 'w') as f:
+            json.dump(demo_data, f, indent=2)
+    
+    if args.sqlite:
+        from sqlite_loader import load_into_sqlite
+        try:
+            with generator.telemetry.phase("sqlite_load"):
+                load_into_sqlite(args.sqlite, demo_data)
+        except Exception as e:
+            print(f"❌ Failed to load {args.sqlite}: {e}")
+            sys.exit(1)
     
     if args.populate:
-        print(f"🎉 Database populated successfully!")
+        journal.close()
+        failures = generator.failure_report()
+        if failures:
+            print(f"⚠️  Database populated with {len(generator.failed_rows)} failed rows:")
+            for endpoint, rows in failures.items():
+                print(f"   - {endpoint}: {len(rows)} failed (e.g. {rows[0]['id']}: {rows[0]['error']})")
+            report_path = f"{args.journal}.failures.json"
+            with open(report_path, 'w') as f:
+                json.dump(failures, f, indent=2)
+            print(f"📄 Failure report: {report_path}")
+            print(f"↩️  Retry just the failures with: --populate --resume --journal {args.journal}")
+        else:
+            print(f"🎉 Database populated successfully!")
         print(f"📊 Summary:")
         print(f"   - {len(generator.created_org_ids)} Organizations created in DB")
         print(f"   - {len(generator.created_patient_ids)} Patients created in DB")
@@ -618,15 +1316,48 @@ def main():
     else:
         print(f"✅ Demo data generated successfully!")
         print(f"📊 Summary:")
-        print(f"   - {len(demo_data['organizations'])} Organizations")
-        print(f"   - {len(demo_data['patients'])} Patients") 
-        print(f"   - {len(demo_data['isolates'])} Isolates")
-        print(f"   - {len(demo_data['genomicData'])} Genomic records")
-        print(f"   - {len(demo_data['phenotypeProfiles'])} Phenotype profiles")
-        print(f"   - {len(demo_data['treatmentOutcomes'])} Treatment outcomes")
-        print(f"   - {len(demo_data['users'])} Users")
-    
-    print(f"📄 JSON output: {args.output}")
+        print(f"   - {counts['organizations']} Organizations")
+        print(f"   - {counts['patients']} Patients") 
+        print(f"   - {counts['isolates']} Isolates")
+        print(f"   - {counts['genomicData']} Genomic records")
+        print(f"   - {counts['phenotypeProfiles']} Phenotype profiles")
+        print(f"   - {counts['treatmentOutcomes']} Treatment outcomes")
+        print(f"   - {counts['users']} Users")
+        if streaming:
+            print(f"   - Peak RSS: {peak_rss_mb:.0f} MB")
+    
+    workload = f" --workload {args.workload_spec}" if generator.workload else ""
+    print(f"🎲 Seed: {generator.seed} (reproduce with --seed {generator.seed} "
+          f"--reference-date {generator.reference_date.isoformat()}{workload})")
+    print(f"📄 {args.format.upper()} output: {args.output}")
+    
+    if args.telemetry or args.prom_textfile or args.profile:
+        report_telemetry(generator, args)
+
+
+def report_telemetry(generator: DemoDataGenerator, args: argparse.Namespace):
+    telemetry = generator.telemetry
+    run = {
+        "seed": generator.seed,
+        "engine": generator.engine,
+        "isolates": generator.num_isolates,
+        "workload": generator.workload.name if generator.workload else "legacy",
+        "mode": "populate" if args.populate else "sqlite" if args.sqlite else args.format,
+        "workers": generator.workers,
+        "batch_size": generator.batch_size,
+        "concurrency": generator.concurrency
+    }
+    telemetry.print_summary()
+    if args.telemetry:
+        telemetry.write_json(args.telemetry, run)
+        print(f"📈 Telemetry report: {args.telemetry}")
+    if args.prom_textfile:
+        telemetry.write_prometheus(args.prom_textfile, run)
+        print(f"📈 Prometheus textfile: {args.prom_textfile}")
+    if args.profile:
+        telemetry.save_profile(args.profile)
+        print(f"🔬 Generation profile: {args.profile} (top functions by cumulative time below)")
+        print(telemetry.profile_summary(15))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
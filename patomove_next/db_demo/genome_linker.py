@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Batch genome-to-isolate auto-linker for Patomove.
+
+Applies the confidence tiers of /api/isolates/[id]/genome-suggestions to every
+unlinked isolate at once. Instead of one `contains` query per isolate, the
+unlinked genome filenames are indexed once (exact, separator-stripped and
+trigram maps), every isolate label is scored against the index, and the
+unambiguous links are written to the SQLite database in one transaction.
+"""
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, Set, Tuple
+import argparse
+
+# Same rules and scores as the genome-suggestions route
+EXTENSION_PATTERN = re.compile(r"\.(fasta|fa|fna|fastq|fq)$", re.IGNORECASE)
+SEPARATOR_PATTERN = re.compile(r"[-_\s]")
+EXACT, STRIPPED, FILENAME_CONTAINS_LABEL, LABEL_CONTAINS_FILENAME = 0.95, 0.85, 0.70, 0.60
+MATCH_REASONS = {
+    EXACT: "Exact match",
+    STRIPPED: "Very close match (ignoring separators)",
+    FILENAME_CONTAINS_LABEL: "Filename contains isolate label",
+    LABEL_CONTAINS_FILENAME: "Isolate label contains filename",
+}
+
+NGRAM = 3
+LINKING_METHOD = "auto_filename"
+
+
+def filename_base(original_filename: str) -> str:
+    return EXTENSION_PATTERN.sub("", original_filename).strip()
+
+
+def strip_separators(text: str) -> str:
+    return SEPARATOR_PATTERN.sub("", text)
+
+
+def ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class FilenameIndex:
+    """Lookup structures over unlinked genome filenames, built once per run"""
+
+    def __init__(self, genomes: Iterable[Dict[str, Any]]):
+        self.bases: Dict[str, str] = {}                       # genome id -> lowercased filename base
+        self.exact: Dict[str, List[str]] = defaultdict(list)
+        self.stripped: Dict[str, List[str]] = defaultdict(list)
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        for genome in genomes:
+            base = filename_base(genome["originalFilename"]).lower()
+            self.bases[genome["id"]] = base
+            self.exact[base].append(genome["id"])
+            stripped = strip_separators(base)
+            if stripped:
+                self.stripped[stripped].append(genome["id"])
+            for gram in ngrams(base):
+                self.grams[gram].add(genome["id"])
+
+    def containing(self, text: str) -> Iterable[str]:
+        """Genome ids whose filename base contains `text`"""
+        if len(text) < NGRAM:
+            return [genome_id for genome_id, base in self.bases.items() if text in base]
+        postings = sorted((self.grams.get(gram, set()) for gram in ngrams(text)), key=len)
+        candidates = set.intersection(*postings) if postings[0] else set()
+        return [genome_id for genome_id in candidates if text in self.bases[genome_id]]
+
+    def contained_in(self, text: str) -> Iterable[str]:
+        """Genome ids whose (non-empty) filename base is a substring of `text`"""
+        found = []
+        for substring in {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}:
+            found.extend(self.exact.get(substring, ()))
+        return found
+
+    def score(self, label: str) -> Dict[str, float]:
+        """Best confidence per genome for one isolate label, using the route's tier order"""
+        label = label.lower()
+        scores: Dict[str, float] = {}
+
+        def offer(genome_ids: Iterable[str], confidence: float):
+            for genome_id in genome_ids:
+                if scores.get(genome_id, 0) < confidence:
+                    scores[genome_id] = confidence
+
+        offer(self.exact.get(label, ()), EXACT)
+        offer(self.stripped.get(strip_separators(label), ()), STRIPPED)
+        if label:
+            offer(self.containing(label), FILENAME_CONTAINS_LABEL)
+            offer(self.contained_in(label), LABEL_CONTAINS_FILENAME)
+        return scores
+
+
+def match(isolates: List[Dict[str, Any]], genomes: List[Dict[str, Any]],
+          min_confidence: float = STRIPPED) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Pick one genome per isolate, best tier first, skipping ties that the tier cannot break"""
+    index = FilenameIndex(genomes)
+    by_tier: Dict[float, List[Tuple[str, str]]] = defaultdict(list)
+    for isolate in isolates:
+        for genome_id, confidence in index.score(isolate["label"]).items():
+            if confidence >= min_confidence:
+                by_tier[confidence].append((isolate["id"], genome_id))
+
+    labels = {isolate["id"]: isolate["label"] for isolate in isolates}
+    filenames = {genome["id"]: genome["originalFilename"] for genome in genomes}
+    linked_isolates: Set[str] = set()
+    linked_genomes: Set[str] = set()
+    links: List[Dict[str, Any]] = []
+    stats = {"ambiguous": 0}
+    for confidence in sorted(by_tier, reverse=True):
+        pairs = [(i, g) for i, g in by_tier[confidence] if i not in linked_isolates and g not in linked_genomes]
+        per_isolate: Dict[str, int] = defaultdict(int)
+        per_genome: Dict[str, int] = defaultdict(int)
+        for isolate_id, genome_id in pairs:
+            per_isolate[isolate_id] += 1
+            per_genome[genome_id] += 1
+        for isolate_id, genome_id in pairs:
+            if per_isolate[isolate_id] > 1 or per_genome[genome_id] > 1:
+                stats["ambiguous"] += 1
+                continue
+            linked_isolates.add(isolate_id)
+            linked_genomes.add(genome_id)
+            links.append({
+                "isolateId": isolate_id,
+                "genomeId": genome_id,
+                "label": labels[isolate_id],
+                "originalFilename": filenames[genome_id],
+                "confidence": confidence,
+                "matchReason": MATCH_REASONS[confidence]
+            })
+        stats[MATCH_REASONS[confidence]] = sum(1 for link in links if link["confidence"] == confidence)
+    return links, stats
+
+
+class SqliteLinkStore:
+    """Read unlinked rows from and write links to the Prisma SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+
+    def begin(self):
+        # Take the write lock before reading so nothing links the same rows underneath us
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def unlinked_isolates(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute('SELECT "id", "label" FROM "Isolate" WHERE "genomeId" IS NULL')
+        return [{"id": row[0], "label": row[1]} for row in rows]
+
+    def unlinked_genomes(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            'SELECT "id", "originalFilename" FROM "GenomicData" '
+            'WHERE "validationStatus" = \'valid\' '
+            'AND "id" NOT IN (SELECT "genomeId" FROM "Isolate" WHERE "genomeId" IS NOT NULL)'
+        )
+        return [{"id": row[0], "originalFilename": row[1]} for row in rows]
+
+    def write_links(self, links: List[Dict[str, Any]]):
+        now_ms = int(time.time() * 1000)  # Prisma stores DateTime as epoch milliseconds on SQLite
+        self.conn.executemany(
+            'UPDATE "Isolate" SET "genomeId" = ?, "updatedAt" = ? WHERE "id" = ? AND "genomeId" IS NULL',
+            [(link["genomeId"], now_ms, link["isolateId"]) for link in links]
+        )
+        self.conn.executemany(
+            'UPDATE "GenomicData" SET "linkedAt" = ?, "autoLinked" = 1, "linkingMethod" = ?, "updatedAt" = ? '
+            'WHERE "id" = ?',
+            [(now_ms, LINKING_METHOD, now_ms, link["genomeId"]) for link in links]
+        )
+
+    def commit(self):
+        self.conn.execute("COMMIT")
+
+    def rollback(self):
+        self.conn.execute("ROLLBACK")
+
+    def close(self):
+        self.conn.close()
+
+
+def load_dataset(path: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Unlinked isolates and valid genomes from generate_db_demo.py output (JSON, .json.gz or NDJSON directory)"""
+    if os.path.isdir(path):
+        from loadtest import read_table
+        tables = {name: list(read_table(path, name)) for name in ("isolates", "genomicData")}
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            tables = json.load(f)
+    isolates = [row for row in tables.get("isolates", []) if not row.get("genomeId")]
+    linked = {row["genomeId"] for row in tables.get("isolates", []) if row.get("genomeId")}
+    genomes = [row for row in tables.get("genomicData", [])
+               if row.get("validationStatus") == "valid" and row["id"] not in linked]
+    return isolates, genomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-link unlinked genomes to isolates by filename, in one batch")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="SQLite database to link (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Score a generated dataset instead of the database (implies --dry-run)")
+    parser.add_argument("--min-confidence", type=float, default=STRIPPED,
+                       help=f"Lowest tier that is linked automatically (default: {STRIPPED})")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Report the links without writing them")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the chosen links as JSON")
+    args = parser.parse_args()
+
+    store = None
+    if args.data:
+        isolates, genomes = load_dataset(args.data)
+        source = args.data
+    else:
+        if not os.path.exists(args.sqlite):
+            parser.error(f"{args.sqlite} does not exist")
+        store = SqliteLinkStore(args.sqlite)
+        store.begin()
+        isolates, genomes = store.unlinked_isolates(), store.unlinked_genomes()
+        source = args.sqlite
+
+    print(f"🔗 Matching {len(isolates)} unlinked isolates against {len(genomes)} unlinked genomes from {source}...")
+    start = time.perf_counter()
+    links, stats = match(isolates, genomes, min_confidence=args.min_confidence)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored in {elapsed:.3f}s: {len(links)} links")
+    for reason, count in stats.items():
+        if reason != "ambiguous" and count:
+            print(f"   - {count} {reason}")
+    if stats["ambiguous"]:
+        print(f"   ⚠️  {stats['ambiguous']} candidate pairs skipped as ambiguous (tied within a tier)")
+
+    if store is not None:
+        try:
+            if args.dry_run or not links:
+                store.rollback()
+            else:
+                start = time.perf_counter()
+                store.write_links(links)
+                store.commit()
+                print(f"💾 Linked {len(links)} genomes in {time.perf_counter() - start:.3f}s")
+        except Exception:
+            store.rollback()
+            raise
+        finally:
+            store.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(links, f, indent=2)
+        print(f"📄 Links: {args.output}")
+
+    if args.dry_run or args.data:
+        print("ℹ️  Dry run: nothing was written")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except sqlite3.Error as e:
+        print(f"❌ SQLite error: {e}")
+        sys.exit(1)
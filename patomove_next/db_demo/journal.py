@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for populating the Patomove API.
+
+An append-only JSONL file: the first line records the generator parameters
+(seed, size, engine, reference date) so a resumed run regenerates exactly the
+same rows; every later line maps a locally generated row ID to the ID the
+server assigned, or records why the row could not be created.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+
+
+class PopulateJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.header: Optional[Dict[str, Any]] = None
+        self.id_map: Dict[str, str] = {}
+        self.previous_failures = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self.replay()
+        # Line buffered: every record reaches the OS as soon as it is written
+        self.f = open(path, "a", buffering=1)
+
+    @staticmethod
+    def read_header(path: str) -> Dict[str, Any]:
+        with open(path) as f:
+            header = json.loads(f.readline() or "{}")
+        if header.get("type") != "run":
+            raise ValueError(f"{path} is not a populate journal")
+        return header
+
+    def replay(self):
+        """Rebuild the local -> server ID map from an earlier (possibly interrupted) run"""
+        failed = set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn last line from a crash
+                if entry.get("type") == "run":
+                    self.header = self.header or entry
+                elif "server" in entry:
+                    self.id_map[entry["local"]] = entry["server"]
+                    failed.discard(entry["local"])
+                else:
+                    failed.add(entry["local"])
+        self.previous_failures = len(failed)
+
+    def _write(self, entry: Dict[str, Any]):
+        with self._lock:
+            self.f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def start(self, params: Dict[str, Any]):
+        if self.header is None:
+            self.header = {"type": "run", **params}
+            self._write(self.header)
+
+    def record_created(self, endpoint: str, local_id: str, server_id: str):
+        self._write({"endpoint": endpoint, "local": local_id, "server": server_id})
+
+    def record_failure(self, endpoint: str, local_id: str, error: str):
+        self._write({"endpoint": endpoint, "local": local_id, "error": error})
+
+    def close(self):
+        self.f.close()
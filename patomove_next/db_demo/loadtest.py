@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Read-path load generator for the Patomove API.
+
+Replays a configurable mix of GET requests against a running `npm run dev` /
+`next start` instance, picking isolate, genome and organization IDs from a
+generated dataset so every request hits real rows. Runs either closed-loop
+(N virtual users, each waiting for its response) or open-loop (a fixed
+arrival rate, with latency measured from the scheduled send time so a slow
+server cannot hide its own queueing). Reports throughput, error rate and a
+latency histogram per route.
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Iterator, Optional
+import argparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LatencyHistogram
+from streaming import IdPool
+
+# Latency bands reported per route
+HISTOGRAM_BOUNDS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Open loop: an arrival sent this long after its scheduled time counts as late
+LATE_SECONDS = 0.01
+
+# Default share of traffic per route (weights, not percentages)
+DEFAULT_MIX = {
+    "isolate": 40,             # GET /isolates/[id]
+    "genome-suggestions": 25,  # GET /isolates/[id]/genome-suggestions (contains/OR scans)
+    "filters": 15,             # GET /isolates/filters (distinct scans)
+    "genomic": 10,             # GET /genomics/[id]
+    "isolates": 5,             # GET /isolates?orgId=... (unpaginated, seven includes)
+    "patients": 5,             # GET /patients?orgId=...
+}
+
+
+class Targets:
+    """IDs taken from a generated dataset, used to build request paths"""
+
+    def __init__(self):
+        self.isolate_ids = IdPool()
+        self.genomic_ids = IdPool()
+        self.org_ids: List[str] = []
+        self.collection_sources: List[str] = []
+
+
+def read_table(path: str, table: str) -> Iterator[Dict[str, Any]]:
+    """Yield rows of one table from an NDJSON output directory"""
+    for suffix, opener in ((".ndjson", open), (".ndjson.gz", gzip.open)):
+        table_path = os.path.join(path, f"{table}{suffix}")
+        if os.path.exists(table_path):
+            with opener(table_path, "rt") as f:
+                for line in f:
+                    yield json.loads(line)
+            return
+
+
+def load_targets(path: str) -> Targets:
+    """Collect request targets from generate_db_demo.py output (--format json/json-stream or ndjson)"""
+    if os.path.isdir(path):
+        tables = {name: read_table(path, name) for name in ("organizations", "isolates", "genomicData")}
+    else:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            tables = json.load(f)
+
+    targets = Targets()
+    targets.org_ids = [org["id"] for org in tables.get("organizations", [])]
+    sources = set()
+    for isolate in tables.get("isolates", []):
+        targets.isolate_ids.append(isolate["id"])
+        sources.add(isolate.get("collectionSource"))
+    targets.collection_sources = sorted(source for source in sources if source)
+    for genome in tables.get("genomicData", []):
+        targets.genomic_ids.append(genome["id"])
+    return targets
+
+
+def route_paths(targets: Targets) -> Dict[str, Callable[[random.Random], str]]:
+    """Route name -> function building a request path for that route"""
+    return {
+        "isolate": lambda rng: f"/isolates/{rng.choice(targets.isolate_ids)}",
+        "genome-suggestions": lambda rng: f"/isolates/{rng.choice(targets.isolate_ids)}/genome-suggestions",
+        "filters": lambda rng: "/isolates/filters",
+        "genomic": lambda rng: f"/genomics/{rng.choice(targets.genomic_ids)}",
+        # Datasets without collectionSource values only filter by org
+        "isolates": lambda rng: (f"/isolates?orgId={rng.choice(targets.org_ids)}"
+                                 if not targets.collection_sources or rng.random() < 0.5
+                                 else f"/isolates?collectionSource={rng.choice(targets.collection_sources)}"),
+        "patients": lambda rng: f"/patients?orgId={rng.choice(targets.org_ids)}",
+    }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse 'isolate=40,filters=10' into route weights"""
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        if route not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route '{route}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(self, base_url: str, targets: Targets, mix: Dict[str, float],
+                 timeout: float = 30.0, max_connections: int = 64, seed: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(32)
+
+        paths = route_paths(targets)
+        required_ids = {"isolate": targets.isolate_ids, "genome-suggestions": targets.isolate_ids,
+                        "genomic": targets.genomic_ids, "isolates": targets.org_ids, "patients": targets.org_ids}
+        # Skip routes the dataset has no IDs for instead of failing every request
+        self.mix = {route: weight for route, weight in mix.items()
+                    if weight > 0 and (route not in required_ids or len(required_ids[route]) > 0)}
+        self.paths = {route: paths[route] for route in self.mix}
+        self.routes = list(self.mix)
+        self.weights = [self.mix[route] for route in self.routes]
+
+        self.histograms = {route: LatencyHistogram() for route in self.routes}
+        self.recording = False
+        # Open loop: arrivals dropped with every slot in flight, and ones sent later than LATE_SECONDS
+        self.dropped = 0
+        self.late = 0
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def pick(self, rng: random.Random):
+        route = rng.choices(self.routes, self.weights)[0]
+        return route, self.paths[route](rng)
+
+    def issue(self, route: str, path: str, scheduled: Optional[float] = None):
+        """Send one GET and record its latency (from `scheduled` in open-loop mode)"""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+            response.content  # include body transfer in the latency
+            failed = response.status_code >= 400
+        except requests.exceptions.RequestException:
+            failed = True
+        if self.recording:
+            histogram = self.histograms[route]
+            histogram.record(time.perf_counter() - start)
+            if failed:
+                histogram.record_error()
+
+    def run_closed_loop(self, users: int, duration: float, warmup: float, think_time: float = 0.0):
+        """N virtual users, each sending its next request once the previous one completes"""
+        stop = threading.Event()
+
+        def user(index: int):
+            rng = random.Random(f"{self.seed}:{index}")
+            while not stop.is_set():
+                self.issue(*self.pick(rng))
+                if think_time:
+                    time.sleep(rng.expovariate(1 / think_time))
+
+        threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+        for thread in threads:
+            thread.start()
+        self.measure(duration, warmup)
+        stop.set()
+        for thread in threads:
+            thread.join(self.timeout)
+
+    def run_open_loop(self, rps: float, duration: float, warmup: float, max_in_flight: int):
+        """Send requests at a fixed arrival rate regardless of how fast responses come back.
+
+        At most max_in_flight requests are outstanding. An arrival finding every slot taken is dropped
+        rather than queued, so a server that falls behind cannot grow an unbounded backlog that runs past
+        the duration; dropped arrivals and ones the scheduler sent late are counted separately.
+        """
+        rng = random.Random(self.seed)
+        interval = 1 / rps
+        stop = threading.Event()
+        slots = threading.BoundedSemaphore(max_in_flight)
+
+        def send(route: str, path: str, scheduled: float):
+            try:
+                self.issue(route, path, scheduled)
+            finally:
+                slots.release()
+
+        def schedule():
+            with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+                start = time.perf_counter()
+                sent = 0
+                while not stop.is_set():
+                    scheduled = start + sent * interval
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    route, path = self.pick(rng)
+                    sent += 1
+                    if not slots.acquire(blocking=False):
+                        if self.recording:
+                            self.dropped += 1
+                        continue
+                    if self.recording and time.perf_counter() - scheduled > LATE_SECONDS:
+                        self.late += 1
+                    pool.submit(send, route, path, scheduled)
+
+        scheduler = threading.Thread(target=schedule, daemon=True)
+        scheduler.start()
+        self.measure(duration, warmup)
+        stop.set()
+        scheduler.join(self.timeout)
+
+    def measure(self, duration: float, warmup: float):
+        if warmup:
+            print(f"🔥 Warming up for {warmup:g}s...")
+            time.sleep(warmup)
+        print(f"⏱️  Measuring for {duration:g}s...")
+        self.recording = True
+        self.started = time.perf_counter()
+        time.sleep(duration)
+        self.recording = False
+        self.elapsed = time.perf_counter() - self.started
+
+    def report(self) -> Dict[str, Any]:
+        routes = {}
+        for route, histogram in self.histograms.items():
+            stats = histogram.summary()
+            stats["rps"] = round(histogram.count / self.elapsed, 2)
+            stats["error_rate"] = round(histogram.errors / histogram.count, 4) if histogram.count else 0.0
+            stats["histogram"] = histogram.distribution(HISTOGRAM_BOUNDS_MS)
+            routes[route] = stats
+        total = sum(stats["count"] for stats in routes.values())
+        errors = sum(stats["errors"] for stats in routes.values())
+        return {
+            "seconds": round(self.elapsed, 2),
+            "requests": total,
+            "rps": round(total / self.elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "dropped": self.dropped,
+            "late": self.late,
+            "routes": routes,
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"📊 {report['requests']:,} requests in {report['seconds']}s "
+          f"({report['rps']:,.1f} req/s, {report['error_rate']:.2%} errors)")
+    if report["dropped"] or report["late"]:
+        print(f"   ⚠️  {report['dropped']:,} arrivals dropped with --max-in-flight requests outstanding, "
+              f"{report['late']:,} sent late")
+    print(f"   {'route':<20}{'req/s':>9}{'errors':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for route, stats in report["routes"].items():
+        print(f"   {route:<20}{stats['rps']:>9,.1f}{stats['error_rate']:>9.2%}"
+              f"{stats['p50_ms']:>8.1f}ms{stats['p95_ms']:>8.1f}ms{stats['p99_ms']:>8.1f}ms{stats['max_ms']:>8.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Patomove read API with IDs from a generated dataset")
+    parser.add_argument("--data", "-d", type=str, default="demo_db.json",
+                       help="Dataset used to seed the server: JSON file or NDJSON directory (default: demo_db.json)")
+    parser.add_argument("--url", type=str, default="http://localhost:3000/api",
+                       help="API base URL (default: http://localhost:3000/api)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--users", "-u", type=int, default=None,
+                     help="Closed loop: number of virtual users (default mode, 10 users)")
+    mode.add_argument("--rps", type=float, default=None,
+                     help="Open loop: target requests per second")
+    parser.add_argument("--duration", type=float, default=60,
+                       help="Measured seconds (default: 60)")
+    parser.add_argument("--warmup", type=float, default=5,
+                       help="Unmeasured warm-up seconds (default: 5)")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                       help="Closed loop: mean seconds a user waits between requests (default: 0)")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                       help="Open loop: cap on concurrent requests; arrivals beyond it are dropped and counted (default: 256)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                       help="Route weights, e.g. isolate=40,genome-suggestions=25,filters=15,genomic=10,isolates=5,patients=5")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                       help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Seed for the request sequence")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the report as JSON")
+    args = parser.parse_args()
+
+    print(f"📂 Loading request targets from {args.data}...")
+    targets = load_targets(args.data)
+    print(f"   {len(targets.isolate_ids):,} isolates, {len(targets.genomic_ids):,} genomes, {len(targets.org_ids)} organizations")
+
+    users = args.users if args.users is not None else 10
+    connections = args.max_in_flight if args.rps else users
+    test = LoadTest(args.url, targets, args.mix, timeout=args.timeout, max_connections=connections, seed=args.seed)
+    if not test.routes:
+        print("❌ The dataset has no IDs for any route in the mix")
+        sys.exit(1)
+
+    try:
+        test.session.get(f"{test.base_url}/isolates/filters", timeout=args.timeout)
+    except requests.exceptions.RequestException:
+        print(f"❌ Server not reachable at {args.url}! Please start with 'npm run dev' or 'npm run start' first.")
+        sys.exit(1)
+
+    if args.rps:
+        print(f"🚦 Open loop at {args.rps:g} req/s across {', '.join(test.routes)}")
+        test.run_open_loop(args.rps, args.duration, args.warmup, args.max_in_flight)
+    else:
+        print(f"👥 Closed loop with {users} virtual users across {', '.join(test.routes)}")
+        test.run_closed_loop(users, args.duration, args.warmup, args.think_time)
+
+    report = test.report()
+    report["mode"] = {"rps": args.rps} if args.rps else {"users": users, "think_time": args.think_time}
+    report["seed"] = test.seed
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
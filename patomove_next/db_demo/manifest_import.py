@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Streaming importer for lab isolate manifests (CSV shaped like efm_demo.csv).
+
+The CSV import wizard posts one isolate per request. This reads a manifest row
+by row and works on fixed-size batches: rows are validated and normalized, the
+lab's patient and environment codes (P001, E001, ...) are resolved with one
+query per batch through a bounded cache, and each batch is inserted in a single
+transaction. Rows that fail go to a reject CSV with the reason instead of
+aborting the import, so memory stays flat for manifests of any length.
+"""
+
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time as time_of_day, timezone
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
+import argparse
+from export_isolates import peak_rss_mb
+from sqlite_loader import SqliteLoader, chunked, to_prisma_datetime
+
+ID_CHUNK = 500
+CACHE_SIZE = 100000
+PROGRESS_EVERY = 100000
+LINKING_METHOD = "manifest"
+
+# Manifest column (lowercased, letters only) -> field; covers efm_demo.csv and the wizard's template headers
+COLUMN_ALIASES = {
+    "isolateid": "label", "label": "label", "sampleid": "label",
+    "species": "species", "organism": "species",
+    "collectionsource": "collectionSource",
+    "collectionsite": "collectionSite",
+    "collectiondate": "collectionDate",
+    "sampletype": "sampleType",
+    "patientid": "patient", "patient": "patient", "patientcode": "patient",
+    "environmentid": "environment", "environment": "environment", "environmentcode": "environment",
+    "priority": "priority",
+    "processingstatus": "processingStatus",
+    "orgid": "org", "org": "org", "organization": "org", "orgcode": "org",
+    "assemblypath": "assemblyPath", "assembly": "assemblyPath",
+    "notes": "notes",
+}
+
+SAMPLE_TYPES = {"clinical", "environmental"}
+PRIORITIES = {"normal", "priority"}
+PROCESSING_STATUSES = {"pending", "to be sequenced", "genome sequenced", "genomics processing", "genomics completed"}
+DATE_FORMATS = ["%d/%m/%Y", "%d.%m.%Y"]
+
+
+class RowError(Exception):
+    def __init__(self, reason: str, detail: Any = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.detail = detail
+
+    def __str__(self) -> str:
+        return f"{self.reason}: {self.detail}" if self.detail not in (None, "") else self.reason
+
+
+def field_map(headers: List[str]) -> Dict[str, str]:
+    """Manifest header -> field for every recognised column"""
+    fields = {}
+    for header in headers:
+        field = COLUMN_ALIASES.get(re.sub(r"[^a-z]", "", header.lower()))
+        if field and field not in fields.values():
+            fields[header] = field
+    return fields
+
+
+def parse_date(value: str) -> int:
+    """Collection date as Prisma epoch ms; date-only values are UTC midnight, as `new Date('2024-12-15')`"""
+    try:
+        if len(value) == 10 and value[4] == "-":
+            return int(datetime.combine(date.fromisoformat(value), time_of_day.min, timezone.utc).timestamp() * 1000)
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return to_prisma_datetime(value) if parsed.tzinfo is None else int(parsed.timestamp() * 1000)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return int(datetime.strptime(value, date_format).replace(tzinfo=timezone.utc).timestamp() * 1000)
+        except ValueError:
+            continue
+    raise RowError("Invalid collection date", value)
+
+
+def normalize(row: Dict[str, Any], fields: Dict[str, str], default_org: Optional[str]) -> Dict[str, Any]:
+    """Validate one manifest row with the wizard's rules and return its normalized fields"""
+    if None in row:
+        raise RowError("Too many columns")
+    values = {field: (row.get(header) or "").strip() for header, field in fields.items()}
+
+    record = {
+        "label": values.get("label", ""),
+        "species": " ".join(values.get("species", "").split()) or None,
+        "collectionSource": values.get("collectionSource", ""),
+        "collectionSite": values.get("collectionSite", ""),
+        "sampleType": (values.get("sampleType") or "clinical").lower(),
+        "priority": (values.get("priority") or "normal").lower(),
+        "processingStatus": (values.get("processingStatus") or "to be sequenced").lower(),
+        "org": values.get("org") or default_org,
+        "patient": values.get("patient") or None,
+        "environment": values.get("environment") or None,
+        "assemblyPath": values.get("assemblyPath") or None,
+        "notes": values.get("notes") or None,
+    }
+    if not record["label"]:
+        raise RowError("Sample ID required")
+    if not record["org"]:
+        raise RowError("Organization required")
+    if not record["collectionSite"]:
+        raise RowError("Collection site required")
+    if not values.get("collectionDate"):
+        raise RowError("Collection date required")
+    record["collectionDate"] = parse_date(values["collectionDate"])
+    if record["sampleType"] not in SAMPLE_TYPES:
+        raise RowError("Invalid sample type", record["sampleType"])
+    if record["priority"] not in PRIORITIES:
+        raise RowError("Invalid priority", record["priority"])
+    if record["processingStatus"] not in PROCESSING_STATUSES:
+        raise RowError("Invalid processing status", record["processingStatus"])
+
+    # Only the reference matching the sample type is kept, as the wizard submits it
+    if record["sampleType"] == "clinical":
+        record["environment"] = None
+        if not record["patient"]:
+            raise RowError("Patient required for clinical samples")
+    else:
+        record["patient"] = None
+        if not record["environment"]:
+            raise RowError("Environment site required for environmental samples")
+    return record
+
+
+class ReferenceCache:
+    """(orgId, externalCode or id) -> row id for Patient or Environment, LRU-bounded.
+
+    Misses for a whole batch are resolved in one query per organization, and
+    unknown references are cached too so a bad code costs one lookup per import.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, table: str, capacity: int = CACHE_SIZE):
+        self.conn = conn
+        self.table = table
+        self.capacity = capacity
+        self.entries: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+        self.hits = 0
+        self.queries = 0
+
+    def resolve(self, keys: Set[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[str]]:
+        resolved = {}
+        misses: Dict[str, List[str]] = {}
+        for key in keys:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                resolved[key] = self.entries[key]
+                self.hits += 1
+            else:
+                misses.setdefault(key[0], []).append(key[1])
+
+        for org_id, refs in misses.items():
+            for chunk in chunked(refs, ID_CHUNK):
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f'SELECT "id", "externalCode" FROM "{self.table}" WHERE "orgId" = ? '
+                    f'AND ("externalCode" IN ({placeholders}) OR "id" IN ({placeholders}))',
+                    [org_id, *chunk, *chunk]
+                )
+                self.queries += 1
+                found = {}
+                for row_id, code in rows:
+                    found[row_id] = row_id
+                    if code is not None:
+                        found[code] = row_id
+                for ref in chunk:
+                    resolved[(org_id, ref)] = found.get(ref)
+                    self.store((org_id, ref), found.get(ref))
+        return resolved
+
+    def store(self, key: Tuple[str, str], row_id: Optional[str]):
+        self.entries[key] = row_id
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def forget(self, keys: Iterable[Tuple[str, str]]):
+        for key in keys:
+            self.entries.pop(key, None)
+
+
+class ManifestImporter:
+    def __init__(self, db_path: str, batch_size: int = 5000, default_org: Optional[str] = None,
+                 create_missing: bool = False, allow_duplicates: bool = False,
+                 created_by: str = "manifest-import", dry_run: bool = False):
+        self.loader = SqliteLoader(db_path, batch_size=batch_size)
+        self.conn = self.loader.conn
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA busy_timeout = 10000")  # share the live database with the app
+        # Connection-scoped, unlike the rest of LOAD_PRAGMAS: keeps the growing Isolate indexes in memory
+        self.conn.execute("PRAGMA cache_size = -65536")  # 64MB
+        self.batch_size = batch_size
+        self.create_missing = create_missing
+        self.allow_duplicates = allow_duplicates
+        self.created_by = created_by
+        self.dry_run = dry_run
+        # A dry run rolls every batch back, so the rows earlier batches would have imported are kept
+        # here to report the same cross-batch duplicates as the real import
+        self.dry_run_labels: Set[Tuple[str, str]] = set()
+
+        self.check_schema()
+        self.orgs: Dict[str, str] = {}
+        for org_id, code in self.conn.execute('SELECT "id", "code" FROM "Organization"'):
+            self.orgs[org_id] = org_id
+            self.orgs[code] = org_id
+            self.orgs[code.lower()] = org_id
+        self.default_org = self.orgs.get(default_org, default_org) if default_org else None
+        self.patients = ReferenceCache(self.conn, "Patient")
+        self.environments = ReferenceCache(self.conn, "Environment")
+
+        self.counts: Dict[str, int] = {"read": 0, "imported": 0, "rejected": 0, "patients created": 0,
+                                       "environments created": 0, "genomes linked": 0}
+        self.reasons: Dict[str, int] = {}
+        self.reject_writer: Optional[csv.DictWriter] = None
+
+    def check_schema(self):
+        for table in ("Patient", "Environment"):
+            if "externalCode" not in self.loader.table_columns(table):
+                raise RuntimeError(f"{self.loader.db_path} has no {table}.externalCode; run 'npx prisma db push' first")
+
+    def close(self):
+        self.loader.close()
+
+    def reject(self, line: int, row: Dict[str, Any], error: RowError):
+        self.counts["rejected"] += 1
+        self.reasons[error.reason] = self.reasons.get(error.reason, 0) + 1
+        if self.reject_writer is not None:
+            self.reject_writer.writerow({**row, "_line": line, "_error": str(error)})
+
+    def resolve_references(self, batch: List[Tuple[int, Dict[str, Any], Dict[str, Any]]]) -> Set[Tuple[str, str, str]]:
+        """Fill in patientId/environmentId; returns (table, orgId, code) of rows created for this batch"""
+        created = set()
+        for field, cache, table in (("patient", self.patients, "Patient"), ("environment", self.environments, "Environment")):
+            keys = {(record["orgId"], record[field]) for _, _, record in batch if record[field]}
+            if not keys:
+                continue
+            resolved = cache.resolve(keys)
+            missing = sorted(key for key, row_id in resolved.items() if row_id is None)
+            if missing and self.create_missing:
+                rows = []
+                for org_id, code in missing:
+                    row = {"id": str(uuid.uuid4()), "orgId": org_id, "externalCode": code}
+                    if table == "Environment":
+                        row["siteName"] = code  # siteName is required; the lab can rename the site later
+                    rows.append(row)
+                    resolved[(org_id, code)] = row["id"]
+                    cache.store((org_id, code), row["id"])
+                    created.add((table, org_id, code))
+                self.loader.insert_rows(table, rows)
+            for _, _, record in batch:
+                if record[field]:
+                    record[f"{field}Id"] = resolved[(record["orgId"], record[field])]
+        return created
+
+    def existing_labels(self, batch: List[Tuple[int, Dict[str, Any], Dict[str, Any]]]) -> Set[Tuple[str, str]]:
+        by_org: Dict[str, List[str]] = {}
+        for _, _, record in batch:
+            by_org.setdefault(record["orgId"], []).append(record["label"])
+        existing = {(record["orgId"], record["label"]) for _, _, record in batch
+                    if (record["orgId"], record["label"]) in self.dry_run_labels}
+        for org_id, labels in by_org.items():
+            for chunk in chunked(labels, ID_CHUNK):
+                rows = self.conn.execute(
+                    f'SELECT "label" FROM "Isolate" WHERE "orgId" = ? AND "label" IN ({", ".join("?" * len(chunk))})',
+                    [org_id, *chunk]
+                )
+                existing.update((org_id, label) for (label,) in rows)
+        return existing
+
+    def genome_ids(self, batch: List[Tuple[int, Dict[str, Any], Dict[str, Any]]]) -> Dict[str, str]:
+        """assembly filename -> genome id, for filenames matching exactly one genome not yet linked to an isolate"""
+        names = {os.path.basename(record["assemblyPath"]) for _, _, record in batch if record["assemblyPath"]}
+        matches: Dict[str, List[str]] = {}
+        for chunk in chunked(sorted(names), ID_CHUNK):
+            rows = self.conn.execute(
+                f'SELECT g."id", g."originalFilename" FROM "GenomicData" g '
+                f'WHERE g."originalFilename" IN ({", ".join("?" * len(chunk))}) '
+                f'AND NOT EXISTS (SELECT 1 FROM "Isolate" i WHERE i."genomeId" = g."id")',
+                chunk
+            )
+            for genome_id, filename in rows:
+                matches.setdefault(filename, []).append(genome_id)
+        return {filename: ids[0] for filename, ids in matches.items() if len(ids) == 1}
+
+    def insert(self, records: List[Dict[str, Any]]):
+        phenotypes = [{"id": record["phenotypeId"], "species": record["species"], "notes": "Species from lab manifest"}
+                      for record in records if record["phenotypeId"]]
+        self.loader.insert_rows("PhenotypeProfile", phenotypes)
+        self.loader.insert_rows("Isolate", ({
+            "id": record["id"],
+            "label": record["label"],
+            "sampleType": record["sampleType"],
+            "phenotypeId": record["phenotypeId"],
+            "collectionSource": record["collectionSource"],
+            "patientId": record.get("patientId"),
+            "environmentId": record.get("environmentId"),
+            "orgId": record["orgId"],
+            "collectionSite": record["collectionSite"],
+            "collectionDate": record["collectionDate"],
+            "priority": record["priority"],
+            "processingStatus": record["processingStatus"],
+            "notes": record["notes"],
+            "genomeId": record["genomeId"],
+            "createdBy": self.created_by,
+            "updatedBy": self.created_by,
+        } for record in records))
+        linked = [record for record in records if record["genomeId"]]
+        self.conn.executemany(
+            'UPDATE "GenomicData" SET "linkedAt" = ?, "autoLinked" = 0, "linkingMethod" = ?, "updatedAt" = ? '
+            'WHERE "id" = ?',
+            [(self.loader.now_ms, LINKING_METHOD, self.loader.now_ms, record["genomeId"]) for record in linked]
+        )
+
+    def import_batch(self, rows: List[Tuple[int, Dict[str, Any]]]):
+        batch = []
+        labels: Set[Tuple[str, str]] = set()
+        for line, row in rows:
+            try:
+                record = normalize(row, self.fields, self.default_org)
+                record["orgId"] = self.orgs.get(record["org"]) or self.orgs.get(record["org"].lower())
+                if record["orgId"] is None:
+                    raise RowError("Unknown organization", record["org"])
+                if (record["orgId"], record["label"]) in labels:
+                    raise RowError("Duplicate sample ID in manifest", record["label"])
+            except RowError as e:
+                self.reject(line, row, e)
+                continue
+            labels.add((record["orgId"], record["label"]))
+            batch.append((line, row, record))
+        if not batch:
+            return
+
+        # The write lock is taken before the lookups so they hold until the batch commits
+        self.conn.execute("BEGIN IMMEDIATE")
+        created: Set[Tuple[str, str, str]] = set()
+        try:
+            created = self.resolve_references(batch)
+            existing = set() if self.allow_duplicates else self.existing_labels(batch)
+            genomes = self.genome_ids(batch)
+            accepted = []
+            for line, row, record in batch:
+                if record["patient"] and not record.get("patientId"):
+                    self.reject(line, row, RowError("Unknown patient", record["patient"]))
+                elif record["environment"] and not record.get("environmentId"):
+                    self.reject(line, row, RowError("Unknown environment", record["environment"]))
+                elif (record["orgId"], record["label"]) in existing:
+                    self.reject(line, row, RowError("Sample ID already imported", record["label"]))
+                else:
+                    filename = os.path.basename(record["assemblyPath"]) if record["assemblyPath"] else None
+                    record["genomeId"] = genomes.pop(filename, None) if filename else None
+                    if filename and not record["genomeId"]:
+                        # Keep the lab's path until the genome is uploaded and linked
+                        record["notes"] = "; ".join(filter(None, [record["notes"], f"Assembly: {record['assemblyPath']}"]))
+                    record["id"] = str(uuid.uuid4())
+                    record["phenotypeId"] = str(uuid.uuid4()) if record["species"] else None
+                    accepted.append((line, row, record))
+
+            try:
+                self.conn.execute("SAVEPOINT batch")
+                self.insert([record for _, _, record in accepted])
+                self.conn.execute("RELEASE batch")
+                imported = accepted
+            except sqlite3.DatabaseError:
+                # Retry one row at a time so only the offending rows are rejected
+                self.conn.execute("ROLLBACK TO batch")
+                self.conn.execute("RELEASE batch")
+                imported = []
+                for line, row, record in accepted:
+                    self.conn.execute("SAVEPOINT row")
+                    try:
+                        self.insert([record])
+                        self.conn.execute("RELEASE row")
+                        imported.append((line, row, record))
+                    except sqlite3.DatabaseError as e:
+                        self.conn.execute("ROLLBACK TO row")
+                        self.conn.execute("RELEASE row")
+                        self.reject(line, row, RowError("Database rejected row", e))
+
+            if self.dry_run:
+                self.conn.execute("ROLLBACK")
+                self.forget(created)
+                self.dry_run_labels.update((record["orgId"], record["label"]) for _, _, record in imported)
+            else:
+                self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            self.forget(created)
+            raise
+
+        self.counts["imported"] += len(imported)
+        self.counts["genomes linked"] += sum(1 for _, _, record in imported if record["genomeId"])
+        self.counts["patients created"] += sum(1 for table, _, _ in created if table == "Patient")
+        self.counts["environments created"] += sum(1 for table, _, _ in created if table == "Environment")
+
+    def forget(self, created: Set[Tuple[str, str, str]]):
+        self.patients.forget((org_id, code) for table, org_id, code in created if table == "Patient")
+        self.environments.forget((org_id, code) for table, org_id, code in created if table == "Environment")
+
+    def run(self, manifest, reject_file=None) -> Dict[str, Any]:
+        reader = csv.DictReader(manifest)
+        headers = reader.fieldnames or []
+        self.fields = field_map(headers)
+        missing = [field for field in ("label", "collectionSite", "collectionDate") if field not in self.fields.values()]
+        if missing:
+            raise ValueError(f"manifest has no column for {missing} (headers: {headers})")
+        if reject_file is not None:
+            self.reject_writer = csv.DictWriter(reject_file, fieldnames=headers + ["_line", "_error"], extrasaction="ignore")
+            self.reject_writer.writeheader()
+
+        def numbered_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+            for row in reader:
+                yield reader.line_num, row
+
+        start = time.perf_counter()
+        next_progress = PROGRESS_EVERY
+        for rows in chunked(numbered_rows(), self.batch_size):
+            self.counts["read"] += len(rows)
+            self.import_batch(rows)
+            if self.counts["read"] >= next_progress:
+                elapsed = time.perf_counter() - start
+                print(f"📥 {self.counts['read']:,} rows, {self.counts['imported']:,} imported, "
+                      f"{self.counts['rejected']:,} rejected ({self.counts['read'] / elapsed:,.0f} rows/s)")
+                next_progress += PROGRESS_EVERY
+        elapsed = time.perf_counter() - start
+
+        return {
+            "counts": self.counts,
+            "rejected": dict(sorted(self.reasons.items(), key=lambda item: -item[1])),
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.counts["read"] / elapsed, 1) if elapsed else None,
+            "reference_lookups": {
+                "patient_queries": self.patients.queries, "patient_cache_hits": self.patients.hits,
+                "environment_queries": self.environments.queries, "environment_cache_hits": self.environments.hits,
+            },
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+
+def open_manifest(path: str):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a lab isolate manifest CSV in validated batches")
+    parser.add_argument("manifest", type=str,
+                       help="Manifest CSV (.gz accepted, '-' for stdin)")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="SQLite database to import into (default: ../prisma/dev.db)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                       help="Rows validated and inserted per transaction (default: 5000)")
+    parser.add_argument("--reject", type=str, default=None,
+                       help="CSV for rejected rows with _line and _error columns (default: <manifest>.rejects.csv)")
+    parser.add_argument("--org", type=str, default=None,
+                       help="Organization id or code for rows without an orgId column value")
+    parser.add_argument("--create-missing", action="store_true",
+                       help="Create patients/environments for unknown codes instead of rejecting the rows")
+    parser.add_argument("--allow-duplicates", action="store_true",
+                       help="Import sample IDs that already exist in the organization")
+    parser.add_argument("--created-by", type=str, default="manifest-import",
+                       help="createdBy recorded on the new isolates (default: manifest-import)")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Validate and insert each batch, then roll it back (keeps the would-be imported "
+                            "sample IDs in memory to flag cross-batch duplicates)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the import summary as JSON")
+    args = parser.parse_args()
+
+    if args.manifest != "-" and not os.path.exists(args.manifest):
+        parser.error(f"{args.manifest} does not exist")
+    if not os.path.exists(args.sqlite):
+        parser.error(f"{args.sqlite} does not exist")
+    if args.reject is None:
+        base = "manifest" if args.manifest == "-" else re.sub(r"\.csv(\.gz)?$", "", args.manifest)
+        args.reject = f"{base}.rejects.csv"
+
+    try:
+        importer = ManifestImporter(args.sqlite, batch_size=max(1, args.batch_size), default_org=args.org,
+                                    create_missing=args.create_missing, allow_duplicates=args.allow_duplicates,
+                                    created_by=args.created_by, dry_run=args.dry_run)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"📋 Importing {args.manifest} into {args.sqlite} in batches of {importer.batch_size}...")
+    try:
+        with open_manifest(args.manifest) as manifest, open(args.reject, "w", newline="") as reject_file:
+            report = importer.run(manifest, reject_file)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        importer.close()
+
+    counts = report["counts"]
+    print(f"✅ {counts['imported']:,} of {counts['read']:,} rows imported in {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']:,.0f} rows/s, peak RSS {report['peak_rss_mb']:.0f} MB)")
+    if counts["patients created"] or counts["environments created"]:
+        print(f"   - {counts['patients created']} patients and {counts['environments created']} environments created")
+    if counts["genomes linked"]:
+        print(f"   - {counts['genomes linked']} isolates linked to uploaded genomes")
+    if counts["rejected"]:
+        print(f"⚠️  {counts['rejected']:,} rows rejected -> {args.reject}")
+        for reason, count in report["rejected"].items():
+            print(f"   - {count:,} {reason}")
+    else:
+        os.remove(args.reject)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report: {args.output}")
+    if args.dry_run:
+        print("ℹ️  Dry run: nothing was written")
+
+
+if __name__ == "__main__":
+    main()
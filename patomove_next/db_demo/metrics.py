@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput measurement helpers shared by the Patomove demo data
+tools (generator population, benchmarks and load tests).
+"""
+
+import math
+import threading
+from typing import Dict, Any, Optional, Sequence
+
+# Bucket boundaries grow by 2% from 1µs, so any percentile is within 2% of the exact value
+BUCKET_GROWTH = 1.02
+BUCKET_FLOOR = 1e-6
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with bounded memory; safe to share between threads.
+
+    Histograms recorded separately (per thread, per process, per run) can be
+    combined with merge() without losing percentile accuracy.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        bucket = int(math.log(max(seconds, BUCKET_FLOOR) / BUCKET_FLOOR, BUCKET_GROWTH))
+        with self._lock:
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        with self._lock:
+            for bucket, count in other.buckets.items():
+                self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+            self.count += other.count
+            self.errors += other.errors
+            self.total += other.total
+            self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """Latency in seconds at or below which p% of recorded samples fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(BUCKET_FLOOR * BUCKET_GROWTH ** (bucket + 1), self.max)
+        return self.max
+
+    def distribution(self, bounds_ms: Sequence[float]) -> Dict[str, int]:
+        """Sample counts per latency band, e.g. {"<=10ms": 120, "<=50ms": 30, ">50ms": 2}"""
+        bands = {f"<={bound:g}ms": 0 for bound in bounds_ms}
+        overflow = f">{bounds_ms[-1]:g}ms"
+        bands[overflow] = 0
+        for bucket, count in self.buckets.items():
+            # Attribute each bucket by its lower edge, which is within 2% of its samples
+            latency_ms = 1000 * BUCKET_FLOOR * BUCKET_GROWTH ** bucket
+            band = next((f"<={bound:g}ms" for bound in bounds_ms if latency_ms <= bound), overflow)
+            bands[band] += count
+        return bands
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts plus mean/p50/p95/p99/max in milliseconds"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(50), 3),
+            "p95_ms": round(1000 * self.percentile(95), 3),
+            "p99_ms": round(1000 * self.percentile(99), 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+def throughput(rows: int, seconds: float) -> Dict[str, float]:
+    return {"rows": rows, "seconds": round(seconds, 4), "rows_per_sec": round(rows / max(seconds, 1e-9), 1)}
+
+
+def format_summary(summary: Dict[str, Any], rows_per_sec: Optional[float] = None) -> str:
+    """One-line rendering of a histogram summary for progress output"""
+    parts = []
+    if rows_per_sec is not None:
+        parts.append(f"{rows_per_sec:,.0f}/s")
+    parts.append(f"p50 {summary['p50_ms']:.1f}ms p95 {summary['p95_ms']:.1f}ms p99 {summary['p99_ms']:.1f}ms")
+    if summary["errors"]:
+        parts.append(f"{summary['errors']} errors")
+    return ", ".join(parts)
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Local pipeline job scheduler for Patomove.
+
+Drains isolates in processingStatus 'genome sequenced' into a durable SQLite
+job table, runs the analysis steps (validate -> annotate -> resistance -> mlst)
+on a process pool with a concurrency limit per step, and posts finished
+results to /api/pipeline-webhook/batch. 'priority' isolates always go first:
+they are admitted ahead of the normal queue, take the head of every step's
+ready queue, and each step keeps slots reserved for them, so their turnaround
+holds even with thousands of normal jobs queued.
+"""
+
+import heapq
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+import argparse
+import requests
+from metrics import LatencyHistogram
+from sqlite_loader import to_prisma_datetime
+
+STEPS = ["validate", "annotate", "resistance", "mlst"]
+DEFAULT_TOOLS = {step: f"pipeline_tools:stub_{step}" for step in STEPS}
+DEFAULT_STEP_LIMITS = {"validate": 2, "annotate": 4, "resistance": 2, "mlst": 2}
+PRIORITY_RANK = {"priority": 1, "normal": 0}
+PENDING_STATUS = "genome sequenced"
+MAX_DELIVERY_ATTEMPTS = 5  # per-result 5xx outcomes before the result is given up on
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    isolate_id TEXT NOT NULL,
+    genome_id TEXT NOT NULL,        -- '' when unlinked; a re-sequenced isolate gets a new genome and a new job
+    label TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,      -- isolate age (epoch seconds), the tie-breaker within a priority
+    queued_at REAL NOT NULL,        -- when the scheduler picked the isolate up
+    assembly_path TEXT,
+    status TEXT NOT NULL,           -- queued, running, completed, failed
+    step TEXT,                      -- next step to run
+    results TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    delivered_at REAL,
+    delivery_attempts INTEGER NOT NULL DEFAULT 0,  -- batches whose outcome for this job was a 5xx
+    delivery_error TEXT,
+    UNIQUE (isolate_id, genome_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, enqueued_at);
+CREATE INDEX IF NOT EXISTS jobs_undelivered ON jobs (delivery_attempts, finished_at)
+    WHERE delivered_at IS NULL AND finished_at IS NOT NULL;
+"""
+
+
+class JobStore:
+    """Durable job state; every step transition is committed, so a restart resumes where it stopped"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")  # the webhook thread reads while the scheduler writes
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(JOB_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, isolates: List[Dict[str, Any]]) -> int:
+        """Queue a job per (isolate, genome) not seen before; returns how many were added"""
+        before = self.conn.total_changes
+        now = time.time()
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (job_id, isolate_id, genome_id, label, priority, enqueued_at, queued_at, "
+            "assembly_path, status, step) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+            [(str(uuid.uuid4()), i["isolate_id"], i["genome_id"] or "", i["label"], i["priority"], i["enqueued_at"],
+              now, i["assembly_path"], STEPS[0]) for i in isolates]
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def recover(self) -> int:
+        """Requeue jobs that were running when a previous scheduler stopped; completed steps are kept"""
+        return self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+
+    def claim(self, limit: int, priority: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Move up to `limit` queued jobs to running, highest priority then oldest first"""
+        if limit <= 0:
+            return []
+        where = "status = 'queued'" + ("" if priority is None else f" AND priority = {int(priority)}")
+        self.conn.execute("BEGIN IMMEDIATE")
+        rows = self.conn.execute(
+            f"SELECT * FROM jobs WHERE {where} ORDER BY priority DESC, enqueued_at LIMIT ?", (limit,)
+        ).fetchall()
+        now = time.time()
+        self.conn.executemany(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = COALESCE(started_at, ?) "
+            "WHERE job_id = ?",
+            [(now, row["job_id"]) for row in rows]
+        )
+        self.conn.execute("COMMIT")
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["results"] = json.loads(job["results"])
+            jobs.append(job)
+        return jobs
+
+    def save_step(self, job: Dict[str, Any]):
+        self.conn.execute("UPDATE jobs SET step = ?, results = ? WHERE job_id = ?",
+                          (job["step"], json.dumps(job["results"]), job["job_id"]))
+
+    def finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> float:
+        finished_at = time.time()
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, step = NULL, results = ?, error = ?, finished_at = ? WHERE job_id = ?",
+            (status, json.dumps(job["results"]), error, finished_at, job["job_id"])
+        )
+        return finished_at
+
+    def undelivered(self, limit: int) -> List[sqlite3.Row]:
+        """Oldest finished results first, with ones the webhook already failed on behind fresh ones"""
+        return self.conn.execute(
+            "SELECT * FROM jobs WHERE delivered_at IS NULL AND finished_at IS NOT NULL "
+            "ORDER BY delivery_attempts, finished_at LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+    def mark_delivered(self, job_ids: List[str], error: Optional[str] = None):
+        now = time.time()
+        self.conn.executemany("UPDATE jobs SET delivered_at = ?, delivery_error = ? WHERE job_id = ?",
+                              [(now, error, job_id) for job_id in job_ids])
+
+    def delivery_failed(self, job_ids: List[str]):
+        self.conn.executemany("UPDATE jobs SET delivery_attempts = delivery_attempts + 1 WHERE job_id = ?",
+                              [(job_id,) for job_id in job_ids])
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        counts["undelivered"] = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE delivered_at IS NULL AND finished_at IS NOT NULL").fetchone()[0]
+        return counts
+
+
+def _isolate_age(value: Any) -> float:
+    """Epoch seconds from a Prisma DateTime (epoch ms on SQLite) or an ISO string"""
+    value = to_prisma_datetime(value)
+    return value / 1000 if value is not None else 0.0
+
+
+class SqliteSource:
+    """Pending isolates from the Patomove SQLite database (read only)"""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        # Genomes linked only through _IsolateAnalyses (as sqlite_loader writes them) count too
+        rows = self.conn.execute(
+            'SELECT i."id", i."label", i."priority", i."createdAt", g."id", g."storagePath" '
+            'FROM "Isolate" i LEFT JOIN "GenomicData" g ON g."id" = COALESCE(i."genomeId", '
+            '(SELECT a."A" FROM "_IsolateAnalyses" a WHERE a."B" = i."id" LIMIT 1)) '
+            'WHERE i."processingStatus" = ?', (PENDING_STATUS,)
+        )
+        return [{
+            "isolate_id": isolate_id,
+            "genome_id": genome_id,
+            "label": label,
+            "priority": PRIORITY_RANK.get(priority, 0),
+            "enqueued_at": _isolate_age(created_at),
+            "assembly_path": storage_path
+        } for isolate_id, label, priority, created_at, genome_id, storage_path in rows]
+
+
+class DatasetSource:
+    """Pending isolates from generate_db_demo.py JSON output, for trying the scheduler without a database"""
+
+    def __init__(self, path: str):
+        with open(path) as f:
+            data = json.load(f)
+        storage_paths = {genome["id"]: genome.get("storagePath") for genome in data.get("genomicData", [])}
+        self.isolates = [{
+            "isolate_id": isolate["id"],
+            "genome_id": isolate.get("genomeId"),
+            "label": isolate["label"],
+            "priority": PRIORITY_RANK.get(isolate.get("priority"), 0),
+            "enqueued_at": _isolate_age(isolate.get("createdAt") or isolate.get("collectionDate")),
+            "assembly_path": storage_paths.get(isolate.get("genomeId"))
+        } for isolate in data.get("isolates", []) if isolate.get("processingStatus") == PENDING_STATUS]
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return self.isolates
+
+
+_tool_cache: Dict[str, Any] = {}
+
+
+def run_step(tool_spec: str, job: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """Run one tool in a worker process; returns its partial results and runtime"""
+    tool = _tool_cache.get(tool_spec)
+    if tool is None:
+        module_name, function_name = tool_spec.split(":")
+        tool = _tool_cache[tool_spec] = getattr(importlib.import_module(module_name), function_name)
+    start = time.perf_counter()
+    results = tool(job)
+    return results, time.perf_counter() - start
+
+
+def merge_results(results: Dict[str, Any], partial: Dict[str, Any]):
+    for key, value in partial.items():
+        if isinstance(value, dict) and isinstance(results.get(key), dict):
+            results[key].update(value)
+        else:
+            results[key] = value
+
+
+def webhook_payload(row: sqlite3.Row) -> Dict[str, Any]:
+    results = json.loads(row["results"])
+    completed = row["status"] == "completed"
+    if not completed:
+        results["errors"] = [row["error"] or "Pipeline analysis failed"]
+    return {
+        "event": "analysis_completed" if completed else "analysis_failed",
+        "job_id": row["job_id"],
+        "isolate_id": row["label"],  # the webhook looks isolates up by label
+        "status": row["status"],
+        "timestamp": datetime.fromtimestamp(row["finished_at"], timezone.utc).isoformat(),
+        "metadata": {"scheduler": "patomove-local", "priority": "priority" if row["priority"] else "normal"},
+        "results": {"job_id": row["job_id"], "isolate_id": row["label"], "status": row["status"], **results}
+    }
+
+
+class WebhookDeliverer(threading.Thread):
+    """Posts finished jobs to the batch webhook from its own thread and connection"""
+
+    def __init__(self, store_path: str, base_url: str, batch_size: int = 50, interval: float = 2.0,
+                 timeout: float = 60):
+        super().__init__(daemon=True)
+        self.store_path = store_path
+        self.url = f"{base_url}/pipeline-webhook/batch"
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.stopping = threading.Event()
+        self.max_stop_failures = 5
+        self.delivered = 0
+        self.rejected = 0
+
+    def flush(self, store: JobStore) -> int:
+        """Post one batch; returns how many jobs were settled. Raises on transport or server errors"""
+        rows = store.undelivered(self.batch_size)
+        if not rows:
+            return 0
+        response = self.session.post(self.url, json=[webhook_payload(row) for row in rows], timeout=self.timeout)
+        response.raise_for_status()
+        outcomes = response.json()["results"]
+
+        delivered, rejected, failed = [], [], []
+        for row, outcome in zip(rows, outcomes):
+            if 200 <= outcome["status"] < 300:
+                delivered.append(row["job_id"])
+            elif outcome["status"] < 500:
+                # e.g. isolate deleted since it was queued: retrying cannot succeed
+                rejected.append((row["job_id"], json.dumps(outcome["body"])))
+            elif row["delivery_attempts"] + 1 >= MAX_DELIVERY_ATTEMPTS:
+                # A result the server keeps failing on must not hold up the ones behind it
+                rejected.append((row["job_id"], json.dumps(outcome["body"])))
+            else:
+                failed.append(row["job_id"])
+        store.delivery_failed(failed)
+        store.mark_delivered(delivered)
+        for job_id, error in rejected:
+            store.mark_delivered([job_id], error=error)
+        self.delivered += len(delivered)
+        self.rejected += len(rejected)
+        return len(delivered) + len(rejected)
+
+    def run(self):
+        store = JobStore(self.store_path)
+        failures = 0
+        try:
+            while True:
+                try:
+                    settled = self.flush(store)
+                    failures = 0
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    failures += 1
+                    if self.stopping.is_set() and failures >= self.max_stop_failures:
+                        print(f"⚠️  Webhook delivery failed ({e}); undelivered results stay queued for the next run")
+                        return
+                    backoff = min(self.interval * 2 ** (failures - 1), 60)
+                    print(f"⚠️  Webhook delivery failed ({e}); retrying in {backoff:.0f}s")
+                    if self.stopping.is_set():
+                        time.sleep(backoff)
+                    else:
+                        self.stopping.wait(backoff)
+                    continue
+                if settled < self.batch_size:
+                    if self.stopping.is_set() and settled == 0:
+                        return
+                    self.stopping.wait(self.interval)
+        finally:
+            store.close()
+
+    def stop(self):
+        """Finish posting what is ready (giving up after repeated failures), then exit"""
+        self.stopping.set()
+        self.join()
+
+
+class PipelineScheduler:
+    def __init__(self, store: JobStore, source: Any, tools: Dict[str, str], step_limits: Dict[str, int],
+                 reserved: int = 1, window: Optional[int] = None, poll_interval: float = 30,
+                 workdir: str = "pipeline_work", stub_scale: float = 1.0):
+        self.store = store
+        self.source = source
+        self.tools = tools
+        self.step_limits = step_limits
+        # Slots per step that normal jobs may not take, so a priority job never waits behind a full step
+        self.reserved = {step: min(reserved, limit - 1) for step, limit in step_limits.items()}
+        self.workers = sum(step_limits.values())
+        self.window = window or 2 * self.workers
+        self.poll_interval = poll_interval
+        self.workdir = workdir
+        self.stub_scale = stub_scale
+
+        self.ready: Dict[str, List[Tuple[int, float, int, Dict[str, Any]]]] = {step: [] for step in STEPS}
+        self.running: Dict[Any, Tuple[Dict[str, Any], str]] = {}
+        self.in_flight: Counter = Counter()
+        self.in_flight_normal: Counter = Counter()
+        self.active = 0  # claimed jobs not yet finished
+        self.sequence = 0
+        self.turnaround = {rank: LatencyHistogram() for rank in PRIORITY_RANK.values()}
+        self.step_latency = {step: LatencyHistogram() for step in STEPS}
+        self.finished = Counter()
+
+    def make_ready(self, job: Dict[str, Any]):
+        self.sequence += 1
+        heapq.heappush(self.ready[job["step"]], (-job["priority"], job["enqueued_at"], self.sequence, job))
+
+    def admit(self):
+        """Claim queued jobs: priority jobs whenever they appear, normal ones only to keep the window full"""
+        for job in self.store.claim(self.window, priority=PRIORITY_RANK["priority"]):
+            self.active += 1
+            self.make_ready(job)
+        for job in self.store.claim(self.window - self.active):
+            self.active += 1
+            self.make_ready(job)
+
+    def dispatch(self, pool: ProcessPoolExecutor):
+        for step in STEPS:
+            ready = self.ready[step]
+            limit = self.step_limits[step]
+            while ready and self.in_flight[step] < limit:
+                job = ready[0][3]
+                normal = job["priority"] == 0
+                if normal and self.in_flight_normal[step] >= limit - self.reserved[step]:
+                    break  # the head is the best candidate; anything behind it is normal too
+                heapq.heappop(ready)
+                self.in_flight[step] += 1
+                self.in_flight_normal[step] += normal
+                future = pool.submit(run_step, self.tools[step], {
+                    **job,
+                    "workdir": self.job_workdir(job),
+                    "stub_scale": self.stub_scale
+                })
+                self.running[future] = (job, step)
+
+    def complete(self, future):
+        job, step = self.running.pop(future)
+        self.in_flight[step] -= 1
+        self.in_flight_normal[step] -= job["priority"] == 0
+        try:
+            partial, seconds = future.result()
+        except Exception as e:
+            self.step_latency[step].record_error()
+            self.finish(job, "failed", f"{step}: {type(e).__name__}: {e}")
+            return
+        self.step_latency[step].record(seconds)
+        merge_results(job["results"], partial or {})
+
+        next_index = STEPS.index(step) + 1
+        if next_index < len(STEPS):
+            job["step"] = STEPS[next_index]
+            self.store.save_step(job)
+            self.make_ready(job)
+        else:
+            self.finish(job, "completed")
+
+    def job_workdir(self, job: Dict[str, Any]) -> str:
+        """Directory for a job's tool output; tools create it (pipeline_tools.output_dir) only when writing"""
+        return os.path.join(self.workdir, job["job_id"])
+
+    def finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None):
+        try:
+            os.rmdir(self.job_workdir(job))
+        except OSError:
+            pass  # never created, or holds tool output
+        finished_at = self.store.finish(job, status, error)
+        self.turnaround[job["priority"]].record(finished_at - job["queued_at"])
+        self.finished[status] += 1
+        self.active -= 1
+
+    def idle(self) -> bool:
+        return not self.running and not any(self.ready.values())
+
+    def run(self, drain: bool = False, progress_interval: float = 10):
+        recovered = self.store.recover()
+        if recovered:
+            print(f"↩️  Requeued {recovered} jobs interrupted in a previous run")
+        next_poll = next_progress = 0.0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                now = time.monotonic()
+                if now >= next_poll:
+                    added = self.store.enqueue(self.source.pending())
+                    if added:
+                        print(f"📥 Queued {added} new isolates")
+                    next_poll = now + self.poll_interval
+                if now >= next_progress:
+                    self.print_progress()
+                    next_progress = now + progress_interval
+
+                self.admit()
+                self.dispatch(pool)
+                if self.idle():
+                    if drain:
+                        break
+                    time.sleep(min(1.0, self.poll_interval))
+                    continue
+                done, _ = wait(list(self.running), timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.complete(future)
+
+    def print_progress(self):
+        counts = self.store.status_counts()
+        print(f"  ⏳ queued {counts.get('queued', 0)}, running {counts.get('running', 0)}, "
+              f"completed {counts.get('completed', 0)}, failed {counts.get('failed', 0)}, "
+              f"awaiting webhook {counts['undelivered']}")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "finished": dict(self.finished),
+            "turnaround": {name: self.turnaround[rank].summary() for name, rank in PRIORITY_RANK.items()},
+            "steps": {step: self.step_latency[step].summary() for step in STEPS}
+        }
+
+
+def parse_assignments(values: List[str], name: str) -> Dict[str, str]:
+    """Parse repeated step=value options"""
+    parsed = {}
+    for value in values:
+        step, _, setting = value.partition("=")
+        if step not in STEPS or not setting:
+            raise ValueError(f"--{name} expects step=value with step in {STEPS}, got {value!r}")
+        parsed[step] = setting
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Patomove analysis jobs locally and post results to the pipeline webhook")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database to read pending isolates from (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Read pending isolates from a generated demo JSON file instead of the database")
+    parser.add_argument("--jobs", type=str, default="pipeline_jobs.db",
+                       help="SQLite file holding job state (default: pipeline_jobs.db)")
+    parser.add_argument("--url", type=str, default="http://localhost:3000/api",
+                       help="API base URL for webhook delivery (default: http://localhost:3000/api)")
+    parser.add_argument("--no-webhook", action="store_true",
+                       help="Keep results in the job table without posting them")
+    parser.add_argument("--webhook-batch", type=int, default=50,
+                       help="Results per webhook request (default: 50)")
+    parser.add_argument("--tool", action="append", default=[], metavar="STEP=MODULE:FUNCTION",
+                       help=f"Tool for a step (default: stubs in pipeline_tools; steps: {', '.join(STEPS)})")
+    parser.add_argument("--limit", action="append", default=[], metavar="STEP=N",
+                       help=f"Concurrent jobs per step (default: {DEFAULT_STEP_LIMITS})")
+    parser.add_argument("--reserved", type=int, default=1,
+                       help="Slots per step kept free for priority isolates (default: 1)")
+    parser.add_argument("--window", type=int, default=None,
+                       help="Normal jobs claimed at once (default: 2 x total slots)")
+    parser.add_argument("--poll-interval", type=float, default=30,
+                       help="Seconds between checks for newly sequenced isolates (default: 30)")
+    parser.add_argument("--workdir", type=str, default="pipeline_work",
+                       help="Directory for per-job tool output (default: pipeline_work)")
+    parser.add_argument("--stub-scale", type=float, default=1.0,
+                       help="Multiplier for stub tool runtimes (default: 1.0)")
+    parser.add_argument("--priority-target", type=float, default=300,
+                       help="Turnaround target for priority isolates in seconds (default: 300)")
+    parser.add_argument("--drain", action="store_true",
+                       help="Exit once every queued job has finished and been delivered")
+    args = parser.parse_args()
+
+    try:
+        tools = {**DEFAULT_TOOLS, **parse_assignments(args.tool, "tool")}
+        step_limits = {**DEFAULT_STEP_LIMITS, **{step: int(n) for step, n in parse_assignments(args.limit, "limit").items()}}
+    except ValueError as e:
+        parser.error(str(e))
+    if min(step_limits.values()) < 1:
+        parser.error("--limit values must be at least 1")
+
+    if args.data:
+        source = DatasetSource(args.data)
+    elif os.path.exists(args.sqlite):
+        source = SqliteSource(args.sqlite)
+    else:
+        parser.error(f"{args.sqlite} does not exist (use --data to read a generated dataset)")
+
+    store = JobStore(args.jobs)
+    scheduler = PipelineScheduler(store, source, tools, step_limits, reserved=args.reserved, window=args.window,
+                                  poll_interval=args.poll_interval, workdir=args.workdir, stub_scale=args.stub_scale)
+    deliverer = None
+    if not args.no_webhook:
+        deliverer = WebhookDeliverer(args.jobs, args.url, batch_size=args.webhook_batch)
+        deliverer.start()
+
+    print(f"🧪 Pipeline scheduler: {scheduler.workers} worker processes, limits {step_limits}, jobs in {args.jobs}")
+    start = time.perf_counter()
+    try:
+        scheduler.run(drain=args.drain)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopping; running jobs will be requeued on the next start")
+    finally:
+        if deliverer:
+            deliverer.stop()
+    elapsed = time.perf_counter() - start
+
+    report = scheduler.report()
+    print(f"✅ Finished {sum(scheduler.finished.values())} jobs in {elapsed:.1f}s: {dict(scheduler.finished)}")
+    for name, summary in report["turnaround"].items():
+        if summary["count"]:
+            print(f"   {name:>8} turnaround: p50 {summary['p50_ms'] / 1000:.1f}s, "
+                  f"p95 {summary['p95_ms'] / 1000:.1f}s, max {summary['max_ms'] / 1000:.1f}s")
+    if deliverer:
+        print(f"📬 Webhook: {deliverer.delivered} delivered, {deliverer.rejected} rejected")
+    scheduler.print_progress()
+    store.close()
+
+    priority = report["turnaround"]["priority"]
+    if priority["count"] and priority["p95_ms"] / 1000 > args.priority_target:
+        print(f"⚠️  Priority p95 turnaround exceeds the {args.priority_target:.0f}s target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Analysis tools for the local pipeline scheduler.
+
+A tool is a plain function `tool(job) -> dict` that returns its part of the
+webhook `results` object (annotation_stats, resistance_genes, mlst_result,
+files). The scheduler refers to tools as "module:function" strings, so real
+wrappers around Prokka, ABRicate or mlst can live in any importable module.
+A tool that writes files gets its job directory from output_dir(job).
+The stub tools here sleep for a configurable time and return plausible,
+deterministic results, standing in for the real binaries in development.
+"""
+
+import hashlib
+import os
+import random
+import time
+from typing import Dict, Any
+
+from fasta_qc import scan_fasta
+
+RESISTANCE_GENES = [
+    ("blaCTX-M-15", "BETA-LACTAM"), ("blaKPC-2", "BETA-LACTAM"), ("blaNDM-1", "BETA-LACTAM"),
+    ("blaOXA-48", "BETA-LACTAM"), ("mecA", "BETA-LACTAM"), ("vanA", "GLYCOPEPTIDE"),
+    ("aac(6')-Ib-cr", "AMINOGLYCOSIDE"), ("qnrS1", "QUINOLONE"), ("sul1", "SULFONAMIDE"),
+    ("tet(A)", "TETRACYCLINE"), ("dfrA17", "TRIMETHOPRIM"), ("mcr-1", "COLISTIN"),
+]
+MLST_LOCI = ["adk", "fumC", "gyrB", "icd", "mdh", "purA", "recA"]
+
+# Simulated runtime per stub step, in seconds (scaled by job["stub_scale"])
+STUB_SECONDS = {"validate": 0.05, "annotate": 0.4, "resistance": 0.2, "mlst": 0.1}
+
+
+def _stub_rng(job: Dict[str, Any], step: str) -> random.Random:
+    seed = hashlib.sha256(f"{job['isolate_id']}:{step}".encode()).hexdigest()
+    return random.Random(seed)
+
+
+def _simulate(job: Dict[str, Any], step: str):
+    time.sleep(STUB_SECONDS[step] * job.get("stub_scale", 1.0))
+
+
+def output_dir(job: Dict[str, Any]) -> str:
+    """Create and return the job's working directory; call it only from a tool that writes files there"""
+    os.makedirs(job["workdir"], exist_ok=True)
+    return job["workdir"]
+
+
+def validate_assembly(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Real FASTA validation via fasta_qc; fails the job when the assembly is missing or malformed"""
+    path = job.get("assembly_path")
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"Assembly not found: {path}")
+    metrics = scan_fasta(path)
+    if metrics["validationErrors"]:
+        raise ValueError("; ".join(metrics["validationErrors"]))
+    return {"annotation_stats": {
+        "genome_size": metrics["totalLength"],
+        "contigs": metrics["contigCount"],
+        "n50": metrics["n50"],
+        "gc_content": metrics["gcContent"]
+    }}
+
+
+def stub_validate(job: Dict[str, Any]) -> Dict[str, Any]:
+    _simulate(job, "validate")
+    rng = _stub_rng(job, "validate")
+    return {"annotation_stats": {
+        "genome_size": rng.randint(2000000, 8000000),
+        "contigs": rng.randint(1, 150),
+        "n50": rng.randint(10000, 500000),
+        "gc_content": round(rng.uniform(35.0, 65.0), 2)
+    }}
+
+
+def stub_annotate(job: Dict[str, Any]) -> Dict[str, Any]:
+    _simulate(job, "annotate")
+    rng = _stub_rng(job, "annotate")
+    genome_size = job["results"].get("annotation_stats", {}).get("genome_size", 5000000)
+    cds = genome_size // rng.randint(900, 1100)
+    return {
+        "annotation_stats": {"total_genes": cds + 100, "cds": cds, "rrna": rng.randint(3, 24), "trna": rng.randint(40, 90)},
+        "files": {"gff": os.path.join(job["workdir"], f"{job['label']}.gff"),
+                  "faa": os.path.join(job["workdir"], f"{job['label']}.faa")}
+    }
+
+
+def stub_resistance(job: Dict[str, Any]) -> Dict[str, Any]:
+    _simulate(job, "resistance")
+    rng = _stub_rng(job, "resistance")
+    genes = rng.sample(RESISTANCE_GENES, rng.randint(0, 4))
+    return {
+        "resistance_genes": [{
+            "gene": gene,
+            "class": drug_class,
+            "method": "ABRicate",
+            "coverage": round(rng.uniform(90, 100), 2),
+            "identity": round(rng.uniform(95, 100), 2)
+        } for gene, drug_class in genes],
+        "files": {"resistance_report": os.path.join(job["workdir"], f"{job['label']}_amr.tsv")}
+    }
+
+
+def stub_mlst(job: Dict[str, Any]) -> Dict[str, Any]:
+    _simulate(job, "mlst")
+    rng = _stub_rng(job, "mlst")
+    return {"mlst_result": {
+        "scheme": "ecoli",
+        "sequence_type": f"ST{rng.randint(1, 1200)}",
+        "alleles": {locus: str(rng.randint(1, 400)) for locus in MLST_LOCI}
+    }}
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Query-plan and latency regression harness for the API's hot SQLite queries.
+
+Seeds Prisma SQLite databases at several sizes with DemoDataGenerator (through
+the snapshot cache, so each size is only generated once), then replays the SQL
+Prisma issues for the hottest routes: the isolate list with its seven includes,
+the distinct lookups behind /api/isolates/filters, and the genome-suggestions
+search and unlinked-genome count. For every query it records EXPLAIN QUERY
+PLAN and timings, flags full scans, temporary B-trees and superlinear growth,
+projects the latency to a larger size, and optionally measures candidate
+indexes against the schema's current @@index set.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import argparse
+from generate_db_demo import DemoDataGenerator
+from snapshot_cache import (DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_PUSH_COMMAND, PROJECT_DIR, SnapshotCache,
+                            data_params, prepare_schema, snapshot_key)
+from sqlite_loader import load_into_sqlite
+from workload import WorkloadProfile
+
+# Prisma splits `IN (...)` relation loads into chunks that fit SQLite's bound-parameter limit
+IN_CHUNK = 999
+# A query whose time grows faster than n ** SUPERLINEAR between sizes is flagged
+SUPERLINEAR = 1.2
+
+# Indexes worth trying against the hot queries; "Table(col, col)" like the --candidate option
+DEFAULT_CANDIDATES = [
+    "Isolate(orgId, collectionDate)",
+    "Isolate(collectionSource, collectionDate)",
+    "Isolate(collectionSite)",
+    "Isolate(collectionSource)",
+    "PhenotypeProfile(species)",
+    "GenomicData(validationStatus, uploadDate)",
+]
+
+
+class Statement:
+    """One SQL statement of a hot query.
+
+    `ids_from` = (statement, column) makes this a relation load: `{ids}` is replaced by
+    chunks of the distinct non-null values of that column in the earlier statement's rows,
+    the way Prisma resolves `include`.
+    """
+
+    def __init__(self, label: str, sql: str, params: Sequence[str] = (), ids_from: Optional[Tuple[str, str]] = None):
+        self.label = label
+        self.sql = sql
+        self.params = params
+        self.ids_from = ids_from
+
+
+class HotQuery:
+    def __init__(self, name: str, route: str, statements: List[Statement]):
+        self.name = name
+        self.route = route
+        self.statements = statements
+
+
+def isolate_list(name: str, route: str, where: str = "", params: Sequence[str] = ()) -> HotQuery:
+    """GET /api/isolates: findMany ordered by collectionDate with seven includes"""
+    return HotQuery(name, route, [
+        Statement("isolates", f'SELECT * FROM "Isolate" {where} ORDER BY "collectionDate" DESC', params),
+        Statement("organization", 'SELECT * FROM "Organization" WHERE "id" IN ({ids})', ids_from=("isolates", "orgId")),
+        Statement("patient", 'SELECT * FROM "Patient" WHERE "id" IN ({ids})', ids_from=("isolates", "patientId")),
+        Statement("environment", 'SELECT * FROM "Environment" WHERE "id" IN ({ids})', ids_from=("isolates", "environmentId")),
+        Statement("phenotypeProfile", 'SELECT * FROM "PhenotypeProfile" WHERE "id" IN ({ids})',
+                  ids_from=("isolates", "phenotypeId")),
+        Statement("genome", 'SELECT * FROM "GenomicData" WHERE "id" IN ({ids})', ids_from=("isolates", "genomeId")),
+        # Many-to-many genomicData: the join table, then the genomes it points at (A = GenomicData, B = Isolate)
+        Statement("genomicData links", 'SELECT "A", "B" FROM "_IsolateAnalyses" WHERE "B" IN ({ids})',
+                  ids_from=("isolates", "id")),
+        Statement("genomicData", 'SELECT * FROM "GenomicData" WHERE "id" IN ({ids})', ids_from=("genomicData links", "A")),
+        Statement("treatments", 'SELECT * FROM "IsolateTreatmentOutcome" WHERE "isolateId" IN ({ids})',
+                  ids_from=("isolates", "id")),
+    ])
+
+
+# `primaryIsolate: { none: {} }` on the Isolate.genomeId back-relation
+UNLINKED = '"id" NOT IN (SELECT "genomeId" FROM "Isolate" WHERE "genomeId" IS NOT NULL)'
+# `contains` on SQLite is a LIKE, which already ignores ASCII case (the route's mode: 'insensitive')
+SUGGESTION_MATCH = " OR ".join(f'"{column}" LIKE ?' for _ in range(4) for column in ("originalFilename", "filename"))
+
+QUERIES = [
+    isolate_list("isolate_list", "GET /api/isolates"),
+    isolate_list("isolate_list_by_org", "GET /api/isolates?orgId=", 'WHERE "orgId" = ?', ["org_id"]),
+    isolate_list("isolate_list_by_source", "GET /api/isolates?collectionSource=", 'WHERE "collectionSource" = ?',
+                 ["collection_source"]),
+    # Prisma applies `distinct` in memory on SQLite: it reads every row, sorted
+    HotQuery("filters_species", "GET /api/isolates/filters", [
+        Statement("species", 'SELECT "species" FROM "PhenotypeProfile" ORDER BY "species" ASC')]),
+    HotQuery("filters_sources", "GET /api/isolates/filters", [
+        Statement("collectionSource", 'SELECT "collectionSource" FROM "Isolate" ORDER BY "collectionSource" ASC')]),
+    HotQuery("filters_sites", "GET /api/isolates/filters", [
+        Statement("collectionSite", 'SELECT "collectionSite" FROM "Isolate" ORDER BY "collectionSite" ASC')]),
+    HotQuery("genome_suggestions", "GET /api/isolates/[id]/genome-suggestions", [
+        Statement("isolate", 'SELECT * FROM "Isolate" WHERE "id" = ?', ["isolate_id"]),
+        Statement("suggestions", f'SELECT * FROM "GenomicData" WHERE {UNLINKED} AND ({SUGGESTION_MATCH}) '
+                                 f'AND "validationStatus" = \'valid\' ORDER BY "uploadDate" DESC, "originalFilename" ASC LIMIT 10',
+                  ["label_terms"]),
+    ]),
+    HotQuery("unlinked_genome_count", "GET /api/isolates/[id]/genome-suggestions", [
+        Statement("count", f'SELECT COUNT(*) FROM "GenomicData" WHERE {UNLINKED} AND "validationStatus" = \'valid\'')]),
+]
+
+
+def parse_index(spec: str) -> Tuple[str, List[str]]:
+    """'Isolate(orgId, collectionDate)' -> ('Isolate', ['orgId', 'collectionDate'])"""
+    match = re.fullmatch(r"\s*(\w+)\s*\(\s*(\w+(?:\s*,\s*\w+)*)\s*\)\s*", spec)
+    if not match:
+        raise argparse.ArgumentTypeError(f"index must look like Table(column, column), got '{spec}'")
+    return match.group(1), [column.strip() for column in match.group(2).split(",")]
+
+
+def existing_indexes(conn: sqlite3.Connection) -> Dict[str, Tuple[str, List[str]]]:
+    indexes = {}
+    for name, table in conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"):
+        columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')]
+        indexes[name] = (table, columns)
+    return indexes
+
+
+def query_context(conn: sqlite3.Connection) -> Dict[str, List[Any]]:
+    """Representative parameters: the busiest organization and a mid-table isolate's label variants"""
+    org_id = conn.execute('SELECT "orgId" FROM "Isolate" GROUP BY "orgId" ORDER BY COUNT(*) DESC LIMIT 1').fetchone()
+    count = conn.execute('SELECT COUNT(*) FROM "Isolate"').fetchone()[0]
+    isolate_id, label = conn.execute('SELECT "id", "label" FROM "Isolate" LIMIT 1 OFFSET ?', (count // 2,)).fetchone()
+    terms = [label.strip(), re.sub(r"[-_\s]", "", label), label.lower(), label.upper()]
+    return {
+        "org_id": [org_id[0] if org_id else None],
+        "collection_source": ["clinical"],
+        "isolate_id": [isolate_id],
+        "label_terms": [f"%{term}%" for term in terms for _ in range(2)],
+    }
+
+
+def chunks(values: List[Any], size: int) -> List[List[Any]]:
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def plan_flags(plan: List[str]) -> List[str]:
+    flags = set()
+    for step in plan:
+        if step.startswith("SCAN ") and step != "SCAN CONSTANT ROW":
+            flags.add("index scan" if " USING " in step else "full scan")
+        if "TEMP B-TREE" in step:
+            flags.add("temp b-tree")
+        if step.startswith("CORRELATED"):
+            flags.add("correlated subquery")
+    return sorted(flags)
+
+
+class Harness:
+    def __init__(self, repeat: int = 3):
+        self.repeat = repeat
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params: List[Any]) -> List[str]:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def run_query(self, conn: sqlite3.Connection, query: HotQuery, context: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """Median wall time over `repeat` runs (rows fetched), plus each statement's plan and row count"""
+        timings = []
+        statements = {}
+        for attempt in range(self.repeat):
+            results: Dict[str, Tuple[List[str], List[tuple]]] = {}
+            start = time.perf_counter()
+            for statement in query.statements:
+                params = [value for name in statement.params for value in context[name]]
+                if statement.ids_from:
+                    source_columns, source_rows = results[statement.ids_from[0]]
+                    column = source_columns.index(statement.ids_from[1])
+                    ids = list(dict.fromkeys(row[column] for row in source_rows if row[column] is not None))
+                    rows, columns, sample = [], [], ids[:IN_CHUNK]
+                    for chunk in chunks(ids, IN_CHUNK):
+                        cursor = conn.execute(statement.sql.format(ids=", ".join("?" * len(chunk))), chunk)
+                        rows.extend(cursor.fetchall())
+                        columns = [d[0] for d in cursor.description]
+                    sql, plan_params = statement.sql.format(ids=", ".join("?" * max(len(sample), 1))), sample or [None]
+                else:
+                    cursor = conn.execute(statement.sql, params)
+                    rows = cursor.fetchall()
+                    columns = [d[0] for d in cursor.description]
+                    sql, plan_params = statement.sql, params
+                results[statement.label] = (columns, rows)
+                if attempt == 0:
+                    statements[statement.label] = {"sql": sql, "params": plan_params, "rows": len(rows)}
+            timings.append(time.perf_counter() - start)
+
+        report_statements = []
+        for label, info in statements.items():
+            plan = self.explain(conn, info["sql"], info["params"])
+            report_statements.append({"statement": label, "rows": info["rows"], "plan": plan, "flags": plan_flags(plan)})
+        return {
+            "ms": round(1000 * statistics.median(timings), 3),
+            "flags": sorted({flag for statement in report_statements for flag in statement["flags"]}),
+            "statements": report_statements,
+        }
+
+    def run_all(self, db_path: str) -> Dict[str, Dict[str, Any]]:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            context = query_context(conn)
+            return {query.name: self.run_query(conn, query, context) for query in QUERIES}
+        finally:
+            conn.close()
+
+
+def seed_database(cache: SnapshotCache, schema: str, db_path: str, isolates: int, seed: int, engine: str,
+                  workload: Optional[WorkloadProfile], push_command: str):
+    """Restore a seeded database of this size from the snapshot cache, generating and caching it on a miss"""
+    params = data_params(isolates, seed, engine, workload=workload)
+    key = snapshot_key(schema, params)
+    if cache.restore(key, db_path):
+        print(f"⚡ {isolates:,} isolates: snapshot {key[:12]} restored")
+        return
+    print(f"🧊 {isolates:,} isolates: snapshot {key[:12]} not cached; generating")
+    prepare_schema(cache, schema, db_path, push_command)
+    generator = DemoDataGenerator(num_isolates=isolates, seed=seed, engine=engine, workload=workload)
+    load_into_sqlite(db_path, generator.generate_demo_data())
+    cache.store(key, db_path, params)
+
+
+def growth(sizes: List[int], times_ms: List[float]) -> Optional[float]:
+    """Least-squares slope of log(time) against log(size): 1 is linear, 2 quadratic"""
+    points = [(math.log(n), math.log(max(t, 1e-3))) for n, t in zip(sizes, times_ms)]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator if denominator else None
+
+
+def project(size: int, time_ms: float, exponent: Optional[float], target: int) -> Optional[float]:
+    if exponent is None:
+        return None
+    return time_ms * (target / size) ** max(exponent, 0.0)
+
+
+def summarize(sizes: List[int], runs: Dict[int, Dict[str, Dict[str, Any]]], project_to: int,
+              budget_ms: float) -> List[Dict[str, Any]]:
+    """Per query: times per size, growth exponent, projected time and flags, worst projected first"""
+    summary = []
+    for query in QUERIES:
+        times = [runs[n][query.name]["ms"] for n in sizes]
+        exponent = growth(sizes, times)
+        projected = project(sizes[-1], times[-1], exponent, project_to)
+        flags = list(runs[sizes[-1]][query.name]["flags"])
+        if exponent is not None and exponent > SUPERLINEAR:
+            flags.append("superlinear")
+        if projected is not None and projected > budget_ms:
+            flags.append("over budget")
+        summary.append({
+            "query": query.name,
+            "route": query.route,
+            "ms_by_size": dict(zip(map(str, sizes), times)),
+            "growth_exponent": round(exponent, 2) if exponent is not None else None,
+            "projected_ms": round(projected, 1) if projected is not None else None,
+            "flags": flags,
+        })
+    summary.sort(key=lambda item: -(item["projected_ms"] if item["projected_ms"] is not None else max(item["ms_by_size"].values())))
+    return summary
+
+
+def evaluate_candidates(harness: Harness, db_path: str, candidates: List[str],
+                        baseline: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create each candidate index on a scratch copy, rerun the hot queries, and report what changed"""
+    work_path = db_path + ".candidates"
+    shutil.copyfile(db_path, work_path)
+    conn = sqlite3.connect(work_path)
+    results = []
+    try:
+        current = existing_indexes(conn)
+        conn.execute("VACUUM")
+        base_pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        for spec in candidates:
+            table, columns = parse_index(spec)
+            duplicate = next((name for name, (t, cols) in current.items() if t == table and cols[:len(columns)] == columns), None)
+            if duplicate:
+                results.append({"index": spec, "covered_by": duplicate})
+                continue
+            name = f"harness_{table}_{'_'.join(columns)}"
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            start = time.perf_counter()
+            conn.execute(f'CREATE INDEX "{name}" ON "{table}" ({column_list})')
+            conn.commit()
+            build_ms = 1000 * (time.perf_counter() - start)
+            size_bytes = (conn.execute("PRAGMA page_count").fetchone()[0] - base_pages) * page_size
+            with_index = harness.run_all(work_path)
+            conn.execute(f'DROP INDEX "{name}"')
+            conn.commit()
+            conn.execute("VACUUM")
+
+            changes = {}
+            for query, before in baseline.items():
+                after = with_index[query]
+                before_plans = [s["plan"] for s in before["statements"]]
+                after_plans = [s["plan"] for s in after["statements"]]
+                if before_plans != after_plans:
+                    changes[query] = {
+                        "ms_before": before["ms"],
+                        "ms_after": after["ms"],
+                        "speedup": round(before["ms"] / max(after["ms"], 1e-3), 2),
+                        "flags_before": before["flags"],
+                        "flags_after": after["flags"],
+                    }
+            results.append({"index": spec, "build_ms": round(build_ms, 1), "bytes": size_bytes, "changes": changes})
+    finally:
+        conn.close()
+        os.remove(work_path)
+    return results
+
+
+def print_report(report: Dict[str, Any]):
+    sizes = report["sizes"]
+    print(f"\n📊 Hot queries, worst projected at {report['project_to']:,} isolates first "
+          f"(budget {report['budget_ms']:g}ms):")
+    header = "".join(f"{n:>12,}" for n in sizes)
+    print(f"   {'query':<26}{header}{'growth':>9}{'projected':>12}  flags")
+    for item in report["summary"]:
+        times = "".join(f"{ms:>10.1f}ms" for ms in item["ms_by_size"].values())
+        exponent = f"n^{item['growth_exponent']:.2f}" if item["growth_exponent"] is not None else "-"
+        projected = f"{item['projected_ms']:>10,.0f}ms" if item["projected_ms"] is not None else f"{'-':>12}"
+        print(f"   {item['query']:<26}{times}{exponent:>9}{projected}  {', '.join(item['flags'])}")
+
+    largest = report["runs"][str(sizes[-1])]
+    print(f"\n🔎 Plans at {sizes[-1]:,} isolates (flagged statements):")
+    for query, result in largest.items():
+        for statement in result["statements"]:
+            if statement["flags"]:
+                print(f"   {query} / {statement['statement']} ({statement['rows']:,} rows): {'; '.join(statement['plan'])}")
+
+    if report.get("candidates"):
+        print(f"\n🧪 Candidate indexes at {sizes[-1]:,} isolates:")
+        for candidate in report["candidates"]:
+            if "covered_by" in candidate:
+                print(f"   {candidate['index']:<42} already covered by {candidate['covered_by']}")
+                continue
+            print(f"   {candidate['index']:<42} {candidate['bytes'] / 1e6:+.1f} MB, built in {candidate['build_ms']:.0f}ms")
+            if not candidate["changes"]:
+                print("      no plan changes")
+            for query, change in candidate["changes"].items():
+                removed = sorted(set(change["flags_before"]) - set(change["flags_after"]))
+                note = f" (removes {', '.join(removed)})" if removed else ""
+                print(f"      {query:<26} {change['ms_before']:>9.1f}ms -> {change['ms_after']:>9.1f}ms  "
+                      f"x{change['speedup']:g}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture query plans and latency growth of the API's hot SQLite queries")
+    parser.add_argument("--sizes", type=str, default="1000,10000,100000",
+                       help="Comma-separated isolate counts to seed and measure (default: 1000,10000,100000)")
+    parser.add_argument("--seed", type=int, default=42,
+                       help="Generator seed (default: 42)")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="numpy",
+                       help="Generation engine for seeding (default: numpy)")
+    parser.add_argument("--workload", type=str, default=None,
+                       help="Workload profile name or JSON file, as for generate_db_demo.py")
+    parser.add_argument("--repeat", type=int, default=3,
+                       help="Runs per query; the median is reported (default: 3)")
+    parser.add_argument("--project-to", type=int, default=1000000,
+                       help="Isolate count to extrapolate latency to (default: 1000000)")
+    parser.add_argument("--budget-ms", type=float, default=500,
+                       help="Flag queries projected to take longer than this (default: 500)")
+    parser.add_argument("--candidates", action="store_true",
+                       help=f"Evaluate the default candidate indexes: {'; '.join(DEFAULT_CANDIDATES)}")
+    parser.add_argument("--candidate", type=str, action="append", default=[],
+                       help="Evaluate an extra index, e.g. 'Isolate(orgId, collectionDate)' (repeatable)")
+    parser.add_argument("--schema", type=str, default=os.path.join(PROJECT_DIR, "prisma", "schema.prisma"),
+                       help="Prisma schema (default: ../prisma/schema.prisma)")
+    parser.add_argument("--push-command", type=str, default=DEFAULT_PUSH_COMMAND,
+                       help="Command creating the empty schema when no template is cached, as for snapshot_cache.py "
+                            "(default: npx prisma db push on a scratch copy of --schema)")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR,
+                       help="Snapshot cache shared with snapshot_cache.py")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the full report (plans, timings, candidates) as JSON")
+    args = parser.parse_args()
+    args.schema = os.path.abspath(args.schema)
+
+    try:
+        sizes = sorted({int(size) for size in args.sizes.split(",")})
+    except ValueError:
+        parser.error(f"--sizes must be comma-separated integers, got '{args.sizes}'")
+    if not sizes or sizes[0] < 10:
+        parser.error("--sizes must be at least 10 isolates")
+    candidates = (DEFAULT_CANDIDATES if args.candidates else []) + args.candidate
+    for spec in candidates:
+        try:
+            parse_index(spec)
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+    workload = None
+    if args.workload:
+        try:
+            workload = WorkloadProfile.from_spec(args.workload)
+        except (ValueError, json.JSONDecodeError) as e:
+            parser.error(f"--workload: {e}")
+
+    cache = SnapshotCache(args.cache_dir, DEFAULT_MAX_BYTES)
+    workdir = tempfile.mkdtemp(prefix="patomove_harness_")
+    db_path = os.path.join(workdir, "dev.db")
+    harness = Harness(repeat=max(1, args.repeat))
+    runs = {}
+    candidate_results = []
+    try:
+        for size in sizes:
+            try:
+                seed_database(cache, args.schema, db_path, size, args.seed, args.engine, workload, args.push_command)
+            except Exception as e:
+                print(f"❌ Could not seed {size:,} isolates: {e}")
+                sys.exit(1)
+            print(f"⏱️  Measuring {len(QUERIES)} hot queries at {size:,} isolates...")
+            runs[size] = harness.run_all(db_path)
+            if candidates and size == sizes[-1]:
+                print(f"🧪 Evaluating {len(candidates)} candidate indexes at {size:,} isolates...")
+                candidate_results = evaluate_candidates(harness, db_path, candidates, runs[size])
+        conn = sqlite3.connect(db_path)
+        indexes = {name: f"{table}({', '.join(columns)})" for name, (table, columns) in existing_indexes(conn).items()}
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "sizes": sizes,
+        "seed": args.seed,
+        "engine": args.engine,
+        "workload": workload.name if workload else None,
+        "project_to": args.project_to,
+        "budget_ms": args.budget_ms,
+        "indexes": indexes,
+        "summary": summarize(sizes, runs, args.project_to, args.budget_ms),
+        "runs": {str(size): result for size, result in runs.items()},
+        "candidates": candidate_results,
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
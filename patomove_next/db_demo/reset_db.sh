@@ -1,61 +1,58 @@
 #!/bin/bash
 
 # Complete database reset and setup script
+# Seeded databases are cached by snapshot_cache.py: a reset with an unchanged schema,
+# generator and arguments is a file copy. Override with ISOLATES=..., SEED=...,
+# or SNAPSHOT_CACHE=0 to always rebuild from scratch.
 echo "🗑️  Resetting database..."
 
 # Navigate to project root (script is in db_demo folder)
 cd "$(dirname "$0")/.."
 
-# Step 1: Remove the SQLite database file
-rm -f prisma/dev.db
-echo "✅ Database file removed"
-
-# Step 2: Recreate the database with fresh schema
-npx prisma db push --accept-data-loss
-echo "✅ Database recreated with fresh schema"
-
-# Step 3: Generate fresh Prisma client
-npx prisma generate
-echo "✅ Prisma client regenerated"
-
-# Step 4: Generate demo data (without server dependency)
-echo "🌱 Generating demo data..."
-cd db_demo
-python3 generate_db_demo.py --isolates 50 --output fresh_demo_data.json
-echo "✅ Demo data JSON generated (50 samples)"
-
-# Step 5: Start the server temporarily to populate database
-echo "🚀 Starting server for data population..."
-cd ..
-npm run dev > /dev/null 2>&1 &
-SERVER_PID=$!
-
-# Wait for server to start
-sleep 5
-
-# Step 6: Populate database with generated data
-echo "📤 Populating database..."
-cd db_demo
-python3 generate_db_demo.py --isolates 50 --populate
+ISOLATES=${ISOLATES:-50}
+SEED=${SEED:-42}
+# Dates are spread back from the first of the month, so a snapshot stays valid (and current) all month
+REFERENCE_DATE=$(date +%Y-%m-01)
+
+# Step 1: Generate the Prisma client, skipped when the schema is unchanged since the last run
+SCHEMA_HASH=$(python3 db_demo/snapshot_cache.py --schema-hash)
+CLIENT_STAMP=node_modules/.prisma/client/.schema-hash
+if [ "$(cat "$CLIENT_STAMP" 2>/dev/null)" != "$SCHEMA_HASH" ]; then
+    npx prisma generate && echo "$SCHEMA_HASH" > "$CLIENT_STAMP"
+    echo "✅ Prisma client regenerated"
+else
+    echo "✅ Prisma client up to date"
+fi
+
+# Step 2: Restore the seeded database from the snapshot cache, building it on a miss
+echo "🌱 Restoring demo database ($ISOLATES isolates, seed $SEED)..."
+if [ "$SNAPSHOT_CACHE" = "0" ]; then
+    rm -f prisma/dev.db
+    npx prisma db push --accept-data-loss --skip-generate
+    echo "✅ Database recreated with fresh schema"
+    cd db_demo
+    python3 generate_db_demo.py --isolates "$ISOLATES" --seed "$SEED" --reference-date "$REFERENCE_DATE" \
+        --output fresh_demo_data.json --sqlite ../prisma/dev.db
+else
+    cd db_demo
+    python3 snapshot_cache.py --db ../prisma/dev.db --isolates "$ISOLATES" --seed "$SEED" \
+        --reference-date "$REFERENCE_DATE" --output fresh_demo_data.json
+fi
 POPULATE_SUCCESS=$?
 
-# Step 7: Stop the temporary server
-kill $SERVER_PID 2>/dev/null
-wait $SERVER_PID 2>/dev/null
-
 if [ $POPULATE_SUCCESS -eq 0 ]; then
-    echo "✅ Database populated successfully (50 samples)"
+    echo "✅ Demo data JSON generated and database populated ($ISOLATES samples)"
     echo "🚀 Database ready for development!"
     echo ""
     echo "📊 Summary:"
     echo "   - Fresh SQLite database created"
-    echo "   - Schema updated with lowercase standardization" 
-    echo "   - 50 demo isolates with genomics-focused workflow"
+    echo "   - Schema updated with lowercase standardization"
+    echo "   - $ISOLATES demo isolates with genomics-focused workflow"
     echo "   - Priority: normal/priority"
     echo "   - Processing status: to be sequenced → genomics completed"
     echo ""
     echo "🎯 Ready to test Sample Management with new schema!"
 else
     echo "❌ Database population failed, but schema is ready"
-    echo "💡 You can manually populate later or run the dev server and try again"
-fi
\ No newline at end of file
+    echo "💡 You can load it later with: python3 sqlite_loader.py fresh_demo_data.json --sqlite ../prisma/dev.db"
+fi
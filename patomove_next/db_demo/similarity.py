@@ -0,0 +1,831 @@
+#!/usr/bin/env python3
+"""
+MinHash/LSH similarity search over GenomicData gene profiles (requires numpy).
+
+A genome's profile is the set of its resistance genes, virulence genes, plasmids
+and MLST alleles ("mlst:adk=12"). Genomes with the same set share one profile,
+and every distinct profile gets a MinHash signature that is split into LSH bands
+kept as sorted key arrays. A query only verifies the profiles sharing a band with
+it, so top-k "most similar isolates" and all-pairs-above-threshold searches touch
+a small fraction of the collection. Profiles are immutable, so an update
+re-points the changed genome and adds any new profile to the bands in place.
+Like gene_index.py, the index is cached in an .npz file and refreshed from
+updatedAt.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+import argparse
+import numpy as np
+from antibiogram import ID_CHUNK, MISSING_DATE, NO_CODE, REFRESH_LAG_MS, Vocabulary
+from gene_index import decode_hits, epoch_ms, pack_strings, unpack_strings
+
+CACHE_VERSION = 2
+# Universal hashing (a * x + b) mod p over 31-bit feature hashes; products stay below 2^62 in uint64
+PRIME = (1 << 31) - 1
+# Profiles hashed per block, bounding the (features x permutations) scratch array
+SIGNATURE_BLOCK = 4096
+# Chance that LSH surfaces a pair whose similarity equals the tuned threshold (higher above it)
+MIN_RECALL = 0.95
+# Candidate pairs verified per block in all-pairs search
+PAIR_BLOCK = 1 << 20
+
+# (genomeId, updatedAt, resistanceGenes, virulenceGenes, plasmids, mlstAlleles, isolateId, label)
+ProfileRow = Tuple[str, Any, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def decode_alleles(blob: Optional[str]) -> Iterator[str]:
+    """mlst:<locus>=<allele> features from an mlstAlleles JSON object"""
+    if not blob:
+        return
+    try:
+        alleles = json.loads(blob)
+    except json.JSONDecodeError:
+        return
+    if isinstance(alleles, dict):
+        for locus, allele in alleles.items():
+            yield f"mlst:{locus}={allele}"
+
+
+def profile_features(resistance: Optional[str], virulence: Optional[str], plasmids: Optional[str],
+                     alleles: Optional[str]) -> Iterator[str]:
+    for kind, blob in (("resistance", resistance), ("virulence", virulence), ("plasmid", plasmids)):
+        for feature, _ in decode_hits(kind, blob):
+            yield feature
+    yield from decode_alleles(alleles)
+
+
+def feature_hash(feature: str) -> int:
+    """Stable across indexes and runs, unlike the feature's vocabulary code"""
+    return zlib.crc32(feature.encode()) % PRIME
+
+
+def lsh_parameters(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) with the most rows per band, and so the fewest false candidates, that still
+    catch a pair exactly at `threshold` with probability MIN_RECALL: 1 - (1 - t^rows)^bands"""
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= MIN_RECALL:
+            return bands, rows
+    return num_perm, 1
+
+
+def distinct(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct values and their counts, via sort and diff (far faster than np.unique on
+    tens of millions of int64s)"""
+    values = np.sort(values)
+    if not len(values):
+        return values, np.empty(0, np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], values[1:] != values[:-1]]))
+    return values[starts], np.diff(np.concatenate([starts, [len(values)]]))
+
+
+def gather(offsets: np.ndarray, values: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenated CSR slices of `rows`, plus each element's position in `rows`"""
+    lengths = offsets[rows + 1] - offsets[rows]
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    starts = np.repeat(offsets[rows] - (np.cumsum(lengths) - lengths), lengths)
+    return values[starts + np.arange(int(lengths.sum()))], owner
+
+
+class SimilarityIndex:
+    def __init__(self, num_perm: int = 128, threshold: float = 0.5, seed: int = 1):
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.seed = seed
+        self.bands, self.rows = lsh_parameters(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self.hash_a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self.hash_b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+        self.band_mix = rng.integers(1, np.iinfo(np.uint64).max, self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self.features = Vocabulary()
+        self.feature_hashes = np.empty(0, np.uint64)
+
+        # Genomes
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.isolate_ids: List[Optional[str]] = []
+        self.labels: List[Optional[str]] = []
+        self.alive = np.empty(0, bool)
+        self.updated_at = np.empty(0, np.int64)
+        self.genome_profile = np.empty(0, np.int32)
+
+        # Profiles: distinct sorted feature-code tuples, append-only; codes of profile p are
+        # profile_codes[profile_offsets[p]:profile_offsets[p + 1]]
+        self.profile_of: Dict[Tuple[int, ...], int] = {}
+        self.profile_codes = np.empty(0, np.int32)
+        self.profile_offsets = np.zeros(1, np.int64)
+        self.members = np.empty(0, np.int32)
+        self.signatures = np.empty((0, num_perm), np.uint32)
+        # Per band: profile keys, and profile ids sorted by key (a bucket is a run of equal keys)
+        self.band_keys = np.empty((0, self.bands), np.uint64)
+        self.bucket_profiles = [np.empty(0, np.int32) for _ in range(self.bands)]
+        self.bucket_keys = [np.empty(0, np.uint64) for _ in range(self.bands)]
+
+        self.genome_watermark = 0
+        self.isolate_watermark = 0
+        # Source (row count, max id) at the last refresh, advanced as upsert adds rows
+        self.source_stats: Tuple[int, str] = (0, "")
+
+    @property
+    def size(self) -> int:
+        return int(self.alive[:len(self.ids)].sum())
+
+    @property
+    def profile_count(self) -> int:
+        return len(self.members)
+
+    def _reserve(self, rows: int):
+        capacity = len(self.alive)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+
+        def grow(array: np.ndarray, fill: Any) -> np.ndarray:
+            grown = np.full(new_capacity, fill, array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self.alive = grow(self.alive, False)
+        self.updated_at = grow(self.updated_at, MISSING_DATE)
+        self.genome_profile = grow(self.genome_profile, NO_CODE)
+
+    def minhash(self, offsets: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+        """Signatures of the non-empty sets hashes[offsets[i]:offsets[i + 1]]"""
+        count = len(offsets) - 1
+        signatures = np.empty((count, self.num_perm), np.uint32)
+        for start in range(0, count, SIGNATURE_BLOCK):
+            stop = min(start + SIGNATURE_BLOCK, count)
+            block = hashes[offsets[start]:offsets[stop]]
+            permuted = (block[:, None] * self.hash_a + self.hash_b) % np.uint64(PRIME)
+            signatures[start:stop] = np.minimum.reduceat(permuted, offsets[start:stop] - offsets[start], axis=0)
+        return signatures
+
+    def keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One 64-bit bucket key per band; uint64 arithmetic wraps, which is all the mixing needs"""
+        banded = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        return (banded.astype(np.uint64) * self.band_mix).sum(axis=2, dtype=np.uint64)
+
+    def _add_profiles(self, profiles: List[Tuple[int, ...]]):
+        """Hash new profiles and merge their band keys into the sorted buckets"""
+        first = len(self.members)
+        lengths = np.array([len(profile) for profile in profiles], np.int64)
+        codes = np.fromiter((code for profile in profiles for code in profile), np.int32, int(lengths.sum()))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        signatures = self.minhash(offsets, self.feature_hashes[codes])
+        keys = self.keys(signatures)
+
+        self.profile_codes = np.concatenate([self.profile_codes, codes])
+        self.profile_offsets = np.concatenate([self.profile_offsets, self.profile_offsets[-1] + offsets[1:]])
+        self.members = np.concatenate([self.members, np.zeros(len(profiles), np.int32)])
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self.band_keys = np.concatenate([self.band_keys, keys])
+        ids = np.arange(first, first + len(profiles), dtype=np.int32)
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind="stable")
+            at = np.searchsorted(self.bucket_keys[band], keys[order, band])
+            self.bucket_keys[band] = np.insert(self.bucket_keys[band], at, keys[order, band])
+            self.bucket_profiles[band] = np.insert(self.bucket_profiles[band], at, ids[order])
+
+    def upsert(self, genomes: Iterable[ProfileRow]) -> int:
+        """Point new or changed genomes at their (possibly new) profile"""
+        count = 0
+        new_profiles: List[Tuple[int, ...]] = []
+        assignments: List[Tuple[int, Tuple[int, ...]]] = []
+        for genome_id, updated_at, resistance, virulence, plasmids, alleles, isolate_id, label in genomes:
+            row = self.row_of.get(genome_id)
+            if row is None:
+                row = self.row_of[genome_id] = len(self.ids)
+                self.ids.append(genome_id)
+                self.source_stats = (self.source_stats[0] + 1, max(self.source_stats[1], genome_id))
+                self.isolate_ids.append(None)
+                self.labels.append(None)
+                self._reserve(len(self.ids))
+            count += 1
+            self.alive[row] = True
+            self.updated_at[row] = epoch_ms(updated_at)
+            self.genome_watermark = max(self.genome_watermark, int(self.updated_at[row]))
+            self.isolate_ids[row], self.labels[row] = isolate_id, label
+
+            codes = {self.features.code(feature) for feature in profile_features(resistance, virulence, plasmids, alleles)}
+            profile = tuple(sorted(codes))
+            if profile and profile not in self.profile_of:
+                self.profile_of[profile] = len(self.members) + len(new_profiles)
+                new_profiles.append(profile)
+            assignments.append((row, profile))
+
+        if len(self.feature_hashes) < len(self.features):
+            added = [feature_hash(feature) for feature in self.features.values[len(self.feature_hashes):]]
+            self.feature_hashes = np.concatenate([self.feature_hashes, np.array(added, np.uint64)])
+        if new_profiles:
+            self._add_profiles(new_profiles)
+        for row, profile in assignments:
+            previous = self.genome_profile[row]
+            if previous != NO_CODE:
+                self.members[previous] -= 1
+            current = self.profile_of[profile] if profile else NO_CODE
+            self.genome_profile[row] = current
+            if current != NO_CODE:
+                self.members[current] += 1
+        return count
+
+    def stale(self, versions: Iterable[Tuple[str, Any]]) -> List[str]:
+        stale = []
+        for genome_id, updated_at in versions:
+            row = self.row_of.get(genome_id)
+            if row is None or self.updated_at[row] != epoch_ms(updated_at):
+                stale.append(genome_id)
+        return stale
+
+    def relink(self, isolates: Iterable[Tuple[str, Optional[str], str, Any]]):
+        """Follow isolates whose primary genome or label changed"""
+        for isolate_id, genome_id, label, updated_at in isolates:
+            self.isolate_watermark = max(self.isolate_watermark, epoch_ms(updated_at))
+            row = self.row_of.get(genome_id) if genome_id else None
+            if row is not None:
+                self.isolate_ids[row], self.labels[row] = isolate_id, label
+
+    def retain(self, live_ids: Iterable[str]) -> int:
+        """Tombstone genomes that no longer exist; their profiles stay indexed for reuse"""
+        live = set(live_ids)
+        gone = [row for genome_id, row in self.row_of.items() if genome_id not in live]
+        for row in gone:
+            del self.row_of[self.ids[row]]
+            self.alive[row] = False
+            if self.genome_profile[row] != NO_CODE:
+                self.members[self.genome_profile[row]] -= 1
+                self.genome_profile[row] = NO_CODE
+        return len(gone)
+
+    def save(self, path: str, source: str):
+        n = len(self.ids)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=CACHE_VERSION,
+            source=source,
+            params=np.array([self.num_perm, self.seed], np.int64),
+            threshold=self.threshold,
+            watermarks=np.array([self.genome_watermark, self.isolate_watermark], np.int64),
+            source_stats=np.array([self.source_stats[0], self.source_stats[1]], dtype=str),
+            ids=pack_strings(self.ids),
+            isolate_ids=pack_strings([isolate_id or "" for isolate_id in self.isolate_ids]),
+            labels=pack_strings([label or "" for label in self.labels]),
+            features=pack_strings(self.features.values),
+            alive=self.alive[:n],
+            updated_at=self.updated_at[:n],
+            genome_profile=self.genome_profile[:n],
+            profile_codes=self.profile_codes,
+            profile_offsets=self.profile_offsets,
+            signatures=self.signatures
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source: str, num_perm: int, threshold: float, seed: int) -> Optional["SimilarityIndex"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as cache:
+            if (int(cache["version"]) != CACHE_VERSION or str(cache["source"]) != source
+                    or cache["params"].tolist() != [num_perm, seed] or float(cache["threshold"]) != threshold):
+                return None
+            index = cls(num_perm, threshold, seed)
+            index.ids = unpack_strings(cache["ids"])
+            index.isolate_ids = [value or None for value in unpack_strings(cache["isolate_ids"])]
+            index.labels = [value or None for value in unpack_strings(cache["labels"])]
+            index.features = Vocabulary(unpack_strings(cache["features"]))
+            index.alive = cache["alive"]
+            index.updated_at = cache["updated_at"]
+            index.genome_profile = cache["genome_profile"]
+            index.profile_codes = cache["profile_codes"]
+            index.profile_offsets = cache["profile_offsets"]
+            index.signatures = cache["signatures"]
+            index.genome_watermark, index.isolate_watermark = cache["watermarks"].tolist()
+            count, max_id = cache["source_stats"].tolist()
+            index.source_stats = (int(count), max_id)
+        index.row_of = {genome_id: row for row, genome_id in enumerate(index.ids) if index.alive[row]}
+        index.feature_hashes = np.array([feature_hash(feature) for feature in index.features.values], np.uint64)
+        codes, offsets = index.profile_codes, index.profile_offsets
+        index.profile_of = {tuple(codes[offsets[p]:offsets[p + 1]].tolist()): p for p in range(len(offsets) - 1)}
+        linked = index.genome_profile[index.alive & (index.genome_profile != NO_CODE)]
+        index.members = np.bincount(linked, minlength=len(offsets) - 1).astype(np.int32)
+        index.band_keys = index.keys(index.signatures)
+        for band in range(index.bands):
+            order = np.argsort(index.band_keys[:, band], kind="stable").astype(np.int32)
+            index.bucket_profiles[band] = order
+            index.bucket_keys[band] = index.band_keys[order, band]
+        return index
+
+    def profile(self, p: int) -> np.ndarray:
+        return self.profile_codes[self.profile_offsets[p]:self.profile_offsets[p + 1]]
+
+    def jaccard(self, codes: np.ndarray, profiles: np.ndarray) -> np.ndarray:
+        """Exact Jaccard similarity of one sorted code set against many profiles"""
+        if not len(profiles):
+            return np.empty(0)
+        values, owner = gather(self.profile_offsets, self.profile_codes, profiles)
+        shared = np.bincount(owner, weights=np.isin(values, codes), minlength=len(profiles))
+        sizes = self.profile_offsets[profiles + 1] - self.profile_offsets[profiles]
+        return shared / (len(codes) + sizes - shared)
+
+    def candidates(self, keys: np.ndarray) -> np.ndarray:
+        """Live profiles sharing at least one band bucket with `keys`"""
+        found = []
+        for band in range(self.bands):
+            bucket_keys = self.bucket_keys[band]
+            lo = np.searchsorted(bucket_keys, keys[band], side="left")
+            hi = np.searchsorted(bucket_keys, keys[band], side="right")
+            found.append(self.bucket_profiles[band][lo:hi])
+        profiles = np.unique(np.concatenate(found)) if found else np.empty(0, np.int32)
+        return profiles[self.members[profiles] > 0]
+
+    def genomes_of(self, profiles: np.ndarray) -> Dict[int, List[int]]:
+        rows = np.flatnonzero(np.isin(self.genome_profile[:len(self.ids)], profiles) & self.alive[:len(self.ids)])
+        grouped: Dict[int, List[int]] = {}
+        for row, p in zip(rows.tolist(), self.genome_profile[rows].tolist()):
+            grouped.setdefault(p, []).append(row)
+        return grouped
+
+    def describe(self, row: int) -> Dict[str, Any]:
+        return {"genomeId": self.ids[row], "isolateId": self.isolate_ids[row], "label": self.labels[row]}
+
+    def codes_for(self, features: Iterable[str]) -> np.ndarray:
+        return np.array(sorted({self.features.codes[f] for f in features if f in self.features.codes}), np.int32)
+
+    def similar_profiles(self, codes: np.ndarray, keys: np.ndarray, min_similarity: float = 0.0,
+                         exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(profiles, similarities) best first; LSH candidates only unless `exact`"""
+        if exact:
+            profiles = np.flatnonzero(self.members > 0).astype(np.int32)
+        else:
+            profiles = self.candidates(keys)
+        similarity = self.jaccard(codes, profiles)
+        keep = similarity >= min_similarity
+        profiles, similarity = profiles[keep], similarity[keep]
+        order = np.lexsort((profiles, -similarity))
+        return profiles[order], similarity[order]
+
+    def top_k(self, genome_id: str, k: int = 10, min_similarity: float = 0.0,
+              exact: bool = False) -> List[Dict[str, Any]]:
+        """The k genomes whose gene profiles are most similar to `genome_id`'s (ties: same profile first)"""
+        row = self.row_of.get(genome_id)
+        if row is None:
+            raise KeyError(f"genome {genome_id} is not indexed")
+        p = int(self.genome_profile[row])
+        if p == NO_CODE:
+            return []
+        codes = self.profile(p)
+        profiles, similarity = self.similar_profiles(codes, self.band_keys[p], min_similarity, exact)
+
+        results = []
+        # Expand profiles to genomes in chunks so a query with many distant neighbours stays cheap
+        for start in range(0, len(profiles), max(k, 16)):
+            chunk = profiles[start:start + max(k, 16)]
+            members = self.genomes_of(chunk)
+            for q, s in zip(chunk.tolist(), similarity[start:start + len(chunk)].tolist()):
+                shared = np.intersect1d(codes, self.profile(q))
+                for other in members.get(q, []):
+                    if other == row:
+                        continue
+                    results.append({**self.describe(other), "similarity": round(s, 4),
+                                    "shared": [self.features.values[c] for c in shared.tolist()]})
+                    if len(results) == k:
+                        return results
+        return results
+
+    def all_pairs(self, threshold: float) -> Dict[str, Any]:
+        """Every pair of genomes whose profiles have Jaccard similarity >= threshold.
+
+        Genomes sharing a profile (similarity 1) are reported as groups; distinct profiles as
+        verified LSH candidate pairs. Pair counts are exact for what LSH finds.
+        """
+        live = self.members > 0
+        pairs = []
+        for band in range(self.bands):
+            keys, profiles = self.bucket_keys[band], self.bucket_profiles[band]
+            mask = live[profiles]
+            keys, profiles = keys[mask], profiles[mask]
+            if len(keys) < 2:
+                continue
+            boundaries = np.flatnonzero(np.diff(keys)) + 1
+            starts = np.concatenate([[0], boundaries])
+            sizes = np.diff(np.concatenate([starts, [len(keys)]]))
+            # Buckets of equal size expand together: starts x (i, j) offsets of the upper triangle
+            for size in np.unique(sizes[sizes > 1]).tolist():
+                i, j = np.triu_indices(size, 1)
+                bucket_starts = starts[sizes == size][:, None]
+                left = profiles[bucket_starts + i].astype(np.int64).ravel()
+                right = profiles[bucket_starts + j].astype(np.int64).ravel()
+                pairs.append(np.minimum(left, right) * self.profile_count + np.maximum(left, right))
+        encoded = distinct(np.concatenate(pairs))[0] if pairs else np.empty(0, np.int64)
+        candidate_pairs = len(encoded)
+
+        found_a, found_b, found_s = [], [], []
+        for start in range(0, len(encoded), PAIR_BLOCK):
+            block = encoded[start:start + PAIR_BLOCK]
+            a, b = block // self.profile_count, block % self.profile_count
+            values_a, owner_a = gather(self.profile_offsets, self.profile_codes, a)
+            values_b, owner_b = gather(self.profile_offsets, self.profile_codes, b)
+            # A code present in both sets of pair n shows up twice under key n * F + code
+            width = np.int64(max(len(self.features), 1))
+            tagged = np.concatenate([owner_a * width + values_a, owner_b * width + values_b])
+            tags, counts = distinct(tagged)
+            shared = np.bincount(tags[counts == 2] // width, minlength=len(block))
+            sizes_a = self.profile_offsets[a + 1] - self.profile_offsets[a]
+            sizes_b = self.profile_offsets[b + 1] - self.profile_offsets[b]
+            similarity = shared / (sizes_a + sizes_b - shared)
+            keep = similarity >= threshold
+            found_a.append(a[keep])
+            found_b.append(b[keep])
+            found_s.append(similarity[keep])
+        a = np.concatenate(found_a) if found_a else np.empty(0, np.int64)
+        b = np.concatenate(found_b) if found_b else np.empty(0, np.int64)
+        similarity = np.concatenate(found_s) if found_s else np.empty(0)
+
+        groups = np.flatnonzero(self.members > 1)
+        return {
+            "threshold": threshold,
+            "candidate_profile_pairs": candidate_pairs,
+            "profile_pairs": len(a),
+            "genome_pairs": int((self.members[a].astype(np.int64) * self.members[b]).sum()
+                                + (self.members[groups].astype(np.int64) * (self.members[groups] - 1) // 2).sum()),
+            "identical_groups": groups,
+            "pairs": (a, b, similarity),
+        }
+
+
+class SqliteProfileSource:
+    """GenomicData gene columns plus the primary-linked isolate, from the Patomove SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.name = f"sqlite:{os.path.abspath(db_path)}"
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def genome_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return self.conn.execute('SELECT "id", "updatedAt" FROM "GenomicData" WHERE "updatedAt" > ?', (since_ms,))
+
+    def genomes(self, ids: List[str]) -> Iterator[ProfileRow]:
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            yield from self.conn.execute(
+                'SELECT g."id", g."updatedAt", g."resistanceGenes", g."virulenceGenes", g."plasmids", g."mlstAlleles", '
+                'i."id", i."label" FROM "GenomicData" g LEFT JOIN "Isolate" i ON i."id" = COALESCE('
+                '(SELECT p."id" FROM "Isolate" p WHERE p."genomeId" = g."id" LIMIT 1), '
+                '(SELECT a."B" FROM "_IsolateAnalyses" a WHERE a."A" = g."id" LIMIT 1)) '
+                f'WHERE g."id" IN ({", ".join("?" * len(chunk))})', chunk
+            )
+
+    def changed_isolates(self, since_ms: int) -> Iterable[Tuple[str, Optional[str], str, Any]]:
+        # Same link resolution as genomes(): the loader links analysed genomes only through _IsolateAnalyses
+        return self.conn.execute(
+            'SELECT i."id", COALESCE(i."genomeId", '
+            '(SELECT a."A" FROM "_IsolateAnalyses" a WHERE a."B" = i."id" LIMIT 1)), '
+            'i."label", i."updatedAt" FROM "Isolate" i WHERE i."updatedAt" > ?', (since_ms,)
+        )
+
+    def genome_stats(self) -> Tuple[int, str]:
+        """Row count and max id, answered from an index without fetching any IDs"""
+        return tuple(self.conn.execute('SELECT COUNT(*), COALESCE(MAX("id"), \'\') FROM "GenomicData"').fetchone())
+
+    def genome_ids(self) -> Iterable[str]:
+        return (row[0] for row in self.conn.execute('SELECT "id" FROM "GenomicData"'))
+
+
+class DatasetProfileSource:
+    """Genomes from generate_db_demo.py JSON output, linked to isolates by filename label like sqlite_loader"""
+
+    def __init__(self, path: str):
+        self.name = f"data:{os.path.abspath(path)}"
+        with open(path) as f:
+            data = json.load(f)
+        self.rows = data.get("genomicData", [])
+        self.isolates_by_label = {isolate["label"]: isolate for isolate in data.get("isolates", [])}
+
+    def genome_versions(self, since_ms: int) -> Iterable[Tuple[str, Any]]:
+        return [(g["id"], g.get("updatedAt")) for g in self.rows]
+
+    def genomes(self, ids: List[str]) -> Iterator[ProfileRow]:
+        wanted = set(ids)
+        for g in self.rows:
+            if g["id"] not in wanted:
+                continue
+            isolate = self.isolates_by_label.get(g["originalFilename"].rsplit(".", 1)[0], {})
+            yield (g["id"], g.get("updatedAt"), g.get("resistanceGenes"), g.get("virulenceGenes"), g.get("plasmids"),
+                   g.get("mlstAlleles"), isolate.get("id"), isolate.get("label"))
+
+    def changed_isolates(self, since_ms: int) -> Iterable[Tuple[str, Optional[str], str, Any]]:
+        return []
+
+    def genome_stats(self) -> Tuple[int, str]:
+        return len(self.rows), max(self.genome_ids(), default="")
+
+    def genome_ids(self) -> Iterable[str]:
+        return (g["id"] for g in self.rows)
+
+
+class SyntheticProfileSource(DatasetProfileSource):
+    """N genomes from the generator's gene vocabularies, in clonal lineages so near neighbours exist.
+
+    Each lineage founder draws genes at the generator's rates; descendants gain or lose a gene
+    or switch an MLST allele now and then, as isolates of one outbreak strain do.
+    """
+
+    def __init__(self, count: int, seed: int = 0, lineage_size: int = 25):
+        from generate_db_demo import DemoDataGenerator
+        gen = DemoDataGenerator(num_isolates=1)
+        rng = np.random.default_rng(seed)
+        self.name = f"synthetic:{count}:{seed}"
+        resistance = list(gen.resistance_gene_names)
+        virulence = [f"vir_{v}" for v in range(1, 51)]
+        plasmids = [f"plasmid_{p}" for p in range(1, 11)]
+        loci = ["adk", "fumC", "gyrB"]
+
+        def founder() -> Dict[str, Any]:
+            return {
+                "resistance": set(rng.choice(resistance, rng.integers(0, 6))) if rng.random() > 0.5 else set(),
+                "virulence": set(rng.choice(virulence, rng.integers(0, 4))) if rng.random() > 0.7 else set(),
+                "plasmids": set(rng.choice(plasmids, rng.integers(0, 4))) if rng.random() > 0.8 else set(),
+                "mlst": {locus: int(rng.integers(1, 101)) for locus in loci} if rng.random() > 0.7 else None,
+            }
+
+        lineages = [founder() for _ in range(max(1, count // lineage_size))]
+        now_ms = int(time.time() * 1000)
+        self.rows = []
+        self.links = {}
+        for i, lineage in enumerate(rng.integers(0, len(lineages), count).tolist()):
+            genes = {kind: set(values) if isinstance(values, set) else values for kind, values in lineages[lineage].items()}
+            kind, vocabulary = [("resistance", resistance), ("virulence", virulence), ("plasmids", plasmids)][int(rng.integers(0, 3))]
+            if rng.random() < 0.3:
+                genes[kind].add(str(rng.choice(vocabulary)))
+            if rng.random() < 0.2 and genes[kind]:
+                genes[kind].discard(sorted(genes[kind])[int(rng.integers(0, len(genes[kind])))])
+            if genes["mlst"] and rng.random() < 0.1:
+                genes["mlst"] = {**genes["mlst"], loci[int(rng.integers(0, 3))]: int(rng.integers(1, 101))}
+            genome_id = f"genome_{i:07d}"
+            self.rows.append({
+                "id": genome_id, "updatedAt": now_ms,
+                "resistanceGenes": json.dumps([{"gene": g, "identity": 99.0} for g in sorted(genes["resistance"])])
+                if genes["resistance"] else None,
+                "virulenceGenes": json.dumps([{"gene": g, "identity": 95.0} for g in sorted(genes["virulence"])])
+                if genes["virulence"] else None,
+                "plasmids": json.dumps(sorted(genes["plasmids"])) if genes["plasmids"] else None,
+                "mlstAlleles": json.dumps(genes["mlst"]) if genes["mlst"] else None,
+            })
+            self.links[genome_id] = (f"isolate_{i:07d}", f"ISO-{i + 1:07d}")
+
+    def genomes(self, ids: List[str]) -> Iterator[ProfileRow]:
+        wanted = set(ids)
+        for g in self.rows:
+            if g["id"] in wanted:
+                yield (g["id"], g["updatedAt"], g["resistanceGenes"], g["virulenceGenes"], g["plasmids"],
+                       g["mlstAlleles"]) + self.links[g["id"]]
+
+
+def refresh(index: SimilarityIndex, source: Any) -> Dict[str, int]:
+    stale = index.stale(source.genome_versions(index.genome_watermark - REFRESH_LAG_MS))
+    updated = index.upsert(source.genomes(stale))
+    index.relink(source.changed_isolates(index.isolate_watermark - REFRESH_LAG_MS))
+    # Deletions leave no updatedAt; only a source row count or max id other than the ones recorded with the
+    # watermark (plus the rows upsert added) needs the full ID scan. See antibiogram.refresh
+    stats = source.genome_stats()
+    scanned = stats != index.source_stats
+    removed = index.retain(source.genome_ids()) if scanned else 0
+    index.source_stats = stats
+    return {"updated": updated, "removed": removed, "scanned": int(scanned)}
+
+
+def load_index(source: Any, cache_path: Optional[str], num_perm: int = 128, threshold: float = 0.5,
+               seed: int = 1) -> Tuple[SimilarityIndex, Dict[str, int]]:
+    index = SimilarityIndex.load(cache_path, source.name, num_perm, threshold, seed) if cache_path else None
+    cached = index is not None
+    index = index or SimilarityIndex(num_perm, threshold, seed)
+    changes = refresh(index, source)
+    if cache_path and (not cached or changes["updated"] or changes["scanned"]):
+        index.save(cache_path, source.name)
+    return index, {**changes, "cached": int(cached)}
+
+
+def pairs_report(index: SimilarityIndex, result: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """Most similar profile pairs and largest identical groups, each with up to five genomes per side"""
+    a, b, similarity = result["pairs"]
+    order = np.lexsort((-(index.members[a] * index.members[b]), -similarity))[:limit]
+    groups = result["identical_groups"]
+    groups = groups[np.argsort(-index.members[groups], kind="stable")][:limit]
+    shown = np.unique(np.concatenate([a[order], b[order], groups])).astype(np.int32)
+    members = index.genomes_of(shown)
+
+    def sample(p: int) -> List[Dict[str, Any]]:
+        return [index.describe(row) for row in members.get(p, [])[:5]]
+
+    return {
+        "threshold": result["threshold"],
+        "candidate_profile_pairs": result["candidate_profile_pairs"],
+        "profile_pairs": result["profile_pairs"],
+        "genome_pairs": result["genome_pairs"],
+        "pairs": [{"similarity": round(float(similarity[n]), 4),
+                   "shared": [index.features.values[c] for c in np.intersect1d(index.profile(a[n]), index.profile(b[n])).tolist()],
+                   "genomes_a": int(index.members[a[n]]), "genomes_b": int(index.members[b[n]]),
+                   "a": sample(int(a[n])), "b": sample(int(b[n]))} for n in order.tolist()],
+        "identical_groups": [{"genomes": int(index.members[p]),
+                              "features": [index.features.values[c] for c in index.profile(p).tolist()],
+                              "sample": sample(int(p))} for p in groups.tolist()],
+    }
+
+
+def run_benchmark(count: int, queries: int = 200, k: int = 10, num_perm: int = 128, threshold: float = 0.5,
+                  seed: int = 1) -> Dict[str, Any]:
+    print(f"🧬 Synthesizing {count:,} genomes from the generator's gene vocabularies...")
+    source = SyntheticProfileSource(count)
+
+    start = time.perf_counter()
+    index = SimilarityIndex(num_perm, threshold, seed)
+    refresh(index, source)
+    build_seconds = time.perf_counter() - start
+    print(f"✅ Indexed {index.size:,} genomes as {index.profile_count:,} distinct profiles "
+          f"({index.bands} bands x {index.rows} rows) in {build_seconds:.2f}s")
+
+    # Incremental maintenance: re-profile 1% of the genomes
+    rng = np.random.default_rng(seed)
+    changed = rng.choice(count, max(1, count // 100), replace=False)
+    for n in changed.tolist():
+        row = source.rows[n]
+        row["plasmids"] = json.dumps(sorted(set(json.loads(row["plasmids"] or "[]")) | {f"plasmid_{int(rng.integers(1, 11))}"}))
+        row["updatedAt"] += 1000
+    start = time.perf_counter()
+    changes = refresh(index, source)
+    update_seconds = time.perf_counter() - start
+    print(f"🔁 Refreshed {changes['updated']:,} changed genomes in {1000 * update_seconds:.0f}ms "
+          f"({index.profile_count:,} profiles)")
+
+    sample = [source.rows[n]["id"] for n in rng.choice(count, min(queries, count), replace=False).tolist()]
+    sample = [genome_id for genome_id in sample if index.genome_profile[index.row_of[genome_id]] != NO_CODE]
+    timings = {"lsh": [], "exact": []}
+    topk_hits = topk_total = threshold_hits = threshold_total = candidates = 0
+    for genome_id in sample:
+        p = int(index.genome_profile[index.row_of[genome_id]])
+        codes, keys = index.profile(p), index.band_keys[p]
+        start = time.perf_counter()
+        approx = index.top_k(genome_id, k)
+        timings["lsh"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        exact = index.top_k(genome_id, k, exact=True)
+        timings["exact"].append(time.perf_counter() - start)
+        # Tied genomes are interchangeable: score by similarity rank, not identity
+        exact_scores = sorted((r["similarity"] for r in exact), reverse=True)
+        approx_scores = sorted((r["similarity"] for r in approx), reverse=True)
+        topk_hits += sum(1 for a, e in zip(approx_scores, exact_scores) if a >= e)
+        topk_total += len(exact_scores)
+
+        found, _ = index.similar_profiles(codes, keys, threshold)
+        truth, _ = index.similar_profiles(codes, keys, threshold, exact=True)
+        threshold_hits += len(np.intersect1d(found, truth))
+        threshold_total += len(truth)
+        candidates += len(index.candidates(keys))
+
+    def percentiles(values: List[float]) -> Dict[str, float]:
+        values = sorted(values)
+        return {"p50_ms": round(1000 * values[len(values) // 2], 2),
+                "p99_ms": round(1000 * values[min(len(values) - 1, int(0.99 * len(values)))], 2)}
+
+    start = time.perf_counter()
+    pairs = index.all_pairs(threshold)
+    pairs_seconds = time.perf_counter() - start
+
+    report = {
+        "genomes": count,
+        "profiles": index.profile_count,
+        "bands": index.bands,
+        "rows": index.rows,
+        "build_seconds": round(build_seconds, 2),
+        "update_ms": round(1000 * update_seconds, 1),
+        "queries": len(sample),
+        "top_k": k,
+        "top_k_recall": round(topk_hits / topk_total, 4) if topk_total else None,
+        "threshold_recall": round(threshold_hits / threshold_total, 4) if threshold_total else None,
+        "mean_candidates": round(candidates / len(sample), 1) if sample else 0,
+        "lsh": percentiles(timings["lsh"]) if sample else None,
+        "exact": percentiles(timings["exact"]) if sample else None,
+        "all_pairs_seconds": round(pairs_seconds, 2),
+        "all_pairs_candidates": pairs["candidate_profile_pairs"],
+        "all_pairs_profile_pairs": pairs["profile_pairs"],
+        "all_pairs_genome_pairs": pairs["genome_pairs"],
+    }
+    print(f"🔎 top-{k}: recall {report['top_k_recall']:.3f}, LSH p50 {report['lsh']['p50_ms']:.1f}ms "
+          f"(exact scan p50 {report['exact']['p50_ms']:.1f}ms), {report['mean_candidates']:.0f} candidates/query "
+          f"of {index.profile_count:,}")
+    print(f"🎯 Pairs >= {threshold}: recall {report['threshold_recall']:.3f}; all-pairs search verified "
+          f"{pairs['candidate_profile_pairs']:,} candidate pairs in {pairs_seconds:.2f}s "
+          f"-> {pairs['profile_pairs']:,} profile pairs, {pairs['genome_pairs']:,} genome pairs")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find genomes with similar resistance/virulence/plasmid/MLST profiles")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--genome", type=str, default=None,
+                     help="Genome ID to find the most similar genomes to")
+    mode.add_argument("--isolate", type=str, default=None,
+                     help="Isolate ID or label; searches from its linked genome")
+    mode.add_argument("--pairs", action="store_true",
+                     help="Report all genome pairs with similarity >= --threshold")
+    mode.add_argument("--benchmark", type=int, default=None, metavar="N",
+                     help="Measure recall and latency on N synthetic genomes (e.g. 100000)")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Use a generated demo JSON file instead of the database")
+    parser.add_argument("--cache", type=str, default="similarity_cache.npz",
+                       help="Index cache file (default: similarity_cache.npz)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Build the index without reading or writing the cache")
+    parser.add_argument("--top-k", "-k", type=int, default=10,
+                       help="Similar genomes to return (default: 10)")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                       help="Jaccard similarity the LSH bands are tuned for, and the --pairs cutoff (default: 0.5)")
+    parser.add_argument("--min-similarity", type=float, default=0.0,
+                       help="Drop neighbours below this similarity (default: 0)")
+    parser.add_argument("--num-perm", type=int, default=128,
+                       help="MinHash permutations per signature (default: 128)")
+    parser.add_argument("--exact", action="store_true",
+                       help="Scan every profile instead of the LSH candidates (for checking recall)")
+    parser.add_argument("--limit", type=int, default=20,
+                       help="Pairs and groups listed by --pairs (default: 20)")
+    parser.add_argument("--queries", type=int, default=200,
+                       help="Query genomes sampled by --benchmark (default: 200)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    args = parser.parse_args()
+
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be in (0, 1]")
+
+    if args.benchmark:
+        report = run_benchmark(args.benchmark, args.queries, args.top_k, args.num_perm, args.threshold)
+        if args.format == "json":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        return
+
+    if args.data:
+        source = DatasetProfileSource(args.data)
+    elif os.path.exists(args.sqlite):
+        source = SqliteProfileSource(args.sqlite)
+    else:
+        parser.error(f"{args.sqlite} does not exist (use --data to read a generated dataset)")
+
+    start = time.perf_counter()
+    # Generated datasets carry no updatedAt to refresh from, so they are always indexed in full
+    index, changes = load_index(source, None if args.no_cache or args.data else args.cache,
+                                args.num_perm, args.threshold)
+    origin = "cache" if changes["cached"] else "source"
+    print(f"🧬 {index.size} genomes, {index.profile_count} distinct profiles from {origin} in "
+          f"{time.perf_counter() - start:.3f}s ({changes['updated']} decoded, {changes['removed']} removed)",
+          file=sys.stderr)
+
+    start = time.perf_counter()
+    if args.pairs:
+        report = pairs_report(index, index.all_pairs(args.threshold), args.limit)
+        print(f"🔗 {report['genome_pairs']:,} genome pairs with similarity >= {args.threshold} "
+              f"({report['profile_pairs']:,} profile pairs from {report['candidate_profile_pairs']:,} candidates) "
+              f"in {1000 * (time.perf_counter() - start):.1f} ms", file=sys.stderr)
+        if args.format == "json":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+            return
+        for group in report["identical_groups"]:
+            labels = ", ".join(g["label"] or g["genomeId"] for g in group["sample"])
+            print(f"   1.000  {group['genomes']:>5} identical  {', '.join(group['features'])}  [{labels}]")
+        for pair in report["pairs"]:
+            a = ", ".join(g["label"] or g["genomeId"] for g in pair["a"])
+            b = ", ".join(g["label"] or g["genomeId"] for g in pair["b"])
+            print(f"   {pair['similarity']:.3f}  [{a}] ~ [{b}]  shared: {', '.join(pair['shared'])}")
+        return
+
+    genome_id = args.genome
+    if args.isolate:
+        rows = [row for row in range(len(index.ids))
+                if index.alive[row] and args.isolate in (index.isolate_ids[row], index.labels[row])]
+        if not rows:
+            parser.error(f"no indexed genome is linked to isolate {args.isolate}")
+        genome_id = index.ids[rows[0]]
+    try:
+        results = index.top_k(genome_id, args.top_k, args.min_similarity, exact=args.exact)
+    except KeyError as e:
+        parser.error(str(e.args[0]))
+    print(f"🔎 {len(results)} similar genomes in {1000 * (time.perf_counter() - start):.1f} ms", file=sys.stderr)
+
+    if args.format == "json":
+        json.dump({"genomeId": genome_id, "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    for r in results:
+        print(f"   {r['similarity']:.3f}  {r['label'] or '-':<12} {r['genomeId']}  shared: {', '.join(r['shared'])}")
+
+
+if __name__ == "__main__":
+    main()
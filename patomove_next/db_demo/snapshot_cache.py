@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of seeded Prisma SQLite database snapshots.
+
+A snapshot is keyed by a hash of everything that determines the database's
+contents: the Prisma schema and Prisma version, the generator's source code,
+and the seed, size and shape arguments. Resetting to a cached snapshot is a
+file copy (a reflink where the filesystem supports it). On a miss the database
+is built once (from a cached empty-schema template when one exists, so
+`prisma db push` only runs when the schema changes), seeded with
+generate_db_demo.py --sqlite and stored. Least recently used snapshots are
+evicted once the cache exceeds its size cap.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+import argparse
+from workload import WorkloadProfile
+
+DB_DEMO_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(DB_DEMO_DIR)
+DEFAULT_CACHE_DIR = os.environ.get("PATOMOVE_SNAPSHOT_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "patomove", "db_snapshots"))
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+# Source files whose contents determine the generated rows; editing any of them changes every key
+GENERATOR_SOURCES = ["generate_db_demo.py", "vector_engine.py", "workload.py", "sqlite_loader.py", "streaming.py"]
+# Bumped if the snapshot layout itself changes
+CACHE_FORMAT = 1
+
+# Creates the empty schema; {schema} is a scratch copy of --schema whose database is dev.db beside it
+DEFAULT_PUSH_COMMAND = "npx prisma db push --accept-data-loss --skip-generate --schema {schema}"
+# The datasource's url line, rewritten in the scratch copy
+DATASOURCE_URL = re.compile(r'(datasource\s+\w+\s*\{[^}]*?\burl\s*=\s*)[^\n]*')
+
+FICLONE = 0x40049409  # Linux ioctl: share the source file's extents (btrfs, XFS, overlayfs on those)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prisma_version(project_dir: str) -> str:
+    """Installed Prisma CLI version (it decides the DDL `db push` emits), else the package.json range"""
+    try:
+        with open(os.path.join(project_dir, "node_modules", "prisma", "package.json")) as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        with open(os.path.join(project_dir, "package.json")) as f:
+            package = json.load(f)
+        return package.get("devDependencies", {}).get("prisma") or package.get("dependencies", {}).get("prisma", "unknown")
+    except (OSError, ValueError):
+        return "unknown"
+
+
+def schema_key(schema_path: str, project_dir: str = PROJECT_DIR) -> str:
+    """Key of the empty database `prisma db push` creates from this schema"""
+    digest = hashlib.sha256()
+    digest.update(f"format={CACHE_FORMAT}\nprisma={prisma_version(project_dir)}\n".encode())
+    digest.update(sha256_file(schema_path).encode())
+    return digest.hexdigest()
+
+
+def generator_version() -> str:
+    digest = hashlib.sha256()
+    for name in GENERATOR_SOURCES:
+        digest.update(f"{name}:{sha256_file(os.path.join(DB_DEMO_DIR, name))}\n".encode())
+    return digest.hexdigest()
+
+
+def snapshot_key(schema_path: str, params: Dict[str, Any], project_dir: str = PROJECT_DIR) -> str:
+    """Key of a seeded database: schema, generator code and the arguments that shape the data"""
+    material = {
+        "schema": schema_key(schema_path, project_dir),
+        "generator": generator_version(),
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def copy_file(source: str, destination: str):
+    """Reflink when the filesystem supports it, else a regular (sendfile) copy"""
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+
+
+def remove_sidecars(db_path: str):
+    """Drop journal/WAL files left by a previous database at this path"""
+    for suffix in ("-journal", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def place(source: str, destination: str):
+    """Copy a cached file into place atomically, so a reader never sees half a database"""
+    tmp_path = f"{destination}.{os.getpid()}.tmp"
+    try:
+        copy_file(source, tmp_path)
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SnapshotCache:
+    """Directory of <key>.db snapshots, each with a <key>.json entry recording its size and last use.
+
+    Entries are written to a temporary name and renamed into place, so concurrent
+    resets (e.g. parallel CI jobs sharing a cache) never read a partial snapshot.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def entry(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(key, ".json")) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if os.path.exists(self.path(key, ".db")) else None
+
+    def write_entry(self, key: str, entry: Dict[str, Any]):
+        tmp_path = self.path(key, f".json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, self.path(key, ".json"))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        keys = [name[:-5] for name in os.listdir(self.cache_dir)
+                if name.endswith(".json") and not name.endswith(".data.json")]
+        return [dict(entry, key=key) for key in keys for entry in [self.entry(key)] if entry]
+
+    def restore(self, key: str, db_path: str, output: Optional[str] = None) -> bool:
+        """Copy a cached snapshot (and its dataset JSON, if one was stored and asked for) into place"""
+        entry = self.entry(key)
+        if entry is None or (output and not os.path.exists(self.path(key, ".data.json"))):
+            return False
+        remove_sidecars(db_path)
+        place(self.path(key, ".db"), db_path)
+        if output:
+            place(self.path(key, ".data.json"), output)
+        entry["last_used"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self.write_entry(key, entry)
+        return True
+
+    def store(self, key: str, db_path: str, params: Dict[str, Any], output: Optional[str] = None):
+        """Store a compact, consistent copy of a database (VACUUM INTO), then evict down to the cap"""
+        tmp_path = self.path(key, f".db.{os.getpid()}.tmp")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("VACUUM INTO ?", (tmp_path,))
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path(key, ".db"))
+        size = os.path.getsize(self.path(key, ".db"))
+        if output:
+            place(output, self.path(key, ".data.json"))
+            size += os.path.getsize(self.path(key, ".data.json"))
+        now = time.time()
+        self.write_entry(key, {"params": params, "bytes": size, "created": now, "last_used": now, "hits": 0})
+        self.evict(keep=key)
+
+    def remove(self, key: str):
+        for suffix in (".json", ".db", ".data.json"):
+            if os.path.exists(self.path(key, suffix)):
+                os.remove(self.path(key, suffix))
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used snapshots until the cache fits in max_bytes"""
+        entries = sorted(self.entries(), key=lambda entry: entry["last_used"])
+        total = sum(entry["bytes"] for entry in entries)
+        evicted = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            self.remove(entry["key"])
+            total -= entry["bytes"]
+            evicted.append(entry["key"])
+        return evicted
+
+
+def is_empty_schema(db_path: str) -> bool:
+    """True if the database has the Prisma tables and no rows in them"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != '_prisma_migrations'")]
+        return bool(tables) and not any(conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone() for table in tables)
+    finally:
+        conn.close()
+
+
+def scratch_schema(schema_path: str, workdir: str) -> str:
+    """Copy the schema into workdir with its datasource pointed at workdir/dev.db"""
+    with open(schema_path) as f:
+        text = f.read()
+    text, found = DATASOURCE_URL.subn(r'\g<1>"file:./dev.db"', text, count=1)
+    if not found:
+        raise RuntimeError(f"No datasource url in {schema_path}")
+    path = os.path.join(workdir, "schema.prisma")
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def prepare_schema(cache: SnapshotCache, schema_path: str, db_path: str,
+                   push_command: str = DEFAULT_PUSH_COMMAND) -> str:
+    """Leave an empty database with this schema at db_path: from the template cache, or via prisma.
+
+    prisma runs on a scratch copy of the schema, so it never touches the database the schema's own
+    datasource names (prisma/dev.db) and always pushes the schema the template key was hashed from.
+    """
+    template_key = "schema-" + schema_key(schema_path)
+    if cache.restore(template_key, db_path):
+        return "cached schema template"
+    workdir = tempfile.mkdtemp(prefix="patomove_schema_")
+    try:
+        command = push_command.format(schema=shlex.quote(scratch_schema(schema_path, workdir)))
+        built = os.path.join(workdir, "dev.db")
+        print(f"🏗️  Creating schema: {command}")
+        subprocess.run(shlex.split(command), cwd=PROJECT_DIR, check=True)
+        if not os.path.exists(built) or not is_empty_schema(built):
+            raise RuntimeError(f"'{command}' did not leave an empty schema at {built}")
+        cache.store(template_key, built, {"schema": os.path.relpath(schema_path, PROJECT_DIR)})
+        remove_sidecars(db_path)
+        place(built, db_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return "prisma db push"
+
+
+def data_params(isolates: int, seed: int, engine: str = "python", reference_date: Optional[datetime] = None,
+                workload: Optional[WorkloadProfile] = None) -> Dict[str, Any]:
+    """The generator arguments that change the database's contents (not --workers or batch sizes)"""
+    return {
+        "isolates": isolates,
+        "seed": seed,
+        "engine": engine,
+        "reference_date": reference_date.isoformat() if reference_date else None,
+        "workload": workload.to_dict() if workload else None,
+    }
+
+
+def build_params(args: argparse.Namespace) -> Dict[str, Any]:
+    workload = WorkloadProfile.from_spec(args.workload) if args.workload else None
+    return data_params(args.isolates, args.seed, args.engine, args.reference_date, workload)
+
+
+def generator_command(args: argparse.Namespace, db_path: str, output: str) -> List[str]:
+    command = [sys.executable, os.path.join(DB_DEMO_DIR, "generate_db_demo.py"),
+               "--isolates", str(args.isolates), "--seed", str(args.seed), "--engine", args.engine,
+               "--workers", str(args.workers), "--sqlite", db_path, "--output", output]
+    if args.reference_date:
+        command += ["--reference-date", args.reference_date.isoformat()]
+    if args.workload:
+        command += ["--workload", args.workload]
+    return command
+
+
+def ensure(args: argparse.Namespace, cache: SnapshotCache) -> bool:
+    """Restore the snapshot for these arguments, building and storing it first on a miss; True on a hit"""
+    params = build_params(args)
+    key = snapshot_key(args.schema, params)
+    start = time.perf_counter()
+    if cache.restore(key, args.db, args.output):
+        print(f"⚡ Snapshot {key[:12]} restored to {args.db} in {time.perf_counter() - start:.2f}s")
+        return True
+
+    print(f"🧊 Snapshot {key[:12]} not cached; building it")
+    source = prepare_schema(cache, args.schema, args.db, args.push_command)
+    print(f"✅ Empty schema from {source}")
+    output = args.output or os.path.join(cache.cache_dir, f"{key}.{os.getpid()}.build.tmp")
+    try:
+        subprocess.run(generator_command(args, args.db, output), cwd=DB_DEMO_DIR, check=True)
+        cache.store(key, args.db, params, args.output)
+    finally:
+        if not args.output and os.path.exists(output):
+            os.remove(output)
+    print(f"💾 Snapshot {key[:12]} stored ({cache.entry(key)['bytes'] / 1e6:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
+    return False
+
+
+def print_entries(cache: SnapshotCache):
+    entries = sorted(cache.entries(), key=lambda entry: entry["last_used"], reverse=True)
+    total = sum(entry["bytes"] for entry in entries)
+    print(f"📦 {len(entries)} snapshots, {total / 1e6:.1f} MB of {cache.max_bytes / 1e6:.0f} MB in {cache.cache_dir}")
+    for entry in entries:
+        params = entry["params"]
+        if "isolates" in params:
+            workload = params["workload"]["name"] if params.get("workload") else "legacy"
+            label = f"{params['isolates']:,} isolates, seed {params['seed']}, {params['engine']}, {workload}"
+        else:
+            label = "empty schema template"
+        last_used = datetime.fromtimestamp(entry["last_used"]).strftime("%Y-%m-%d %H:%M")
+        print(f"   {entry['key'][:12]}  {entry['bytes'] / 1e6:9.1f} MB  {entry.get('hits', 0):>4} hits  "
+              f"last used {last_used}  {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore a seeded Prisma SQLite database from a snapshot cache, "
+                                                 "building and caching it on a miss")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--key", action="store_true",
+                       help="Print the snapshot key for these arguments and exit")
+    action.add_argument("--schema-hash", action="store_true",
+                       help="Print the hash of the Prisma schema and Prisma version and exit")
+    action.add_argument("--list", action="store_true",
+                       help="List cached snapshots, most recently used first")
+    action.add_argument("--prune", action="store_true",
+                       help="Evict least recently used snapshots down to --max-size")
+    action.add_argument("--clear", action="store_true",
+                       help="Remove every cached snapshot")
+    parser.add_argument("--db", type=str, default=os.path.join(PROJECT_DIR, "prisma", "dev.db"),
+                       help="Database to restore or build (default: ../prisma/dev.db)")
+    parser.add_argument("--schema", type=str, default=os.path.join(PROJECT_DIR, "prisma", "schema.prisma"),
+                       help="Prisma schema (default: ../prisma/schema.prisma)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Also restore/keep the dataset JSON the database was seeded from (e.g. for loadtest.py)")
+    parser.add_argument("--isolates", "-i", type=int, default=500,
+                       help="Number of isolates (default: 500)")
+    parser.add_argument("--seed", type=int, default=42,
+                       help="Generator seed; snapshots are only reproducible seeded (default: 42)")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                       help="Generation engine (default: python)")
+    parser.add_argument("--reference-date", type=datetime.fromisoformat, default=None,
+                       help="Generator reference date (default: the generator's seeded default)")
+    parser.add_argument("--workload", type=str, default=None,
+                       help="Workload profile name or JSON file, as for generate_db_demo.py")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                       help="Generator worker processes on a miss; not part of the key (default: 1)")
+    parser.add_argument("--push-command", type=str, default=DEFAULT_PUSH_COMMAND,
+                       help="Command run in the project directory to create the schema when no template is cached; "
+                            "{schema} is a scratch copy of --schema whose database is dev.db beside it "
+                            f"(default: {DEFAULT_PUSH_COMMAND})")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR,
+                       help="Snapshot directory (default: $PATOMOVE_SNAPSHOT_CACHE or ~/.cache/patomove/db_snapshots)")
+    parser.add_argument("--max-size", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3,
+                       help="Cache size cap in GB; least recently used snapshots are evicted (default: 5)")
+    args = parser.parse_args()
+    if args.seed < 0:
+        parser.error("--seed must be a non-negative integer")
+    # The generator and push command run in other directories
+    args.db, args.schema = os.path.abspath(args.db), os.path.abspath(args.schema)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    if args.workload:
+        try:
+            WorkloadProfile.from_spec(args.workload)
+        except (ValueError, json.JSONDecodeError) as e:
+            parser.error(f"--workload: {e}")
+
+    if args.schema_hash:
+        print(schema_key(args.schema))
+        return
+    if args.key:
+        print(snapshot_key(args.schema, build_params(args)))
+        return
+
+    cache = SnapshotCache(args.cache_dir, int(args.max_size * 1024 ** 3))
+    if args.list:
+        print_entries(cache)
+    elif args.prune:
+        evicted = cache.evict()
+        print(f"🧹 Evicted {len(evicted)} snapshots")
+    elif args.clear:
+        entries = cache.entries()
+        for entry in entries:
+            cache.remove(entry["key"])
+        print(f"🧹 Removed {len(entries)} snapshots")
+    else:
+        try:
+            ensure(args, cache)
+        except (subprocess.CalledProcessError, RuntimeError, OSError, sqlite3.Error) as e:
+            print(f"❌ Could not build the snapshot: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Steady-state soak test: rate-limited incremental ingestion into an existing
+Patomove database.
+
+Production does not rebuild the database; it sees a continuous trickle of new
+isolates for existing patients, genomes uploaded later and linked to their
+isolate, and isolates and genomes moving through their processing statuses.
+This tool loads the IDs already in the target database, then issues that mix
+of creates and status transitions through the API at a fixed rate (a token
+bucket) for a set duration, or up a ladder of rates, and reports the sustained
+throughput and tail latency of each step, so the highest ingest rate the
+SQLite/Prisma stack sustains before latency degrades can be read off.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+import argparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LatencyHistogram, format_summary
+from streaming import IdPool
+
+# Status pipelines, in the order generate_db_demo.py lists them
+ISOLATE_STATUSES = ["to be sequenced", "genome sequenced", "genomics processing", "genomics completed"]
+GENOME_STATUSES = ["uploaded", "validated", "analyzing", "completed"]
+
+# Default share of operations (weights, not percentages)
+DEFAULT_MIX = {
+    "isolate": 35,   # POST /isolates for an existing patient
+    "status": 25,    # PUT /isolates/[id] to the next processing status
+    "genome": 15,    # POST /genomics for an isolate still waiting for its genome
+    "link": 15,      # POST /isolates/[id]/genome-suggestions linking that genome
+    "validate": 10,  # PATCH /genomics/[id] to the next processing status
+}
+
+COLLECTION_SITES = ["blood", "urine", "wound", "sputum", "CSF", "stool", "throat", "nasal", "skin", "catheter"]
+
+# Failures after which a claimed work item goes back in its queue (with timeouts and connection errors)
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# The subset after which a POST's item goes back: only refusals that prove nothing was written
+# (a timeout or 5xx may follow a created genome, and requeueing its isolate would add a second one)
+UNWRITTEN_STATUSES = {429, 503}
+
+# Latency bands reported per step
+HISTOGRAM_BOUNDS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class WorkQueue(IdPool):
+    """IdPool that also hands out random members, removing them (swap with the last one)"""
+
+    def take(self, rng: random.Random) -> Optional[str]:
+        if not len(self):
+            return None
+        index = rng.randrange(len(self))
+        value = self[index]
+        last = self._data[-16:]
+        self._data[index * 16:(index + 1) * 16] = last
+        del self._data[-16:]
+        return value
+
+
+class SoakState:
+    """IDs the operations draw on; shared by the request threads under one lock"""
+
+    def __init__(self):
+        self.patient_ids = IdPool()
+        self.patient_orgs = IdPool()
+        # isolate_stages[i]: isolates in ISOLATE_STATUSES[i]; genome_stages likewise
+        self.isolate_stages = [WorkQueue() for _ in ISOLATE_STATUSES[:-1]]
+        self.genome_stages = [WorkQueue() for _ in GENOME_STATUSES[:-1]]
+        # Isolates with no genome yet (id, label), and uploaded genomes waiting to be linked
+        self.awaiting_genome: List[Tuple[str, str]] = []
+        self.pending_links: List[Tuple[str, str]] = []
+        self.lock = threading.Lock()
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "patients": len(self.patient_ids),
+            "isolates_in_progress": sum(len(stage) for stage in self.isolate_stages),
+            "isolates_awaiting_genome": len(self.awaiting_genome),
+            "genomes_in_progress": sum(len(stage) for stage in self.genome_stages),
+        }
+
+
+def load_state(db_path: str, max_ids: int) -> SoakState:
+    """Read the IDs to build on from a Prisma SQLite database (read-only, newest rows first)"""
+    state = SoakState()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for patient_id, org_id in conn.execute(
+                "SELECT id, orgId FROM Patient ORDER BY rowid DESC LIMIT ?", (max_ids,)):
+            state.patient_ids.append(patient_id)
+            state.patient_orgs.append(org_id)
+        for stage, status in enumerate(ISOLATE_STATUSES[:-1]):
+            for (isolate_id,) in conn.execute(
+                    "SELECT id FROM Isolate WHERE processingStatus = ? ORDER BY rowid DESC LIMIT ?", (status, max_ids)):
+                state.isolate_stages[stage].append(isolate_id)
+        state.awaiting_genome = conn.execute(
+            "SELECT id, label FROM Isolate WHERE genomeId IS NULL ORDER BY rowid DESC LIMIT ?", (max_ids,)).fetchall()
+        for stage, status in enumerate(GENOME_STATUSES[:-1]):
+            for (genome_id,) in conn.execute(
+                    "SELECT id FROM GenomicData WHERE processingStatus = ? ORDER BY rowid DESC LIMIT ?", (status, max_ids)):
+                state.genome_stages[stage].append(genome_id)
+    finally:
+        conn.close()
+    return state
+
+
+class TokenBucket:
+    """Releases one token every 1/rate seconds.
+
+    Tokens a stalled sender did not take on time are not dropped: they are handed
+    out back to back until it catches up, so the offered load stays at the target.
+    take() returns the time the token was due, and latency is measured from it, so
+    a saturated server shows up as growing latency rather than a lower send rate.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next = time.perf_counter()
+
+    def take(self) -> float:
+        due = self.next
+        self.next += self.interval
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return due
+
+
+class Step:
+    """Measurements for one target rate"""
+
+    def __init__(self, rate: float, duration: float, warmup: float):
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.histograms = {op: LatencyHistogram() for op in DEFAULT_MIX}
+        self.total = LatencyHistogram()
+        self.scheduled = 0
+        self.measure_start = 0.0
+        self.last_completion = 0.0
+
+    def record(self, op: str, scheduled: float, ok: bool):
+        now = time.perf_counter()
+        if scheduled < self.measure_start:
+            return
+        for histogram in (self.histograms[op], self.total):
+            histogram.record(now - scheduled)
+            if not ok:
+                histogram.record_error()
+        self.last_completion = max(self.last_completion, now)
+
+    def report(self, slo_p99_ms: float, max_error_rate: float) -> Dict[str, Any]:
+        # Requests scheduled in the window but completed after it stretch the window,
+        # so a server that falls behind shows up as achieved < target
+        elapsed = max(self.last_completion - self.measure_start, self.duration)
+        summary = self.total.summary()
+        achieved = self.total.count / elapsed  # errors are judged by error_rate
+        error_rate = self.total.errors / self.total.count if self.total.count else 0.0
+        sustained = (self.total.count > 0 and achieved >= 0.95 * self.rate
+                     and summary["p99_ms"] <= slo_p99_ms and error_rate <= max_error_rate)
+        return {
+            "target_rps": self.rate,
+            "offered_rps": round(self.scheduled / self.duration, 2),
+            "achieved_rps": round(achieved, 2),
+            "error_rate": round(error_rate, 4),
+            "sustained": sustained,
+            **summary,
+            "histogram": self.total.distribution(HISTOGRAM_BOUNDS_MS),
+            "operations": {op: histogram.summary() for op, histogram in self.histograms.items() if histogram.count},
+        }
+
+
+class Soak:
+    def __init__(self, base_url: str, state: SoakState, mix: Dict[str, float], timeout: float = 30.0,
+                 max_in_flight: int = 64, seed: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.state = state
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.run_tag = f"{self.seed:08x}"[-8:].upper()
+        self.created = 0
+
+        self.ops = [op for op, weight in mix.items() if weight > 0]
+        self.weights = [mix[op] for op in self.ops]
+        self.handlers = {"isolate": self.create_isolate, "status": self.advance_isolate, "genome": self.upload_genome,
+                         "link": self.link_genome, "validate": self.advance_genome}
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # ---- operations ----------------------------------------------------------
+    # Each claims its work item under the state lock when scheduled (so concurrent
+    # requests never act on the same row) and returns a request plus a completion
+    # callback and a requeue callback that hands the item back if the request fails,
+    # or None when there is nothing to do for that operation right now.
+
+    def create_isolate(self, rng: random.Random):
+        state = self.state
+        index = rng.randrange(len(state.patient_ids))
+        self.created += 1
+        label = f"SOAK-{self.run_tag}-{self.created:06d}"
+        body = {
+            "label": label,
+            "sampleType": "clinical",
+            "collectionSource": "clinical",
+            "collectionSite": rng.choice(COLLECTION_SITES),
+            "collectionDate": datetime.now(timezone.utc).isoformat(),
+            "orgId": state.patient_orgs[index],
+            "patientId": state.patient_ids[index],
+            "priority": "priority" if rng.random() < 0.2 else "normal",
+            "processingStatus": ISOLATE_STATUSES[0],
+            "notes": "Soak test isolate"
+        }
+
+        def done(response: requests.Response):
+            isolate_id = response.json()["isolate"]["id"]
+            with state.lock:
+                state.isolate_stages[0].append(isolate_id)
+                state.awaiting_genome.append((isolate_id, label))
+        return "POST", "/isolates", body, done, None
+
+    def advance_isolate(self, rng: random.Random):
+        state = self.state
+        stages = [stage for stage, queue in enumerate(state.isolate_stages) if len(queue)]
+        if not stages:
+            return None
+        stage = rng.choice(stages)
+        isolate_id = state.isolate_stages[stage].take(rng)
+
+        def done(response: requests.Response):
+            if stage + 1 < len(state.isolate_stages):
+                with state.lock:
+                    state.isolate_stages[stage + 1].append(isolate_id)
+
+        def requeue():
+            with state.lock:
+                state.isolate_stages[stage].append(isolate_id)
+        return "PUT", f"/isolates/{isolate_id}", {"processingStatus": ISOLATE_STATUSES[stage + 1]}, done, requeue
+
+    def upload_genome(self, rng: random.Random):
+        state = self.state
+        if not state.awaiting_genome:
+            return None
+        # Swap-remove a random isolate so the rest keep their place
+        index = rng.randrange(len(state.awaiting_genome))
+        state.awaiting_genome[index], state.awaiting_genome[-1] = state.awaiting_genome[-1], state.awaiting_genome[index]
+        isolate_id, label = state.awaiting_genome.pop()
+        filename = f"{label}.fasta"
+        storage_id = f"{rng.getrandbits(64):016x}"
+        body = {
+            "filename": f"{storage_id}_{filename}",
+            "originalFilename": filename,
+            "storagePath": f"/storage/genomes/{storage_id}_{filename}",
+            "fileSize": rng.randint(1024 * 1024, 10 * 1024 * 1024),
+            "fileHash": f"sha256_{rng.getrandbits(128):032x}",
+            "uploadedBy": "soak"
+        }
+
+        def done(response: requests.Response):
+            genome_id = response.json()["id"]
+            with state.lock:
+                state.pending_links.append((isolate_id, genome_id))
+                state.genome_stages[0].append(genome_id)
+
+        def requeue():
+            with state.lock:
+                state.awaiting_genome.append((isolate_id, label))
+        return "POST", "/genomics", body, done, requeue
+
+    def link_genome(self, rng: random.Random):
+        state = self.state
+        if not state.pending_links:
+            return None
+        isolate_id, genome_id = state.pending_links.pop(0)  # oldest upload first
+
+        def requeue():
+            with state.lock:
+                state.pending_links.insert(0, (isolate_id, genome_id))
+        return ("POST", f"/isolates/{isolate_id}/genome-suggestions",
+                {"genomeId": genome_id, "linkingMethod": "auto_filename"}, None, requeue)
+
+    def advance_genome(self, rng: random.Random):
+        state = self.state
+        stages = [stage for stage, queue in enumerate(state.genome_stages) if len(queue)]
+        if not stages:
+            return None
+        stage = rng.choice(stages)
+        genome_id = state.genome_stages[stage].take(rng)
+        body = {"processingStatus": GENOME_STATUSES[stage + 1]}
+        if stage == 0:
+            body["validationStatus"] = "valid"
+
+        def done(response: requests.Response):
+            if stage + 1 < len(state.genome_stages):
+                with state.lock:
+                    state.genome_stages[stage + 1].append(genome_id)
+
+        def requeue():
+            with state.lock:
+                state.genome_stages[stage].append(genome_id)
+        return "PATCH", f"/genomics/{genome_id}", body, done, requeue
+
+    def next_request(self, rng: random.Random):
+        """Pick an operation by weight; fall back to creating an isolate when it has no work"""
+        op = rng.choices(self.ops, self.weights)[0]
+        with self.state.lock:
+            request = self.handlers[op](rng)
+            if request is None:
+                op, request = "isolate", self.create_isolate(rng)
+        return op, request
+
+    # ---- driving -------------------------------------------------------------
+
+    def issue(self, step: Step, op: str, request, scheduled: float):
+        method, path, body, done, requeue = request
+        ok = False
+        try:
+            unsent = False
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", json=body, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                response = None
+                unsent = isinstance(e, requests.exceptions.ConnectTimeout)
+            ok = response is not None and response.status_code < 400
+            if method == "POST":
+                retryable = unsent or (response is not None and response.status_code in UNWRITTEN_STATUSES)
+            else:
+                retryable = response is None or response.status_code in RETRYABLE_STATUSES
+            if ok and done:
+                done(response)
+            elif not ok and requeue and retryable:
+                # Hand the item back so sustained errors do not drain the update/link pools;
+                # other 4xx mean the item itself is bad and it is dropped
+                requeue()
+        except (ValueError, KeyError):
+            ok = False
+        finally:
+            step.record(op, scheduled, ok)
+            self.slots.release()
+
+    def run_step(self, step: Step, pool: ThreadPoolExecutor):
+        bucket = TokenBucket(step.rate)
+        start = time.perf_counter()
+        step.measure_start = start + step.warmup
+        stop = step.measure_start + step.duration
+        while True:
+            scheduled = bucket.take()
+            if scheduled >= stop:
+                break
+            op, request = self.next_request(self.rng)
+            self.slots.acquire()  # at most max_in_flight outstanding; the wait counts as latency
+            pool.submit(self.issue, step, op, request, scheduled)
+            if scheduled >= step.measure_start:
+                step.scheduled += 1
+        # Drain: the step ends when its last request completes
+        for _ in range(self.max_in_flight):
+            self.slots.acquire()
+        for _ in range(self.max_in_flight):
+            self.slots.release()
+
+    def run(self, rates: List[float], duration: float, warmup: float, slo_p99_ms: float,
+            max_error_rate: float, stop_on_degraded: bool = True) -> List[Dict[str, Any]]:
+        reports = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for rate in rates:
+                print(f"🚦 {rate:g} records/s for {duration:g}s" + (f" (+{warmup:g}s warm-up)" if warmup else ""))
+                step = Step(rate, duration, warmup)
+                self.run_step(step, pool)
+                report = step.report(slo_p99_ms, max_error_rate)
+                reports.append(report)
+                marker = "✅" if report["sustained"] else "⚠️ "
+                print(f"   {marker} achieved {report['achieved_rps']:,.1f}/s of {report['offered_rps']:,.1f}/s offered, "
+                      f"{format_summary(report)}")
+                if not report["sustained"] and stop_on_degraded:
+                    print("   Latency or throughput degraded; stopping the ladder")
+                    break
+        return reports
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse 'isolate=40,status=30' into operation weights"""
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation '{op}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def parse_rates(value: str) -> List[float]:
+    """'20' for one rate, '10,20,40' for a ladder, or 'start:stop:step' for an arithmetic ladder"""
+    try:
+        if ":" in value:
+            start, stop, step = (float(part) for part in value.split(":"))
+            rates = []
+            while start <= stop + 1e-9:
+                rates.append(start)
+                start += step
+        else:
+            rates = [float(part) for part in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate list '{value}'")
+    if not rates or any(rate <= 0 for rate in rates):
+        raise argparse.ArgumentTypeError("rates must be positive")
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak an existing Patomove database with rate-limited incremental ingestion")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Prisma SQLite database the server uses; existing IDs are read from it (default: ../prisma/dev.db)")
+    parser.add_argument("--url", type=str, default="http://localhost:3000/api",
+                       help="API base URL (default: http://localhost:3000/api)")
+    parser.add_argument("--rate", type=parse_rates, default=[10.0],
+                       help="Target records/sec: one rate, a ladder '10,20,40' or 'start:stop:step' (default: 10)")
+    parser.add_argument("--duration", type=float, default=60,
+                       help="Measured seconds per rate (default: 60)")
+    parser.add_argument("--warmup", type=float, default=5,
+                       help="Unmeasured seconds at the start of each rate (default: 5)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                       help="Operation weights, e.g. isolate=35,status=25,genome=15,link=15,validate=10")
+    parser.add_argument("--slo-p99-ms", type=float, default=500,
+                       help="A rate is sustained while p99 latency stays under this (default: 500)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                       help="...and the error rate stays under this (default: 0.01)")
+    parser.add_argument("--keep-going", action="store_true",
+                       help="Run every rate of the ladder even after one degrades")
+    parser.add_argument("--max-in-flight", type=int, default=64,
+                       help="Cap on concurrent requests (default: 64)")
+    parser.add_argument("--max-ids", type=int, default=200000,
+                       help="Newest rows per pool to load from the database (default: 200000)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                       help="Per-request timeout in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, default=None,
+                       help="Seed for the operation sequence")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                       help="Write the report as JSON")
+    args = parser.parse_args()
+    if args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1")
+
+    if not os.path.exists(args.sqlite):
+        print(f"❌ Database not found: {args.sqlite}")
+        sys.exit(1)
+    print(f"📂 Loading existing IDs from {args.sqlite}...")
+    state = load_state(args.sqlite, args.max_ids)
+    counts = state.counts()
+    print("   " + ", ".join(f"{count:,} {name.replace('_', ' ')}" for name, count in counts.items()))
+    if not counts["patients"]:
+        print("❌ The database has no patients to attach new isolates to; seed it first")
+        sys.exit(1)
+
+    soak = Soak(args.url, state, args.mix, timeout=args.timeout, max_in_flight=args.max_in_flight, seed=args.seed)
+    try:
+        soak.session.get(f"{soak.base_url}/organizations", timeout=args.timeout)
+    except requests.exceptions.RequestException:
+        print(f"❌ Server not reachable at {args.url}! Please start with 'npm run dev' or 'npm run start' first.")
+        sys.exit(1)
+
+    print(f"🧪 Soak run {soak.run_tag}: new isolates are labelled SOAK-{soak.run_tag}-NNNNNN")
+    steps = soak.run(args.rate, args.duration, args.warmup, args.slo_p99_ms,
+                     args.max_error_rate, stop_on_degraded=not args.keep_going)
+
+    sustained = [step["target_rps"] for step in steps if step["sustained"]]
+    if sustained:
+        print(f"📊 Highest sustained rate: {max(sustained):g} records/s (p99 <= {args.slo_p99_ms:g}ms)")
+    else:
+        print(f"📊 No rate was sustained within p99 <= {args.slo_p99_ms:g}ms")
+
+    if args.output:
+        report = {
+            "seed": soak.seed,
+            "run_tag": soak.run_tag,
+            "mix": args.mix,
+            "slo_p99_ms": args.slo_p99_ms,
+            "max_error_rate": args.max_error_rate,
+            "loaded": counts,
+            "max_sustained_rps": max(sustained) if sustained else None,
+            "steps": steps
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Direct-to-SQLite bulk loader for Patomove demo data.
+Writes a generated dataset straight into the Prisma-created tables, so seeding
+the dev database no longer needs a running Next.js server.
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+import argparse
+
+# Dataset key -> Prisma table, in foreign key dependency order
+TABLE_ORDER = [
+    ("organizations", "Organization"),
+    ("users", "User"),
+    ("environments", "Environment"),
+    ("patients", "Patient"),
+    ("patientAdts", "PatientAdt"),
+    ("phenotypeProfiles", "PhenotypeProfile"),
+    ("isolates", "Isolate"),
+    ("genomicData", "GenomicData"),
+    ("treatmentOutcomes", "IsolateTreatmentOutcome"),
+    ("proteinRefs", "ProteinRef"),
+]
+
+# Implicit many-to-many table behind Isolate.genomicData / GenomicData.analysisIsolates.
+# Prisma orders A/B by model name: A = GenomicData.id, B = Isolate.id
+ISOLATE_ANALYSES_TABLE = "_IsolateAnalyses"
+
+# Settings that trade durability for speed while the load transaction runs.
+# They are connection-scoped, so closing the connection restores the defaults.
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256MB page cache
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA foreign_keys = OFF",
+]
+
+
+def to_prisma_datetime(value: Any) -> Any:
+    """Convert an ISO date string to the epoch milliseconds Prisma stores for DateTime on SQLite"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    # Naive timestamps are local time, matching `new Date(value)` in the API routes
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def prepend(first: Any, rest: Iterator[Any]) -> Iterator[Any]:
+    yield first
+    yield from rest
+
+
+def quote(name: str) -> str:
+    return f'"{name}"'
+
+
+class SqliteLoader:
+    def __init__(self, db_path: str, batch_size: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.now_ms = int(time.time() * 1000)
+        self.row_counts: Dict[str, int] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def table_columns(self, table: str) -> Dict[str, str]:
+        """Return column name -> declared type for a Prisma table"""
+        return {row[1]: row[2].upper() for row in self.conn.execute(f'PRAGMA table_info("{table}")')}
+
+    def check_schema(self):
+        """Make sure `prisma db push` has created the tables we write into"""
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table for _, table in TABLE_ORDER if table not in existing]
+        if ISOLATE_ANALYSES_TABLE not in existing:
+            missing.append(ISOLATE_ANALYSES_TABLE)
+        if missing:
+            raise RuntimeError(f"{self.db_path} is missing tables {missing}; run 'npx prisma db push' first")
+
+    def insert_rows(self, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert dataset rows into a table with batched executemany, converting DateTime/Boolean columns"""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return 0
+
+        schema = self.table_columns(table)
+        columns = [name for name in first if name in schema]
+        # Audit timestamps have no usable DB default (updatedAt is set by the Prisma client)
+        audit_columns = [name for name in ("createdAt", "updatedAt") if name in schema and name not in first]
+        datetime_columns = {name for name in columns if schema[name] == "DATETIME"}
+        boolean_columns = {name for name in columns if schema[name] == "BOOLEAN"}
+
+        def to_tuple(row: Dict[str, Any]) -> Tuple[Any, ...]:
+            values = []
+            for name in columns:
+                value = row.get(name)
+                if name in datetime_columns:
+                    value = to_prisma_datetime(value)
+                elif name in boolean_columns and value is not None:
+                    value = int(bool(value))
+                values.append(value)
+            values.extend([self.now_ms] * len(audit_columns))
+            return tuple(values)
+
+        all_columns = columns + audit_columns
+        sql = (f'INSERT INTO {quote(table)} ({", ".join(map(quote, all_columns))}) '
+               f'VALUES ({", ".join("?" * len(all_columns))})')
+
+        count = 0
+        for chunk in chunked(map(to_tuple, prepend(first, rows)), self.batch_size):
+            self.conn.executemany(sql, chunk)
+            count += len(chunk)
+        return count
+
+    def isolate_analysis_links(self, demo_data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+        """Yield (genomicDataId, isolateId) pairs for analysed genomes whose filename matches an isolate label"""
+        isolate_ids_by_label = {isolate["label"]: isolate["id"] for isolate in demo_data.get("isolates", [])}
+        for genome in demo_data.get("genomicData", []):
+            if not genome.get("analysisCompleted"):
+                continue
+            label = genome["originalFilename"].rsplit(".", 1)[0]
+            isolate_id = isolate_ids_by_label.get(label)
+            if isolate_id:
+                yield genome["id"], isolate_id
+
+    def load(self, demo_data: Dict[str, Any]) -> Dict[str, int]:
+        """Write every table of a generated dataset in a single transaction"""
+        self.check_schema()
+        for pragma in LOAD_PRAGMAS:
+            self.conn.execute(pragma)
+
+        self.conn.execute("BEGIN")
+        try:
+            for key, table in TABLE_ORDER:
+                self.row_counts[table] = self.insert_rows(table, demo_data.get(key, []))
+
+            links = 0
+            for chunk in chunked(self.isolate_analysis_links(demo_data), self.batch_size):
+                self.conn.executemany(f'INSERT OR IGNORE INTO "{ISOLATE_ANALYSES_TABLE}" ("A", "B") VALUES (?, ?)', chunk)
+                links += len(chunk)
+            self.row_counts[ISOLATE_ANALYSES_TABLE] = links
+
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        self.conn.execute("PRAGMA optimize")
+        return self.row_counts
+
+
+def load_into_sqlite(db_path: str, demo_data: Dict[str, Any], batch_size: int = 10000) -> Dict[str, int]:
+    """Bulk load a generated dataset into a Prisma SQLite database and print a summary"""
+    print(f"💾 Loading demo data into {db_path}...")
+    start = time.perf_counter()
+    loader = SqliteLoader(db_path, batch_size=batch_size)
+    try:
+        row_counts = loader.load(demo_data)
+    finally:
+        loader.close()
+    elapsed = time.perf_counter() - start
+
+    total = sum(row_counts.values())
+    for table, count in row_counts.items():
+        print(f"   - {count} {table} rows")
+    print(f"✅ Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return row_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a generated Patomove demo JSON file straight into the Prisma SQLite database")
+    parser.add_argument("input", help="Demo data JSON produced by generate_db_demo.py")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="SQLite database created by 'npx prisma db push' (default: ../prisma/dev.db)")
+    parser.add_argument("--batch-size", type=int, default=10000,
+                       help="Rows per executemany batch (default: 10000)")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        demo_data = json.load(f)
+
+    try:
+        load_into_sqlite(args.sqlite, demo_data, batch_size=args.batch_size)
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"❌ Failed to load {args.input}: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Constant-memory output for Patomove demo data generation.
+Tables are written row by row as they are generated; only compact foreign key
+ID pools are kept in memory for the tables generated downstream.
+"""
+
+import gzip
+import json
+import os
+import uuid
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Any, Iterable, Iterator, TextIO
+
+
+class IdPool(Sequence):
+    """Append-only pool of UUID strings packed as 16 raw bytes each.
+
+    Supports len() and indexing, so random.choice() and sampling work on it
+    exactly as on a list of ID strings at a fraction of the memory.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def append(self, value: str):
+        self._data += uuid.UUID(value).bytes
+
+    def collect(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass rows through unchanged, remembering each row's ID"""
+        for row in rows:
+            self.append(row["id"])
+            yield row
+
+    def __len__(self) -> int:
+        return len(self._data) // 16
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("IdPool index out of range")
+        return str(uuid.UUID(bytes=bytes(self._data[index * 16:(index + 1) * 16])))
+
+
+class KeyColumn(Sequence):
+    """Append-only column of one foreign key per row (e.g. each patient's orgId), parallel to an IdPool.
+
+    Values come from a small pool of keys, so each row costs a 4-byte position into it.
+    """
+
+    def __init__(self, field: str, keys: Sequence[str]):
+        self.field = field
+        self.keys = list(keys)
+        self._positions = {key: position for position, key in enumerate(self.keys)}
+        self._data = array("I")
+
+    def collect(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass rows through unchanged, remembering each row's key"""
+        for row in rows:
+            self._data.append(self._positions[row[self.field]])
+            yield row
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.keys[position] for position in self._data[index]]
+        return self.keys[self._data[index]]
+
+
+def open_text(path: str, compress: bool) -> TextIO:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8", buffering=1024 * 1024)
+
+
+def dump_row(row: Dict[str, Any]) -> str:
+    return json.dumps(row, separators=(",", ":"))
+
+
+class NdjsonWriter:
+    """Write each table as newline-delimited JSON (<table>.ndjson[.gz]) in an output directory"""
+
+    def __init__(self, output_dir: str, compress: bool = False):
+        self.output_dir = output_dir
+        self.compress = compress
+        self.suffix = ".ndjson.gz" if compress else ".ndjson"
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_table(self, name: str, rows: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with open_text(os.path.join(self.output_dir, f"{name}{self.suffix}"), self.compress) as f:
+            for row in rows:
+                f.write(dump_row(row))
+                f.write("\n")
+                count += 1
+        return count
+
+    def write_metadata(self, metadata: Dict[str, Any]):
+        with open(os.path.join(self.output_dir, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+    def close(self):
+        pass
+
+
+class JsonStreamWriter:
+    """Write one JSON document shaped like the default output, one row per line"""
+
+    def __init__(self, path: str, compress: bool = False):
+        self.f = open_text(path, compress)
+        self.f.write("{")
+        self.first_key = True
+
+    def _key(self, name: str):
+        self.f.write("\n" if self.first_key else ",\n")
+        self.f.write(f"{json.dumps(name)}: ")
+        self.first_key = False
+
+    def write_table(self, name: str, rows: Iterable[Dict[str, Any]]) -> int:
+        self._key(name)
+        self.f.write("[")
+        count = 0
+        for row in rows:
+            self.f.write("\n  " if count == 0 else ",\n  ")
+            self.f.write(dump_row(row))
+            count += 1
+        self.f.write("\n]" if count else "]")
+        return count
+
+    def write_metadata(self, metadata: Dict[str, Any]):
+        self._key("metadata")
+        self.f.write(json.dumps(metadata))
+
+    def close(self):
+        self.f.write("\n}\n")
+        self.f.close()
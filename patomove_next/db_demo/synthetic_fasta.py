@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Synthetic FASTA assemblies for Patomove demo genomes.
+
+Writes real multi-contig assemblies into the storage layout used by
+/api/upload (storage/genomes/<filename>) and fills each GenomicData record's
+fileSize, fileHash, contigCount, totalLength, n50, gcContent and
+qualityMetrics from the bytes actually written. Files are streamed contig by
+contig and spread across a process pool; every file is derived from its own
+seed, so output does not depend on the number of workers.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+import argparse
+from fasta_qc import n50, quality_metrics
+
+LINE_WIDTH = 80
+MIN_CONTIG_LENGTH = 500
+
+# Defaults for records that carry no target metrics
+DEFAULT_LENGTH_RANGE = (2000000, 8000000)
+DEFAULT_CONTIG_RANGE = (1, 150)
+DEFAULT_GC_RANGE = (35.0, 65.0)
+
+
+def base_table(gc_fraction: float) -> bytes:
+    """Translation table mapping random bytes to A/C/G/T with P(G or C) ~= gc_fraction (1/256 steps)"""
+    gc_slots = round(256 * gc_fraction)
+    return bytes((b"GC"[i % 2] if i < gc_slots else b"AT"[i % 2]) for i in range(256))
+
+
+def contig_lengths(rng: random.Random, total_length: int, contig_count: int) -> List[int]:
+    """Split total_length into contig_count lengths with an assembly-like long tail, longest first"""
+    contig_count = max(1, min(contig_count, total_length // MIN_CONTIG_LENGTH))
+    weights = [rng.lognormvariate(0, 1.5) for _ in range(contig_count)]
+    spare = total_length - MIN_CONTIG_LENGTH * contig_count
+    scale = spare / sum(weights)
+    lengths = [MIN_CONTIG_LENGTH + int(weight * scale) for weight in weights]
+    lengths[0] += total_length - sum(lengths)  # rounding remainder
+    return sorted(lengths, reverse=True)
+
+
+def write_assembly(path: str, seed: str, total_length: int, contig_count: int,
+                   gc_content: float, compress: bool = False) -> Dict[str, Any]:
+    """Stream one synthetic assembly to `path` and return metrics measured from the written bytes"""
+    rng = random.Random(seed)
+    table = base_table(gc_content / 100)
+    lengths = contig_lengths(rng, total_length, contig_count)
+
+    digest = hashlib.sha256()
+    file_size = 0
+    gc_count = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as raw:
+        out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) if compress else raw
+        for index, length in enumerate(lengths):
+            sequence = rng.randbytes(length).translate(table)
+            gc_count += sequence.count(b"G") + sequence.count(b"C")
+            header = f">contig_{index + 1} length={length}\n".encode()
+            body = b"\n".join(sequence[i:i + LINE_WIDTH] for i in range(0, length, LINE_WIDTH)) + b"\n"
+            if not compress:
+                digest.update(header)
+                digest.update(body)
+            out.write(header)
+            out.write(body)
+            file_size += len(header) + len(body)
+        if compress:
+            out.close()
+    os.replace(tmp_path, path)  # never leave a half-written file under its final name
+
+    if compress:
+        # The stored file is the compressed one, so size and hash describe those bytes
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+    total = sum(lengths)
+    return {
+        "fileSize": file_size,
+        "fileHash": digest.hexdigest(),
+        "contigCount": len(lengths),
+        "totalLength": total,
+        "n50": n50(lengths),
+        "gcContent": round(100 * gc_count / total, 2),
+        "qualityMetrics": quality_metrics(lengths)
+    }
+
+
+def assembly_targets(row: Dict[str, Any], rng: random.Random) -> Tuple[int, int, float]:
+    """Target total length, contig count and GC% for a record, falling back to typical bacterial ranges"""
+    total_length = row.get("totalLength") or rng.randint(*DEFAULT_LENGTH_RANGE)
+    contig_count = row.get("contigCount") or rng.randint(*DEFAULT_CONTIG_RANGE)
+    gc_content = row.get("gcContent") or round(rng.uniform(*DEFAULT_GC_RANGE), 2)
+    return total_length, contig_count, gc_content
+
+
+def _write_record(task: Tuple[str, str, int, int, float, bool]) -> Dict[str, Any]:
+    path, seed, total_length, contig_count, gc_content, compress = task
+    return write_assembly(path, seed, total_length, contig_count, gc_content, compress)
+
+
+class FastaMaterializer:
+    """Write a FASTA file for every GenomicData row flowing through, updating the row from the file"""
+
+    def __init__(self, storage_root: str, seed: Any, workers: int = 1, compress: bool = False):
+        self.genome_dir = os.path.join(storage_root, "genomes")
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.compress = compress
+        self.files_written = 0
+        self.bytes_written = 0
+        os.makedirs(self.genome_dir, exist_ok=True)
+
+    def task(self, row: Dict[str, Any]) -> Tuple[str, str, int, int, float, bool]:
+        if self.compress and not row["filename"].endswith(".gz"):
+            row["filename"] += ".gz"
+        # Same relative layout /api/upload writes and /api/files serves
+        row["storagePath"] = os.path.join("storage", "genomes", row["filename"])
+        seed = f"{self.seed}:fasta:{row['id']}"
+        targets = assembly_targets(row, random.Random(seed))
+        return (os.path.join(self.genome_dir, row["filename"]), seed) + targets + (self.compress,)
+
+    def apply(self, row: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+        row.update(metrics)
+        self.files_written += 1
+        self.bytes_written += metrics["fileSize"]
+        return row
+
+    def materialize(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield rows in order once their file is on disk; keeps at most 2 x workers files in flight"""
+        if self.workers == 1:
+            for row in rows:
+                yield self.apply(row, _write_record(self.task(row)))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for row in rows:
+                pending.append((row, pool.submit(_write_record, self.task(row))))
+                if len(pending) >= 2 * self.workers:
+                    row, future = pending.popleft()
+                    yield self.apply(row, future.result())
+            while pending:
+                row, future = pending.popleft()
+                yield self.apply(row, future.result())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic FASTA assemblies (no database records)")
+    parser.add_argument("--count", "-n", type=int, default=100,
+                       help="Number of assemblies (default: 100)")
+    parser.add_argument("--storage", type=str, default="../storage",
+                       help="Storage root; files go to <storage>/genomes (default: ../storage)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1,
+                       help="Writer processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0,
+                       help="Seed for file contents (default: 0)")
+    parser.add_argument("--gzip", action="store_true",
+                       help="Write .fasta.gz files")
+    parser.add_argument("--manifest", type=str, default=None,
+                       help="Write the per-file metrics as JSON")
+    args = parser.parse_args()
+
+    rows = ({"id": f"synthetic_{i + 1:06d}", "filename": f"synthetic_{i + 1:06d}.fasta"} for i in range(args.count))
+    materializer = FastaMaterializer(args.storage, args.seed, workers=args.workers, compress=args.gzip)
+    print(f"🧬 Writing {args.count} synthetic assemblies to {materializer.genome_dir}...")
+    written = list(materializer.materialize(rows))
+    print(f"✅ Wrote {materializer.files_written} files ({materializer.bytes_written / 1024**2:,.0f} MB)")
+
+    if args.manifest:
+        with open(args.manifest, "w") as f:
+            json.dump(written, f, indent=2)
+        print(f"📄 Manifest: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Run telemetry for the demo data generator: wall and CPU time per phase, per
+endpoint request counts, bytes and latency, optional cProfile capture of the
+generation code, and export as a JSON report or a Prometheus textfile.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional
+from metrics import LatencyHistogram
+
+# Upper bounds (ms) of the Prometheus latency histogram buckets
+PROMETHEUS_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+METRIC_PREFIX = "patomove_seed"
+
+
+def cpu_seconds() -> float:
+    """User + system CPU of this process and its reaped children (shard worker pools)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class EndpointStats:
+    """Request counters for one API path; updated from the populate thread pool"""
+
+    def __init__(self, latency: Optional[LatencyHistogram] = None):
+        self.latency = latency or LatencyHistogram()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.serialize_seconds = 0.0
+        self.statuses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, status: Optional[int], sent: int, received: int, serialize_seconds: float):
+        """status None means the request failed without a response (timeout, connection error)"""
+        key = str(status) if status is not None else "error"
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+            self.serialize_seconds += serialize_seconds
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "statuses": dict(sorted(self.statuses.items())),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "serialize_seconds": round(self.serialize_seconds, 4),
+            "latency": self.latency.summary(),
+            "latency_bands": self.latency.distribution(PROMETHEUS_BUCKETS_MS)
+        }
+
+
+class Telemetry:
+    """Collects phase timings and endpoint stats for one generator run.
+
+    Phases nest: a phase opened inside another is reported under "<outer>/<inner>",
+    and each phase's self time excludes its children, so e.g. isolate generation
+    and the isolate populate tier it triggers are reported separately.
+    """
+
+    def __init__(self, profile: bool = False):
+        self.started = time.time()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.order: List[str] = []
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self._stack: List[Dict[str, Any]] = []
+        self._endpoints_lock = threading.Lock()
+        self.profiler = cProfile.Profile() if profile else None
+
+    def _toggle_profiler(self, was: bool, now: bool):
+        if self.profiler and was != now:
+            if now:
+                self.profiler.enable()
+            else:
+                self.profiler.disable()
+
+    @contextmanager
+    def phase(self, name: str, profile: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+        """Time a block; yields a dict whose "rows" the caller may set.
+
+        With cProfile enabled, profile=True captures the block and profile=False pauses
+        capture inside it (e.g. HTTP populate within a generation phase); None inherits.
+        """
+        parent = self._stack[-1] if self._stack else None
+        path = f"{parent['path']}/{name}" if parent else name
+        parent_profiled = parent["profiled"] if parent else False
+        profiled = parent_profiled if profile is None else profile
+        frame = {"path": path, "rows": None, "child_wall": 0.0, "child_cpu": 0.0, "profiled": profiled}
+        if path not in self.phases:
+            # Registered on entry so parents are listed before their nested phases
+            self.order.append(path)
+            self.phases[path] = {"wall_seconds": 0.0, "cpu_seconds": 0.0, "self_wall_seconds": 0.0,
+                                 "self_cpu_seconds": 0.0, "calls": 0}
+        self._toggle_profiler(parent_profiled, profiled)
+        self._stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        try:
+            yield frame
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+            self._stack.pop()
+            self._toggle_profiler(profiled, parent_profiled)
+
+            stats = self.phases[path]
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            stats["self_wall_seconds"] += wall - frame["child_wall"]
+            stats["self_cpu_seconds"] += cpu - frame["child_cpu"]
+            if frame["rows"] is not None:
+                stats["rows"] = stats.get("rows", 0) + frame["rows"]
+            if self._stack:
+                self._stack[-1]["child_wall"] += wall
+                self._stack[-1]["child_cpu"] += cpu
+
+    def endpoint(self, path: str, latency: Optional[LatencyHistogram] = None) -> EndpointStats:
+        with self._endpoints_lock:
+            stats = self.endpoints.get(path)
+            if stats is None:
+                stats = self.endpoints[path] = EndpointStats(latency)
+            return stats
+
+    def profile_summary(self, limit: int = 25) -> Optional[str]:
+        if not self.profiler:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def save_profile(self, path: str):
+        self.profiler.dump_stats(path)
+
+    def report(self, run: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        phases = {}
+        for path in self.order:
+            stats = self.phases[path]
+            phases[path] = {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+            if stats.get("rows") and stats["wall_seconds"] > 0:
+                phases[path]["rows_per_sec"] = round(stats["rows"] / stats["wall_seconds"], 1)
+        return {
+            "run": run or {},
+            "started_at": self.started,
+            "wall_seconds": round(time.time() - self.started, 4),
+            "phases": phases,
+            "endpoints": {path: stats.report() for path, stats in sorted(self.endpoints.items())}
+        }
+
+    def write_json(self, path: str, run: Optional[Dict[str, Any]] = None):
+        with open(path, "w") as f:
+            json.dump(self.report(run), f, indent=2)
+
+    def prometheus(self, run: Optional[Dict[str, Any]] = None) -> str:
+        """Prometheus text exposition, for node_exporter's textfile collector"""
+        lines = []
+        p = METRIC_PREFIX
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        def labels(**values: Any) -> str:
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values.values())
+            return "{" + ",".join(f'{k}="{v}"' for k, v in zip(values, escaped)) + "}"
+
+        run = run or {}
+        metric("run_info", "gauge", "Parameters of the last seeding run")
+        lines.append(f"{p}_run_info{labels(**run)} 1")
+        metric("run_timestamp_seconds", "gauge", "Start time of the last seeding run")
+        lines.append(f"{p}_run_timestamp_seconds {self.started:.3f}")
+        metric("run_duration_seconds", "gauge", "Wall time of the last seeding run")
+        lines.append(f"{p}_run_duration_seconds {time.time() - self.started:.4f}")
+
+        for name, key, help_text in [
+            ("phase_wall_seconds", "wall_seconds", "Wall time per generator phase, including nested phases"),
+            ("phase_self_wall_seconds", "self_wall_seconds", "Wall time per generator phase, excluding nested phases"),
+            ("phase_cpu_seconds", "cpu_seconds", "CPU time (including shard workers) per generator phase"),
+            ("phase_rows", "rows", "Rows produced per generator phase"),
+        ]:
+            metric(name, "gauge", help_text)
+            for path in self.order:
+                if key in self.phases[path]:
+                    lines.append(f"{p}_{name}{labels(phase=path)} {self.phases[path][key]:g}")
+
+        endpoints = sorted(self.endpoints.items())
+        metric("http_requests_total", "counter", "API requests by endpoint and status")
+        for path, stats in endpoints:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f"{p}_http_requests_total{labels(endpoint=path, status=status)} {count}")
+        for name, attr, help_text in [
+            ("http_request_bytes_total", "bytes_sent", "Request body bytes by endpoint"),
+            ("http_response_bytes_total", "bytes_received", "Response body bytes by endpoint"),
+            ("http_serialize_seconds_total", "serialize_seconds", "Time spent JSON-encoding request bodies"),
+        ]:
+            metric(name, "counter", help_text)
+            for path, stats in endpoints:
+                lines.append(f"{p}_{name}{labels(endpoint=path)} {getattr(stats, attr):g}")
+
+        metric("http_request_duration_seconds", "histogram", "API request latency by endpoint")
+        for path, stats in endpoints:
+            cumulative = 0
+            bands = stats.latency.distribution(PROMETHEUS_BUCKETS_MS)
+            for bound, count in zip(PROMETHEUS_BUCKETS_MS, bands.values()):
+                cumulative += count
+                lines.append(f"{p}_http_request_duration_seconds_bucket{labels(endpoint=path, le=f'{bound / 1000:g}')} {cumulative}")
+            lines.append(f"{p}_http_request_duration_seconds_bucket{labels(endpoint=path, le='+Inf')} {stats.latency.count}")
+            lines.append(f"{p}_http_request_duration_seconds_sum{labels(endpoint=path)} {stats.latency.total:.6f}")
+            lines.append(f"{p}_http_request_duration_seconds_count{labels(endpoint=path)} {stats.latency.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, run: Optional[Dict[str, Any]] = None):
+        # Write then rename, so the textfile collector never scrapes a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus(run))
+        os.replace(tmp_path, path)
+
+    def print_summary(self):
+        print("⏱️  Phase timings (wall / self / CPU):")
+        for path in self.order:
+            stats = self.phases[path]
+            depth = path.count("/")
+            rows = f"  {stats['rows']:,} rows" if stats.get("rows") is not None else ""
+            print(f"   {'  ' * depth}{path.rsplit('/', 1)[-1]:<{28 - 2 * depth}} {stats['wall_seconds']:8.2f}s "
+                  f"{stats['self_wall_seconds']:8.2f}s {stats['cpu_seconds']:8.2f}s{rows}")
+        if self.endpoints:
+            print("🌐 Endpoints:")
+            for path, stats in sorted(self.endpoints.items()):
+                summary = stats.latency.summary()
+                errors = f"  {summary['errors']} errors" if summary["errors"] else ""
+                print(f"   {path:<24} {stats.requests:>7,} req  {stats.bytes_sent / 1e6:8.1f} MB sent  "
+                      f"p50 {summary['p50_ms']:.1f}ms p95 {summary['p95_ms']:.1f}ms p99 {summary['p99_ms']:.1f}ms{errors}")
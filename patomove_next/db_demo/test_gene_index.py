@@ -0,0 +1,91 @@
+"""Refresh keeps genomes linked only through the _IsolateAnalyses relation (as sqlite_loader writes them)"""
+
+import json
+import sqlite3
+
+from gene_index import GeneIndex, SqliteGenomeSource, refresh
+
+UPDATED_MS = 1735689600000
+COLLECTED_MS = 1733011200000
+
+
+def build_db(path: str):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE "GenomicData" ("id" TEXT PRIMARY KEY, "updatedAt" DATETIME, "resistanceGenes" TEXT,
+                                    "virulenceGenes" TEXT, "plasmids" TEXT);
+        CREATE TABLE "Isolate" ("id" TEXT PRIMARY KEY, "label" TEXT, "orgId" TEXT, "collectionDate" DATETIME,
+                                "genomeId" TEXT, "updatedAt" DATETIME);
+        CREATE TABLE "_IsolateAnalyses" ("A" TEXT NOT NULL, "B" TEXT NOT NULL);
+    ''')
+    genes = json.dumps([{"gene": "blaKPC-2", "identity": 99.8}])
+    conn.executemany('INSERT INTO "GenomicData" VALUES (?, ?, ?, NULL, NULL)',
+                     [("g-primary", UPDATED_MS, genes), ("g-analysis", UPDATED_MS, genes)])
+    conn.executemany('INSERT INTO "Isolate" VALUES (?, ?, ?, ?, ?, ?)',
+                     [("i-primary", "ISO-0001", "org-1", COLLECTED_MS, "g-primary", UPDATED_MS),
+                      ("i-analysis", "ISO-0002", "org-1", COLLECTED_MS, None, UPDATED_MS)])
+    conn.execute('INSERT INTO "_IsolateAnalyses" VALUES (?, ?)', ("g-analysis", "i-analysis"))
+    conn.commit()
+    conn.close()
+
+
+def linked(index: GeneIndex):
+    _, rows = index.search("blaKPC-2")
+    return {row["genomeId"]: (row["isolateId"], row["label"], row["orgId"]) for row in rows}
+
+
+def test_refresh_keeps_analysis_only_link(tmp_path):
+    db_path = str(tmp_path / "dev.db")
+    build_db(db_path)
+    index = GeneIndex()
+    refresh(index, SqliteGenomeSource(db_path))
+
+    expected = {"g-primary": ("i-primary", "ISO-0001", "org-1"),
+                "g-analysis": ("i-analysis", "ISO-0002", "org-1")}
+    assert linked(index) == expected
+    assert index.search("blaKPC-2", org="org-1")[0] == 2
+
+    # A later isolate edit comes back through changed_isolates only
+    conn = sqlite3.connect(db_path)
+    conn.execute('UPDATE "Isolate" SET "label" = ?, "updatedAt" = ? WHERE "id" = ?',
+                 ("ISO-0002b", UPDATED_MS + 60000, "i-analysis"))
+    conn.commit()
+    conn.close()
+    refresh(index, SqliteGenomeSource(db_path))
+    assert linked(index)["g-analysis"] == ("i-analysis", "ISO-0002b", "org-1")
+
+
+def test_refresh_drops_deleted_genome_when_count_is_unchanged(tmp_path):
+    db_path = str(tmp_path / "dev.db")
+    build_db(db_path)
+    index = GeneIndex()
+    refresh(index, SqliteGenomeSource(db_path))
+
+    # One genome deleted and another inserted below the watermark, so upsert skips it and the counts match
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM "GenomicData" WHERE "id" = ?', ("g-primary",))
+    conn.execute('INSERT INTO "GenomicData" VALUES (?, ?, NULL, NULL, NULL)', ("g-new", 0))
+    conn.commit()
+    conn.close()
+    assert refresh(index, SqliteGenomeSource(db_path))["removed"] == 1
+    assert set(linked(index)) == {"g-analysis"}
+
+
+def test_refresh_skips_id_scan_without_deletions(tmp_path):
+    db_path = str(tmp_path / "dev.db")
+    build_db(db_path)
+    index = GeneIndex()
+    assert refresh(index, SqliteGenomeSource(db_path))["scanned"] == 0
+
+    # New and edited genomes arrive through the watermark, so the count and max id still match
+    conn = sqlite3.connect(db_path)
+    conn.execute('INSERT INTO "GenomicData" VALUES (?, ?, NULL, NULL, NULL)', ("g-zz", UPDATED_MS + 60000))
+    conn.execute('UPDATE "GenomicData" SET "updatedAt" = ? WHERE "id" = ?', (UPDATED_MS + 60000, "g-primary"))
+    conn.commit()
+    conn.close()
+    assert refresh(index, SqliteGenomeSource(db_path)) == {"updated": 2, "removed": 0, "scanned": 0}
+
+    # The stats are saved with the watermarks
+    cache_path = str(tmp_path / "gene_index.npz")
+    index.save(cache_path, "test")
+    assert refresh(GeneIndex.load(cache_path, "test"), SqliteGenomeSource(db_path))["scanned"] == 0
@@ -0,0 +1,87 @@
+"""Job keys: a finished isolate is only analysed again when it comes back with a new genome"""
+
+import os
+
+from pipeline_scheduler import MAX_DELIVERY_ATTEMPTS, STEPS, JobStore, PipelineScheduler, WebhookDeliverer
+
+
+def pending(genome_id):
+    return [{"isolate_id": "i-1", "genome_id": genome_id, "label": "ISO-0001", "priority": 0,
+             "enqueued_at": 0.0, "assembly_path": f"/storage/genomes/{genome_id}.fasta"}]
+
+
+def test_resequenced_isolate_is_queued_again(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    assert store.enqueue(pending("g-1")) == 1
+    [job] = store.claim(10)
+    store.finish(job, "completed")
+
+    # Still 'genome sequenced' with the same genome (e.g. before the webhook lands): no second job
+    assert store.enqueue(pending("g-1")) == 0
+    assert store.claim(10) == []
+
+    # Re-sequenced: the isolate returns to 'genome sequenced' linked to a new genome
+    assert store.enqueue(pending("g-2")) == 1
+    [job] = store.claim(10)
+    assert (job["isolate_id"], job["genome_id"], job["assembly_path"]) == ("i-1", "g-2", "/storage/genomes/g-2.fasta")
+    assert store.status_counts()["completed"] == 1
+    store.close()
+
+
+class FakeResponse:
+    def __init__(self, results):
+        self.results = results
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"results": self.results, "count": len(self.results)}
+
+
+class FailingWebhook:
+    """Batch webhook that answers 500 for ISO-0001 and 200 for everything else"""
+
+    def __init__(self):
+        self.batches = []
+
+    def post(self, url, json, timeout):
+        self.batches.append([payload["isolate_id"] for payload in json])
+        return FakeResponse([{"status": 500 if payload["isolate_id"] == "ISO-0001" else 200, "body": {}}
+                             for payload in json])
+
+
+def test_failing_result_is_rejected_and_does_not_block_later_ones(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.enqueue([{"isolate_id": f"i-{n}", "genome_id": f"g-{n}", "label": f"ISO-{n:04d}", "priority": 0,
+                    "enqueued_at": float(n), "assembly_path": None} for n in (1, 2, 3)])
+    for job in store.claim(10):
+        store.finish(job, "completed")
+
+    deliverer = WebhookDeliverer(store.path, "http://localhost:3000/api", batch_size=1)
+    deliverer.session = FailingWebhook()
+    while store.undelivered(1):
+        deliverer.flush(store)
+
+    # The failing result goes behind the others after its first 500, then is given up on
+    assert deliverer.session.batches[:3] == [["ISO-0001"], ["ISO-0002"], ["ISO-0003"]]
+    assert len(deliverer.session.batches) == 2 + MAX_DELIVERY_ATTEMPTS
+    assert (deliverer.delivered, deliverer.rejected) == (2, 1)
+    store.close()
+
+
+def test_finished_job_leaves_no_empty_workdir(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.enqueue([{"isolate_id": f"i-{n}", "genome_id": f"g-{n}", "label": f"ISO-{n:04d}", "priority": 0,
+                    "enqueued_at": float(n), "assembly_path": None} for n in (1, 2, 3)])
+    scheduler = PipelineScheduler(store, None, {}, {step: 1 for step in STEPS}, workdir=str(tmp_path / "work"))
+    untouched, empty, written = store.claim(10)
+    os.makedirs(scheduler.job_workdir(empty))
+    os.makedirs(scheduler.job_workdir(written))
+    open(os.path.join(scheduler.job_workdir(written), "ISO-0003.gff"), "w").close()
+
+    for job in (untouched, empty, written):
+        scheduler.active += 1
+        scheduler.finish(job, "completed")
+    assert os.listdir(tmp_path / "work") == [written["job_id"]]
+    store.close()
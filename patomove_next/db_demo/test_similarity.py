@@ -0,0 +1,48 @@
+"""Refresh follows isolates linked only through the _IsolateAnalyses relation (as sqlite_loader writes them)"""
+
+import json
+import sqlite3
+
+from similarity import SimilarityIndex, SqliteProfileSource, refresh
+
+UPDATED_MS = 1735689600000
+
+
+def build_db(path: str):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE "GenomicData" ("id" TEXT PRIMARY KEY, "updatedAt" DATETIME, "resistanceGenes" TEXT,
+                                    "virulenceGenes" TEXT, "plasmids" TEXT, "mlstAlleles" TEXT);
+        CREATE TABLE "Isolate" ("id" TEXT PRIMARY KEY, "label" TEXT, "genomeId" TEXT, "updatedAt" DATETIME);
+        CREATE TABLE "_IsolateAnalyses" ("A" TEXT NOT NULL, "B" TEXT NOT NULL);
+    ''')
+    genes = json.dumps([{"gene": "blaKPC-2", "identity": 99.8}])
+    conn.executemany('INSERT INTO "GenomicData" VALUES (?, ?, ?, NULL, NULL, NULL)',
+                     [("g-primary", UPDATED_MS, genes), ("g-analysis", UPDATED_MS, genes)])
+    conn.executemany('INSERT INTO "Isolate" VALUES (?, ?, ?, ?)',
+                     [("i-primary", "ISO-0001", "g-primary", UPDATED_MS),
+                      ("i-analysis", "ISO-0002", None, UPDATED_MS)])
+    conn.execute('INSERT INTO "_IsolateAnalyses" VALUES (?, ?)', ("g-analysis", "i-analysis"))
+    conn.commit()
+    conn.close()
+
+
+def linked(index: SimilarityIndex):
+    return {genome_id: (index.isolate_ids[row], index.labels[row]) for genome_id, row in index.row_of.items()}
+
+
+def test_refresh_keeps_analysis_only_link(tmp_path):
+    db_path = str(tmp_path / "dev.db")
+    build_db(db_path)
+    index = SimilarityIndex()
+    refresh(index, SqliteProfileSource(db_path))
+    assert linked(index) == {"g-primary": ("i-primary", "ISO-0001"), "g-analysis": ("i-analysis", "ISO-0002")}
+
+    # A later isolate edit comes back through changed_isolates only
+    conn = sqlite3.connect(db_path)
+    conn.execute('UPDATE "Isolate" SET "label" = ?, "updatedAt" = ? WHERE "id" = ?',
+                 ("ISO-0002b", UPDATED_MS + 60000, "i-analysis"))
+    conn.commit()
+    conn.close()
+    refresh(index, SqliteProfileSource(db_path))
+    assert linked(index)["g-analysis"] == ("i-analysis", "ISO-0002b")
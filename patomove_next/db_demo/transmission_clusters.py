@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Ward co-location and transmission cluster detection.
+
+Patient stays (PatientAdt admit/discharge per ward) are swept in admit order
+per ward, so only stays that actually overlap are paired. Two isolates are
+linked when their patients shared a ward, the isolates have the same species
+and MLST sequence type, and both were collected within --window-days of the
+shared stay. Linked isolates are merged into clusters with a union-find.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import argparse
+from sqlite_loader import to_prisma_datetime
+
+DAY_MS = 86400000
+
+# (patientId, orgId, ward, admit ms, discharge ms or None while still admitted)
+Stay = Tuple[str, str, str, int, Optional[int]]
+# (isolateId, label, patientId, collectionDate ms, species, mlstType)
+TypedIsolate = Tuple[str, str, str, int, str, str]
+
+
+class DisjointSet:
+    """Union-find over hashable items with path halving and union by size"""
+
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+        self.size: Dict[Any, int] = {}
+
+    def find(self, item: Any) -> Any:
+        parent = self.parent.setdefault(item, item)
+        if parent == item:
+            self.size.setdefault(item, 1)
+            return item
+        while parent != self.parent[parent]:
+            self.parent[item] = self.parent[parent]
+            item, parent = parent, self.parent[parent]
+        return parent
+
+    def union(self, a: Any, b: Any):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+
+    def groups(self) -> List[List[Any]]:
+        members = defaultdict(list)
+        for item in self.parent:
+            members[self.find(item)].append(item)
+        return list(members.values())
+
+
+def co_located(stays: Iterable[Tuple[Any, int, int, str]],
+               min_overlap_ms: int = 0) -> Iterable[Tuple[Any, str, str, int, int]]:
+    """
+    Sweep (group, start, end, patient) stays sorted by (group, start); yields
+    (group, patient_a, patient_b, overlap_start, overlap_end) for every pair of different
+    patients in the same group whose stays overlap by at least min_overlap_ms.
+    """
+    min_overlap_ms = max(min_overlap_ms, 1)  # a discharge at the moment of an admit is not an overlap
+    current = None
+    active: List[Tuple[int, str]] = []  # min-heap of (end, patient)
+    for group, start, end, patient in stays:
+        if group != current:
+            current, active = group, []
+        # Anything ending before this stay can overlap it long enough can't overlap later stays either
+        while active and active[0][0] < start + min_overlap_ms:
+            heapq.heappop(active)
+        for other_end, other in active:
+            overlap_end = min(end, other_end)
+            if other != patient and overlap_end - start >= min_overlap_ms:
+                yield group, other, patient, start, overlap_end
+        heapq.heappush(active, (end, patient))
+
+
+def find_clusters(stays: Iterable[Stay], isolates: Iterable[TypedIsolate], as_of_ms: int,
+                  window_days: float = 14, min_overlap_hours: float = 0, min_size: int = 2) -> Dict[str, Any]:
+    window_ms = int(window_days * DAY_MS)
+    by_patient_type: Dict[Tuple[str, Tuple[str, str]], List[TypedIsolate]] = defaultdict(list)
+    for isolate in isolates:
+        by_patient_type[(isolate[2], (isolate[4], isolate[5]))].append(isolate)
+    types_of: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for patient, typing in by_patient_type:
+        types_of[patient].append(typing)
+
+    # One interval per (stay, sequence type the patient carries), so the sweep only pairs patients
+    # that could be linked instead of every pair of patients sharing a ward
+    intervals = []
+    stay_count = 0
+    for patient, org, ward, admit, discharge in stays:
+        stay_count += 1
+        end = as_of_ms if discharge is None else discharge
+        if end <= admit:
+            continue
+        for typing in types_of.get(patient, ()):
+            intervals.append(((org, ward, typing), admit, end, patient))
+    intervals.sort(key=lambda interval: (interval[0], interval[1]))
+
+    clusters = DisjointSet()
+    links: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    pairs = 0
+    for (org, ward, typing), a, b, overlap_start, overlap_end in co_located(intervals, int(min_overlap_hours * 3600000)):
+        pairs += 1
+        for x in by_patient_type[(a, typing)]:
+            if not overlap_start - window_ms <= x[3] <= overlap_end + window_ms:
+                continue
+            for y in by_patient_type[(b, typing)]:
+                if not overlap_start - window_ms <= y[3] <= overlap_end + window_ms:
+                    continue
+                key = (x[0], y[0]) if x[0] < y[0] else (y[0], x[0])
+                if key not in links or overlap_start < links[key]["from"]:
+                    links[key] = {"ward": ward, "orgId": org, "from": overlap_start, "to": overlap_end}
+                clusters.union(x[0], y[0])
+
+    isolate_info = {isolate[0]: isolate for group in by_patient_type.values() for isolate in group}
+    edges_of: Dict[str, List[Tuple[Tuple[str, str], Dict[str, Any]]]] = defaultdict(list)
+    for key, link in links.items():
+        edges_of[clusters.find(key[0])].append((key, link))
+
+    results = []
+    for members in clusters.groups():
+        if len(members) < min_size:
+            continue
+        rows = sorted((isolate_info[m] for m in members), key=lambda isolate: isolate[3])
+        edges = edges_of[clusters.find(members[0])]
+        results.append({
+            "species": rows[0][4],
+            "mlstType": rows[0][5],
+            "isolates": [{"id": r[0], "label": r[1], "patientId": r[2], "collectionDate": iso_date(r[3])} for r in rows],
+            "patients": len({r[2] for r in rows}),
+            "wards": sorted({link["ward"] for _, link in edges}),
+            "first": iso_date(rows[0][3]),
+            "last": iso_date(rows[-1][3]),
+            "links": [{"isolates": list(key), "ward": link["ward"], "orgId": link["orgId"],
+                       "from": iso_date(link["from"]), "to": iso_date(link["to"])} for key, link in edges]
+        })
+    results.sort(key=lambda cluster: (-cluster["patients"], -len(cluster["isolates"]), cluster["first"]))
+    return {"stays": stay_count, "typed_isolates": len(isolate_info), "intervals": len(intervals),
+            "overlapping_pairs": pairs, "linked_isolate_pairs": len(links), "clusters": results}
+
+
+def epoch_ms(value: Any) -> Optional[int]:
+    value = to_prisma_datetime(value)
+    return None if value is None else int(value)
+
+
+def iso_date(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000).isoformat()
+
+
+class SqliteColocationSource:
+    """PatientAdt stays and typed patient isolates from the Patomove SQLite database"""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def stays(self, since_ms: int) -> Iterable[Stay]:
+        rows = self.conn.execute(
+            'SELECT "patientId", "orgId", "ward", "admitDate", "dischargeDate" FROM "PatientAdt" '
+            'WHERE "ward" IS NOT NULL AND ("dischargeDate" IS NULL OR "dischargeDate" >= ?)', (since_ms,)
+        )
+        return ((patient, org, ward, epoch_ms(admit), epoch_ms(discharge)) for patient, org, ward, admit, discharge in rows)
+
+    def isolates(self, since_ms: int) -> Iterable[TypedIsolate]:
+        # Primary genome first, then the analysis relation; species from the genome, else the AST profile
+        rows = self.conn.execute(
+            'SELECT i."id", i."label", i."patientId", i."collectionDate", '
+            'COALESCE(g."speciesIdentification", p."species"), g."mlstType" FROM "Isolate" i '
+            'JOIN "GenomicData" g ON g."id" = COALESCE(i."genomeId", '
+            '(SELECT a."A" FROM "_IsolateAnalyses" a WHERE a."B" = i."id" LIMIT 1)) '
+            'LEFT JOIN "PhenotypeProfile" p ON p."id" = i."phenotypeId" '
+            'WHERE i."patientId" IS NOT NULL AND g."mlstType" IS NOT NULL AND i."collectionDate" >= ?', (since_ms,)
+        )
+        return ((isolate_id, label, patient, epoch_ms(collected), species, st)
+                for isolate_id, label, patient, collected, species, st in rows if species)
+
+
+class DatasetColocationSource:
+    """The same rows from generate_db_demo.py JSON output; genomes link to isolates by filename label"""
+
+    def __init__(self, path: str):
+        with open(path) as f:
+            data = json.load(f)
+        self.adts = data.get("patientAdts", [])
+        genomes = {g["originalFilename"].rsplit(".", 1)[0]: g for g in data.get("genomicData", [])}
+        species = {p["id"]: p.get("species") for p in data.get("phenotypeProfiles", [])}
+        self.typed = []
+        for isolate in data.get("isolates", []):
+            genome = genomes.get(isolate["label"])
+            if not isolate.get("patientId") or not genome or not genome.get("mlstType"):
+                continue
+            isolate_species = genome.get("speciesIdentification") or species.get(isolate.get("phenotypeId"))
+            if isolate_species:
+                self.typed.append((isolate["id"], isolate["label"], isolate["patientId"],
+                                   epoch_ms(isolate["collectionDate"]), isolate_species, genome["mlstType"]))
+
+    def stays(self, since_ms: int) -> Iterable[Stay]:
+        for adt in self.adts:
+            discharge = epoch_ms(adt.get("dischargeDate"))
+            if adt.get("ward") and (discharge is None or discharge >= since_ms):
+                yield adt["patientId"], adt["orgId"], adt["ward"], epoch_ms(adt["admitDate"]), discharge
+
+    def isolates(self, since_ms: int) -> Iterable[TypedIsolate]:
+        return [isolate for isolate in self.typed if isolate[3] >= since_ms]
+
+
+class SyntheticColocationSource:
+    """N stays shaped like generate_patient_adts (1-3 per patient over 180 days, 30% still admitted), for benchmarks"""
+
+    def __init__(self, count: int, seed: int = 0):
+        import random
+        from generate_db_demo import DemoDataGenerator
+        rng = random.Random(seed)
+        species_list = DemoDataGenerator(num_isolates=1).species_list
+        self.as_of = int(time.time() * 1000)
+        wards = [f"Ward {w}{n}" for w in ["A", "B", "C", "ICU", "ER"] for n in range(1, 10)]
+        self.adts = []
+        self.typed = []
+        patient = 0
+        while len(self.adts) < count:
+            patient += 1
+            patient_id = f"patient_{patient:07d}"
+            for _ in range(rng.randint(1, 3)):
+                admit = self.as_of - rng.randint(1, 180) * DAY_MS
+                discharge = admit + rng.randint(1, 30) * DAY_MS if rng.random() > 0.3 else None
+                self.adts.append((patient_id, f"org_{rng.randint(1, 2)}", rng.choice(wards), admit, discharge))
+            # 1 in 4 patients has a typed isolate
+            if rng.random() < 0.25:
+                self.typed.append((f"isolate_{patient:07d}", f"ISO-{patient:07d}", patient_id,
+                                   self.as_of - rng.randint(0, 180) * DAY_MS, rng.choice(species_list),
+                                   f"ST{rng.randint(1, 500)}"))
+
+    def stays(self, since_ms: int) -> Iterable[Stay]:
+        return [stay for stay in self.adts if stay[4] is None or stay[4] >= since_ms]
+
+    def isolates(self, since_ms: int) -> Iterable[TypedIsolate]:
+        return [isolate for isolate in self.typed if isolate[3] >= since_ms]
+
+
+def latest_date(stays: List[Stay], isolates: List[TypedIsolate]) -> int:
+    """Default 'now' for still-admitted patients: the newest date in the data"""
+    dates = [stay[4] if stay[4] is not None else stay[3] for stay in stays] + [isolate[3] for isolate in isolates]
+    return max(dates) if dates else int(time.time() * 1000)
+
+
+def print_clusters(report: Dict[str, Any]):
+    for n, cluster in enumerate(report["clusters"], 1):
+        print(f"\n🧫 Cluster {n}: {cluster['species']} {cluster['mlstType']} - {len(cluster['isolates'])} isolates, "
+              f"{cluster['patients']} patients, {cluster['first'][:10]} → {cluster['last'][:10]}")
+        print(f"   Wards: {', '.join(cluster['wards'])}")
+        for isolate in cluster["isolates"]:
+            print(f"   {isolate['label']:<12} {isolate['collectionDate'][:10]}  patient {isolate['patientId']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect ward co-location transmission clusters (same species and ST)")
+    parser.add_argument("--sqlite", type=str, default="../prisma/dev.db",
+                       help="Patomove database (default: ../prisma/dev.db)")
+    parser.add_argument("--data", type=str, default=None,
+                       help="Use a generated demo JSON file instead of the database")
+    parser.add_argument("--window-days", type=float, default=14,
+                       help="Isolates must be collected within this many days of the shared stay (default: 14)")
+    parser.add_argument("--min-overlap-hours", type=float, default=0,
+                       help="Minimum time two patients shared a ward (default: 0, any overlap)")
+    parser.add_argument("--lookback-days", type=float, default=None,
+                       help="Only stays and isolates from the last N days before --as-of (default: all)")
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=None,
+                       help="End of still-open stays (default: newest date in the data)")
+    parser.add_argument("--min-size", type=int, default=2, help="Smallest cluster to report (default: 2)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report to this file")
+    parser.add_argument("--benchmark", type=int, default=None, metavar="N",
+                       help="Run on N synthetic ADT stays instead (e.g. 500000)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        start = time.perf_counter()
+        source = SyntheticColocationSource(args.benchmark)
+        print(f"🏥 Synthesized {args.benchmark:,} stays in {time.perf_counter() - start:.1f}s")
+    elif args.data:
+        source = DatasetColocationSource(args.data)
+    elif os.path.exists(args.sqlite):
+        source = SqliteColocationSource(args.sqlite)
+    else:
+        parser.error(f"{args.sqlite} does not exist (use --data to read a generated dataset)")
+
+    start = time.perf_counter()
+    as_of = epoch_ms(args.as_of) if args.as_of else None
+    since = as_of - int(args.lookback_days * DAY_MS) if as_of and args.lookback_days else 0
+    stays = list(source.stays(since))
+    isolates = list(source.isolates(since))
+    if as_of is None:
+        as_of = latest_date(stays, isolates)
+        if args.lookback_days:
+            since = as_of - int(args.lookback_days * DAY_MS)
+            stays = [s for s in stays if s[4] is None or s[4] >= since]
+            isolates = [i for i in isolates if i[3] >= since]
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = find_clusters(stays, isolates, as_of, args.window_days, args.min_overlap_hours, args.min_size)
+    report["asOf"] = iso_date(as_of)
+    report["windowDays"] = args.window_days
+    detect_seconds = time.perf_counter() - start
+
+    print(f"🏥 {report['stays']:,} stays, {report['typed_isolates']:,} typed isolates → "
+          f"{report['overlapping_pairs']:,} same-type ward overlaps, {report['linked_isolate_pairs']:,} linked isolate pairs, "
+          f"{len(report['clusters'])} clusters (load {load_seconds:.2f}s, detect {detect_seconds:.2f}s)", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}", file=sys.stderr)
+    if args.format == "json":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif not args.benchmark:
+        print_clusters(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Column-wise NumPy generation engine for Patomove demo data.
+
+Generates the high-volume tables (phenotype profiles, isolates, genomic data)
+a shard of rows at a time: every field is sampled as a whole column, and rows
+are only assembled into dicts as the writer consumes them. Value distributions
+match the per-row engine in generate_db_demo.py.
+"""
+
+import json
+import zlib
+from datetime import timedelta
+from typing import Dict, List, Any, Iterator, Sequence
+
+import numpy as np
+
+
+class ColumnSampler:
+    """Whole-column versions of the random.* calls made per row, drawn from one shard's RNG"""
+
+    def __init__(self, rng: np.random.Generator, date_strings: np.ndarray, date_sampler=None):
+        self.rng = rng
+        self.date_strings = date_strings
+        self.date_sampler = date_sampler
+
+    def randint(self, low: int, high: int, n: int) -> np.ndarray:
+        """Inclusive bounds, like random.randint"""
+        return self.rng.integers(low, high + 1, n)
+
+    def uniform(self, low: float, high: float, n: int, digits: int) -> np.ndarray:
+        return np.round(low + (high - low) * self.rng.random(n), digits)
+
+    def choice(self, options: Sequence[Any], n: int) -> List[Any]:
+        return np.asarray(options, dtype=object)[self.rng.integers(0, len(options), n)].tolist()
+
+    def pool_choice(self, pool: Sequence[str], n: int) -> List[str]:
+        return [pool[i] for i in self.pool_index(pool, n)]
+
+    def pool_index(self, pool: Sequence[str], n: int) -> List[int]:
+        """Random positions into an ID pool; resolve only the ones a row actually uses"""
+        return self.rng.integers(0, max(len(pool), 1), n).tolist()
+
+    def skewed_index(self, pool: Sequence[str], n: int, picker=None) -> List[int]:
+        """pool_index, or Zipf-skewed positions when a workload supplies a picker"""
+        return picker.pick_many(self.rng, n) if picker else self.pool_index(pool, n)
+
+    def keep(self, threshold: float, n: int) -> List[bool]:
+        """Column form of `random.random() > threshold`"""
+        return (self.rng.random(n) > threshold).tolist()
+
+    def dates(self, rows: range) -> List[str]:
+        """Column form of collection_date(i): the workload's date curve, else random_date_last_6_months(i)"""
+        if self.date_sampler:
+            return self.date_sampler.sample_many(self.rng, len(rows))
+        offsets = (np.arange(rows.start, rows.stop) % 180) + self.rng.integers(0, 11, len(rows))
+        return self.date_strings[offsets].tolist()
+
+    def uuids(self, n: int) -> List[str]:
+        raw = self.rng.integers(0, 256, (n, 16), dtype=np.uint8)
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+        hexes = raw.tobytes().hex()
+        return [f"{hexes[o:o+8]}-{hexes[o+8:o+12]}-{hexes[o+12:o+16]}-{hexes[o+16:o+20]}-{hexes[o+20:o+32]}"
+                for o in range(0, n * 32, 32)]
+
+    def ragged(self, max_len: int, n: int):
+        """Per-row list lengths in [0, max_len] plus the start offset of each row's items"""
+        lengths = self.randint(0, max_len, n)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return lengths.tolist(), starts.tolist(), int(lengths.sum())
+
+
+class VectorizedEngine:
+    def __init__(self, generator):
+        self.gen = generator
+
+        # random_date_last_6_months() only produces 190 distinct days, so format them once
+        base_date = generator.reference_date - timedelta(days=180)
+        self.date_strings = np.array([(base_date + timedelta(days=d)).isoformat() for d in range(190)], dtype=object)
+
+        # Every {antibiotic, mic, interpretation} entry is one of 8 x 9 JSON fragments
+        self.mic_fragments = np.array([
+            [json.dumps({"antibiotic": antibiotic, "mic": mic,
+                         "interpretation": "R" if mic >= 16 else ("I" if mic >= 4 else "S")})
+             for mic in generator.mic_values]
+            for antibiotic in generator.antibiotics
+        ], dtype=object)
+
+    def sampler(self, rng: np.random.Generator) -> ColumnSampler:
+        gen = self.gen
+        return ColumnSampler(rng, self.date_strings, gen.date_sampler() if gen.workload else None)
+
+    def picker(self, pool: Sequence[str], kind: str):
+        """Zipf picker for a patient/org pool under a workload, else None (uniform)"""
+        return self.gen.zipf_picker(len(pool), kind) if self.gen.workload else None
+
+    def shard_rng(self, table: str, shard: int) -> np.random.Generator:
+        """NumPy counterpart of DemoDataGenerator.shard_rng: one stream per (seed, table, shard)"""
+        return np.random.default_rng([self.gen.seed, zlib.crc32(table.encode()), shard])
+
+    # ---- tables ------------------------------------------------------------
+
+    def phenotype_profile_rows(self, rows: range, rng: np.random.Generator) -> Iterator[Dict[str, Any]]:
+        gen = self.gen
+        c = self.sampler(rng)
+        num_antibiotics = len(gen.antibiotics)
+        n = len(rows)
+        # random.sample(antibiotics, k): first k of a random permutation per row
+        tested_counts = c.randint(3, 8, n).tolist()
+        permutations = np.argsort(c.rng.random((n, num_antibiotics)), axis=1)
+        mic_indices = c.rng.integers(0, len(gen.mic_values), (n, num_antibiotics))
+        fragments = self.mic_fragments[permutations, mic_indices].tolist()
+
+        ids = c.uuids(n)
+        species = c.choice(gen.species_list, n)
+        methods = c.choice(gen.ast_methods, n)
+        test_dates = c.dates(rows)
+        confidences = c.uniform(0.85, 0.99, n, 3).tolist()
+        panels = c.choice(gen.ast_panels, n)
+
+        for j, i in enumerate(rows):
+            yield {
+                "id": ids[j],
+                "species": species[j],
+                "method": methods[j],
+                "testDate": test_dates[j],
+                "confidence": confidences[j],
+                "notes": f"AST profile {i+1} - {panels[j]}",
+                "micData": "[" + ", ".join(fragments[j][:tested_counts[j]]) + "]"
+            }
+
+    def isolate_rows(self, rows: range, rng: np.random.Generator, org_ids: Sequence[str], patient_ids: Sequence[str],
+                     environment_ids: Sequence[str], phenotype_ids: Sequence[str],
+                     patient_orgs: Sequence[str], environment_orgs: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        gen = self.gen
+        c = self.sampler(rng)
+        n = len(rows)
+        ids = c.uuids(n)
+        environment_choices = c.pool_index(environment_ids, n)
+        patient_choices = c.skewed_index(patient_ids, n, self.picker(patient_ids, "patient"))
+        phenotype_choices = c.pool_index(phenotype_ids, n)
+        has_phenotype = c.keep(0.6, n) if phenotype_ids else [False] * n
+        if gen.workload:
+            # Each isolate stays in its patient's or site's org, as in the per-row engine
+            orgs = [environment_orgs[environment_choices[j]] if i % 4 == 0 else patient_orgs[patient_choices[j]]
+                    for j, i in enumerate(rows)]
+        else:
+            orgs = [org_ids[k] for k in c.pool_index(org_ids, n)]
+        sites = c.choice(gen.collection_sites, n)
+        collection_dates = c.dates(rows)
+        priorities = c.choice(gen.priorities, n)
+        statuses = c.choice(gen.statuses, n)
+        contexts = c.choice(gen.isolate_contexts, n)
+
+        for j, i in enumerate(rows):
+            # 75% human, 25% environmental
+            environmental = i % 4 == 0
+            yield {
+                "id": ids[j],
+                "label": f"ISO-{i+1:04d}",
+                "sampleType": "environmental" if environmental else "clinical",
+                "phenotypeId": phenotype_ids[phenotype_choices[j]] if has_phenotype[j] else None,
+                "collectionSource": "environmental" if environmental else "clinical",
+                "patientId": None if environmental else patient_ids[patient_choices[j]],
+                "environmentId": environment_ids[environment_choices[j]] if environmental else None,
+                "orgId": orgs[j],
+                "collectionSite": sites[j],
+                "collectionDate": collection_dates[j],
+                "priority": priorities[j],
+                "processingStatus": statuses[j],
+                "notes": f"Demo isolate {i+1} - {contexts[j]}"
+            }
+
+    def genomic_data_rows(self, rows: range, rng: np.random.Generator, isolate_ids: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        gen = self.gen
+        c = self.sampler(rng)
+        num_isolates = len(isolate_ids)
+        dumps = json.dumps
+        n = len(rows)
+        index = np.arange(rows.start, rows.stop)
+
+        # 70% of filenames match an isolate label, the rest use one of five unmatched patterns
+        matched = ((index < num_isolates) & (c.rng.random(n) > 0.3)).tolist()
+        patterns = c.rng.integers(0, 5, n).tolist()
+        unmatched_numbers = np.stack([
+            index + 1,
+            c.randint(100, 999, n),
+            c.randint(1, 100, n),
+            c.randint(1, 50, n),
+            c.randint(1, 75, n)
+        ]).T.tolist()
+
+        ids = c.uuids(n)
+        storage_ids = c.uuids(2 * n)
+        hashes = c.rng.integers(0, 256, (n, 16), dtype=np.uint8).tobytes().hex()
+        file_sizes = c.randint(1024*1024, 10*1024*1024, n).tolist()
+        upload_dates = c.dates(rows)
+        validation_statuses = c.choice(gen.validation_statuses, n)
+        processing_statuses = c.choice(gen.genome_processing_statuses, n)
+
+        contig_counts = c.randint(1, 150, n).tolist()
+        total_lengths = c.randint(2000000, 8000000, n).tolist()
+        n50s = c.randint(10000, 500000, n).tolist()
+        gc_contents = c.uniform(35.0, 65.0, n, 2).tolist()
+        has_contigs, has_length, has_n50, has_gc = (c.keep(0.2, n) for _ in range(4))
+
+        has_quality = c.keep(0.3, n)
+        quality = np.stack([c.randint(1, 150, n), c.randint(50000, 2000000, n),
+                            c.randint(2000000, 8000000, n)]).T.tolist()
+
+        platforms = c.choice(gen.sequencing_platforms, n)
+        has_platform = c.keep(0.4, n)
+        assemblers = c.choice(gen.assemblers, n)
+        versions = np.stack([c.randint(3, 4, n), c.randint(0, 15, n), c.randint(0, 3, n)]).T.tolist()
+        has_assembly_stats = c.keep(0.5, n)
+        schemes = c.choice(gen.mlst_schemes, n)
+        has_scheme = c.keep(0.6, n)
+        sequence_types = c.randint(1, 500, n).tolist()
+        has_sequence_type = c.keep(0.6, n)
+        alleles = c.randint(1, 100, (n, 3)).tolist()
+        has_alleles = c.keep(0.7, n)
+
+        resistance_lengths, resistance_starts, total = c.ragged(5, n)
+        resistance_entries = [
+            f'{{"gene": {dumps(gene)}, "identity": {identity!r}}}'
+            for gene, identity in zip(c.choice(gen.resistance_gene_names, total),
+                                      c.uniform(95, 100, total, 2).tolist())
+        ]
+        has_resistance = c.keep(0.5, n)
+        virulence_lengths, virulence_starts, total = c.ragged(3, n)
+        virulence_entries = [
+            f'{{"gene": "vir_{number}", "identity": {identity!r}}}'
+            for number, identity in zip(c.randint(1, 50, total).tolist(), c.uniform(90, 100, total, 2).tolist())
+        ]
+        has_virulence = c.keep(0.7, n)
+        plasmid_lengths, plasmid_starts, total = c.ragged(3, n)
+        plasmid_entries = [f'"plasmid_{number}"' for number in c.randint(1, 10, total).tolist()]
+        has_plasmids = c.keep(0.8, n)
+
+        species = c.choice(gen.species_list, n)
+        has_species = c.keep(0.3, n)
+        species_confidences = c.uniform(0.85, 0.99, n, 3).tolist()
+        has_species_confidence = c.keep(0.3, n)
+        has_assembly_path = c.keep(0.4, n)
+        has_annotation_path = c.keep(0.6, n)
+        analysis_completed = c.keep(0.4, n)
+        job_numbers = c.randint(10000, 99999, n).tolist()
+        has_job = c.keep(0.5, n)
+        uploaders = c.choice(gen.uploaders, n)
+        creators = c.choice(["system", "user_001"], n)
+        updaters = c.choice(["system", "pipeline"], n)
+        has_updater = c.keep(0.5, n)
+        contexts = c.choice(gen.genome_contexts, n)
+
+        for j, i in enumerate(rows):
+            if matched[j]:
+                base_filename = f"ISO-{i % num_isolates + 1:04d}"
+            else:
+                pattern, numbers = patterns[j], unmatched_numbers[j]
+                base_filename = (f"genome_{numbers[0]:03d}", f"sample_{numbers[1]}", f"EC{numbers[2]:03d}",
+                                 f"SA{numbers[3]:03d}", f"KP{numbers[4]:03d}")[pattern]
+            filename = f"{base_filename}.fasta"
+            start = resistance_starts[j]
+            resistance = "[" + ", ".join(resistance_entries[start:start + resistance_lengths[j]]) + "]"
+            start = virulence_starts[j]
+            virulence = "[" + ", ".join(virulence_entries[start:start + virulence_lengths[j]]) + "]"
+            start = plasmid_starts[j]
+            plasmids = "[" + ", ".join(plasmid_entries[start:start + plasmid_lengths[j]]) + "]"
+            q = quality[j]
+            v = versions[j]
+            a = alleles[j]
+
+            yield {
+                "id": ids[j],
+                "filename": f"{storage_ids[2*j]}_{filename}",
+                "originalFilename": filename,
+                "storagePath": f"/storage/genomes/{storage_ids[2*j+1]}_{filename}",
+                "fileSize": file_sizes[j],
+                "fileHash": f"sha256_{hashes[j*32:(j+1)*32]}",
+                "uploadDate": upload_dates[j],
+                "linkedAt": None,
+                "autoLinked": False,
+                "linkingMethod": None,
+                "validationStatus": validation_statuses[j],
+                "processingStatus": processing_statuses[j],
+                "validationErrors": None,
+                "contigCount": contig_counts[j] if has_contigs[j] else None,
+                "totalLength": total_lengths[j] if has_length[j] else None,
+                "n50": n50s[j] if has_n50[j] else None,
+                "gcContent": gc_contents[j] if has_gc[j] else None,
+                "qualityMetrics": f'{{"num_contigs": {q[0]}, "largest_contig": {q[1]}, "total_length": {q[2]}}}'
+                                  if has_quality[j] else None,
+                "sequencingPlatform": platforms[j] if has_platform[j] else None,
+                "assemblyStats": f'{{"assembler": "{assemblers[j]}", "version": "v{v[0]}.{v[1]}.{v[2]}"}}'
+                                 if has_assembly_stats[j] else None,
+                "mlstScheme": schemes[j] if has_scheme[j] else None,
+                "mlstType": f"ST{sequence_types[j]}" if has_sequence_type[j] else None,
+                "mlstAlleles": f'{{"adk": {a[0]}, "fumC": {a[1]}, "gyrB": {a[2]}}}' if has_alleles[j] else None,
+                "resistanceGenes": resistance if has_resistance[j] else None,
+                "virulenceGenes": virulence if has_virulence[j] else None,
+                "plasmids": plasmids if has_plasmids[j] else None,
+                "speciesIdentification": species[j] if has_species[j] else None,
+                "speciesConfidence": species_confidences[j] if has_species_confidence[j] else None,
+                "assemblyPath": f"/pipeline/assemblies/{base_filename}_processed.fasta" if has_assembly_path[j] else None,
+                "annotationPath": f"/pipeline/annotations/{base_filename}.gff" if has_annotation_path[j] else None,
+                "analysisCompleted": analysis_completed[j],
+                "pipelineJobId": f"job_{job_numbers[j]}" if has_job[j] else None,
+                "uploadedBy": uploaders[j],
+                "createdBy": creators[j],
+                "updatedBy": updaters[j] if has_updater[j] else None,
+                "notes": f"Demo genome {i+1} - {contexts[j]}"
+            }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Workload profiles for production-like demo data at scale.
+
+The default generator spreads every date over ~190 days, caps patients at 50
+and picks every foreign key uniformly, which hides index and pagination
+problems. A WorkloadProfile instead spreads collection dates over several
+years with growth, seasonal and weekday curves, draws isolates per patient and
+per organization from Zipf distributions, generates admissions with transfers
+and lognormal lengths of stay, and sizes each table independently.
+"""
+
+import json
+import math
+import os
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List, Any
+
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "realistic": {
+        # Dates
+        "span_years": 3.0,
+        "growth_per_year": 1.08,          # sample volume multiplier per year
+        "seasonal_amplitude": 0.25,       # +/- share of volume at the seasonal peak/trough
+        "seasonal_peak_day": 200,         # day of year with most samples (mid-July)
+        "weekday_weights": [1.15, 1.10, 1.05, 1.05, 1.00, 0.45, 0.30],  # Monday..Sunday
+        # Table sizes: absolute counts, or per generated isolate
+        "organizations": 12,
+        "environments": 60,
+        "patients_per_isolate": 0.3,
+        "phenotypes_per_isolate": 0.33,
+        "genomes_per_isolate": 0.2,
+        # Skew: Zipf exponent and head offset (fraction of the pool) for picking a row's patient / organization
+        "patient_skew": 1.0,
+        "patient_skew_offset": 0.005,
+        "org_skew": 1.2,
+        "org_skew_offset": 0.0,
+        # ADT: admissions per patient and ward transfers per admission (geometric means)
+        "admissions_per_patient": 1.8,
+        "transfers_per_admission": 0.6,
+        "median_stay_days": 3.5,
+        "stay_sigma": 0.9,
+    },
+}
+
+
+class WorkloadProfile:
+    """A named set of workload parameters; unknown keys are rejected so typos don't go unnoticed"""
+
+    def __init__(self, name: str = "realistic", **overrides: Any):
+        params = dict(PRESETS["realistic"])
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"Unknown workload parameters: {', '.join(sorted(unknown))}")
+        params.update(overrides)
+        if len(params["weekday_weights"]) != 7:
+            raise ValueError("weekday_weights needs 7 values, Monday first")
+        self.name = name
+        self.params = params
+        for key, value in params.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "WorkloadProfile":
+        """A preset name, or a JSON file of parameters applied on top of "preset" (default realistic)"""
+        if spec in PRESETS:
+            return cls(spec, **PRESETS[spec])
+        if not os.path.exists(spec):
+            raise ValueError(f"Workload must be one of {', '.join(PRESETS)} or a JSON file, got {spec!r}")
+        with open(spec) as f:
+            overrides = json.load(f)
+        preset = overrides.pop("preset", "realistic")
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown workload preset {preset!r}")
+        return cls(os.path.basename(spec), **{**PRESETS[preset], **overrides})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, **self.params}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WorkloadProfile":
+        data = dict(data)
+        return cls(data.pop("name", "realistic"), **data)
+
+
+class DateSampler:
+    """Draws timestamps over the profile's span, weighted by growth, season and weekday"""
+
+    def __init__(self, profile: WorkloadProfile, reference_date: datetime):
+        days = max(1, int(round(profile.span_years * 365.25)))
+        # Last sampled day is the one before the reference date, so no timestamp lies in its future
+        self.start = datetime(reference_date.year, reference_date.month, reference_date.day) - timedelta(days=days)
+        weights = []
+        for day in range(days):
+            date = self.start + timedelta(days=day)
+            growth = profile.growth_per_year ** (day / 365.25)
+            season = 1 + profile.seasonal_amplitude * math.cos(
+                2 * math.pi * (date.timetuple().tm_yday - profile.seasonal_peak_day) / 365.25)
+            weights.append(growth * season * profile.weekday_weights[date.weekday()])
+        self.days = days
+        self.cumulative = list(accumulate(weights))
+        self._array = None
+
+    def day(self, u: float) -> int:
+        """Day index for a uniform draw u in [0, 1)"""
+        return min(bisect_right(self.cumulative, u * self.cumulative[-1]), self.days - 1)
+
+    def sample(self, rng) -> datetime:
+        """Python engine: one timestamp (minute resolution) from a random.Random"""
+        return self.start + timedelta(days=self.day(rng.random()), minutes=rng.randrange(1440))
+
+    def sample_many(self, rng, n: int) -> List[str]:
+        """NumPy engine: n ISO timestamps from a numpy Generator"""
+        import numpy as np
+        if self._array is None:
+            self._array = np.asarray(self.cumulative)
+        cumulative = self._array
+        days = np.minimum(np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side="right"), self.days - 1)
+        minutes = rng.integers(0, 1440, n)
+        start = np.datetime64(self.start, "m")
+        stamps = start + days.astype("timedelta64[D]") + minutes.astype("timedelta64[m]")
+        # numpy renders minutes as "YYYY-MM-DDTHH:MM"; add seconds to match datetime.isoformat()
+        return [f"{stamp}:00" for stamp in stamps.astype(str).tolist()]
+
+
+class ZipfPicker:
+    """Index into a pool of n rows with P(rank k) proportional to 1 / (k + q) ** s (Zipf-Mandelbrot).
+
+    q = 1 + offset * n flattens the head: with s = 1 and offset = 0.005 the busiest row is
+    picked ~200x as often as the least busy, instead of n times as often.
+    """
+
+    def __init__(self, n: int, s: float, offset: float = 0.0):
+        self.n = max(n, 1)
+        q = 1 + offset * self.n
+        # array('d') keeps a million-row pool at 8 bytes per row
+        self.cumulative = array("d", accumulate(1.0 / (k + q) ** s for k in range(self.n)))
+        self._array = None
+
+    def pick(self, rng) -> int:
+        return min(bisect_right(self.cumulative, rng.random() * self.cumulative[-1]), self.n - 1)
+
+    def pick_many(self, rng, n: int) -> List[int]:
+        import numpy as np
+        if self._array is None:
+            self._array = np.frombuffer(self.cumulative, dtype=np.float64)
+        picks = np.searchsorted(self._array, rng.random(n) * self._array[-1], side="right")
+        return np.minimum(picks, self.n - 1).tolist()
+
+
+def geometric(rng, mean: float) -> int:
+    """Count >= 0 with the given mean (number of successes before the first failure)"""
+    if mean <= 0:
+        return 0
+    p = mean / (1 + mean)
+    count = 0
+    while rng.random() < p:
+        count += 1
+    return count